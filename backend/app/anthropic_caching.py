@@ -0,0 +1,140 @@
+"""Anthropic model that marks the static prompt prefix for prompt caching.
+
+pydantic-ai sends the system prompt as a plain string and drops the cache
+token counts from the usage. :class:`CachingAnthropicModel` sends it as a
+text block with ``cache_control``, so the result tool and the system prompt
+(everything but the chunk) are cached after the first request of a job, and
+reports the cache reads and writes in ``Usage.details`` (see
+``prompt_cache``), for streamed responses too: the pydantic-ai release
+this targets cannot stream from Anthropic at all, so
+:class:`CachingAnthropicStreamedResponse` maps the Messages API events. Imported on first use through
+``transcript_processor.PROVIDER_MODELS``.
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterable, List
+
+from anthropic import NOT_GIVEN
+from pydantic_ai import usage
+from pydantic_ai.models import AgentModel, StreamedResponse, check_allow_model_requests
+from pydantic_ai.models.anthropic import AnthropicAgentModel, AnthropicModel
+
+from prompt_cache import usage_details
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+class CachingAnthropicAgentModel(AnthropicAgentModel):
+    async def request(self, messages, model_settings):
+        response = await self._messages_create(messages, False, model_settings)
+        return self._process_response(response), map_usage(response)
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings):
+        response = await self._messages_create(messages, True, model_settings)
+        async with response:
+            yield CachingAnthropicStreamedResponse(response, datetime.now(timezone.utc))
+
+    async def _messages_create(self, messages, stream, model_settings):
+        if not self.tools:
+            tool_choice = None
+        elif not self.allow_text_result:
+            tool_choice = {"type": "any"}
+        else:
+            tool_choice = {"type": "auto"}
+
+        system_prompt, anthropic_messages = self._map_message(messages)
+        model_settings = model_settings or {}
+
+        return await self.client.messages.create(
+            max_tokens=model_settings.get("max_tokens", 1024),
+            system=system_blocks(system_prompt) or NOT_GIVEN,
+            messages=anthropic_messages,
+            model=self.model_name,
+            tools=self.tools or NOT_GIVEN,
+            tool_choice=tool_choice or NOT_GIVEN,
+            stream=stream,
+            # Only passed when set: not every anthropic release accepts them
+            **{key: model_settings[key] for key in ("temperature", "top_p", "timeout") if key in model_settings},
+        )
+
+
+@dataclass
+class CachingAnthropicStreamedResponse(StreamedResponse):
+    """A streamed Messages API response, with the usage of :func:`map_usage`."""
+
+    _response: AsyncIterable
+    _timestamp: datetime
+
+    async def _get_event_iterator(self):
+        async for event in self._response:
+            if event.type == "message_start":
+                # The input and cache token counts are only in the first event
+                self._usage = map_usage(event.message)
+            elif event.type == "message_delta":
+                # output_tokens is the running total for the message, not an increment
+                self._usage.response_tokens = event.usage.output_tokens
+                self._usage.total_tokens = (self._usage.request_tokens or 0) + event.usage.output_tokens
+            elif event.type == "content_block_start":
+                block = event.content_block
+                if block.type == "text" and block.text:
+                    yield self._parts_manager.handle_text_delta(vendor_part_id=event.index, content=block.text)
+                elif block.type == "tool_use":
+                    # The arguments follow as input_json_delta events
+                    maybe_event = self._parts_manager.handle_tool_call_delta(
+                        vendor_part_id=event.index, tool_name=block.name, args=None, tool_call_id=block.id
+                    )
+                    if maybe_event is not None:
+                        yield maybe_event
+            elif event.type == "content_block_delta":
+                delta = event.delta
+                if delta.type == "text_delta":
+                    yield self._parts_manager.handle_text_delta(vendor_part_id=event.index, content=delta.text)
+                elif delta.type == "input_json_delta":
+                    maybe_event = self._parts_manager.handle_tool_call_delta(
+                        vendor_part_id=event.index, tool_name=None, args=delta.partial_json, tool_call_id=None
+                    )
+                    if maybe_event is not None:
+                        yield maybe_event
+
+    def timestamp(self) -> datetime:
+        return self._timestamp
+
+
+class CachingAnthropicModel(AnthropicModel):
+    """``AnthropicModel`` with the tools and system prompt cached between requests."""
+
+    async def agent_model(self, *, function_tools, allow_text_result, result_tools) -> AgentModel:
+        check_allow_model_requests()
+        tools = [self._map_tool_definition(r) for r in function_tools]
+        if result_tools:
+            tools += [self._map_tool_definition(r) for r in result_tools]
+        return CachingAnthropicAgentModel(self.client, self.model_name, allow_text_result, tools)
+
+    def name(self) -> str:
+        return f"anthropic:{self.model_name}"
+
+
+def system_blocks(system_prompt: str) -> List[dict]:
+    """The system prompt as one text block ending the cached prefix."""
+    if not system_prompt:
+        return []
+    # Tools come before the system prompt, so this one breakpoint caches both
+    return [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+
+def map_usage(response) -> usage.Usage:
+    """Usage of a Messages API response; input tokens include the cached ones."""
+    response_usage = response.usage
+    cache_read = getattr(response_usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(response_usage, "cache_creation_input_tokens", None) or 0
+    # Anthropic's input_tokens only counts the tokens after the last cache breakpoint
+    request_tokens = response_usage.input_tokens + cache_read + cache_write
+    return usage.Usage(
+        request_tokens=request_tokens,
+        response_tokens=response_usage.output_tokens,
+        total_tokens=request_tokens + response_usage.output_tokens,
+        details=usage_details(cache_read, cache_write),
+    )
@@ -0,0 +1,188 @@
+"""Fixed-duration audio frames for live transcription.
+
+A meeting's audio arrives as PCM blocks of whatever size the capture device
+produces. :func:`iter_frames` re-cuts them into frames of a fixed duration,
+and :class:`FrameRingBuffer` sits between capture and transcription: capture
+never waits for the transcriber, and when transcription falls too far behind
+the oldest frames are dropped (and counted) instead of growing memory for
+the length of the meeting.
+"""
+
+import asyncio
+import io
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Deque, List, Optional
+
+DEFAULT_SAMPLE_RATE = 16000
+DEFAULT_SAMPLE_WIDTH = 2  # 16-bit PCM, what whisper.cpp expects
+DEFAULT_FRAME_SECONDS = 5.0
+# Two minutes of 5 second frames
+DEFAULT_BUFFER_FRAMES = 24
+
+
+@dataclass
+class AudioFrame:
+    """``duration`` seconds of PCM audio starting ``start`` seconds into the meeting."""
+
+    index: int
+    start: float
+    duration: float
+    data: bytes
+    sample_rate: int = DEFAULT_SAMPLE_RATE
+    sample_width: int = DEFAULT_SAMPLE_WIDTH
+    channels: int = 1
+    # ``time.monotonic()`` when the last sample of the frame was captured
+    captured_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def to_wav(self) -> bytes:
+        """Encode the frame as a WAV file, e.g. for the whisper server."""
+        out = io.BytesIO()
+        with wave.open(out, "wb") as wav:
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(self.sample_width)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.data)
+        return out.getvalue()
+
+
+async def iter_frames(
+    source: AsyncIterable[bytes],
+    frame_seconds: float = DEFAULT_FRAME_SECONDS,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    sample_width: int = DEFAULT_SAMPLE_WIDTH,
+    channels: int = 1,
+) -> AsyncIterator[AudioFrame]:
+    """Re-cut PCM blocks from ``source`` into frames of ``frame_seconds``.
+
+    The last frame holds whatever is left when the source ends and may be
+    shorter.
+    """
+    bytes_per_second = sample_rate * sample_width * channels
+    frame_bytes = max(1, int(frame_seconds * sample_rate)) * sample_width * channels
+    pending = bytearray()
+    index = 0
+    position = 0
+
+    def frame(data: bytes) -> AudioFrame:
+        nonlocal index, position
+        result = AudioFrame(
+            index=index, start=position / bytes_per_second, duration=len(data) / bytes_per_second, data=data,
+            sample_rate=sample_rate, sample_width=sample_width, channels=channels,
+        )
+        index += 1
+        position += len(data)
+        return result
+
+    async for block in source:
+        pending.extend(block)
+        while len(pending) >= frame_bytes:
+            data = bytes(pending[:frame_bytes])
+            del pending[:frame_bytes]
+            yield frame(data)
+    # Drop a trailing partial sample rather than emit misaligned PCM
+    usable = len(pending) - len(pending) % (sample_width * channels)
+    if usable:
+        yield frame(bytes(pending[:usable]))
+
+
+class FrameRingBuffer:
+    """Bounded FIFO of frames that drops the oldest frame when full."""
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_FRAMES):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.dropped = 0
+        self.high_water = 0
+        self._frames: Deque[AudioFrame] = deque()
+        self._closed = False
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put_nowait(self, frame: AudioFrame) -> None:
+        if self._closed:
+            raise RuntimeError("buffer is closed")
+        if len(self._frames) >= self.capacity:
+            self._frames.popleft()
+            self.dropped += 1
+        self._frames.append(frame)
+        self.high_water = max(self.high_water, len(self._frames))
+        self._ready.set()
+
+    def close(self) -> None:
+        """Mark the end of the stream; frames already buffered are still returned."""
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[AudioFrame]:
+        """Return the oldest frame, or None once the buffer is closed and empty."""
+        while not self._frames:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+    async def __aiter__(self) -> AsyncIterator[AudioFrame]:
+        while True:
+            frame = await self.get()
+            if frame is None:
+                return
+            yield frame
+
+
+def format_offset(seconds: float) -> str:
+    """Format an offset into the meeting as ``HH:MM:SS.mmm``."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+@dataclass
+class TranscriptSegment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class StreamingTranscript:
+    """Result and statistics of a streamed recording."""
+
+    segments: List[TranscriptSegment] = field(default_factory=list)
+    frames: int = 0
+    dropped_frames: int = 0
+    failed_frames: int = 0
+    # Segments that were transcribed but could not be stored
+    failed_segments: int = 0
+    buffer_high_water: int = 0
+    # Filled in when silence is trimmed before transcription
+    silent_frames: int = 0
+    audio_seconds: float = 0.0
+    speech_seconds: float = 0.0
+    # Seconds from the end of a frame's capture until its text was stored
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(segment.text for segment in self.segments)
+
+    @property
+    def skipped_fraction(self) -> float:
+        """Fraction of the audio not sent to the transcriber as silence."""
+        return 1.0 - self.speech_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    @property
+    def max_latency(self) -> Optional[float]:
+        return max(self.latencies) if self.latencies else None
@@ -9,6 +9,7 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from db import DatabaseManager
+from instrumentation import timed
 
 SECRET_KEY = os.getenv("SECRET_KEY", "secret-key")
 ALGORITHM = "HS256"
@@ -41,7 +42,9 @@ async def authenticate_user(username: str, password: str) -> Optional[dict]:
     user = await db.get_user(username)
     if not user:
         return None
-    if not pwd_context.verify(password, user["hashed_password"]):
+    with timed("auth"):
+        verified = pwd_context.verify(password, user["hashed_password"])
+    if not verified:
         return None
     return user
 
@@ -62,7 +65,9 @@ async def create_tokens(username: str, role: str) -> dict:
         {"sub": username},
         timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
     )
-    await db.save_refresh_token(username, pwd_context.hash(refresh_token))
+    with timed("auth"):
+        token_hash = pwd_context.hash(refresh_token)
+    await db.save_refresh_token(username, token_hash)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
@@ -118,7 +123,9 @@ async def refresh_access_token(data: TokenRefresh):
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
     token_hash = await db.get_refresh_token_hash(username)
-    if not token_hash or not pwd_context.verify(data.refresh_token, token_hash):
+    with timed("auth"):
+        valid = bool(token_hash) and pwd_context.verify(data.refresh_token, token_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
     user = await db.get_user(username)
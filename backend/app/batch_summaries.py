@@ -0,0 +1,402 @@
+"""Summaries of many meetings through the providers' batch APIs.
+
+Interactive summaries send one ``agent.run`` per chunk, at full price and
+under the interactive rate limits. For work that can wait (reprocessing the
+archive overnight), :class:`BatchSummarizer` collects the chunk requests of
+many meetings into batch submissions instead: OpenAI (and Groq) Batch API
+JSONL files and Anthropic Message Batches. Batches are billed at half price,
+have their own rate limits and finish within 24 hours.
+
+The summarizer polls each batch until it has ended, saves every chunk
+result to the meeting's ``ChunkCheckpoint`` as it arrives and, once all of a
+meeting's chunks are in, merges them and completes its
+``summary_processes`` row. Requests that failed or expired are left out of
+the checkpoint, so running the same jobs again only resubmits those.
+
+Chunks are independent requests in a batch, so the context carried into a
+chunk is the tail of the previous chunk rather than its summary.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from cpu_pool import cpu_pool
+from db import DatabaseManager
+from prompt_cache import PromptCacheStats
+from transcript_compaction import CARRY_OVER_MAX_CHARS, carry_over_summary
+from transcript_processor import SUMMARY_SYSTEM_PROMPT, ChunkCheckpoint, SummaryResponse, chunk_prompt
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BATCH_URL = os.getenv("OPENAI_BATCH_URL", "https://api.openai.com")
+GROQ_BATCH_URL = os.getenv("GROQ_BATCH_URL", "https://api.groq.com/openai")
+ANTHROPIC_BATCH_URL = os.getenv("ANTHROPIC_BATCH_URL", "https://api.anthropic.com")
+# Seconds between status checks of a submitted batch
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "60"))
+# Requests per submission; OpenAI accepts up to 50,000 and Anthropic 100,000
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10000"))
+BATCH_HTTP_TIMEOUT = float(os.getenv("BATCH_HTTP_TIMEOUT", "120"))
+BATCH_MAX_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", "4096"))
+
+RESULT_TOOL_NAME = "final_result"
+RESULT_TOOL_DESCRIPTION = "The final response which ends this conversation"
+
+
+@dataclass
+class BatchJob:
+    """A meeting transcript to summarize, with the chunking of a summary request."""
+
+    meeting_id: str
+    text: str
+    chunk_size: int = 5000
+    overlap: int = 1000
+    compact: bool = True
+
+
+@dataclass
+class BatchResult:
+    """One request's outcome: the validated summary JSON, or why there is none."""
+
+    custom_id: str
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    usage: Tuple[int, int, int, int] = (0, 0, 0, 0)
+
+
+@dataclass
+class _PendingChunk:
+    job: int
+    index: int
+    input_hash: str
+    prompt: str
+
+
+@dataclass
+class _JobState:
+    job: BatchJob
+    checkpoint: ChunkCheckpoint
+    num_chunks: int = 0
+    submitted: int = 0
+    failed: int = 0
+    batch_ids: List[str] = field(default_factory=list)
+    cache_stats: PromptCacheStats = field(default_factory=PromptCacheStats)
+
+
+def _summary_json(arguments) -> str:
+    """Validate the result tool's arguments (a dict or JSON text) as a ``SummaryResponse``."""
+    if isinstance(arguments, str):
+        return SummaryResponse.model_validate_json(arguments).model_dump_json()
+    return SummaryResponse.model_validate(arguments).model_dump_json()
+
+
+class _BatchHTTPClient:
+    """Holds the HTTP client of a batch API; one it created itself is closed by :meth:`aclose`."""
+
+    def __init__(self, base_url: str, http_client: Optional[httpx.AsyncClient]):
+        self.base_url = base_url.rstrip("/")
+        self._owns_client = http_client is None
+        self.client = http_client if http_client is not None else httpx.AsyncClient(timeout=BATCH_HTTP_TIMEOUT)
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self.client.aclose()
+
+
+class OpenAIBatchClient(_BatchHTTPClient):
+    """The OpenAI Batch API: a JSONL file of Chat Completions requests, uploaded and then batched.
+
+    Groq serves the same API under ``/openai/v1``, so it is this client with
+    another ``base_url``.
+    """
+
+    ENDED = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, api_key: str, base_url: str = OPENAI_BATCH_URL,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(base_url, http_client)
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+
+    def request(self, custom_id: str, model_name: str, prompt: str) -> Dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model_name,
+                "messages": [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                "tools": [{
+                    "type": "function",
+                    "function": {
+                        "name": RESULT_TOOL_NAME,
+                        "description": RESULT_TOOL_DESCRIPTION,
+                        "parameters": SummaryResponse.model_json_schema(),
+                    },
+                }],
+                "tool_choice": "required",
+            },
+        }
+
+    async def submit(self, requests: List[Dict]) -> str:
+        content = "".join(json.dumps(request) + "\n" for request in requests).encode("utf-8")
+        response = await self.client.post(
+            f"{self.base_url}/v1/files",
+            headers=self.headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", content, "application/jsonl")},
+        )
+        response.raise_for_status()
+        response = await self.client.post(
+            f"{self.base_url}/v1/batches",
+            headers=self.headers,
+            json={"input_file_id": response.json()["id"], "endpoint": "/v1/chat/completions",
+                  "completion_window": "24h"},
+        )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def status(self, batch_id: str) -> Dict:
+        response = await self.client.get(f"{self.base_url}/v1/batches/{batch_id}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def ended(self, batch: Dict) -> bool:
+        return batch["status"] in self.ENDED
+
+    async def results(self, batch: Dict) -> List[BatchResult]:
+        results = []
+        # Successful requests are in the output file and failed ones in the error file
+        for key in ("output_file_id", "error_file_id"):
+            if not batch.get(key):
+                continue
+            response = await self.client.get(f"{self.base_url}/v1/files/{batch[key]}/content", headers=self.headers)
+            response.raise_for_status()
+            results.extend(self.parse(line) for line in response.text.splitlines() if line.strip())
+        return results
+
+    @staticmethod
+    def parse(line: str) -> BatchResult:
+        record = json.loads(line)
+        custom_id = record["custom_id"]
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or (response.get("body") or {}).get("error")
+            return BatchResult(custom_id, error=json.dumps(error))
+        body = response["body"]
+        usage = body.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        result = BatchResult(custom_id, usage=(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                                               cached, 0))
+        try:
+            calls = body["choices"][0]["message"].get("tool_calls") or []
+            arguments = next(call["function"]["arguments"] for call in calls
+                             if call["function"]["name"] == RESULT_TOOL_NAME)
+            result.summary = _summary_json(arguments)
+        except Exception as e:
+            result.error = f"invalid summary: {e}"
+        return result
+
+
+class AnthropicBatchClient(_BatchHTTPClient):
+    """Anthropic Message Batches: the Messages API requests posted in one body."""
+
+    def __init__(self, api_key: str, base_url: str = ANTHROPIC_BATCH_URL,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(base_url, http_client)
+        self.headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+
+    def request(self, custom_id: str, model_name: str, prompt: str) -> Dict:
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": model_name,
+                "max_tokens": BATCH_MAX_TOKENS,
+                # Batched requests share the prompt cache with interactive ones
+                "system": [{"type": "text", "text": SUMMARY_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+                "messages": [{"role": "user", "content": prompt}],
+                "tools": [{
+                    "name": RESULT_TOOL_NAME,
+                    "description": RESULT_TOOL_DESCRIPTION,
+                    "input_schema": SummaryResponse.model_json_schema(),
+                }],
+                "tool_choice": {"type": "tool", "name": RESULT_TOOL_NAME},
+            },
+        }
+
+    async def submit(self, requests: List[Dict]) -> str:
+        response = await self.client.post(
+            f"{self.base_url}/v1/messages/batches", headers=self.headers, json={"requests": requests}
+        )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def status(self, batch_id: str) -> Dict:
+        response = await self.client.get(f"{self.base_url}/v1/messages/batches/{batch_id}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def ended(self, batch: Dict) -> bool:
+        return batch["processing_status"] == "ended"
+
+    async def results(self, batch: Dict) -> List[BatchResult]:
+        if not batch.get("results_url"):
+            return []
+        response = await self.client.get(batch["results_url"], headers=self.headers)
+        response.raise_for_status()
+        return [self.parse(line) for line in response.text.splitlines() if line.strip()]
+
+    @staticmethod
+    def parse(line: str) -> BatchResult:
+        record = json.loads(line)
+        custom_id = record["custom_id"]
+        outcome = record["result"]
+        if outcome["type"] != "succeeded":
+            # errored, canceled or expired
+            return BatchResult(custom_id, error=json.dumps(outcome.get("error") or outcome["type"]))
+        message = outcome["message"]
+        usage = message.get("usage") or {}
+        read = usage.get("cache_read_input_tokens") or 0
+        write = usage.get("cache_creation_input_tokens") or 0
+        result = BatchResult(custom_id, usage=(usage.get("input_tokens", 0) + read + write,
+                                               usage.get("output_tokens", 0), read, write))
+        try:
+            arguments = next(block["input"] for block in message["content"]
+                             if block["type"] == "tool_use" and block["name"] == RESULT_TOOL_NAME)
+            result.summary = _summary_json(arguments)
+        except Exception as e:
+            result.error = f"invalid summary: {e}"
+        return result
+
+
+def batch_client(model: str, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
+    """The batch client of a model provider; Ollama has no batch API."""
+    if not api_key:
+        raise ValueError(f"No API key set for {model}")
+    if model == "openai":
+        return OpenAIBatchClient(api_key, OPENAI_BATCH_URL, http_client)
+    if model == "groq":
+        return OpenAIBatchClient(api_key, GROQ_BATCH_URL, http_client)
+    if model == "claude":
+        return AnthropicBatchClient(api_key, ANTHROPIC_BATCH_URL, http_client)
+    raise ValueError(f"Model provider {model} has no batch API")
+
+
+class BatchSummarizer:
+    """Summarizes a list of ``BatchJob`` in as few batch submissions as possible."""
+
+    def __init__(self, db: DatabaseManager, client, model: str, model_name: str,
+                 poll_interval: float = BATCH_POLL_INTERVAL, max_requests: int = BATCH_MAX_REQUESTS):
+        self.db = db
+        self.client = client
+        self.model = model
+        self.model_name = model_name
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+
+    async def _prepare(self, number: int, state: _JobState) -> List[_PendingChunk]:
+        """The requests for a job's chunks that have no saved summary yet."""
+        job = state.job
+        chunk_size, overlap = job.chunk_size, job.overlap
+        if chunk_size - overlap <= 0:
+            overlap = max(0, chunk_size - 100)
+        _, chunks = await cpu_pool.prepare_chunks(job.text, chunk_size, overlap, job.compact)
+        state.num_chunks = len(chunks)
+        await state.checkpoint.load()
+
+        pending = []
+        for i, chunk in enumerate(chunks):
+            input_hash = state.checkpoint.input_hash(chunk, self.model, self.model_name)
+            if state.checkpoint.lookup(i, input_hash) is not None:
+                continue
+            carry_over = None
+            if job.compact and i > 0:
+                carry_over = carry_over_summary(None, chunks[i - 1], min(overlap, CARRY_OVER_MAX_CHARS))
+            pending.append(_PendingChunk(number, i, input_hash, chunk_prompt(chunk, carry_over)))
+        return pending
+
+    async def _run_batch(self, batch: List[_PendingChunk], states: List[_JobState]) -> None:
+        # custom_ids must be short and alphanumeric for Anthropic, so meeting ids are not used
+        by_id = {f"j{item.job}-c{item.index}": item for item in batch}
+        batch_id = await self.client.submit(
+            [self.client.request(custom_id, self.model_name, item.prompt) for custom_id, item in by_id.items()]
+        )
+        for number in {item.job for item in batch}:
+            states[number].batch_ids.append(batch_id)
+        logger.info(f"Submitted batch {batch_id} with {len(batch)} chunk requests")
+
+        status = await self.client.status(batch_id)
+        while not self.client.ended(status):
+            await asyncio.sleep(self.poll_interval)
+            status = await self.client.status(batch_id)
+
+        answered = set()
+        for result in await self.client.results(status):
+            item = by_id.get(result.custom_id)
+            if item is None:
+                continue
+            answered.add(result.custom_id)
+            state = states[item.job]
+            state.cache_stats.add_tokens(*result.usage)
+            if result.summary is None:
+                state.failed += 1
+                logger.warning(f"Chunk {item.index + 1} of {state.job.meeting_id} failed in batch {batch_id}: "
+                               f"{result.error}")
+                continue
+            await state.checkpoint.save(item.index, item.input_hash, result.summary)
+        for custom_id in by_id.keys() - answered:
+            states[by_id[custom_id].job].failed += 1
+        logger.info(f"Batch {batch_id} ended with {len(answered)} of {len(batch)} results")
+
+    async def _finish(self, state: _JobState) -> str:
+        """Complete the meeting's summary if every chunk has one; returns the job's outcome."""
+        saved = state.checkpoint.saved
+        if state.num_chunks == 0 or any(i not in saved for i in range(state.num_chunks)):
+            return "incomplete"
+        meeting_id = state.job.meeting_id
+        job_stats: Dict = {
+            "prompt_cache": state.cache_stats.as_dict(),
+            "resumed_chunks": state.num_chunks - state.submitted,
+            "batch": {"provider": self.model, "batch_ids": state.batch_ids,
+                      "requests": state.submitted, "failed": state.failed},
+        }
+        all_json_data = [saved[i]["summary"] for i in range(state.num_chunks)]
+        meeting_name, summary_json = await cpu_pool.merge_summaries(all_json_data, label=meeting_id, stats=job_stats)
+        if meeting_name:
+            await self.db.update_meeting_name(meeting_id, meeting_name)
+        # The existing summary stays readable until the new one replaces it
+        await self.db.create_process(meeting_id)
+        await self.db.update_process(meeting_id, status="completed", result=summary_json,
+                                     chunk_count=state.num_chunks, metadata=job_stats)
+        await state.checkpoint.clear()
+        return "completed"
+
+    async def run(self, jobs: List[BatchJob]) -> Dict[str, str]:
+        """Summarize ``jobs``; returns ``completed`` or ``incomplete`` per meeting id.
+
+        Incomplete meetings keep the chunk summaries that did arrive, so
+        running them again only submits the missing chunks.
+        """
+        states = [_JobState(job, ChunkCheckpoint(self.db, job.meeting_id)) for job in jobs]
+        pending: List[_PendingChunk] = []
+        for number, state in enumerate(states):
+            chunks = await self._prepare(number, state)
+            state.submitted = len(chunks)
+            pending.extend(chunks)
+        logger.info(f"Batch summarizing {len(jobs)} meetings: {len(pending)} chunk requests")
+
+        batches = [pending[start:start + self.max_requests] for start in range(0, len(pending), self.max_requests)]
+        outcomes = await asyncio.gather(*(self._run_batch(batch, states) for batch in batches),
+                                        return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch submission failed: {outcome}", exc_info=outcome)
+
+        return {state.job.meeting_id: await self._finish(state) for state in states}
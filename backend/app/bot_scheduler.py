@@ -0,0 +1,441 @@
+"""Run many meeting bots at once from one process.
+
+:class:`BotScheduler` starts a :class:`MeetingBot` for every scheduled
+meeting shortly before the meeting begins (``schedule_calendar`` takes the
+start times from calendar events) and streams its audio with
+``MeetingBot.stream_and_transcribe``. Sessions are plain asyncio tasks, so
+dozens of meetings cost dozens of tasks rather than dozens of threads.
+
+Three limits keep a busy host stable:
+
+* each connector attends at most ``connector_limits[name]`` meetings at a
+  time; further sessions wait for a slot,
+* every session transcribes through one shared :class:`TranscriptionPool`
+  with a fixed number of workers, and
+* while the host CPU is saturated the pool admits only one frame at a time.
+  Sessions then fall behind and their ring buffers drop the oldest frames
+  (see ``FrameRingBuffer``) instead of capture stalling or memory growing.
+
+``BotScheduler.health`` reports per-session progress and problems.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from functools import partial
+from typing import AsyncIterable, Callable, Dict, Iterable, List, Optional
+
+from audio_stream import (
+    DEFAULT_BUFFER_FRAMES,
+    DEFAULT_FRAME_SECONDS,
+    DEFAULT_SAMPLE_RATE,
+    AudioFrame,
+    StreamingTranscript,
+)
+from meeting_bot import FrameTranscriber, MeetingBot
+
+logger = logging.getLogger(__name__)
+
+# Meetings one connector attends at the same time unless configured otherwise
+DEFAULT_CONNECTOR_LIMIT = int(os.getenv("BOT_CONNECTOR_LIMIT", "10"))
+TRANSCRIPTION_WORKERS = int(os.getenv("BOT_TRANSCRIPTION_WORKERS", str(os.cpu_count() or 1)))
+# System CPU utilization (0-1) above which transcription is throttled
+CPU_HIGH_WATER = float(os.getenv("BOT_CPU_HIGH_WATER", "0.9"))
+# Join this many seconds before the scheduled start
+JOIN_EARLY_SECONDS = float(os.getenv("BOT_JOIN_EARLY_SECONDS", "30"))
+# A running session that has not produced a frame for this long is reported as stalled
+STALL_SECONDS = float(os.getenv("BOT_STALL_SECONDS", "60"))
+
+
+class CPUMonitor:
+    """System-wide CPU utilization, sampled at most every ``interval`` seconds.
+
+    Reads ``/proc/stat`` where it exists and falls back to the one minute
+    load average divided by the number of CPUs.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._last_sample = 0.0
+        self._last_times: Optional[List[int]] = None
+        self._value = 0.0
+
+    @staticmethod
+    def _read_proc_stat() -> Optional[List[int]]:
+        try:
+            with open("/proc/stat") as f:
+                fields = f.readline().split()
+        except OSError:
+            return None
+        return [int(value) for value in fields[1:]]
+
+    def _sample(self) -> float:
+        times = self._read_proc_stat()
+        if times is None:
+            return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+        previous, self._last_times = self._last_times, times
+        if previous is None:
+            return self._value
+        deltas = [now - before for now, before in zip(times, previous)]
+        total = sum(deltas)
+        # idle and iowait
+        idle = deltas[3] + (deltas[4] if len(deltas) > 4 else 0)
+        return (total - idle) / total if total else self._value
+
+    def __call__(self) -> float:
+        now = time.monotonic()
+        if now - self._last_sample >= self.interval:
+            self._value = self._sample()
+            self._last_sample = now
+        return self._value
+
+
+class TranscriptionPool:
+    """Fixed number of transcription workers shared by every bot session.
+
+    Coroutine transcribers (e.g. calls to a whisper server) run on the event
+    loop, blocking ones in the pool's own threads; either way at most
+    ``workers`` frames are transcribed at once. While ``cpu_probe()`` is at
+    or above ``high_water`` new frames are admitted only when nothing else
+    is running.
+    """
+
+    def __init__(
+        self,
+        workers: int = TRANSCRIPTION_WORKERS,
+        cpu_probe: Optional[Callable[[], float]] = None,
+        high_water: float = CPU_HIGH_WATER,
+        poll_interval: float = 0.05,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.cpu_probe = cpu_probe if cpu_probe is not None else CPUMonitor()
+        self.high_water = high_water
+        self.poll_interval = poll_interval
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.throttled_seconds = 0.0
+        self._slots = asyncio.Semaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe")
+
+    @property
+    def saturated(self) -> bool:
+        return self.cpu_probe() >= self.high_water
+
+    async def _admit(self) -> None:
+        started = None
+        while self.active > 0 and self.saturated:
+            if started is None:
+                started = time.monotonic()
+            await asyncio.sleep(self.poll_interval)
+        if started is not None:
+            self.throttled_seconds += time.monotonic() - started
+
+    async def transcribe(self, transcriber: FrameTranscriber, frame: AudioFrame) -> str:
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+            try:
+                await self._admit()
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            if asyncio.iscoroutinefunction(transcriber):
+                text = await transcriber(frame)
+            else:
+                loop = asyncio.get_running_loop()
+                text = await loop.run_in_executor(self._executor, partial(transcriber, frame))
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            self._slots.release()
+        self.completed += 1
+        return text
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cpu": round(self.cpu_probe(), 3),
+            "saturated": self.saturated,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SessionState(str, Enum):
+    SCHEDULED = "scheduled"
+    # Waiting for a free slot of its connector
+    WAITING = "waiting"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class CalendarEvent:
+    """A meeting on a calendar the bots should attend."""
+
+    meeting_id: str
+    connector: str
+    token: str
+    start: datetime
+    end: Optional[datetime] = None
+    title: Optional[str] = None
+
+
+@dataclass
+class BotSession:
+    session_id: str
+    meeting_id: str
+    connector: str
+    token: str
+    # Scheduled meeting start, seconds since the epoch
+    start_at: float
+    title: Optional[str] = None
+    state: SessionState = SessionState.SCHEDULED
+    transcript: StreamingTranscript = field(default_factory=StreamingTranscript)
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    # ``time.monotonic()`` when the last audio frame was captured, speech or not
+    last_frame_at: Optional[float] = None
+    running_since: Optional[float] = field(default=None, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def status(self, stall_seconds: float = STALL_SECONDS) -> str:
+        """``ok``, ``degraded`` (frames were dropped or failed, or segments not stored), ``stalled`` or ``failed``."""
+        if self.state == SessionState.FAILED:
+            return "failed"
+        if self.state == SessionState.RUNNING:
+            since = self.last_frame_at if self.last_frame_at is not None else self.running_since
+            if since is not None and time.monotonic() - since > stall_seconds:
+                return "stalled"
+        if self.transcript.dropped_frames or self.transcript.failed_frames or self.transcript.failed_segments:
+            return "degraded"
+        return "ok"
+
+    def health(self, stall_seconds: float = STALL_SECONDS) -> Dict:
+        transcript = self.transcript
+        return {
+            "session_id": self.session_id,
+            "meeting_id": self.meeting_id,
+            "connector": self.connector,
+            "title": self.title,
+            "state": self.state.value,
+            "status": self.status(stall_seconds),
+            "start_at": self.start_at,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "frames": transcript.frames,
+            "segments": len(transcript.segments),
+            "dropped_frames": transcript.dropped_frames,
+            "failed_frames": transcript.failed_frames,
+            "failed_segments": transcript.failed_segments,
+            "buffer_high_water": transcript.buffer_high_water,
+            "skipped_fraction": round(transcript.skipped_fraction, 3),
+            "max_latency": transcript.max_latency,
+            "seconds_since_last_frame": (
+                round(time.monotonic() - self.last_frame_at, 3) if self.last_frame_at is not None else None
+            ),
+            "error": self.error,
+        }
+
+
+AudioSourceFactory = Callable[[BotSession], AsyncIterable[bytes]]
+
+
+class BotScheduler:
+    """Attend many meetings concurrently with one :class:`MeetingBot` per session.
+
+    ``connectors`` maps a connector name (``"zoom"``, ``"google_meet"``) to a
+    connector instance, ``audio_source(session)`` returns the PCM capture of
+    the session's meeting and ``transcriber`` transcribes one frame. Segments
+    are stored with ``db.save_meeting_transcript`` when a ``db`` is given, and
+    silence is trimmed before transcription when a ``vad`` is given.
+    """
+
+    def __init__(
+        self,
+        connectors: Dict[str, object],
+        audio_source: AudioSourceFactory,
+        transcriber: FrameTranscriber,
+        pool: Optional[TranscriptionPool] = None,
+        db=None,
+        connector_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = DEFAULT_CONNECTOR_LIMIT,
+        join_early: float = JOIN_EARLY_SECONDS,
+        stall_seconds: float = STALL_SECONDS,
+        frame_seconds: float = DEFAULT_FRAME_SECONDS,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        buffer_frames: int = DEFAULT_BUFFER_FRAMES,
+        frame_concurrency: int = 2,
+        vad=None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.connectors = connectors
+        self.audio_source = audio_source
+        self.transcriber = transcriber
+        self.pool = pool if pool is not None else TranscriptionPool()
+        self.db = db
+        self.join_early = join_early
+        self.stall_seconds = stall_seconds
+        self.frame_seconds = frame_seconds
+        self.sample_rate = sample_rate
+        self.buffer_frames = buffer_frames
+        self.frame_concurrency = frame_concurrency
+        self.vad = vad
+        self.clock = clock
+        limits = connector_limits or {}
+        self.connector_limits = {name: limits.get(name, default_limit) for name in connectors}
+        self._slots = {name: asyncio.Semaphore(limit) for name, limit in self.connector_limits.items()}
+        self.sessions: Dict[str, BotSession] = {}
+
+    def schedule(
+        self,
+        meeting_id: str,
+        connector: str,
+        token: str,
+        start_at: Optional[float] = None,
+        title: Optional[str] = None,
+    ) -> BotSession:
+        """Attend ``meeting_id`` from ``join_early`` seconds before ``start_at`` (default: now)."""
+        if connector not in self.connectors:
+            raise ValueError(f"Unknown connector {connector!r}")
+        session = BotSession(
+            session_id=uuid.uuid4().hex,
+            meeting_id=meeting_id,
+            connector=connector,
+            token=token,
+            start_at=start_at if start_at is not None else self.clock(),
+            title=title,
+        )
+        self.sessions[session.session_id] = session
+        session.task = asyncio.create_task(self._run(session))
+        return session
+
+    def schedule_calendar(self, events: Iterable[CalendarEvent]) -> List[BotSession]:
+        """Schedule every calendar event that has not ended and is not scheduled yet."""
+        now = self.clock()
+        active = {
+            (session.connector, session.meeting_id)
+            for session in self.sessions.values()
+            if session.state in (SessionState.SCHEDULED, SessionState.WAITING, SessionState.RUNNING)
+        }
+        scheduled = []
+        for event in events:
+            if event.end is not None and event.end.timestamp() <= now:
+                continue
+            if (event.connector, event.meeting_id) in active:
+                continue
+            active.add((event.connector, event.meeting_id))
+            scheduled.append(
+                self.schedule(event.meeting_id, event.connector, event.token, event.start.timestamp(), event.title)
+            )
+        return scheduled
+
+    def _frame_transcriber(self, session: BotSession) -> FrameTranscriber:
+        async def transcribe(frame: AudioFrame) -> str:
+            return await self.pool.transcribe(self.transcriber, frame)
+        return transcribe
+
+    @staticmethod
+    def _frame_seen(session: BotSession) -> Callable[[AudioFrame], None]:
+        # Every captured frame counts: with a VAD, silent frames never reach the transcriber
+        def seen(frame: AudioFrame) -> None:
+            session.last_frame_at = time.monotonic()
+        return seen
+
+    async def _run(self, session: BotSession) -> None:
+        try:
+            delay = session.start_at - self.join_early - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            session.state = SessionState.WAITING
+            async with self._slots[session.connector]:
+                session.state = SessionState.RUNNING
+                session.started_at = self.clock()
+                session.running_since = time.monotonic()
+                bot = MeetingBot(
+                    self.connectors[session.connector],
+                    transcriber=None,
+                    frame_transcriber=self._frame_transcriber(session),
+                    db=self.db,
+                    vad=self.vad,
+                )
+                await bot.stream_and_transcribe(
+                    session.meeting_id,
+                    session.token,
+                    self.audio_source(session),
+                    frame_seconds=self.frame_seconds,
+                    sample_rate=self.sample_rate,
+                    buffer_frames=self.buffer_frames,
+                    concurrency=self.frame_concurrency,
+                    transcript=session.transcript,
+                    on_frame=self._frame_seen(session),
+                )
+            session.state = SessionState.COMPLETED
+        except asyncio.CancelledError:
+            session.state = SessionState.CANCELLED
+            raise
+        except Exception as e:
+            logger.error(f"Bot session {session.session_id} for {session.meeting_id} failed: {e}", exc_info=True)
+            session.state = SessionState.FAILED
+            session.error = str(e)
+        finally:
+            session.ended_at = self.clock()
+
+    def cancel(self, session_id: str) -> bool:
+        session = self.sessions.get(session_id)
+        if session is None or session.task is None or session.task.done():
+            return False
+        session.task.cancel()
+        return True
+
+    async def wait(self) -> None:
+        """Wait until every scheduled session has ended."""
+        tasks = [session.task for session in self.sessions.values() if session.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def health(self) -> Dict:
+        running: Dict[str, int] = {}
+        for session in self.sessions.values():
+            if session.state == SessionState.RUNNING:
+                running[session.connector] = running.get(session.connector, 0) + 1
+        return {
+            "pool": self.pool.stats(),
+            "connectors": {
+                name: {"limit": limit, "running": running.get(name, 0)}
+                for name, limit in self.connector_limits.items()
+            },
+            "sessions": [session.health(self.stall_seconds) for session in self.sessions.values()],
+        }
+
+    async def aclose(self) -> None:
+        """Cancel every session that is still scheduled or running."""
+        for session in self.sessions.values():
+            if session.task is not None and not session.task.done():
+                session.task.cancel()
+        await self.wait()
+        self.pool.shutdown()
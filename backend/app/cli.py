@@ -1,15 +1,46 @@
 import argparse
 import asyncio
+import os
 import pathlib
 import sys
 
 import uvicorn
 
-# Ensure migrations package is importable
+# Ensure migrations and benchmarks packages are importable
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+# The app modules import each other by bare name
+APP_DIR = str(pathlib.Path(__file__).resolve().parent)
+sys.path.append(APP_DIR)
 
 from migrations import run_migrations
-from .main import app
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run migrations, then serve the API from one or ``args.workers`` processes.
+
+    With several workers uvicorn pre-forks them from a supervisor process and
+    they share the SQLite state store. Send SIGHUP to the supervisor to
+    restart the workers one at a time (in-flight requests get up to
+    ``--graceful-timeout`` seconds), and SIGTTIN/SIGTTOU to add or remove one.
+    """
+    db_path = os.path.abspath(args.db)
+    asyncio.run(run_migrations(db_path, wal=args.workers > 1))
+    # Read by the app at import time, in this process and in every worker
+    os.environ["DATABASE_PATH"] = db_path
+    if args.workers > 1:
+        os.environ.setdefault("STATE_STORE", "sqlite")
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            app_dir=APP_DIR,
+            timeout_graceful_shutdown=args.graceful_timeout,
+        )
+    else:
+        from .main import app
+
+        uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=args.graceful_timeout)
 
 
 def main() -> None:
@@ -23,14 +54,141 @@ def main() -> None:
     serve_parser.add_argument("--db", default="meeting_minutes.db", help="Path to SQLite database")
     serve_parser.add_argument("--host", default="0.0.0.0")
     serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--workers", type=int, default=1,
+                              help="Worker processes; SIGHUP restarts them gracefully")
+    serve_parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                              help="Seconds a stopping worker waits for in-flight requests")
+
+    recompress_parser = subparsers.add_parser(
+        "recompress", help="Compress existing transcripts and summary results with trained zstd dictionaries"
+    )
+    recompress_parser.add_argument("--db", default="meeting_minutes.db", help="Path to SQLite database")
+    recompress_parser.add_argument("--batch-size", type=int, default=500, help="Rows rewritten per transaction")
+    recompress_parser.add_argument("--no-train", dest="train", action="store_false",
+                                   help="Keep the current dictionaries instead of training new ones")
+    recompress_parser.add_argument("--dict-size", type=int, default=64 * 1024, help="Dictionary size in bytes")
+    recompress_parser.add_argument("--vacuum", action="store_true", help="Rebuild the file to release freed space")
+
+    resummarize_parser = subparsers.add_parser(
+        "resummarize", help="Summarize the stored meetings again, e.g. after changing models"
+    )
+    resummarize_parser.add_argument("--db", default="meeting_minutes.db", help="Path to SQLite database")
+    resummarize_parser.add_argument("--model", help="Model provider to use instead of each meeting's own")
+    resummarize_parser.add_argument("--model-name", help="Model name to use instead of each meeting's own")
+    resummarize_parser.add_argument("--concurrency", type=int, default=8, help="Summaries running at once")
+    resummarize_parser.add_argument("--provider-limit", action="append", default=[], metavar="PROVIDER=N",
+                                    help="Summaries running at once for one provider (ollama defaults to 1)")
+    resummarize_parser.add_argument("--page-size", type=int, default=100, help="Meetings read per query")
+    resummarize_parser.add_argument("--limit", type=int, help="Stop after this many meetings")
+    resummarize_parser.add_argument("--checkpoint", default="resummarize-checkpoint.json",
+                                    help="Progress file; a run started with the same file resumes where it stopped")
+    resummarize_parser.add_argument("--progress-interval", type=float, default=10.0,
+                                    help="Seconds between progress lines")
+    resummarize_parser.add_argument("--batch", action="store_true",
+                                    help="Use the provider's batch API, a page of meetings per submission: "
+                                         "half the price, but each page can take up to 24 hours")
+
+    loadtest_parser = subparsers.add_parser(
+        "loadtest", help="Run concurrent virtual users against the app in-process with a fake LLM"
+    )
+    loadtest_parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    loadtest_parser.add_argument("--iterations", type=int, default=1, help="Flows per virtual user")
+    loadtest_parser.add_argument("--segments", type=int, default=20, help="Transcript segments per meeting")
+    loadtest_parser.add_argument("--segment-chars", type=int, default=400, help="Characters per segment")
+    loadtest_parser.add_argument("--mode", choices=["poll", "stream"], default="poll",
+                                 help="Follow summaries by polling or over the SSE stream")
+    loadtest_parser.add_argument("--poll-interval", type=float, default=0.05)
+    loadtest_parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which users start")
+    loadtest_parser.add_argument("--latency", default="lognormal:0.02,0.5", help="Fake LLM latency distribution")
+    loadtest_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    loadtest_parser.add_argument("--seed", type=int, default=0)
+    loadtest_parser.add_argument("--output", help="Write the JSON report to this path")
 
     args = parser.parse_args()
 
     if args.command == "migrate":
         asyncio.run(run_migrations(args.db))
     elif args.command == "serve":
+        serve(args)
+    elif args.command == "recompress":
+        from migrations.recompress import recompress
+
         asyncio.run(run_migrations(args.db))
-        uvicorn.run(app, host=args.host, port=args.port)
+        report = asyncio.run(recompress(args.db, batch_size=args.batch_size, train=args.train,
+                                        dict_size=args.dict_size, vacuum=args.vacuum))
+        for stats in report:
+            ratio = stats["bytes_before"] / stats["bytes_after"] if stats["bytes_after"] else 0.0
+            print(f"{stats['table']}.{stats['column']}: {stats['rows']} rows, "
+                  f"{stats['bytes_before']} -> {stats['bytes_after']} bytes ({ratio:.1f}x)")
+    elif args.command == "resummarize":
+        if (args.model is None) != (args.model_name is None):
+            parser.error("--model and --model-name go together")
+        if args.batch and args.model is None:
+            parser.error("--batch needs --model and --model-name: a batch goes to one model")
+        provider_limits = {}
+        for value in args.provider_limit:
+            provider, _, limit = value.partition("=")
+            if not limit.isdigit():
+                parser.error(f"--provider-limit expects PROVIDER=N, got {value!r}")
+            provider_limits[provider] = int(limit)
+
+        db_path = os.path.abspath(args.db)
+        asyncio.run(run_migrations(db_path))
+        # Read by the app modules at import time
+        os.environ["DATABASE_PATH"] = db_path
+        from db import DB_BULK_BUSY_TIMEOUT, DatabaseManager
+        from resummarize import processor, resummarize, resummarize_batch
+
+        # Every write of this process is part of the bulk run, so it may wait longer for the lock
+        processor.db = DatabaseManager(db_path, busy_timeout=DB_BULK_BUSY_TIMEOUT)
+
+        if args.batch:
+            progress = asyncio.run(resummarize_batch(
+                args.checkpoint,
+                args.model,
+                args.model_name,
+                page_size=args.page_size,
+                limit=args.limit,
+                on_progress=lambda progress: print(progress.format(), flush=True),
+            ))
+        else:
+            progress = asyncio.run(resummarize(
+                args.checkpoint,
+                model=args.model,
+                model_name=args.model_name,
+                concurrency=args.concurrency,
+                provider_limits=provider_limits,
+                page_size=args.page_size,
+                limit=args.limit,
+                progress_interval=args.progress_interval,
+                on_progress=lambda progress: print(progress.format(), flush=True),
+            ))
+        if progress.failed:
+            sys.exit(1)
+    elif args.command == "loadtest":
+        import logging
+
+        from benchmarks.loadtest import LoadTestConfig, format_report, run_loadtest, write_report
+        from .main import app
+
+        # Per-request logging would dominate the measurements
+        logging.disable(logging.ERROR)
+        config = LoadTestConfig(
+            users=args.users,
+            iterations=args.iterations,
+            segments=args.segments,
+            segment_chars=args.segment_chars,
+            mode=args.mode,
+            poll_interval=args.poll_interval,
+            ramp_up=args.ramp_up,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+        report = asyncio.run(run_loadtest(app, config))
+        print(format_report(report))
+        if args.output:
+            write_report(report, args.output)
 
 
 if __name__ == "__main__":
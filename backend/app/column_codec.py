@@ -0,0 +1,117 @@
+"""Transparent zstd compression of large text columns.
+
+Transcripts and summary results are the bulk of the database. Values of the
+columns in :data:`COMPRESSED_COLUMNS` are stored as zstd frames (BLOBs)
+instead of TEXT once they are at least ``DB_COMPRESSION_MIN_BYTES`` long;
+shorter values and rows written before compression was enabled stay TEXT,
+and :meth:`ColumnCodec.decode` returns both as ``str``.
+
+Transcripts of one deployment share speaker names, timestamps and
+vocabulary, which a zstd dictionary trained on existing rows (see
+``migrations.recompress``) turns into much better ratios for short values.
+Dictionaries are stored in the ``compression_dictionaries`` table, one
+active dictionary per column. Each frame records the ID of the dictionary
+it was compressed with, so rows compressed with an older dictionary (or
+none) stay readable after a new one is trained.
+"""
+
+import os
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import zstandard
+
+COMPRESSED_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("transcript_chunks", "transcript_text"),
+    ("transcripts", "transcript"),
+    ("summary_processes", "result"),
+    ("summary_chunk_results", "summary"),
+)
+
+# ``zstd`` or ``none``; with ``none`` new values are written as plain TEXT
+DB_COMPRESSION = os.getenv("DB_COMPRESSION", "zstd").lower()
+DB_COMPRESSION_LEVEL = int(os.getenv("DB_COMPRESSION_LEVEL", "3"))
+# Values shorter than this (in UTF-8 bytes) are stored uncompressed
+DB_COMPRESSION_MIN_BYTES = int(os.getenv("DB_COMPRESSION_MIN_BYTES", "128"))
+
+
+class UnknownDictionary(LookupError):
+    """A value was compressed with a dictionary this codec has not loaded."""
+
+    def __init__(self, dict_id: int):
+        super().__init__(f"zstd dictionary {dict_id} is not loaded")
+        self.dict_id = dict_id
+
+
+class ColumnCodec:
+    """Encodes column values for storage and decodes them back to text."""
+
+    def __init__(
+        self,
+        enabled: bool = DB_COMPRESSION == "zstd",
+        level: int = DB_COMPRESSION_LEVEL,
+        min_bytes: int = DB_COMPRESSION_MIN_BYTES,
+    ):
+        self.enabled = enabled
+        self.level = level
+        self.min_bytes = min_bytes
+        # Set once the dictionaries have been read from the database
+        self.loaded = False
+        self._dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self._active: Dict[Tuple[str, str], int] = {}
+        self._compressors: Dict[int, zstandard.ZstdCompressor] = {}
+        self._decompressors: Dict[int, zstandard.ZstdDecompressor] = {}
+
+    def load_dictionaries(self, rows: Iterable[Tuple[str, str, bytes]]) -> None:
+        """Register ``(table, column, data)`` rows, oldest first; the last one per column is active."""
+        for table, column, data in rows:
+            dictionary = zstandard.ZstdCompressionDict(data)
+            dict_id = dictionary.dict_id()
+            self._dictionaries[dict_id] = dictionary
+            self._active[(table, column)] = dict_id
+        self.loaded = True
+
+    def active_dictionary(self, table: str, column: str) -> int:
+        """ID of the dictionary new values of the column are compressed with, 0 for none."""
+        return self._active.get((table, column), 0)
+
+    def _compressor(self, dict_id: int) -> zstandard.ZstdCompressor:
+        compressor = self._compressors.get(dict_id)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self._dictionaries.get(dict_id), write_content_size=True
+            )
+            self._compressors[dict_id] = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id and dict_id not in self._dictionaries:
+                raise UnknownDictionary(dict_id)
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+            self._decompressors[dict_id] = decompressor
+        return decompressor
+
+    def encode(self, table: str, column: str, value: Optional[str]) -> Union[str, bytes, None]:
+        if value is None or not self.enabled:
+            return value
+        data = value.encode("utf-8")
+        if len(data) < self.min_bytes:
+            return value
+        return self._compressor(self.active_dictionary(table, column)).compress(data)
+
+    def decode(self, value: Union[str, bytes, None]) -> Optional[str]:
+        """Return the text of a stored value; raises ``UnknownDictionary`` if its dictionary is not loaded."""
+        if not isinstance(value, bytes):
+            return value
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        return self._decompressor(dict_id).decompress(value).decode("utf-8")
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = 64 * 1024) -> bytes:
+    """Train a zstd dictionary on sample values; raises ``ValueError`` if there are too few."""
+    encoded = [sample.encode("utf-8") for sample in samples if sample]
+    try:
+        return zstandard.train_dictionary(dict_size, encoded).as_bytes()
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Cannot train a dictionary from {len(encoded)} samples: {e}") from e
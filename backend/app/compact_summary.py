@@ -0,0 +1,117 @@
+"""Compact in-memory form of summaries passed between pipeline stages.
+
+Summaries are validated once, where they enter the pipeline: the agent
+validates the LLM's output as a ``SummaryResponse`` (and the batch path does
+the same for batch results). After that the chunk summaries are JSON the
+pipeline wrote itself (in ``process_transcript``, the chunk checkpoints and
+the CPU pool), and validating them again at every stage only costs time.
+
+Between stages a summary is a :class:`CompactSummary` instead of nested
+dicts or pydantic models. Its blocks are slotted dataclasses, about a third
+of the size of a four-key dict, and the values that repeat across tens of
+thousands of blocks of a long meeting (ids, types, colors) are interned, so
+each distinct value is stored once. Building one does no validation: only
+pass data that was validated where it came from.
+
+``python -m benchmarks.compact_summary`` compares the memory and CPU cost
+with dicts and with the pydantic models.
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from summary_stream import SECTION_TITLES
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
+class CompactBlock:
+    id: str
+    type: str
+    content: str
+    color: str
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CompactBlock":
+        return cls(
+            _intern(data.get("id", "")),
+            _intern(data.get("type", "")),
+            data.get("content", ""),
+            _intern(data.get("color", "")),
+        )
+
+    def as_dict(self) -> Dict:
+        return {"id": self.id, "type": self.type, "content": self.content, "color": self.color}
+
+
+@dataclass(slots=True)
+class CompactSection:
+    title: str
+    blocks: List[CompactBlock] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class CompactSummary:
+    """A summary with a section for every key of ``SECTION_TITLES``, in that order."""
+
+    meeting_name: str = ""
+    sections: Dict[str, CompactSection] = field(
+        default_factory=lambda: {key: CompactSection(title) for key, title in SECTION_TITLES.items()}
+    )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CompactSummary":
+        """Build from a summary dict; sections and blocks that are not dicts are left out."""
+        summary = cls(meeting_name=data.get("MeetingName") or "")
+        for key, section in summary.sections.items():
+            value = data.get(key)
+            if not isinstance(value, dict) or not isinstance(value.get("blocks"), list):
+                continue
+            section.title = _intern(value.get("title") or section.title)
+            section.blocks = [CompactBlock.from_dict(block) for block in value["blocks"] if isinstance(block, dict)]
+        return summary
+
+    @classmethod
+    def from_json(cls, text: str) -> "CompactSummary":
+        """Build from summary JSON; raises ``ValueError`` if it is not a JSON object."""
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("summary JSON is not an object")
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_response(cls, response) -> "CompactSummary":
+        """Build from a validated ``SummaryResponse`` without dumping it first."""
+        summary = cls(meeting_name=response.MeetingName)
+        for key, section in summary.sections.items():
+            value = getattr(response, key)
+            section.title = _intern(value.title)
+            section.blocks = [
+                CompactBlock(_intern(block.id), _intern(block.type), block.content, _intern(block.color))
+                for block in value.blocks
+            ]
+        return summary
+
+    def extend(self, other: "CompactSummary") -> None:
+        """Append ``other``'s blocks; its meeting name replaces this one unless it is empty."""
+        if other.meeting_name:
+            self.meeting_name = other.meeting_name
+        for key, section in self.sections.items():
+            section.blocks.extend(other.sections[key].blocks)
+
+    def block_count(self) -> int:
+        return sum(len(section.blocks) for section in self.sections.values())
+
+    def as_dict(self) -> Dict:
+        summary: Dict = {"MeetingName": self.meeting_name}
+        for key, section in self.sections.items():
+            summary[key] = {"title": section.title, "blocks": [block.as_dict() for block in section.blocks]}
+        return summary
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict())
@@ -0,0 +1,213 @@
+"""Shared process pool for CPU-heavy transcript stages.
+
+Chunk preparation (compaction and splitting) and the final JSON merge and
+dedup are pure CPU work. For multi-hour transcripts they would block the
+API event loop for hundreds of milliseconds, so above a size threshold they
+run in a ``ProcessPoolExecutor`` whose workers are spawned and warmed up
+once and then reused.
+
+Transcript text and chunk results are handed to the workers through
+``multiprocessing.shared_memory`` instead of being pickled into the task
+payload; only a ``SharedTextRef`` (segment name and size) travels through
+the executor's pipe. Results that are large strings come back the same way.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+from transcript_compaction import prepare_chunks
+
+logger = logging.getLogger(__name__)
+
+# Inputs smaller than this (in characters) are processed inline; the
+# round trip to a worker costs more than the work itself.
+DEFAULT_MIN_OFFLOAD_CHARS = 200_000
+
+
+@dataclass(frozen=True)
+class SharedTextRef:
+    """Handle to UTF-8 text stored in a shared memory segment."""
+
+    name: str
+    size: int
+
+
+def put_shared_text(text: str) -> Tuple[SharedMemory, SharedTextRef]:
+    """Copy text into a new shared memory segment.
+
+    The caller owns the returned segment and must ``close`` and ``unlink`` it.
+    """
+    data = text.encode("utf-8")
+    shm = SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm, SharedTextRef(shm.name, len(data))
+
+
+def read_shared_bytes(ref: SharedTextRef, unlink: bool = False) -> bytes:
+    shm = SharedMemory(name=ref.name)
+    try:
+        return bytes(shm.buf[:ref.size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+
+def read_shared_text(ref: SharedTextRef, unlink: bool = False) -> str:
+    return read_shared_bytes(ref, unlink=unlink).decode("utf-8")
+
+
+def _export_text(text: str) -> SharedTextRef:
+    # Worker side: hand a result string back without pickling it. The parent
+    # unlinks the segment once it has read it.
+    shm, ref = put_shared_text(text)
+    shm.close()
+    return ref
+
+
+def _init_worker() -> None:
+    logger.debug(f"CPU pool worker {os.getpid()} ready")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _prepare_chunks_task(ref: SharedTextRef, chunk_size: int, overlap: int, compact: bool):
+    source, spans = prepare_chunks(read_shared_text(ref), chunk_size, overlap, compact)
+    # The parent already has the raw text, only a compacted copy needs to travel back
+    return (_export_text(source) if compact else None), spans
+
+
+def _merge_task(ref: SharedTextRef, offsets: List[Tuple[int, int]], dedupe: bool, label: str):
+    from summary_merge import merge_chunk_summaries
+
+    data = read_shared_bytes(ref)
+    all_json_data = [data[start:end].decode("utf-8") for start, end in offsets]
+    stats: Dict = {}
+    summary = merge_chunk_summaries(all_json_data, dedupe=dedupe, label=label, stats=stats)
+    return summary["MeetingName"], _export_text(json.dumps(summary)), stats
+
+
+class CPUPool:
+    """Lazily started, warmed-up process pool shared by the API."""
+
+    def __init__(self, max_workers: Optional[int] = None, min_offload_chars: int = DEFAULT_MIN_OFFLOAD_CHARS):
+        if max_workers is None:
+            max_workers = int(os.getenv("CPU_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+        self.max_workers = max_workers
+        self.min_offload_chars = min_offload_chars
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Created on first use: an asyncio.Lock only works on one event loop,
+        # and the module-level pool outlives the loops of the CLI and the tests
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._start_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        """Spawn every worker and wait until each has answered once."""
+        if not self.enabled or self._executor is not None:
+            return
+        loop = asyncio.get_running_loop()
+        if self._start_lock is None or self._start_lock_loop is not loop:
+            self._start_lock, self._start_lock_loop = asyncio.Lock(), loop
+        async with self._start_lock:
+            if self._executor is not None:
+                return
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            try:
+                pids = await asyncio.gather(
+                    *(loop.run_in_executor(executor, _ping) for _ in range(self.max_workers))
+                )
+            except BaseException:
+                # e.g. the app shut down while it was warming up
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            self._executor = executor
+            logger.info(f"CPU pool started with {len(set(pids))} warm workers")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def should_offload(self, size: int) -> bool:
+        return self.enabled and size >= self.min_offload_chars
+
+    async def run(self, func, *args):
+        """Run ``func(*args)`` in a worker process, starting the pool if needed."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def prepare_chunks(self, text: str, chunk_size: int, overlap: int, compact: bool) -> Tuple[str, List[str]]:
+        """Compact and split a transcript, off the event loop for large inputs.
+
+        Returns the text the chunks were cut from and the chunks themselves.
+        """
+        if not self.should_offload(len(text)):
+            source, spans = prepare_chunks(text, chunk_size, overlap, compact)
+        else:
+            shm, ref = put_shared_text(text)
+            try:
+                source_ref, spans = await self.run(_prepare_chunks_task, ref, chunk_size, overlap, compact)
+            finally:
+                shm.close()
+                shm.unlink()
+            source = read_shared_text(source_ref, unlink=True) if source_ref else text
+        return source, [source[start:end] for start, end in spans]
+
+    async def merge_summaries(
+        self, all_json_data: List[str], label: str = "", stats: Optional[Dict] = None, dedupe: bool = True
+    ) -> Tuple[str, str]:
+        """Merge chunk summaries, returning the meeting name and the merged summary JSON."""
+        # Imported here to keep NumPy out of the API's import time
+        from summary_merge import merge_chunk_summaries
+
+        total = sum(len(item) for item in all_json_data)
+        if not self.should_offload(total):
+            merge_stats: Dict = {}
+            summary = merge_chunk_summaries(all_json_data, dedupe=dedupe, label=label, stats=merge_stats)
+            meeting_name, summary_json = summary["MeetingName"], json.dumps(summary)
+        else:
+            encoded = [item.encode("utf-8") for item in all_json_data]
+            offsets, position = [], 0
+            for item in encoded:
+                offsets.append((position, position + len(item)))
+                position += len(item)
+            shm = SharedMemory(create=True, size=max(1, position))
+            try:
+                for item, (start, end) in zip(encoded, offsets):
+                    shm.buf[start:end] = item
+                del encoded
+                ref = SharedTextRef(shm.name, position)
+                meeting_name, result_ref, merge_stats = await self.run(_merge_task, ref, offsets, dedupe, label)
+            finally:
+                shm.close()
+                shm.unlink()
+            summary_json = read_shared_text(result_ref, unlink=True)
+        if stats is not None:
+            stats.update(merge_stats)
+        return meeting_name, summary_json
+
+
+cpu_pool = CPUPool()
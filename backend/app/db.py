@@ -1,50 +1,115 @@
 import aiosqlite
 import json
+import os
+import time
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import logging
 from contextlib import asynccontextmanager
 
+from column_codec import ColumnCodec, UnknownDictionary
+from instrumentation import timed
+
 logger = logging.getLogger(__name__)
 
+# ``cli.py serve --db`` exports DATABASE_PATH so every worker opens the same file
+DEFAULT_DB_PATH = os.getenv("DATABASE_PATH", "meeting_minutes.db")
+# Seconds a connection waits for another writer's lock before failing with
+# "database is locked". API requests keep sqlite's default so a request never
+# hangs for long; bulk writers (many jobs writing at once, where waiting is
+# fine) pass busy_timeout=DB_BULK_BUSY_TIMEOUT, as their writes queue up
+# behind each other.
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+DB_BULK_BUSY_TIMEOUT = float(os.getenv("DB_BULK_BUSY_TIMEOUT", "30"))
+# Settings are served from memory; after this many seconds the next read checks
+# the settings_version row for changes made by other processes. Writes through
+# any DatabaseManager of this process are visible immediately.
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "1.0"))
+
+API_KEY_COLUMNS = {
+    "openai": "openaiApiKey",
+    "claude": "anthropicApiKey",
+    "groq": "groqApiKey",
+    "ollama": "ollamaApiKey",
+}
+
+class _SettingsCache:
+    """The cached settings row of one database file, shared by its DatabaseManagers"""
+
+    __slots__ = ("settings", "version", "checked_at")
+
+    def __init__(self):
+        self.settings: Optional[Dict] = None
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+
+
+_settings_caches: Dict[str, _SettingsCache] = {}
+
+
+def _settings_cache(db_path: str) -> _SettingsCache:
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    return _settings_caches.setdefault(key, _SettingsCache())
+
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "meeting_minutes.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, codec: Optional[ColumnCodec] = None,
+                 busy_timeout: float = DB_BUSY_TIMEOUT):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        # Compresses transcript and result columns; see column_codec
+        self.codec = codec if codec is not None else ColumnCodec()
+        self.settings_cache_ttl = SETTINGS_CACHE_TTL
+        self._settings = _settings_cache(db_path)
 
     @asynccontextmanager
     async def _get_connection(self):
         """Get a new database connection"""
-        conn = await aiosqlite.connect(self.db_path)
+        with timed("db"):
+            conn = await aiosqlite.connect(self.db_path, timeout=self.busy_timeout)
+            try:
+                yield conn
+            finally:
+                await conn.close()
+
+    async def _load_dictionaries(self, conn) -> None:
+        cursor = await conn.execute("SELECT table_name, column_name, data FROM compression_dictionaries ORDER BY id")
+        self.codec.load_dictionaries(await cursor.fetchall())
+
+    async def _encode(self, conn, table: str, column: str, value: Optional[str]):
+        if not self.codec.loaded:
+            await self._load_dictionaries(conn)
+        return self.codec.encode(table, column, value)
+
+    async def _decode(self, conn, value) -> Optional[str]:
         try:
-            yield conn
-        finally:
-            await conn.close()
+            return self.codec.decode(value)
+        except UnknownDictionary:
+            # Trained by another process after this one loaded the dictionaries
+            await self._load_dictionaries(conn)
+            return self.codec.decode(value)
 
     async def create_process(self, meeting_id: str) -> str:
         """Create a new process entry or update existing one and return its ID"""
         now = datetime.utcnow().isoformat()
         
         async with self._get_connection() as conn:
-            # First try to update existing process
-            await conn.execute(
+            # A rerun resets the existing process but keeps its created_at
+            cursor = await conn.execute(
                 """
-                UPDATE summary_processes 
-                SET status = ?, updated_at = ?, start_time = ?, error = NULL, result = NULL
-                WHERE meeting_id = ?
+                INSERT INTO summary_processes (meeting_id, status, created_at, updated_at, start_time)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(meeting_id) DO UPDATE SET
+                    status = excluded.status, updated_at = excluded.updated_at,
+                    start_time = excluded.start_time, error = NULL, result = NULL
+                RETURNING meeting_id
                 """,
-                ("PENDING", now, now, meeting_id)
+                (meeting_id, "PENDING", now, now, now)
             )
-            
-            # If no rows were updated, insert a new one
-            if conn.total_changes == 0:
-                await conn.execute(
-                    "INSERT INTO summary_processes (meeting_id, status, created_at, updated_at, start_time) VALUES (?, ?, ?, ?, ?)",
-                    (meeting_id, "PENDING", now, now, now)
-                )
-            
+            row = await cursor.fetchone()
             await conn.commit()
         
-        return meeting_id
+        return row[0]
 
     async def update_process(self, meeting_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None, 
                            chunk_count: Optional[int] = None, processing_time: Optional[float] = None, 
@@ -58,7 +123,7 @@ class DatabaseManager:
             
             if result:
                 update_fields.append("result = ?")
-                params.append(json.dumps(result))
+                params.append(await self._encode(conn, "summary_processes", "result", json.dumps(result)))
             if error:
                 update_fields.append("error = ?")
                 params.append(error)
@@ -81,24 +146,51 @@ class DatabaseManager:
             await conn.commit()
 
     async def save_transcript(self, meeting_id: str, transcript_text: str, model: str, model_name: str, 
-                            chunk_size: int, overlap: int):
-        """Save transcript data"""
+                            chunk_size: int, overlap: int, upload_id: Optional[str] = None):
+        """Save transcript data; uploaded transcripts are referenced by ``upload_id`` instead of copied"""
         now = datetime.utcnow().isoformat()
         async with self._get_connection() as conn:
-            # First try to update existing transcript
+            transcript_text = await self._encode(conn, "transcript_chunks", "transcript_text", transcript_text)
+            # Replaces the transcript of an earlier run but keeps its meeting_name
             await conn.execute("""
-                UPDATE transcript_chunks 
-                SET transcript_text = ?, model = ?, model_name = ?, chunk_size = ?, overlap = ?, created_at = ?
-                WHERE meeting_id = ?
-            """, (transcript_text, model, model_name, chunk_size, overlap, now, meeting_id))
-            
-            # If no rows were updated, insert a new one
-            if conn.total_changes == 0:
-                await conn.execute("""
-                    INSERT INTO transcript_chunks (meeting_id, transcript_text, model, model_name, chunk_size, overlap, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (meeting_id, transcript_text, model, model_name, chunk_size, overlap, now))
-            
+                INSERT INTO transcript_chunks (meeting_id, transcript_text, model, model_name, chunk_size, overlap, created_at, upload_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(meeting_id) DO UPDATE SET
+                    transcript_text = excluded.transcript_text, model = excluded.model,
+                    model_name = excluded.model_name, chunk_size = excluded.chunk_size,
+                    overlap = excluded.overlap, created_at = excluded.created_at, upload_id = excluded.upload_id
+            """, (meeting_id, transcript_text, model, model_name, chunk_size, overlap, now, upload_id))
+            await conn.commit()
+
+    async def get_chunk_results(self, meeting_id: str) -> Dict[int, Dict]:
+        """Chunk summaries saved by the meeting's summary jobs, keyed by chunk index"""
+        async with self._get_connection() as conn:
+            cursor = await conn.execute(
+                "SELECT chunk_index, input_hash, summary FROM summary_chunk_results WHERE meeting_id = ?",
+                (meeting_id,),
+            )
+            return {
+                index: {"input_hash": input_hash, "summary": await self._decode(conn, summary)}
+                for index, input_hash, summary in await cursor.fetchall()
+            }
+
+    async def save_chunk_result(self, meeting_id: str, chunk_index: int, input_hash: str, summary: str):
+        """Save or replace the summary of one chunk"""
+        now = datetime.utcnow().isoformat()
+        async with self._get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO summary_chunk_results (meeting_id, chunk_index, input_hash, summary, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(meeting_id, chunk_index) DO UPDATE SET
+                    input_hash = excluded.input_hash, summary = excluded.summary, created_at = excluded.created_at
+            """, (meeting_id, chunk_index, input_hash,
+                  await self._encode(conn, "summary_chunk_results", "summary", summary), now))
+            await conn.commit()
+
+    async def delete_chunk_results(self, meeting_id: str):
+        """Delete the saved chunk summaries of a meeting"""
+        async with self._get_connection() as conn:
+            await conn.execute("DELETE FROM summary_chunk_results WHERE meeting_id = ?", (meeting_id,))
             await conn.commit()
 
     async def update_meeting_name(self, meeting_id: str, meeting_name: str):
@@ -131,32 +223,71 @@ class DatabaseManager:
                 WHERE t.meeting_id = ?
             """, (meeting_id,)) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    return dict(zip([col[0] for col in cursor.description], row))
-                return None
+                if not row:
+                    return None
+                data = dict(zip([col[0] for col in cursor.description], row))
+            data["transcript_text"] = await self._decode(conn, data["transcript_text"])
+            data["result"] = await self._decode(conn, data["result"])
+            return data
+
+    async def get_transcript_page(self, after: Optional[str], limit: int) -> List[Dict]:
+        """Meeting ids and models of stored transcripts ordered by meeting id, the ``limit`` after ``after``
+        (keyset paging); the transcripts themselves are read with ``get_stored_transcript``"""
+        async with self._get_connection() as conn:
+            async with conn.execute("""
+                SELECT meeting_id, model, model_name
+                FROM transcript_chunks
+                WHERE meeting_id > ?
+                ORDER BY meeting_id
+                LIMIT ?
+            """, (after or "", limit)) as cursor:
+                columns = [col[0] for col in cursor.description]
+                return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+    async def get_stored_transcript(self, meeting_id: str) -> Optional[Dict]:
+        """A meeting's stored transcript with its chunking, or None if there is none"""
+        async with self._get_connection() as conn:
+            async with conn.execute("""
+                SELECT meeting_id, transcript_text, model, model_name, chunk_size, overlap, upload_id
+                FROM transcript_chunks
+                WHERE meeting_id = ?
+            """, (meeting_id,)) as cursor:
+                row = await cursor.fetchone()
+                if not row:
+                    return None
+                data = dict(zip([col[0] for col in cursor.description], row))
+            data["transcript_text"] = await self._decode(conn, data["transcript_text"])
+            return data
+
+    async def count_transcripts(self, after: Optional[str] = None) -> int:
+        """Number of stored transcripts after meeting id ``after``"""
+        async with self._get_connection() as conn:
+            async with conn.execute(
+                "SELECT COUNT(*) FROM transcript_chunks WHERE meeting_id > ?", (after or "",)
+            ) as cursor:
+                return (await cursor.fetchone())[0]
 
     async def save_meeting(self, meeting_id: str, title: str):
         """Save or update a meeting"""
         try:
             async with self._get_connection() as conn:
+                # The existence check and the insert are one statement, so two
+                # requests saving the same meeting cannot both succeed
                 cursor = await conn.execute(
-                    "SELECT id FROM meetings WHERE id = ? OR title = ?",
-                    (meeting_id, title),
+                    """
+                    INSERT INTO meetings (id, title, created_at, updated_at)
+                    SELECT ?, ?, datetime('now'), datetime('now')
+                    WHERE NOT EXISTS (SELECT 1 FROM meetings WHERE id = ? OR title = ?)
+                    ON CONFLICT(id) DO NOTHING
+                    RETURNING id
+                    """,
+                    (meeting_id, title, meeting_id, title),
                 )
-                existing_meeting = await cursor.fetchone()
-
-                if not existing_meeting:
-                    await conn.execute(
-                        """
-                        INSERT INTO meetings (id, title, created_at, updated_at)
-                        VALUES (?, ?, datetime('now'), datetime('now'))
-                        """,
-                        (meeting_id, title),
-                    )
-                else:
-                    raise Exception(f"Meeting with ID {meeting_id} already exists")
-
+                inserted = await cursor.fetchone()
                 await conn.commit()
+
+                if not inserted:
+                    raise Exception(f"Meeting with ID {meeting_id} already exists")
                 return True
         except Exception as e:
             logger.error(f"Error saving meeting: {str(e)}")
@@ -172,7 +303,8 @@ class DatabaseManager:
                         meeting_id, transcript, timestamp, summary, action_items, key_points
                     ) VALUES (?, ?, ?, ?, ?, ?)
                     """,
-                    (meeting_id, transcript, timestamp, summary, action_items, key_points),
+                    (meeting_id, await self._encode(conn, "transcripts", "transcript", transcript), timestamp,
+                     summary, action_items, key_points),
                 )
 
                 await conn.commit()
@@ -211,7 +343,7 @@ class DatabaseManager:
                     'updated_at': meeting[3],
                     'transcripts': [{
                         'id': meeting_id,
-                        'text': transcript[0],
+                        'text': await self._decode(conn, transcript[0]),
                         'timestamp': transcript[1]
                     } for transcript in transcripts]
                 }
@@ -254,6 +386,7 @@ class DatabaseManager:
                 
                 # Delete from summary_processes
                 await conn.execute("DELETE FROM summary_processes WHERE meeting_id = ?", (meeting_id,))
+                await conn.execute("DELETE FROM summary_chunk_results WHERE meeting_id = ?", (meeting_id,))
                 
                 # Delete from transcripts
                 await conn.execute("DELETE FROM transcripts WHERE meeting_id = ?", (meeting_id,))
@@ -267,86 +400,86 @@ class DatabaseManager:
                 logger.error(f"Error deleting meeting {meeting_id}: {str(e)}")
                 return False
 
-    async def get_model_config(self):
-        """Get the current model configuration"""
+    async def _get_settings(self) -> Optional[Dict]:
+        """The settings row, from memory unless the cache is due for a version check"""
+        cache = self._settings
+        if cache.version is not None and time.monotonic() - cache.checked_at < self.settings_cache_ttl:
+            return cache.settings
         async with self._get_connection() as conn:
-            cursor = await conn.execute("SELECT provider, model, whisperModel FROM settings")
+            # Read the version before the row, so a concurrent write is at worst
+            # cached under the old version and reloaded on the next check
+            cursor = await conn.execute("SELECT version FROM settings_version WHERE id = 1")
             row = await cursor.fetchone()
-            return dict(zip([col[0] for col in cursor.description], row)) if row else None
+            version = row[0] if row else 0
+            if version != cache.version:
+                cursor = await conn.execute("SELECT * FROM settings WHERE id = '1'")
+                row = await cursor.fetchone()
+                cache.settings = dict(zip([col[0] for col in cursor.description], row)) if row else None
+                cache.version = version
+        cache.checked_at = time.monotonic()
+        return cache.settings
+
+    async def _bump_settings_version(self, conn) -> None:
+        """Mark the settings as changed for every process; call before committing a settings write"""
+        await conn.execute("""
+            INSERT INTO settings_version (id, version) VALUES (1, 1)
+            ON CONFLICT(id) DO UPDATE SET version = version + 1
+        """)
+
+    def invalidate_settings(self) -> None:
+        """Drop the cached settings so the next read, through any manager of this file, goes to the database"""
+        self._settings.settings = None
+        self._settings.version = None
+
+    async def get_model_config(self):
+        """Get the current model configuration"""
+        settings = await self._get_settings()
+        if settings is None:
+            return None
+        return {key: settings[key] for key in ("provider", "model", "whisperModel")}
 
     async def save_model_config(self, provider: str, model: str, whisperModel: str):
         """Save the model configuration"""
         async with self._get_connection() as conn:
-            # Check if the configuration already exists
-            cursor = await conn.execute("SELECT id FROM settings")
-            existing_config = await cursor.fetchone()
-            if existing_config:
-                # Update existing configuration
-                await conn.execute("""
-                    UPDATE settings 
-                    SET provider = ?, model = ?, whisperModel = ?
-                    WHERE id = '1'    
-                """, (provider, model, whisperModel))
-            else:
-                # Insert new configuration
-                await conn.execute("""
-                    INSERT INTO settings (id, provider, model, whisperModel)
-                    VALUES (?, ?, ?, ?)
-                """, ('1', provider, model, whisperModel))
+            # The API key columns of an existing configuration are kept
+            await conn.execute("""
+                INSERT INTO settings (id, provider, model, whisperModel)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    provider = excluded.provider, model = excluded.model, whisperModel = excluded.whisperModel
+            """, ('1', provider, model, whisperModel))
+            await self._bump_settings_version(conn)
             await conn.commit()
+        self.invalidate_settings()
 
+    def _api_key_column(self, provider: str) -> str:
+        if provider not in API_KEY_COLUMNS:
+            raise ValueError(f"Invalid provider: {provider}")
+        return API_KEY_COLUMNS[provider]
 
     async def save_api_key(self, api_key: str, provider: str):
         """Save the API key"""
-        provider_list = ["openai", "claude", "groq", "ollama"]
-        if provider not in provider_list:
-            raise ValueError(f"Invalid provider: {provider}")
-        if provider == "openai":
-            api_key_name = "openaiApiKey"
-        elif provider == "claude":
-            api_key_name = "anthropicApiKey"
-        elif provider == "groq":
-            api_key_name = "groqApiKey"
-        elif provider == "ollama":
-            api_key_name = "ollamaApiKey"
+        api_key_name = self._api_key_column(provider)
         async with self._get_connection() as conn:
             await conn.execute(f"UPDATE settings SET {api_key_name} = ? WHERE id = '1'", (api_key,))
+            await self._bump_settings_version(conn)
             await conn.commit()
+        self.invalidate_settings()
 
     async def get_api_key(self, provider: str):
         """Get the API key"""
-        provider_list = ["openai", "claude", "groq", "ollama"]
-        if provider not in provider_list:
-            raise ValueError(f"Invalid provider: {provider}")
-        if provider == "openai":
-            api_key_name = "openaiApiKey"
-        elif provider == "claude":
-            api_key_name = "anthropicApiKey"
-        elif provider == "groq":
-            api_key_name = "groqApiKey"
-        elif provider == "ollama":
-            api_key_name = "ollamaApiKey"
-        async with self._get_connection() as conn:
-            cursor = await conn.execute(f"SELECT {api_key_name} FROM settings WHERE id = '1'")
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        api_key_name = self._api_key_column(provider)
+        settings = await self._get_settings()
+        return settings[api_key_name] if settings else None
         
     async def delete_api_key(self, provider: str):
         """Delete the API key"""
-        provider_list = ["openai", "claude", "groq", "ollama"]
-        if provider not in provider_list:
-            raise ValueError(f"Invalid provider: {provider}")
-        if provider == "openai":
-            api_key_name = "openaiApiKey"
-        elif provider == "claude":
-            api_key_name = "anthropicApiKey"
-        elif provider == "groq":
-            api_key_name = "groqApiKey"
-        elif provider == "ollama":
-            api_key_name = "ollamaApiKey"
+        api_key_name = self._api_key_column(provider)
         async with self._get_connection() as conn:
             await conn.execute(f"UPDATE settings SET {api_key_name} = NULL WHERE id = '1'")
+            await self._bump_settings_version(conn)
             await conn.commit()
+        self.invalidate_settings()
 
     async def create_user(self, username: str, hashed_password: str, role: str):
         """Create or update a user"""
@@ -396,6 +529,59 @@ class DatabaseManager:
                 (username,)
             )
             await conn.commit()
-            
-   
 
+    async def create_upload_session(self, upload_id: str, kind: str, size: int, sha256: Optional[str] = None,
+                                    filename: Optional[str] = None, meeting_id: Optional[str] = None):
+        """Create a chunked upload session"""
+        now = datetime.utcnow().isoformat()
+        async with self._get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO upload_sessions (id, kind, filename, meeting_id, size, sha256, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, 'open', ?, ?)
+            """, (upload_id, kind, filename, meeting_id, size, sha256, now, now))
+            await conn.commit()
+
+    async def get_upload_session(self, upload_id: str):
+        """Get an upload session, or None if it does not exist"""
+        async with self._get_connection() as conn:
+            cursor = await conn.execute("SELECT * FROM upload_sessions WHERE id = ?", (upload_id,))
+            row = await cursor.fetchone()
+            return dict(zip([col[0] for col in cursor.description], row)) if row else None
+
+    async def save_upload_part(self, upload_id: str, offset: int, size: int, sha256: str):
+        """Record a stored part; re-sending the same range replaces it"""
+        now = datetime.utcnow().isoformat()
+        async with self._get_connection() as conn:
+            await conn.execute("""
+                INSERT INTO upload_parts (upload_id, offset, size, sha256) VALUES (?, ?, ?, ?)
+                ON CONFLICT(upload_id, offset) DO UPDATE SET size = excluded.size, sha256 = excluded.sha256
+            """, (upload_id, offset, size, sha256))
+            await conn.execute("UPDATE upload_sessions SET updated_at = ? WHERE id = ?", (now, upload_id))
+            await conn.commit()
+
+    async def get_upload_parts(self, upload_id: str):
+        """Get the stored parts of an upload ordered by offset"""
+        async with self._get_connection() as conn:
+            cursor = await conn.execute(
+                "SELECT offset, size, sha256 FROM upload_parts WHERE upload_id = ? ORDER BY offset",
+                (upload_id,)
+            )
+            rows = await cursor.fetchall()
+            return [{"offset": row[0], "size": row[1], "sha256": row[2]} for row in rows]
+
+    async def complete_upload_session(self, upload_id: str, sha256: str):
+        """Mark an upload as complete with the verified hash of its content"""
+        now = datetime.utcnow().isoformat()
+        async with self._get_connection() as conn:
+            await conn.execute(
+                "UPDATE upload_sessions SET status = 'complete', sha256 = ?, updated_at = ? WHERE id = ?",
+                (sha256, now, upload_id)
+            )
+            await conn.commit()
+
+    async def delete_upload_session(self, upload_id: str):
+        """Delete an upload session and its part records"""
+        async with self._get_connection() as conn:
+            await conn.execute("DELETE FROM upload_parts WHERE upload_id = ?", (upload_id,))
+            await conn.execute("DELETE FROM upload_sessions WHERE id = ?", (upload_id,))
+            await conn.commit()
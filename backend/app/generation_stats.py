@@ -0,0 +1,137 @@
+"""Generation calls and retries of the summary jobs, per model.
+
+The summary agent only has the result tool, so each chunk should take one
+generation; every extra one is a retry after the model's output failed to
+validate, and its tokens are wasted. :class:`CountingModel` wraps the
+pydantic-ai model of a job and records the usage of every request, and
+:class:`GenerationStats` turns those into per-chunk counts.
+
+Models that report it (Ollama) also give the time spent loading the model
+into memory apart from the time spent generating, in ``usage.details``.
+
+A job's counts are stored in its metadata under ``generation``; the
+totals per model are kept in :data:`model_stats` and exported as
+``summary_*`` counters on ``/metrics``.
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
+from typing import Dict, List
+
+from pydantic_ai.models import AgentModel, Model
+
+from instrumentation import registry
+
+
+class _CountingAgentModel(AgentModel):
+    def __init__(self, wrapped: AgentModel, usages: List):
+        self.wrapped = wrapped
+        self.usages = usages
+
+    async def request(self, messages, model_settings):
+        response, usage = await self.wrapped.request(messages, model_settings)
+        self.usages.append(usage)
+        return response, usage
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings):
+        async with self.wrapped.request_stream(messages, model_settings) as response:
+            try:
+                yield response
+            finally:
+                self.usages.append(response.usage())
+
+
+class CountingModel(Model):
+    """A pydantic-ai model that records the usage of each request in ``usages``."""
+
+    def __init__(self, wrapped: Model):
+        self.wrapped = wrapped
+        self.usages: List = []
+
+    async def agent_model(self, *, function_tools, allow_text_result, result_tools) -> AgentModel:
+        agent_model = await self.wrapped.agent_model(
+            function_tools=function_tools, allow_text_result=allow_text_result, result_tools=result_tools
+        )
+        return _CountingAgentModel(agent_model, self.usages)
+
+    def name(self) -> str:
+        return self.wrapped.name()
+
+    @property
+    def repaired(self) -> int:
+        """Outputs the wrapped model repaired instead of having them retried, if it does that."""
+        return getattr(self.wrapped, "repaired", 0)
+
+
+def _tokens(usage) -> int:
+    if usage.total_tokens is not None:
+        return usage.total_tokens
+    return (usage.request_tokens or 0) + (usage.response_tokens or 0)
+
+
+@dataclass
+class GenerationStats:
+    """Generation calls of one job, or of every job of a model."""
+
+    chunks: int = 0
+    failed_chunks: int = 0
+    generations: int = 0
+    retries: int = 0
+    repaired: int = 0
+    wasted_tokens: int = 0
+    # Reported by the model server, when it does
+    load_seconds: float = 0.0
+    generation_seconds: float = 0.0
+
+    @property
+    def generations_per_chunk(self) -> float:
+        return self.generations / self.chunks if self.chunks else 0.0
+
+    def add_chunk(self, usages: List, succeeded: bool) -> None:
+        """Count one chunk from the usage of the requests it took, in order."""
+        self.chunks += 1
+        self.generations += len(usages)
+        if succeeded:
+            self.retries += max(0, len(usages) - 1)
+            wasted = usages[:-1]
+        else:
+            self.failed_chunks += 1
+            self.retries += len(usages)
+            wasted = usages
+        self.wasted_tokens += sum(_tokens(usage) for usage in wasted)
+        for usage in usages:
+            details = usage.details or {}
+            self.load_seconds += details.get("load_ms", 0) / 1000
+            self.generation_seconds += details.get("generation_ms", 0) / 1000
+
+    def merge(self, other: "GenerationStats") -> None:
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+    def as_dict(self) -> Dict:
+        stats = {field.name: getattr(self, field.name) for field in fields(self)}
+        stats["load_seconds"] = round(self.load_seconds, 3)
+        stats["generation_seconds"] = round(self.generation_seconds, 3)
+        stats["generations_per_chunk"] = round(self.generations_per_chunk, 3)
+        return stats
+
+
+# Totals of every job in this process, by model name ("provider:model")
+model_stats: Dict[str, GenerationStats] = {}
+
+
+def record_job(model: str, stats: GenerationStats) -> None:
+    """Add a finished job's counts to the model's totals and metrics."""
+    model_stats.setdefault(model, GenerationStats()).merge(stats)
+    for name, value, help_text in (
+        ("summary_chunks_total", stats.chunks, "Transcript chunks summarized"),
+        ("summary_generations_total", stats.generations, "LLM generations for summary chunks"),
+        ("summary_retries_total", stats.retries, "Summary generations retried after invalid output"),
+        ("summary_repaired_total", stats.repaired, "Invalid summary outputs repaired instead of retried"),
+        ("summary_wasted_tokens_total", stats.wasted_tokens, "Tokens of summary generations that were retried"),
+        ("summary_model_load_seconds_total", stats.load_seconds, "Time the model server spent loading the model"),
+        ("summary_generation_seconds_total", stats.generation_seconds,
+         "Time the model server spent generating summaries"),
+    ):
+        registry.inc(name, value, help_text=help_text, model=model)
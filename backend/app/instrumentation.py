@@ -0,0 +1,404 @@
+"""Opt-in runtime instrumentation for the API.
+
+Set ``ENABLE_INSTRUMENTATION=true`` to turn it on. When enabled it provides:
+
+* an event-loop lag monitor: a task that wakes up every ``LOOP_MONITOR_INTERVAL``
+  seconds and records how late it was woken;
+* a watchdog thread that notices when the loop has not ticked for longer
+  than ``SLOW_CALLBACK_THRESHOLD`` seconds and samples the loop thread's
+  stack while it is still blocked, so the offending synchronous code
+  (bcrypt, ``json.loads``, ``requests.post``...) shows up by name;
+* per-request phase timing (``db``, ``llm``, ``serialization``, ``auth``) via
+  the ``timed`` context manager, reported as histograms and as a
+  ``Server-Timing`` response header;
+* ``GET /metrics`` in Prometheus text format and ``GET /debug/slow-callbacks``
+  with the recorded stack samples.
+
+The two endpoints have no authentication, and the stack samples show the
+server's code and paths, so each is only mounted when asked for with
+``EXPOSE_METRICS=true`` or ``EXPOSE_DEBUG_ENDPOINTS=true``. Set them only
+where the port is not reachable from outside (or a proxy guards the paths).
+
+When disabled, ``timed`` is a no-op and nothing is installed.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))
+SLOW_CALLBACK_THRESHOLD = float(os.getenv("SLOW_CALLBACK_THRESHOLD", "0.1"))
+MAX_SLOW_CALLBACKS = 100
+# Unauthenticated endpoints, off unless the deployment keeps them private
+EXPOSE_METRICS = os.getenv("EXPOSE_METRICS", "false").lower() == "true"
+EXPOSE_DEBUG_ENDPOINTS = os.getenv("EXPOSE_DEBUG_ENDPOINTS", "false").lower() == "true"
+
+# Set by ``install``; keeps ``timed`` free when instrumentation is off
+_active = False
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def enabled() -> bool:
+    return os.getenv("ENABLE_INSTRUMENTATION", "false").lower() == "true"
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Minimal thread-safe metrics store rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def _declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._help:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, help_text: str = "", **labels) -> None:
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            series = self._values.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, help_text: str = "", **labels) -> None:
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels) -> None:
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            # Layout: one count per bucket, then +Inf count, then sum
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def get(self, name: str, **labels) -> Optional[float]:
+        with self._lock:
+            return self._values.get(name, {}).get(_label_key(labels))
+
+    def histogram_count(self, name: str, **labels) -> float:
+        with self._lock:
+            state = self._histograms.get(name, {}).get(_label_key(labels))
+            return state[-2] if state else 0.0
+
+    def histogram_sum(self, name: str, **labels) -> float:
+        with self._lock:
+            state = self._histograms.get(name, {}).get(_label_key(labels))
+            return state[-1] if state else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._help.clear()
+            self._values.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._help):
+                kind, help_text = self._help[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for key, state in sorted(self._histograms.get(name, {}).items()):
+                        for bound, count in zip(self.buckets, state):
+                            labels = _format_labels(key, (("le", repr(bound)),))
+                            lines.append(f"{name}_bucket{labels} {_format_value(count)}")
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {_format_value(state[-2])}")
+                        lines.append(f"{name}_count{_format_labels(key)} {_format_value(state[-2])}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {_format_value(state[-1])}")
+                else:
+                    for key, value in sorted(self._values.get(name, {}).items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+
+class timed:
+    """Time a phase of work (``db``, ``llm``, ``serialization``...).
+
+    Usable as ``with timed("db"):`` or ``async with timed("llm"):``. The
+    elapsed time is added to the current request's phase totals, if any, and
+    to the ``app_phase_duration_seconds`` histogram.
+    """
+
+    __slots__ = ("phase", "_start")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+        self._start = 0.0
+
+    def __enter__(self):
+        if _active:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if _active:
+            elapsed = time.perf_counter() - self._start
+            phases = _request_phases.get()
+            if phases is not None:
+                phases[self.phase] = phases.get(self.phase, 0.0) + elapsed
+            registry.observe(
+                "app_phase_duration_seconds", elapsed,
+                help_text="Time spent in instrumented phases of work", phase=self.phase,
+            )
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
+
+
+class SlowCallback:
+    """A period during which the event loop did not tick, with a stack sample."""
+
+    def __init__(self, started_at: float, stack: List[str]):
+        self.started_at = started_at
+        self.wall_time = time.time()
+        self.duration: Optional[float] = None
+        self.stack = stack
+
+    def as_dict(self) -> Dict:
+        return {
+            "timestamp": self.wall_time,
+            "duration": self.duration,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """Measure event-loop lag and sample stacks of blocking callbacks."""
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = SLOW_CALLBACK_THRESHOLD,
+                 metrics: MetricsRegistry = registry):
+        self.interval = interval
+        self.threshold = threshold
+        self.metrics = metrics
+        self.slow_callbacks: Deque[SlowCallback] = deque(maxlen=MAX_SLOW_CALLBACKS)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._heartbeat = time.monotonic()
+            self.metrics.observe("event_loop_lag_seconds", lag, help_text="Delay in waking a periodic event loop task")
+            self.metrics.set("event_loop_last_lag_seconds", lag, help_text="Most recent event loop lag sample")
+
+    def _watch(self) -> None:
+        current: Optional[SlowCallback] = None
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            stalled_for = time.monotonic() - self._heartbeat - self.interval
+            if stalled_for > self.threshold and current is None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = traceback.format_stack(frame) if frame is not None else []
+                current = SlowCallback(self._heartbeat + self.interval, stack)
+                self.slow_callbacks.append(current)
+            elif stalled_for <= self.threshold and current is not None:
+                current.duration = self._heartbeat - current.started_at
+                self.metrics.inc("event_loop_slow_callbacks_total",
+                                 help_text="Number of times the event loop was blocked past the threshold")
+                self.metrics.observe("event_loop_slow_callback_seconds", current.duration,
+                                     help_text="Duration of event loop stalls past the threshold")
+                logger.warning(
+                    f"Event loop blocked for {current.duration:.3f}s in:\n{''.join(current.stack[-6:])}"
+                )
+                current = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+class TimingMiddleware:
+    """ASGI middleware recording request latency and per-phase timings.
+
+    A request ends when the last body message is sent. Background tasks run
+    after that, inside the same app call, and are recorded apart from it
+    (``http_background_seconds`` and ``http_background_phase_seconds``).
+    """
+
+    # Work after the response shorter than this is just the app returning
+    background_min_seconds = 0.001
+
+    def __init__(self, app, metrics: MetricsRegistry = registry):
+        self.app = app
+        self.metrics = metrics
+
+    def _observe_phases(self, name: str, help_text: str, path: str, phases: Dict[str, float]) -> None:
+        for phase, value in phases.items():
+            self.metrics.observe(name, value, help_text=help_text, route=path, phase=phase)
+
+    def _observe_request(self, scope, status: int, elapsed: float, phases: Dict[str, float]) -> None:
+        path = getattr(scope.get("route"), "path", "unmatched")
+        self.metrics.observe(
+            "http_request_duration_seconds", elapsed,
+            help_text="HTTP request latency", method=scope["method"], route=path, status=str(status),
+        )
+        self._observe_phases("http_request_phase_seconds", "Time spent per phase within an HTTP request",
+                             path, phases)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        start = time.perf_counter()
+        status = 500
+        responded_at: Optional[float] = None
+
+        async def send_with_timing(message):
+            nonlocal status, responded_at
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if phases:
+                    server_timing = ", ".join(f"{name};dur={value * 1000:.1f}" for name, value in phases.items())
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded_at = time.perf_counter()
+                self._observe_request(scope, status, responded_at - start, phases)
+                # Phases timed from here on belong to the background tasks
+                phases.clear()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_phases.reset(token)
+            if responded_at is None:
+                self._observe_request(scope, status, time.perf_counter() - start, phases)
+            else:
+                elapsed = time.perf_counter() - responded_at
+                if phases or elapsed >= self.background_min_seconds:
+                    path = getattr(scope.get("route"), "path", "unmatched")
+                    self.metrics.observe(
+                        "http_background_seconds", elapsed,
+                        help_text="Time spent in background tasks after the response was sent", route=path,
+                    )
+                    self._observe_phases("http_background_phase_seconds",
+                                         "Time spent per phase within background tasks", path, phases)
+
+
+metrics_router = APIRouter()
+debug_router = APIRouter()
+monitor: Optional[LoopMonitor] = None
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@debug_router.get("/debug/slow-callbacks", include_in_schema=False)
+async def slow_callbacks():
+    return [item.as_dict() for item in (monitor.slow_callbacks if monitor else [])]
+
+
+def install(app: FastAPI) -> None:
+    """Attach the middleware, endpoints and loop monitor to an application."""
+    global _active, monitor
+    _active = True
+    monitor = LoopMonitor()
+    app.add_middleware(TimingMiddleware)
+    if EXPOSE_METRICS:
+        app.include_router(metrics_router)
+    if EXPOSE_DEBUG_ENDPOINTS:
+        app.include_router(debug_router)
+
+    # Wrap the app's lifespan so the monitor runs alongside whatever it manages
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app_: FastAPI):
+        monitor.start()
+        try:
+            async with app_lifespan(app_) as state:
+                yield state
+        finally:
+            await monitor.stop()
+
+    app.router.lifespan_context = lifespan
@@ -1,19 +1,40 @@
 import requests
+from typing import Optional
 from urllib.parse import urlencode
 
 from ..config import FeatureFlags
+from .http import get_http_client
+from .tokens import OAuthToken, TokenStore
 
 class OAuthConnector:
-    """Base class for OAuth based connectors."""
+    """Base class for OAuth based connectors.
+
+    The ``*_async`` methods go through the shared pooled HTTP client and,
+    given an ``account``, take the access token from ``token_store``,
+    refreshing it shortly before it expires.
+    """
+    name: str = ""
+    display_name: str = ""
     auth_base_url: str = ""
     token_url: str = ""
     api_base_url: str = ""
 
-    def __init__(self, client_id: str, client_secret: str, redirect_uri: str, *, enabled: bool):
+    def __init__(self, client_id: str, client_secret: str, redirect_uri: str, *, enabled: bool,
+                 token_store: Optional[TokenStore] = None, http_client=None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.enabled = enabled
+        self.token_store = token_store if token_store is not None else TokenStore()
+        self._http_client = http_client
+
+    @property
+    def http_client(self):
+        return self._http_client if self._http_client is not None else get_http_client()
+
+    def check_enabled(self) -> None:
+        if not self.enabled:
+            raise RuntimeError(f"{self.display_name} integration disabled")
 
     def authorization_url(self, scope: str) -> str:
         params = {
@@ -24,17 +45,70 @@ class OAuthConnector:
         }
         return f"{self.auth_base_url}?{urlencode(params)}"
 
-    def exchange_code_for_token(self, code: str) -> dict:
-        data = {
+    def _code_grant(self, code: str) -> dict:
+        return {
             "grant_type": "authorization_code",
             "code": code,
             "redirect_uri": self.redirect_uri,
             "client_id": self.client_id,
             "client_secret": self.client_secret,
         }
-        response = requests.post(self.token_url, data=data)
+
+    def exchange_code_for_token(self, code: str) -> dict:
+        response = requests.post(self.token_url, data=self._code_grant(code))
         response.raise_for_status()
         return response.json()
 
+    async def exchange_code_for_token_async(self, code: str) -> dict:
+        response = await self.http_client.post(self.token_url, data=self._code_grant(code))
+        response.raise_for_status()
+        return response.json()
+
+    async def refresh_token_async(self, token: OAuthToken) -> OAuthToken:
+        data = {
+            "grant_type": "refresh_token",
+            "refresh_token": token.refresh_token,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }
+        response = await self.http_client.post(self.token_url, data=data)
+        response.raise_for_status()
+        return OAuthToken.from_response(response.json(), previous=token)
+
+    def token_key(self, account: str) -> str:
+        return f"{self.name}:{account}"
+
+    async def authorize_async(self, code: str, account: str) -> OAuthToken:
+        """Exchange an authorization code and keep the token for ``account``."""
+        token = OAuthToken.from_response(await self.exchange_code_for_token_async(code))
+        await self.token_store.set(self.token_key(account), token)
+        return token
+
+    async def access_token(self, account: str, stale: Optional[str] = None) -> str:
+        token = await self.token_store.get_token(self.token_key(account), self.refresh_token_async, stale=stale)
+        return token.access_token
+
+    def join_url(self, meeting_id: str) -> str:
+        raise NotImplementedError
+
     def join_meeting(self, meeting_id: str, token: str) -> dict:
         raise NotImplementedError
+
+    async def join_meeting_async(self, meeting_id: str, token: Optional[str] = None, *,
+                                 account: Optional[str] = None) -> dict:
+        """Join with an explicit ``token`` or with the cached token of ``account``.
+
+        If the provider rejects a cached token it is refreshed and the join
+        retried once.
+        """
+        self.check_enabled()
+        if token is None:
+            if account is None:
+                raise ValueError("join_meeting_async needs a token or an account")
+            token = await self.access_token(account)
+        response = await self.http_client.post(self.join_url(meeting_id), headers={"Authorization": f"Bearer {token}"})
+        if response.status_code == 401 and account is not None:
+            token = await self.access_token(account, stale=token)
+            response = await self.http_client.post(self.join_url(meeting_id), headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,51 @@
+"""Pooled HTTP client shared by the async connector calls.
+
+Every connector coroutine goes through one ``httpx.AsyncClient`` so that
+token exchanges and joins to the same provider reuse keep-alive connections
+instead of paying a TCP and TLS handshake per request. The client's
+connections belong to the event loop that opened them, so a new client is
+made when it is used from another loop (another test, or the app started
+again in the same process); ``main`` closes it on shutdown.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+import httpx
+
+CONNECTOR_MAX_CONNECTIONS = int(os.getenv("CONNECTOR_MAX_CONNECTIONS", "100"))
+CONNECTOR_MAX_KEEPALIVE = int(os.getenv("CONNECTOR_MAX_KEEPALIVE", "20"))
+# Seconds
+CONNECTOR_TIMEOUT = float(os.getenv("CONNECTOR_TIMEOUT", "10"))
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=CONNECTOR_MAX_CONNECTIONS,
+            max_keepalive_connections=CONNECTOR_MAX_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(CONNECTOR_TIMEOUT),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the running loop's shared client, creating it on first use."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # A client left by a finished loop cannot be closed from this one; its sockets are dropped
+        _client, _client_loop = create_http_client(), loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    client, loop = _client, _client_loop
+    _client = _client_loop = None
+    if client is not None and loop is asyncio.get_running_loop():
+        await client.aclose()
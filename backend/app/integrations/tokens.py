@@ -0,0 +1,121 @@
+"""OAuth token cache with proactive refresh.
+
+:class:`TokenStore` keeps the current token of every connected account.
+``get_token`` hands out the cached access token and refreshes it once it is
+within ``refresh_margin`` seconds of expiring, so a join never waits for an
+OAuth round trip on a token that is about to lapse. Concurrent callers that
+find the same token expiring share one refresh request.
+
+Tokens live in this process unless a ``StateStore`` is given (see
+``state_store``), in which case they are shared with the other workers.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+# Refresh tokens that expire within this many seconds
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+
+TOKEN_NAMESPACE = "oauth_tokens"
+
+
+@dataclass
+class OAuthToken:
+    access_token: str
+    refresh_token: Optional[str] = None
+    # Seconds since the epoch, None if the provider gave no expiry
+    expires_at: Optional[float] = None
+    token_type: str = "Bearer"
+    scope: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, payload: Dict, previous: Optional["OAuthToken"] = None) -> "OAuthToken":
+        """Build a token from a token endpoint response.
+
+        Providers may leave the refresh token out of a refresh response; the
+        previous one then stays valid.
+        """
+        expires_in = payload.get("expires_in")
+        return cls(
+            access_token=payload["access_token"],
+            refresh_token=payload.get("refresh_token") or (previous.refresh_token if previous else None),
+            expires_at=time.time() + float(expires_in) if expires_in is not None else None,
+            token_type=payload.get("token_type", "Bearer"),
+            scope=payload.get("scope") or (previous.scope if previous else None),
+        )
+
+    def expires_within(self, seconds: float) -> bool:
+        return self.expires_at is not None and self.expires_at - time.time() <= seconds
+
+
+Refresher = Callable[[OAuthToken], Awaitable[OAuthToken]]
+
+
+class TokenStore:
+    """Current OAuth token per account key, e.g. ``"zoom:alice@example.com"``."""
+
+    def __init__(self, state=None, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.state = state
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self._tokens: Dict[str, OAuthToken] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str) -> Optional[OAuthToken]:
+        if self.state is None:
+            return self._tokens.get(key)
+        value = await self.state.get(TOKEN_NAMESPACE, key)
+        return OAuthToken(**value) if value is not None else None
+
+    async def set(self, key: str, token: OAuthToken) -> None:
+        if self.state is None:
+            self._tokens[key] = token
+        else:
+            await self.state.set(TOKEN_NAMESPACE, key, asdict(token))
+
+    async def delete(self, key: str) -> None:
+        if self.state is None:
+            self._tokens.pop(key, None)
+        else:
+            await self.state.delete(TOKEN_NAMESPACE, key)
+
+    async def get_token(self, key: str, refresh: Refresher, stale: Optional[str] = None) -> OAuthToken:
+        """Return a usable token for ``key``, refreshing it if it expires soon.
+
+        Pass the access token a provider just rejected as ``stale`` to force a
+        refresh; it is skipped if another caller already replaced that token.
+        Raises ``LookupError`` if the account was never authorized.
+        """
+        token = await self.get(key)
+        if token is None:
+            raise LookupError(f"No OAuth token for {key}")
+        if stale is None and not token.expires_within(self.refresh_margin):
+            return token
+        if stale is not None and token.access_token != stale:
+            return token
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, refresh, stale))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller giving up must not cancel the refresh for the others
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: str, refresh: Refresher, stale: Optional[str]) -> OAuthToken:
+        # Another worker may have refreshed it meanwhile
+        token = await self.get(key)
+        if token is None:
+            raise LookupError(f"No OAuth token for {key}")
+        fresh = token.access_token != stale if stale is not None else not token.expires_within(self.refresh_margin)
+        if fresh:
+            return token
+        if not token.refresh_token:
+            raise LookupError(f"OAuth token for {key} expired and has no refresh token")
+        new_token = await refresh(token)
+        self.refreshes += 1
+        await self.set(key, new_token)
+        return new_token
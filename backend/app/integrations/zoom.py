@@ -1,22 +1,29 @@
 import requests
+from typing import Optional
 
 from .base import OAuthConnector
+from .tokens import TokenStore
 from ..config import FeatureFlags
 
 class ZoomConnector(OAuthConnector):
     """Zoom integration using OAuth"""
+    name = "zoom"
+    display_name = "Zoom"
     auth_base_url = "https://zoom.us/oauth/authorize"
     token_url = "https://zoom.us/oauth/token"
     api_base_url = "https://api.zoom.us/v2"
 
-    def __init__(self, client_id: str, client_secret: str, redirect_uri: str):
-        super().__init__(client_id, client_secret, redirect_uri, enabled=FeatureFlags.zoom_enabled())
+    def __init__(self, client_id: str, client_secret: str, redirect_uri: str, *,
+                 token_store: Optional[TokenStore] = None, http_client=None):
+        super().__init__(client_id, client_secret, redirect_uri, token_store=token_store, http_client=http_client,
+                         enabled=FeatureFlags.zoom_enabled())
+
+    def join_url(self, meeting_id: str) -> str:
+        return f"{self.api_base_url}/meetings/{meeting_id}/join"
 
     def join_meeting(self, meeting_id: str, token: str) -> dict:
-        if not self.enabled:
-            raise RuntimeError("Zoom integration disabled")
+        self.check_enabled()
         headers = {"Authorization": f"Bearer {token}"}
-        url = f"{self.api_base_url}/meetings/{meeting_id}/join"
-        response = requests.post(url, headers=headers)
+        response = requests.post(self.join_url(meeting_id), headers=headers)
         response.raise_for_status()
         return response.json()
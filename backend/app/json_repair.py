@@ -0,0 +1,161 @@
+"""Tolerant parsing of the JSON that small models produce.
+
+Local models often return JSON that is almost right: wrapped in a Markdown
+code fence or a sentence of prose, with trailing commas, Python literals,
+raw newlines in strings, or cut off when the model hits its output limit.
+Each of those used to cost a full retry generation. :func:`repair_json`
+fixes them; :func:`fill_required` then adds required properties that are
+missing, as empty values, following a JSON schema.
+
+Anything that cannot be repaired still raises ``ValueError``, so the caller
+can fall back to asking the model again.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```\s*$")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _scan(text: str) -> str:
+    """One pass over ``text`` fixing what is wrong outside and inside strings.
+
+    Removes trailing commas and comments, maps Python literals to JSON,
+    escapes control characters in strings and closes whatever is still
+    open at the end, dropping a dangling key or comma first.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char in "\r\t":
+                char = "\\r" if char == "\r" else "\\t"
+            out.append(char)
+            i += 1
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            # A comma right before a closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+            continue
+        else:
+            word = re.match(r"[A-Za-z]+", text[i:])
+            if word and word.group() in _PYTHON_LITERALS:
+                out.append(_PYTHON_LITERALS[word.group()])
+                i += len(word.group())
+                continue
+        out.append(char)
+        i += 1
+
+    if escaped:
+        out.pop()
+    if in_string:
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    # Cut off in the middle of an object member: drop the key that has no value
+    repaired = re.sub(r'"(?:[^"\\]|\\.)*"\s*:\s*$', "", repaired)
+    if stack and stack[-1] == "}":
+        repaired = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"$', r"\1", repaired)
+    repaired = re.sub(r",\s*$", "", repaired)
+    return repaired + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Any:
+    """Parse ``text`` as JSON, repairing the common mistakes of small models.
+
+    Raises ``ValueError`` when no JSON value can be recovered.
+    """
+    text = _FENCE.sub("", text.strip())
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("no JSON object in the model output")
+    text = text[start:]
+    decoder = json.JSONDecoder()
+    try:
+        # Also drops anything the model wrote after the object
+        return decoder.raw_decode(text)[0]
+    except json.JSONDecodeError:
+        pass
+    try:
+        return decoder.raw_decode(_scan(text))[0]
+    except json.JSONDecodeError as e:
+        raise ValueError(f"could not repair the model output: {e}") from e
+
+
+def _resolve(schema: Dict, defs: Dict) -> Dict:
+    ref = schema.get("$ref")
+    if ref and ref.startswith("#/$defs/"):
+        return defs.get(ref[len("#/$defs/"):], {})
+    return schema
+
+
+def _empty(schema: Dict, defs: Dict) -> Any:
+    schema = _resolve(schema, defs)
+    kind = schema.get("type")
+    if kind == "array":
+        return []
+    if kind == "object":
+        return fill_required({}, schema, defs)
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return schema.get("default", "")
+
+
+def fill_required(value: Any, schema: Dict, defs: Optional[Dict] = None) -> Any:
+    """Add the required properties missing from ``value`` (recursively) as empty values."""
+    defs = schema.get("$defs", {}) if defs is None else defs
+    schema = _resolve(schema, defs)
+    if isinstance(value, dict) and schema.get("type") == "object":
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                value[name] = _empty(properties.get(name, {}), defs)
+        for name, item in value.items():
+            if name in properties:
+                value[name] = fill_required(item, properties[name], defs)
+    elif isinstance(value, list) and schema.get("type") == "array":
+        items = schema.get("items", {})
+        return [fill_required(item, items, defs) for item in value]
+    return value
+
+
+def inline_refs(schema: Any, defs: Optional[Dict] = None) -> Any:
+    """``schema`` with every ``$ref`` to ``$defs`` replaced by the definition it points to."""
+    if defs is None:
+        defs = schema.get("$defs", {}) if isinstance(schema, dict) else {}
+    if isinstance(schema, dict):
+        resolved = _resolve(schema, defs)
+        if resolved is not schema:
+            return inline_refs(resolved, defs)
+        return {key: inline_refs(item, defs) for key, item in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [inline_refs(item, defs) for item in schema]
+    return schema
@@ -1,32 +1,23 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Security
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
-import uvicorn
-from typing import Optional, List, Tuple
-
 """Application entry point for the FastAPI backend."""
+
+import asyncio
 import logging
-from dotenv import load_dotenv
-from db import DatabaseManager
-import json
-from threading import Lock
-from transcript_processor import TranscriptProcessor
-import time
-from tasks import generate_summary_task
 import os
+from contextlib import asynccontextmanager
 
-import uvicorn
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 
+import instrumentation
+import transcript_processor
+from cpu_pool import cpu_pool
+from integrations.http import close_http_client
+from ollama_lifecycle import lifecycle as ollama_lifecycle
 from auth import router as auth_router
-from db import DatabaseManager
-from routers import meetings
+from routers import meetings, uploads
 from schemas.meetings import AsyncSummaryRequest, SaveModelConfigRequest, TranscriptRequest
-from tasks import generate_summary_task
+from state_store import state_store
 
 
 load_dotenv()
@@ -44,18 +35,59 @@ console_handler.setFormatter(formatter)
 if not logger.handlers:
     logger.addHandler(console_handler)
 
+
+async def preload_model_provider() -> None:
+    """Import the configured provider's model module ahead of the first summary.
+
+    A local Ollama model is also loaded into memory, so the first summary does
+    not wait for it.
+    """
+    try:
+        model_config = await meetings.processor.db.get_model_config()
+        if not model_config:
+            return
+        # Importing a provider SDK takes up to a couple of seconds; keep it off the event loop
+        await asyncio.to_thread(transcript_processor.load_model_class, model_config["provider"])
+        logger.info(f"Preloaded model provider: {model_config['provider']}")
+        if model_config["provider"] == "ollama":
+            await ollama_lifecycle.preload(model_config["model"])
+    except Exception as e:
+        logger.warning(f"Could not preload model provider: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background once serving, and clean up on shutdown."""
+    warm_up = []
+    if os.getenv("PRELOAD_MODEL_PROVIDER", "true").lower() == "true":
+        warm_up.append(asyncio.create_task(preload_model_provider()))
+    if os.getenv("CPU_POOL_PRELOAD", "true").lower() == "true":
+        # Spawns the workers now rather than during the first large summary
+        warm_up.append(asyncio.create_task(cpu_pool.start()))
+    yield
+
+    logger.info("API shutting down, cleaning up resources")
+    for task in warm_up:
+        task.cancel()
+    await ollama_lifecycle.close()
+    await close_http_client()
+    # Waits for running merges; off the loop so other shutdown work can proceed
+    await asyncio.to_thread(cpu_pool.shutdown)
+    try:
+        meetings.processor.cleanup()
+        logger.info("Successfully cleaned up resources")
+    except Exception as e:  # pragma: no cover - best effort cleanup
+        logger.error(f"Error during cleanup: {str(e)}", exc_info=True)
+
+
 app = FastAPI(
     title="Meeting Summarizer API",
     description="API for processing and summarizing meeting transcripts",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-
-oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
-
 # Configure CORS with environment-based trusted origins
-allowed_origins = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()]
-
 allowed_origins = [
     origin.strip()
     for origin in os.getenv("ALLOWED_ORIGINS", "").split(",")
@@ -71,528 +103,23 @@ app.add_middleware(
     max_age=3600,
 )
 
-db = DatabaseManager()
-
-
-# Import authentication utilities
-from auth import (
-    router as auth_router,
-    get_current_active_user,
-    get_current_active_admin,
-    get_current_user,
-    User,
-)
+if instrumentation.enabled():
+    instrumentation.install(app)
 
 app.include_router(auth_router)
 app.include_router(meetings.router)
+app.include_router(uploads.router)
 
 # Expose processor for backwards compatibility with tests
 processor = meetings.processor
 process_transcript_background = meetings.process_transcript_background
-async_summary_results: dict[str, dict] = {}
-
-# New Pydantic models for meeting management
-class Transcript(BaseModel):
-    id: str
-    text: str
-    timestamp: str
-
-class MeetingResponse(BaseModel):
-    id: str
-    title: str
-
-class MeetingDetailsResponse(BaseModel):
-    id: str
-    title: str
-    created_at: str
-    updated_at: str
-    transcripts: List[Transcript]
-
-class MeetingTitleUpdate(BaseModel):
-    title: str
-
-
-class MeetingTitleRequest(BaseModel):
-class SaveMeetingTitleRequest(BaseModel):
-
-    meeting_id: str
-    title: str
-
-class DeleteMeetingRequest(BaseModel):
-    meeting_id: str
-
-class SaveTranscriptRequest(BaseModel):
-    meeting_title: str
-    transcripts: List[Transcript]
-
-class SaveModelConfigRequest(BaseModel):
-    provider: str
-    model: str
-    whisperModel: str
-    apiKey: Optional[str] = None
-
-class TranscriptRequest(BaseModel):
-    """Request model for transcript text"""
-    text: str
-    model: str
-    model_name: str
-    meeting_id: str
-    chunk_size: Optional[int] = 5000
-    overlap: Optional[int] = 1000
-
-
-class AsyncSummaryRequest(BaseModel):
-    """Request model for asynchronous summary generation"""
-    text: str
-
-class SummaryProcessor:
-    """Handles the processing of summaries in a thread-safe way"""
-    def __init__(self):
-        try:
-            self.db = DatabaseManager()
-
-            logger.info("Initializing SummaryProcessor components")
-            self.transcript_processor = TranscriptProcessor()
-            logger.info("SummaryProcessor initialized successfully (core components)")
-        except Exception as e:
-            logger.error(f"Failed to initialize SummaryProcessor: {str(e)}", exc_info=True)
-            raise
-
-    async def process_transcript(
-        self,
-        text: str,
-        model: str,
-        model_name: str,
-        chunk_size: int = 5000,
-        overlap: int = 1000,
-    ) -> Tuple[int, List[str]]:
-        """Process a transcript text"""
-        try:
-            if not text:
-                raise ValueError("Empty transcript text provided")
-
-            # Validate chunk_size and overlap
-            if chunk_size <= 0:
-                raise ValueError("chunk_size must be positive")
-            if overlap < 0:
-                raise ValueError("overlap must be non-negative")
-            if overlap >= chunk_size:
-                overlap = chunk_size - 1  # Ensure overlap is less than chunk_size
-
-            # Ensure step size is positive
-            step_size = chunk_size - overlap
-            if step_size <= 0:
-                chunk_size = overlap + 1  # Adjust chunk_size to ensure positive step
-
-            logger.info(f"Processing transcript of length {len(text)} with chunk_size={chunk_size}, overlap={overlap}")
-            num_chunks, all_json_data = await self.transcript_processor.process_transcript(
-                text=text,
-                model=model,
-                model_name=model_name,
-                chunk_size=chunk_size,
-                overlap=overlap
-            )
-            logger.info(f"Successfully processed transcript into {num_chunks} chunks")
-
-            return num_chunks, all_json_data
-        except Exception as e:
-            logger.error(f"Error processing transcript: {str(e)}", exc_info=True)
-            raise
-
-    def cleanup(self):
-        """Cleanup resources"""
-        try:
-            logger.info("Cleaning up resources")
-            if hasattr(self, 'transcript_processor'):
-                self.transcript_processor.cleanup()
-            logger.info("Cleanup completed successfully")
-        except Exception as e:
-            logger.error(f"Error during cleanup: {str(e)}", exc_info=True)
-
-# Initialize processor
-processor = SummaryProcessor()
-
-# New meeting management endpoints
-
-@app.get("/get-meetings", response_model=List[MeetingResponse])
-async def get_meetings(current_user: User = Depends(get_current_active_user)):
-
-    """Get all meetings with their basic information"""
-    try:
-        meetings = await db.get_all_meetings()
-        return [{"id": meeting["id"], "title": meeting["title"]} for meeting in meetings]
-    except Exception as e:
-        logger.error(f"Error getting meetings: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/meetings/{meeting_id}", response_model=MeetingDetailsResponse)
-async def get_meeting(meeting_id: str):
-    """Get a specific meeting by ID with all its details"""
-    try:
-        meeting = await db.get_meeting(meeting_id)
-        if not meeting:
-            raise HTTPException(status_code=404, detail="Meeting not found")
-        return meeting
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting meeting: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/save-meeting-title")
-
-async def save_meeting_title_admin(data: SaveMeetingTitleRequest):
-    """Save a meeting title (legacy endpoint)"""
-
-async def save_meeting_title(
-
-    data: MeetingTitleRequest,
-    current_user: User = Depends(get_current_active_admin),
-):
-    """Legacy endpoint for updating a meeting title."""
+db = processor.db
 
-    data: SaveMeetingTitleRequest,
-
-@app.post("/meetings/{meeting_id}/title")
-async def update_meeting_title(
-    meeting_id: str,
-    data: MeetingTitleUpdate,
-    current_user: User = Depends(get_current_active_admin),
-):
-    """Save a meeting title"""
-
-
-    try:
-        await db.update_meeting_title(data.meeting_id, data.title)
-        return {"message": "Meeting title saved successfully"}
-    except Exception as e:
-        logger.error(f"Error saving meeting title: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-
-
-@app.post("/meetings/{meeting_id}/title")
-async def save_meeting_title_path(meeting_id: str, data: MeetingTitleUpdate):
-    """Save a meeting title"""
-
-    """Update a meeting title"""
-    try:
-        await db.update_meeting_title(meeting_id, data.title)
-        return {"message": "Meeting title updated successfully"}
-    except Exception as e:
-        logger.error(f"Error updating meeting title: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+# Eager Celery results are kept in the shared store so any worker can answer the poll
+ASYNC_SUMMARY_NAMESPACE = "async_summary"
+ASYNC_SUMMARY_TTL = 3600
 
 
-@app.post("/delete-meeting")
-async def delete_meeting_admin(
-    data: DeleteMeetingRequest,
-    token: str | None = Security(oauth2_scheme_optional),
-):
-    """Delete a meeting and all its associated data (legacy endpoint)"""
-    try:
-        if token:
-            user = await get_current_user(token)
-            if user.role.lower() != "admin":
-                raise HTTPException(status_code=403, detail="Not enough privileges")
-
-@app.delete("/meetings/{meeting_id}")
-async def delete_meeting(
-    meeting_id: str,
-    current_user: User = Depends(get_current_active_admin),
-):
-
-    """Legacy endpoint to delete a meeting"""
-
-    """Delete a meeting and all its associated data"""
-
-    try:
-        success = await db.delete_meeting(data.meeting_id)
-        if success:
-            return {"message": "Meeting deleted successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to delete meeting")
-
-
-    except HTTPException:
-        raise
-
-    except Exception as e:
-        logger.error(f"Error deleting meeting: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-    except Exception as e:
-        logger.error(f"Error deleting meeting: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.delete("/meetings/{meeting_id}")
-async def delete_meeting_path(meeting_id: str):
-
-    """Delete a meeting and all its associated data"""
-    try:
-        success = await db.delete_meeting(meeting_id)
-        if success:
-            return {"message": "Meeting deleted successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to delete meeting")
-    except Exception as e:
-        logger.error(f"Error deleting meeting: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-async def process_transcript_background(process_id: str, transcript: TranscriptRequest):
-    """Background task to process transcript"""
-    try:
-        logger.info(f"Starting background processing for process_id: {process_id}")
-        meeting_id = transcript.meeting_id
-
-        num_chunks, all_json_data = await processor.process_transcript(
-            text=transcript.text,
-            model=transcript.model,
-            model_name=transcript.model_name,
-            chunk_size=transcript.chunk_size,
-            overlap=transcript.overlap
-        )
-
-        # Create final summary structure by aggregating chunk results
-        final_summary = {
-            "MeetingName": "",
-            "SectionSummary": {"title": "Section Summary", "blocks": []},
-            "CriticalDeadlines": {"title": "Critical Deadlines", "blocks": []},
-            "KeyItemsDecisions": {"title": "Key Items & Decisions", "blocks": []},
-            "ImmediateActionItems": {"title": "Immediate Action Items", "blocks": []},
-            "NextSteps": {"title": "Next Steps", "blocks": []},
-            "OtherImportantPoints": {"title": "Other Important Points", "blocks": []},
-            "ClosingRemarks": {"title": "Closing Remarks", "blocks": []}
-        }
-
-        # Process each chunk's data
-        for json_str in all_json_data:
-            try:
-                json_dict = json.loads(json_str)
-                if "MeetingName" in json_dict and json_dict["MeetingName"]:
-                    final_summary["MeetingName"] = json_dict["MeetingName"]
-                for key in final_summary:
-                    if key != "MeetingName" and key in json_dict and isinstance(json_dict[key], dict) and "blocks" in json_dict[key]:
-                        if isinstance(json_dict[key]["blocks"], list):
-                            final_summary[key]["blocks"].extend(json_dict[key]["blocks"])
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON chunk for {process_id}: {e}. Chunk: {json_str[:100]}...")
-            except Exception as e:
-                logger.error(f"Error processing chunk data for {process_id}: {e}. Chunk: {json_str[:100]}...")
-
-        # Update database with meeting name using meeting_id
-        if final_summary["MeetingName"]:
-            await processor.db.update_meeting_name(meeting_id, final_summary["MeetingName"])
-
-        # Save final result
-        if all_json_data:
-            await processor.db.update_process(process_id, status="completed", result=json.dumps(final_summary))
-            logger.info(f"Background processing completed for process_id: {process_id}")
-        else:
-            error_msg = "Summary generation failed: No summary could be generated. Please check your model/API key settings."
-            await processor.db.update_process(process_id, status="failed", error=error_msg)
-            logger.error(f"Background processing failed for process_id: {process_id} - {error_msg}")
-
-    except Exception as e:
-        error_msg = str(e)
-        logger.error(f"Error in background processing for {process_id}: {error_msg}", exc_info=True)
-        try:
-            await processor.db.update_process(process_id, status="failed", error=error_msg)
-        except Exception as db_e:
-            logger.error(f"Failed to update DB status to failed for {process_id}: {db_e}", exc_info=True)
-
-@app.post("/meetings/{meeting_id}/summary")
-async def process_transcript_api(
-    meeting_id: str,
-    transcript: TranscriptRequest,
-    background_tasks: BackgroundTasks
-):
-    """Process a transcript text with background processing"""
-    try:
-        # Create new process linked to meeting_id
-        process_id = await processor.db.create_process(meeting_id)
-
-        transcript.meeting_id = meeting_id
-
-        # Save transcript data associated with meeting_id
-        await processor.db.save_transcript(
-            meeting_id,
-            transcript.text,
-            transcript.model,
-            transcript.model_name,
-            transcript.chunk_size,
-            transcript.overlap
-        )
-
-        # Start background processing
-        background_tasks.add_task(
-            process_transcript_background,
-            process_id,
-            transcript
-        )
-
-        return JSONResponse({
-            "message": "Processing started",
-            "process_id": process_id
-        })
-
-    except Exception as e:
-        logger.error(f"Error in process_transcript_api: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/process-transcript")
-async def process_transcript_legacy(transcript: TranscriptRequest, background_tasks: BackgroundTasks):
-    """Legacy endpoint to process a transcript"""
-    try:
-        process_id = await processor.db.create_process(transcript.meeting_id)
-        await processor.db.save_transcript(
-            transcript.meeting_id,
-            transcript.text,
-            transcript.model,
-            transcript.model_name,
-            transcript.chunk_size,
-            transcript.overlap
-        )
-        background_tasks.add_task(
-            process_transcript_background,
-            process_id,
-            transcript
-        )
-        return {"message": "Processing started", "process_id": process_id}
-    except Exception as e:
-        logger.error(f"Error in process_transcript endpoint: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/meetings/{meeting_id}/summary")
-async def get_summary(meeting_id: str):
-    """Get the summary for a given meeting ID"""
-    try:
-        result = await processor.db.get_transcript_data(meeting_id)
-        if not result:
-            return JSONResponse(
-                status_code=404,
-                content={
-                    "status": "error",
-                    "meetingName": None,
-                    "meeting_id": meeting_id,
-                    "data": None,
-                    "start": None,
-                    "end": None,
-                    "error": "Meeting ID not found"
-                }
-            )
-
-        status = result.get("status", "unknown").lower()
-
-        # Parse result data if available
-        summary_data = None
-        if result.get("result"):
-            try:
-                parsed_result = json.loads(result["result"])
-                if isinstance(parsed_result, str):
-                    summary_data = json.loads(parsed_result)
-                else:
-                    summary_data = parsed_result
-                if not isinstance(summary_data, dict):
-                    logger.error(f"Parsed summary data is not a dictionary for meeting {meeting_id}")
-                    summary_data = None
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON data for meeting {meeting_id}: {str(e)}")
-                status = "failed"
-                result["error"] = f"Invalid summary data format: {str(e)}"
-            except Exception as e:
-                logger.error(f"Unexpected error parsing summary data for {meeting_id}: {str(e)}")
-                status = "failed"
-                result["error"] = f"Error processing summary data: {str(e)}"
-
-        response = {
-            "status": "processing" if status in ["processing", "pending", "started"] else status,
-            "meetingName": summary_data.get("MeetingName") if isinstance(summary_data, dict) else None,
-            "meeting_id": meeting_id,
-            "start": result.get("start_time"),
-            "end": result.get("end_time"),
-            "data": summary_data if status == "completed" else None
-        }
-
-        if status == "failed":
-            response["status"] = "error"
-            response["error"] = result.get("error", "Unknown processing error")
-            response["data"] = None
-            response["meetingName"] = None
-            return JSONResponse(status_code=400, content=response)
-
-        elif status in ["processing", "pending", "started"]:
-            response["data"] = None
-            return JSONResponse(status_code=202, content=response)
-
-        elif status == "completed":
-            if not summary_data:
-                response["status"] = "error"
-                response["error"] = "Completed but summary data is missing or invalid"
-                response["data"] = None
-                response["meetingName"] = None
-                return JSONResponse(status_code=500, content=response)
-            return JSONResponse(status_code=200, content=response)
-
-        else:
-            response["status"] = "error"
-            response["error"] = f"Unknown or unexpected status: {status}"
-            response["data"] = None
-            response["meetingName"] = None
-            return JSONResponse(status_code=500, content=response)
-
-    except Exception as e:
-        logger.error(f"Error getting summary for {meeting_id}: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=500,
-            content={
-                "status": "error",
-                "meetingName": None,
-                "meeting_id": meeting_id,
-                "data": None,
-                "start": None,
-                "end": None,
-                "error": f"Internal server error: {str(e)}"
-            }
-        )
-
-@app.get("/get-summary/{meeting_id}")
-async def get_summary_legacy(meeting_id: str):
-    return await get_summary(meeting_id)
-
-@app.post("/meetings")
-async def create_meeting(request: SaveTranscriptRequest):
-    """Create a meeting and save transcript segments without processing"""
-    try:
-        logger.info(f"Received save-transcript request for meeting: {request.meeting_title}")
-        logger.info(f"Number of transcripts to save: {len(request.transcripts)}")
-
-        # Generate a unique meeting ID
-        meeting_id = f"meeting-{int(time.time() * 1000)}"
-
-        # Save the meeting
-        await db.save_meeting(meeting_id, request.meeting_title)
-
-        # Save each transcript segment
-        for transcript in request.transcripts:
-            await db.save_meeting_transcript(
-                meeting_id=meeting_id,
-                transcript=transcript.text,
-                timestamp=transcript.timestamp,
-                summary="",
-                action_items="",
-                key_points=""
-            )
-
-        logger.info("Transcripts saved successfully")
-        return {"status": "success", "message": "Transcript saved successfully", "meeting_id": meeting_id}
-    except Exception as e:
-        logger.error(f"Error saving transcript: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
 @app.get("/model-config")
 async def get_model_config():
     """Get the current model configuration."""
@@ -624,18 +151,23 @@ async def get_api_key(provider: str):
 @app.post("/summary/async")
 async def create_async_summary(request: AsyncSummaryRequest):
     """Create an asynchronous summary task."""
+    # Celery is only imported once the async API is actually used
+    from tasks import generate_summary_task
 
     task = generate_summary_task.apply(args=(request.text,))
-    async_summary_results[task.id] = task.result
+    await state_store.set(ASYNC_SUMMARY_NAMESPACE, task.id, task.result, ttl=ASYNC_SUMMARY_TTL)
     return {"task_id": task.id}
 
 
 @app.get("/summary/async/{task_id}")
 async def get_async_summary(task_id: str):
     """Fetch the result of an asynchronous summary task."""
+    from tasks import generate_summary_task
+
     if os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true":
-        if task_id in async_summary_results:
-            return {"status": "completed", "result": async_summary_results[task_id]}
+        result = await state_store.get(ASYNC_SUMMARY_NAMESPACE, task_id)
+        if result is not None:
+            return {"status": "completed", "result": result}
         return {"status": "processing"}
     result = generate_summary_task.AsyncResult(task_id)
     if result.ready():
@@ -643,21 +175,10 @@ async def get_async_summary(task_id: str):
     return {"status": "processing"}
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on API shutdown."""
-
-    logger.info("API shutting down, cleaning up resources")
-    try:
-        meetings.processor.cleanup()
-        logger.info("Successfully cleaned up resources")
-    except Exception as e:  # pragma: no cover - best effort cleanup
-        logger.error(f"Error during cleanup: {str(e)}", exc_info=True)
-
-
 if __name__ == "__main__":
     import multiprocessing
 
+    import uvicorn
+
     multiprocessing.freeze_support()
     uvicorn.run(app, host="0.0.0.0", port=5167)
-
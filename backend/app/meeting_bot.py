@@ -1,16 +1,65 @@
+import asyncio
+import logging
 import os
 import tempfile
-from typing import Callable
+import time
+import wave
+from contextlib import aclosing
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from audio_stream import (
+    DEFAULT_BUFFER_FRAMES,
+    DEFAULT_FRAME_SECONDS,
+    DEFAULT_SAMPLE_RATE,
+    DEFAULT_SAMPLE_WIDTH,
+    AudioFrame,
+    FrameRingBuffer,
+    StreamingTranscript,
+    TranscriptSegment,
+    format_offset,
+    iter_frames,
+)
+from vad import NoiseFloor, TrimmedAudio, VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
+
+FrameTranscriber = Callable[[AudioFrame], Union[str, Awaitable[str]]]
+SegmentCallback = Callable[[TranscriptSegment], Awaitable[None]]
+
 
 class MeetingBot:
-    """Bot that joins meetings, records audio and hands off for transcription."""
-    def __init__(self, connector, transcriber: Callable[[str], str]):
+    """Bot that joins meetings, records audio and hands off for transcription.
+
+    ``join_record_and_transcribe`` records the whole meeting and then
+    transcribes the file. ``stream_and_transcribe`` transcribes fixed-length
+    frames while the meeting is still being recorded and stores each
+    segment as soon as it is ready; it needs a ``frame_transcriber``.
+
+    With a ``vad`` both paths hand only the speech to the transcriber;
+    silent frames are not transcribed at all.
+    """
+    def __init__(self, connector, transcriber: Callable[[str], str],
+                 frame_transcriber: Optional[FrameTranscriber] = None, db=None,
+                 vad: Optional[VoiceActivityDetector] = None):
         self.connector = connector
         self.transcriber = transcriber
+        self.frame_transcriber = frame_transcriber
+        self.db = db
+        self.vad = vad
+        # What the VAD cut from the last recording handed off; its
+        # ``timestamp_map`` maps transcriber timestamps back to the recording
+        self.last_trim: Optional[TrimmedAudio] = None
 
     def join_meeting(self, meeting_id: str, token: str) -> None:
         self.connector.join_meeting(meeting_id, token)
 
+    async def join_meeting_async(self, meeting_id: str, token: str) -> None:
+        join = getattr(self.connector, "join_meeting_async", None)
+        if asyncio.iscoroutinefunction(join):
+            await join(meeting_id, token)
+        else:
+            await asyncio.to_thread(self.join_meeting, meeting_id, token)
+
     def record_audio(self, duration: int = 1) -> str:
         """Simulate audio recording by creating an empty temp file."""
         fd, path = tempfile.mkstemp(suffix=".wav")
@@ -19,9 +68,182 @@ class MeetingBot:
         return path
 
     def handoff_for_transcription(self, audio_path: str) -> str:
+        if self.vad is not None:
+            try:
+                speech_path, self.last_trim = self.vad.trim_wav(audio_path)
+            except (wave.Error, EOFError) as e:
+                logger.warning(f"Not trimming silence from {audio_path}: {e}")
+            else:
+                logger.info(
+                    f"Skipped {self.last_trim.skipped_fraction:.0%} of {self.last_trim.duration:.1f}s "
+                    f"of audio as silence"
+                )
+                audio_path = speech_path
         return self.transcriber(audio_path)
 
     def join_record_and_transcribe(self, meeting_id: str, token: str) -> str:
         self.join_meeting(meeting_id, token)
         audio = self.record_audio()
         return self.handoff_for_transcription(audio)
+
+    async def stream_audio(
+        self,
+        source: AsyncIterable[bytes],
+        frame_seconds: float = DEFAULT_FRAME_SECONDS,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        sample_width: int = DEFAULT_SAMPLE_WIDTH,
+        channels: int = 1,
+        buffer: Optional[FrameRingBuffer] = None,
+    ) -> AsyncIterator[AudioFrame]:
+        """Yield fixed-duration frames of ``source`` as they are captured.
+
+        Capture runs in its own task and feeds a bounded ring buffer, so a slow
+        consumer never stalls the audio source; see ``FrameRingBuffer``.
+        """
+        buffer = buffer if buffer is not None else FrameRingBuffer(DEFAULT_BUFFER_FRAMES)
+
+        async def capture():
+            try:
+                async for frame in iter_frames(source, frame_seconds, sample_rate, sample_width, channels):
+                    buffer.put_nowait(frame)
+            finally:
+                buffer.close()
+
+        task = asyncio.create_task(capture())
+        try:
+            async for frame in buffer:
+                yield frame
+            # Surface errors from the audio source
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _transcribe_frame(self, frame: AudioFrame) -> str:
+        if asyncio.iscoroutinefunction(self.frame_transcriber):
+            return await self.frame_transcriber(frame)
+        # Blocking transcribers (whisper HTTP calls, local models) run in a thread
+        return await asyncio.to_thread(self.frame_transcriber, frame)
+
+    async def stream_and_transcribe(
+        self,
+        meeting_id: str,
+        token: str,
+        source: AsyncIterable[bytes],
+        frame_seconds: float = DEFAULT_FRAME_SECONDS,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        sample_width: int = DEFAULT_SAMPLE_WIDTH,
+        channels: int = 1,
+        buffer_frames: int = DEFAULT_BUFFER_FRAMES,
+        concurrency: int = 2,
+        on_segment: Optional[SegmentCallback] = None,
+        transcript: Optional[StreamingTranscript] = None,
+        on_frame: Optional[Callable[[AudioFrame], None]] = None,
+    ) -> StreamingTranscript:
+        """Join a meeting and transcribe its audio while it is being recorded.
+
+        Up to ``concurrency`` frames are transcribed at once. Segments are
+        stored in meeting order with ``db.save_meeting_transcript`` (when the
+        bot has a ``db``) and passed to ``on_segment`` as soon as every
+        earlier frame is done, so text is stored a few frame lengths after it
+        was spoken rather than after the meeting ends. Pass ``transcript`` to
+        watch its counters while the meeting is still running. ``on_frame``
+        is called for every frame taken from the capture buffer, including
+        the silent ones the VAD keeps from the transcriber.
+        """
+        if self.frame_transcriber is None:
+            raise ValueError("stream_and_transcribe needs a frame_transcriber")
+        await self.join_meeting_async(meeting_id, token)
+
+        result = transcript if transcript is not None else StreamingTranscript()
+        buffer = FrameRingBuffer(buffer_frames)
+        slots = asyncio.Semaphore(concurrency)
+        done: Dict[int, Optional[str]] = {}
+        frames: Dict[int, AudioFrame] = {}
+        # Where in the meeting the speech of a VAD-trimmed frame starts and ends
+        spans: Dict[int, Tuple[float, float]] = {}
+        # Kept across frames, so a frame of steady speech is not measured against itself
+        noise_floor = NoiseFloor()
+        next_index = 0
+        commit_lock = asyncio.Lock()
+        tasks: List[asyncio.Task] = []
+
+        async def commit_ready() -> None:
+            nonlocal next_index
+            async with commit_lock:
+                # Frames dropped by the ring buffer never arrive; skip past them
+                while next_index not in done and frames and min(frames) > next_index:
+                    next_index = min(frames)
+                while next_index in done:
+                    frame = frames.pop(next_index)
+                    text = (done.pop(next_index) or "").strip()
+                    next_index += 1
+                    if not text:
+                        continue
+                    start, end = spans.pop(frame.index, (frame.start, frame.end))
+                    segment = TranscriptSegment(start, end, text)
+                    if self.db is not None:
+                        try:
+                            await self.db.save_meeting_transcript(
+                                meeting_id=meeting_id, transcript=text, timestamp=format_offset(start)
+                            )
+                        except Exception as e:
+                            # The segment stays in the result; the stream goes on with the next frame
+                            logger.error(f"Storing the segment at {format_offset(start)} of {meeting_id} failed: {e}",
+                                         exc_info=True)
+                            result.failed_segments += 1
+                    result.segments.append(segment)
+                    result.latencies.append(time.monotonic() - frame.captured_at)
+                    if on_segment is not None:
+                        await on_segment(segment)
+
+        async def transcribe(frame: AudioFrame) -> None:
+            try:
+                speech = frame
+                if self.vad is not None:
+                    speech, trimmed = await asyncio.to_thread(self.vad.trim_frame, frame, noise_floor)
+                    result.audio_seconds += trimmed.duration
+                    result.speech_seconds += trimmed.speech_duration
+                    if speech is None:
+                        result.silent_frames += 1
+                    else:
+                        spans[frame.index] = (speech.start, frame.start + trimmed.regions[-1].end)
+                text = await self._transcribe_frame(speech) if speech is not None else ""
+            except Exception as e:
+                logger.error(f"Transcription of frame {frame.index} of {meeting_id} failed: {e}", exc_info=True)
+                result.failed_frames += 1
+                text = None
+            finally:
+                slots.release()
+            done[frame.index] = text
+            await commit_ready()
+
+        try:
+            frame_stream = self.stream_audio(source, frame_seconds, sample_rate, sample_width, channels, buffer)
+            async with aclosing(frame_stream):
+                async for frame in frame_stream:
+                    if on_frame is not None:
+                        on_frame(frame)
+                    result.frames += 1
+                    result.dropped_frames = buffer.dropped
+                    result.buffer_high_water = buffer.high_water
+                    await slots.acquire()
+                    frames[frame.index] = frame
+                    tasks.append(asyncio.create_task(transcribe(frame)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            result.dropped_frames = buffer.dropped
+            result.buffer_high_water = buffer.high_water
+
+        if result.dropped_frames:
+            logger.warning(f"Dropped {result.dropped_frames} audio frames of {meeting_id}: transcription fell behind")
+        logger.info(
+            f"Streamed {result.frames} frames of {meeting_id}, max speech-to-storage latency "
+            f"{result.max_latency or 0:.2f}s"
+            + (f", {result.skipped_fraction:.0%} skipped as silence" if self.vad is not None else "")
+        )
+        return result
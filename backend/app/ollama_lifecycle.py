@@ -0,0 +1,188 @@
+"""Keeps the local Ollama model loaded while there is work for it.
+
+Ollama unloads a model ``keep_alive`` after its last request (5 minutes by
+default), and the first summary after that waits for the model to be read
+back into memory, often tens of seconds. :data:`lifecycle`:
+
+* preloads the configured model when the API starts
+  (``main.preload_model_provider``);
+* while summary jobs for a model are queued or running (:meth:`hold` /
+  :meth:`release`, or :meth:`job`), pings Ollama every
+  ``OLLAMA_PING_INTERVAL`` seconds so the model stays loaded, or is loaded
+  again before the next job gets to it;
+* when the host's available memory drops below ``OLLAMA_MIN_FREE_MEMORY_MB``,
+  unloads the models no job is holding.
+
+The time Ollama spends loading a model is reported on its own: on
+``/metrics`` as ``ollama_model_load_seconds``, and per job, apart from the
+generation time, in the ``generation`` statistics (see ``generation_stats``).
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# How long Ollama keeps a model loaded after a request (an Ollama duration, e.g. "10m")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+OLLAMA_PING_INTERVAL = float(os.getenv("OLLAMA_PING_INTERVAL", "60"))
+# Idle models are unloaded when less memory than this is available; 0 disables it
+OLLAMA_MIN_FREE_MEMORY_MB = float(os.getenv("OLLAMA_MIN_FREE_MEMORY_MB", "1024"))
+# Loading a large model from disk can take minutes
+OLLAMA_LOAD_TIMEOUT = float(os.getenv("OLLAMA_LOAD_TIMEOUT", "300"))
+
+
+def tagged_model_name(model_name: str) -> str:
+    """``model_name`` with Ollama's default ``:latest`` tag if it has none, as ``/api/ps`` reports it."""
+    return model_name if ":" in model_name.rsplit("/", 1)[-1] else f"{model_name}:latest"
+
+
+def available_memory_mb() -> Optional[float]:
+    """``MemAvailable`` from ``/proc/meminfo``, or ``None`` where that is not available."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class OllamaLifecycle:
+    """Preloads, keeps alive and unloads the models of a local Ollama server."""
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_BASE_URL,
+        http_client: Optional[httpx.AsyncClient] = None,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        ping_interval: float = OLLAMA_PING_INTERVAL,
+        min_free_memory_mb: float = OLLAMA_MIN_FREE_MEMORY_MB,
+        memory_probe: Callable[[], Optional[float]] = available_memory_mb,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._client = http_client
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.min_free_memory_mb = min_free_memory_mb
+        self.memory_probe = memory_probe
+        # Summary jobs queued or running, by model name
+        self.jobs: Dict[str, int] = {}
+        self._pinger: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=OLLAMA_LOAD_TIMEOUT)
+        return self._client
+
+    async def _generate(self, model_name: str, keep_alive) -> Dict:
+        # A generate request without a prompt only loads (or, with keep_alive 0, unloads) the model
+        response = await self.client.post(
+            f"{self.base_url}/api/generate", json={"model": model_name, "keep_alive": keep_alive}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def preload(self, model_name: str) -> float:
+        """Load ``model_name`` (or renew its keep-alive); returns the seconds Ollama spent loading it."""
+        body = await self._generate(model_name, self.keep_alive)
+        load_seconds = (body.get("load_duration") or 0) / 1e9
+        registry.observe("ollama_model_load_seconds", load_seconds,
+                         help_text="Time Ollama spent loading a model for a preload or keep-alive ping",
+                         model=model_name)
+        if load_seconds >= 0.5:
+            logger.info(f"Loaded Ollama model {model_name} in {load_seconds:.1f}s")
+        return load_seconds
+
+    async def unload(self, model_name: str) -> None:
+        await self._generate(model_name, 0)
+        registry.inc("ollama_model_unloads_total", help_text="Ollama models unloaded under memory pressure",
+                     model=model_name)
+        logger.info(f"Unloaded Ollama model {model_name}")
+
+    async def loaded_models(self) -> List[str]:
+        """Names of the models Ollama has in memory."""
+        response = await self.client.get(f"{self.base_url}/api/ps")
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    async def relieve_memory_pressure(self) -> List[str]:
+        """Unload the loaded models no job is holding if memory is low; returns their names."""
+        if self.min_free_memory_mb <= 0:
+            return []
+        available = self.memory_probe()
+        if available is None or available >= self.min_free_memory_mb:
+            return []
+        # Jobs may name a model without its tag; Ollama always reports one
+        held = {tagged_model_name(model_name) for model_name in self.jobs}
+        unloaded = []
+        for model_name in await self.loaded_models():
+            if tagged_model_name(model_name) not in held:
+                await self.unload(model_name)
+                unloaded.append(model_name)
+        if unloaded:
+            logger.warning(f"{available:.0f} MB of memory available, unloaded idle Ollama models: {unloaded}")
+        return unloaded
+
+    def hold(self, model_name: str) -> None:
+        """Register a summary job for ``model_name``; the model is kept loaded until it is released."""
+        self.jobs[model_name] = self.jobs.get(model_name, 0) + 1
+        if self._pinger is None or self._pinger.done():
+            self._pinger = asyncio.create_task(self._ping_while_held())
+
+    async def release(self, model_name: str) -> None:
+        remaining = self.jobs.get(model_name, 0) - 1
+        if remaining > 0:
+            self.jobs[model_name] = remaining
+            return
+        self.jobs.pop(model_name, None)
+        if not self.jobs and self._pinger is not None:
+            self._pinger.cancel()
+            self._pinger = None
+        try:
+            await self.relieve_memory_pressure()
+        except Exception as e:
+            logger.warning(f"Could not check for idle Ollama models to unload: {e}")
+
+    @asynccontextmanager
+    async def job(self, model_name: str):
+        """Holds ``model_name`` for the duration of the block."""
+        self.hold(model_name)
+        try:
+            yield
+        finally:
+            await self.release(model_name)
+
+    async def _ping_while_held(self) -> None:
+        while self.jobs:
+            await asyncio.sleep(self.ping_interval)
+            for model_name in list(self.jobs):
+                try:
+                    await self.preload(model_name)
+                except Exception as e:
+                    logger.warning(f"Keep-alive ping for Ollama model {model_name} failed: {e}")
+            try:
+                await self.relieve_memory_pressure()
+            except Exception as e:
+                logger.warning(f"Could not check for idle Ollama models to unload: {e}")
+
+    async def close(self) -> None:
+        if self._pinger is not None:
+            self._pinger.cancel()
+            self._pinger = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+lifecycle = OllamaLifecycle()
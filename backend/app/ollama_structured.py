@@ -0,0 +1,222 @@
+"""Ollama model that constrains generation to the result's JSON schema.
+
+pydantic-ai talks to Ollama through its OpenAI-compatible endpoint and asks
+for the summary as a tool call, which small local models often answer with
+invalid JSON; each failure cost another full generation (up to
+``result_retries``). :class:`StructuredOllamaModel` uses Ollama's native
+``/api/chat`` instead and passes the result schema as ``format``, so the
+output is constrained by a grammar to valid JSON of that shape. What can
+still go wrong (output cut off at the token limit, a required field left
+out) goes through ``json_repair`` before the agent validates it, and only
+output that cannot be repaired is retried.
+
+Imported on first use through ``transcript_processor.PROVIDER_MODELS``.
+"""
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic_ai import usage
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    RetryPromptPart,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models import (
+    AgentModel,
+    Model,
+    StreamedResponse,
+    cached_async_http_client,
+    check_allow_model_requests,
+)
+
+from json_repair import fill_required, inline_refs, repair_json
+from ollama_lifecycle import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def map_messages(messages) -> List[Dict]:
+    """pydantic-ai messages as ``/api/chat`` messages; results are plain JSON content."""
+    chat = []
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, SystemPromptPart):
+                    chat.append({"role": "system", "content": part.content})
+                elif isinstance(part, UserPromptPart):
+                    chat.append({"role": "user", "content": part.content})
+                elif isinstance(part, RetryPromptPart):
+                    chat.append({"role": "user", "content": part.model_response()})
+                elif isinstance(part, ToolReturnPart):
+                    chat.append({"role": "tool", "content": part.model_response_str()})
+        elif isinstance(message, ModelResponse):
+            content = "".join(
+                part.args_as_json_str() if isinstance(part, ToolCallPart) else part.content
+                for part in message.parts
+            )
+            chat.append({"role": "assistant", "content": content})
+    return chat
+
+
+def map_usage(body: Dict) -> usage.Usage:
+    """Token counts of a final ``/api/chat`` response, with the model load and generation time in ms."""
+    request_tokens = body.get("prompt_eval_count") or 0
+    response_tokens = body.get("eval_count") or 0
+    generation_ns = (body.get("prompt_eval_duration") or 0) + (body.get("eval_duration") or 0)
+    return usage.Usage(
+        request_tokens=request_tokens,
+        response_tokens=response_tokens,
+        total_tokens=request_tokens + response_tokens,
+        details={
+            "load_ms": (body.get("load_duration") or 0) // 1_000_000,
+            "generation_ms": generation_ns // 1_000_000,
+        },
+    )
+
+
+class StructuredOllamaStreamedResponse(StreamedResponse):
+    """``/api/chat`` NDJSON stream, with the content as the result tool's arguments."""
+
+    def __init__(self, agent_model: "StructuredOllamaAgentModel", lines, timestamp: datetime):
+        super().__init__()
+        self._agent_model = agent_model
+        self._lines = lines
+        self._timestamp = timestamp
+
+    async def _get_event_iterator(self):
+        content = []
+        tool = self._agent_model.result_tool
+        async for line in self._lines:
+            if not line.strip():
+                continue
+            body = json.loads(line)
+            if body.get("error"):
+                raise RuntimeError(f"Ollama error: {body['error']}")
+            delta = (body.get("message") or {}).get("content") or ""
+            if delta:
+                content.append(delta)
+                if tool is None:
+                    yield self._parts_manager.handle_text_delta(vendor_part_id="content", content=delta)
+                else:
+                    event = self._parts_manager.handle_tool_call_delta(
+                        vendor_part_id="content", tool_name=tool.name, args=delta, tool_call_id=None
+                    )
+                    if event is not None:
+                        yield event
+            if body.get("done"):
+                self._usage += map_usage(body)
+        if tool is not None:
+            args, repaired = self._agent_model.result_args("".join(content))
+            if repaired:
+                # Replaces the streamed arguments
+                yield self._parts_manager.handle_tool_call_part(vendor_part_id="content", tool_name=tool.name,
+                                                                args=args)
+
+    def timestamp(self) -> datetime:
+        return self._timestamp
+
+
+class StructuredOllamaAgentModel(AgentModel):
+    def __init__(self, model: "StructuredOllamaModel", result_tools):
+        self.model = model
+        self.result_tool = result_tools[0] if result_tools else None
+        self.schema = self.result_tool.parameters_json_schema if self.result_tool else None
+
+    def _body(self, messages, model_settings, stream: bool) -> Dict:
+        body = {"model": self.model.model_name, "messages": map_messages(messages), "stream": stream,
+                "keep_alive": OLLAMA_KEEP_ALIVE}
+        if self.schema is not None:
+            # Ollama's grammar conversion does not follow $refs
+            body["format"] = inline_refs(self.schema)
+        options = {key: value for key, value in (model_settings or {}).items()
+                   if key in ("temperature", "top_p", "seed")}
+        if "max_tokens" in (model_settings or {}):
+            options["num_predict"] = model_settings["max_tokens"]
+        if options:
+            body["options"] = options
+        return body
+
+    def result_args(self, text: str):
+        """The result tool's arguments from the model's text, and whether they had to be repaired.
+
+        Text that cannot be repaired is returned as is, for the agent to
+        reject and retry.
+        """
+        try:
+            args = json.loads(text)
+            repaired = False
+        except json.JSONDecodeError:
+            try:
+                args = repair_json(text)
+            except ValueError as e:
+                logger.info(f"Could not repair {self.model.name()} output, it will be retried: {e}")
+                return text, False
+            repaired = True
+        if not isinstance(args, dict):
+            return text, False
+        before = json.dumps(args)
+        # Valid JSON can still leave out required properties
+        args = fill_required(args, self.schema)
+        repaired = repaired or json.dumps(args) != before
+        if repaired:
+            self.model.repaired += 1
+        return args, repaired
+
+    def _response(self, text: str, timestamp: datetime) -> ModelResponse:
+        if self.result_tool is None:
+            return ModelResponse(parts=[TextPart(text)], timestamp=timestamp)
+        args, _ = self.result_args(text)
+        part = ToolCallPart.from_raw_args(tool_name=self.result_tool.name, args=args)
+        return ModelResponse(parts=[part], timestamp=timestamp)
+
+    async def request(self, messages, model_settings):
+        response = await self.model.client.post(
+            f"{self.model.base_url}/api/chat", json=self._body(messages, model_settings, stream=False),
+            timeout=(model_settings or {}).get("timeout", httpx.USE_CLIENT_DEFAULT),
+        )
+        response.raise_for_status()
+        body = response.json()
+        return self._response(body["message"]["content"], _now()), map_usage(body)
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings):
+        async with self.model.client.stream(
+            "POST", f"{self.model.base_url}/api/chat", json=self._body(messages, model_settings, stream=True)
+        ) as response:
+            response.raise_for_status()
+            yield StructuredOllamaStreamedResponse(self, response.aiter_lines(), _now())
+
+
+class StructuredOllamaModel(Model):
+    """Ollama through ``/api/chat`` with the result schema as the ``format`` constraint."""
+
+    def __init__(self, model_name: str, *, base_url: str = OLLAMA_BASE_URL,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip("/")
+        self.client = http_client or cached_async_http_client()
+        # Outputs repaired instead of retried, see generation_stats
+        self.repaired = 0
+
+    async def agent_model(self, *, function_tools, allow_text_result, result_tools) -> AgentModel:
+        check_allow_model_requests()
+        if function_tools:
+            raise ValueError("StructuredOllamaModel does not support function tools")
+        return StructuredOllamaAgentModel(self, result_tools)
+
+    def name(self) -> str:
+        return f"ollama:{self.model_name}"
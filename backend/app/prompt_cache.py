@@ -0,0 +1,86 @@
+"""Accounting for provider-side prompt caching of the summary prompts.
+
+Every chunk of a summary job is sent with the same prefix: the result tool
+(the ``SummaryResponse`` schema) and the system prompt with the
+instructions; only the user message with the chunk differs. Providers that
+cache prompt prefixes bill and process the cached part of that prefix at a
+fraction of the cost:
+
+* OpenAI caches prefixes of 1024 tokens or more automatically and reports
+  the cached part as ``cached_tokens``;
+* Anthropic caches up to blocks marked with ``cache_control``, which
+  ``anthropic_caching.CachingAnthropicModel`` adds to the system prompt,
+  and reports ``cache_read_input_tokens`` and
+  ``cache_creation_input_tokens``.
+
+:class:`PromptCacheStats` adds up the usage of every LLM request of a job
+so the hit rate ends up in the job's metadata.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Keys of ``Usage.details`` with tokens read from or written to the cache
+CACHE_READ_KEYS = ("cached_tokens", "cache_read_input_tokens")
+CACHE_WRITE_KEYS = ("cache_creation_input_tokens",)
+
+
+@dataclass
+class PromptCacheStats:
+    """Prompt cache usage of one summary job."""
+
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the input tokens that were read from the cache."""
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def add(self, usage) -> None:
+        """Add a pydantic-ai ``Usage`` (or ``None`` when the model reports none)."""
+        if usage is None:
+            return
+        details = usage.details or {}
+        self.requests += usage.requests
+        self.input_tokens += usage.request_tokens or 0
+        self.output_tokens += usage.response_tokens or 0
+        self.cached_tokens += sum(details.get(key, 0) for key in CACHE_READ_KEYS)
+        self.cache_write_tokens += sum(details.get(key, 0) for key in CACHE_WRITE_KEYS)
+
+    def add_tokens(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0,
+                   cache_write_tokens: int = 0) -> None:
+        """Add one request's token counts, as read from a raw provider response."""
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cached_tokens += cached_tokens
+        self.cache_write_tokens += cache_write_tokens
+
+    def add_result(self, result) -> None:
+        """Add the usage of an agent run result, if it has one."""
+        usage = getattr(result, "usage", None)
+        self.add(usage() if callable(usage) else None)
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "output_tokens": self.output_tokens,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+def usage_details(cache_read: Optional[int], cache_write: Optional[int]) -> Dict[str, int]:
+    """``Usage.details`` entries for Anthropic's cache token counts."""
+    details = {}
+    if cache_read:
+        details["cache_read_input_tokens"] = cache_read
+    if cache_write:
+        details["cache_creation_input_tokens"] = cache_write
+    return details
@@ -0,0 +1,352 @@
+"""Re-summarize the stored meetings in bulk (``python -m app.cli resummarize``).
+
+Meeting ids are read from ``transcript_chunks`` in pages ordered by meeting
+id (keyset paging, so the scan does not slow down as it goes and a resumed
+run starts at its last position); a meeting's transcript is only read when
+its summary starts, so at most ``concurrency`` are in memory at once. Every meeting is summarized the way
+``POST /meetings/{id}/summary`` does it, holding the meeting's summary
+lease, with at most ``concurrency`` summaries at a time overall and at most
+``provider_limits[provider]`` per model provider. Meetings whose summary is
+already being processed are skipped.
+
+Progress is saved to a checkpoint file after every meeting: the id up to
+which every meeting is done, plus the ids that failed or were skipped. A
+run that is interrupted and started again with the same checkpoint continues
+after that id; meetings in progress when it stopped are summarized again,
+reusing the chunk summaries they had saved.
+
+With ``--batch`` (:func:`resummarize_batch`) the meetings go through the
+provider's batch API instead, a page of meetings per submission; see
+``batch_summaries``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from batch_summaries import BatchJob
+from db import DatabaseManager
+from ollama_lifecycle import lifecycle as ollama_lifecycle
+from routers.meetings import (
+    SUMMARY_LEASE_TTL,
+    new_lease_owner,
+    process_transcript_background,
+    processor,
+    summary_lease_name,
+)
+from schemas.meetings import TranscriptRequest
+from state_store import state_store
+from transcript_processor import TranscriptProcessor
+from upload_store import open_transcript_upload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("RESUMMARIZE_CONCURRENCY", "8"))
+DEFAULT_PAGE_SIZE = 100
+# A local Ollama server runs one generation at a time
+DEFAULT_PROVIDER_LIMITS = {"ollama": 1}
+
+
+@dataclass
+class ResummarizeCheckpoint:
+    """Progress of a re-summarization run, as saved in its checkpoint file."""
+
+    model: Optional[str] = None
+    model_name: Optional[str] = None
+    # Every meeting up to and including this id has been handled
+    after: Optional[str] = None
+    completed: int = 0
+    failed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> "ResummarizeCheckpoint":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        # Written next to the file and renamed, so an interrupted write never leaves half a checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class ResummarizeProgress:
+    """Counts and throughput of the current run."""
+
+    total: int
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> int:
+        return self.completed + self.failed + self.skipped
+
+    @property
+    def rate(self) -> float:
+        """Meetings handled per minute."""
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[timedelta]:
+        if not self.done:
+            return None
+        remaining = max(0, self.total - self.done)
+        return timedelta(seconds=round(remaining / self.rate * 60))
+
+    def format(self) -> str:
+        return (
+            f"{self.done}/{self.total} meetings ({self.completed} completed, {self.failed} failed, "
+            f"{self.skipped} skipped), {self.rate:.1f}/min, ETA {self.eta or 'unknown'}"
+        )
+
+
+async def _summarize(db: DatabaseManager, meeting_id: str, model: str, model_name: str) -> str:
+    """Summarize one stored meeting; returns ``completed``, ``failed`` or ``skipped``."""
+    lease = summary_lease_name(meeting_id)
+    lease_owner = new_lease_owner()
+    if not await state_store.acquire_lease(lease, lease_owner, SUMMARY_LEASE_TTL):
+        logger.info(f"Skipping {meeting_id}: its summary is already being processed")
+        return "skipped"
+    try:
+        row = await db.get_stored_transcript(meeting_id)
+        if row is None:
+            logger.info(f"Skipping {meeting_id}: it was deleted")
+            await state_store.release_lease(lease, lease_owner)
+            return "skipped"
+        request = TranscriptRequest(
+            text=None if row["upload_id"] else row["transcript_text"],
+            upload_id=row["upload_id"],
+            model=model,
+            model_name=model_name,
+            chunk_size=row["chunk_size"] or 5000,
+            overlap=row["overlap"] or 1000,
+        )
+        await processor.db.create_process(meeting_id)
+        await processor.db.save_transcript(
+            meeting_id, row["transcript_text"] or "", model, model_name,
+            request.chunk_size, request.overlap, upload_id=row["upload_id"],
+        )
+    except Exception:
+        await state_store.release_lease(lease, lease_owner)
+        raise
+    # Releases the lease when done
+    await process_transcript_background(meeting_id, request, meeting_id=meeting_id, lease_owner=lease_owner)
+    data = await processor.db.get_transcript_data(meeting_id)
+    return "completed" if data and data["status"] == "completed" else "failed"
+
+
+async def resummarize(
+    checkpoint_path: str,
+    model: Optional[str] = None,
+    model_name: Optional[str] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    provider_limits: Optional[Dict[str, int]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+    progress_interval: float = 10.0,
+    on_progress: Optional[Callable[[ResummarizeProgress], None]] = None,
+    db: Optional[DatabaseManager] = None,
+) -> ResummarizeProgress:
+    """Re-summarize the stored meetings after the checkpoint's position.
+
+    ``model`` and ``model_name`` replace each meeting's stored model; by
+    default every meeting is summarized again with its own. ``limit`` stops
+    after that many meetings. ``on_progress`` is called every
+    ``progress_interval`` seconds and once at the end.
+    """
+    db = db or processor.db
+    checkpoint = ResummarizeCheckpoint.load(checkpoint_path)
+    if checkpoint.after is not None and (checkpoint.model, checkpoint.model_name) != (model, model_name):
+        raise ValueError(
+            f"{checkpoint_path} belongs to a run with model {checkpoint.model}/{checkpoint.model_name}; "
+            "use another checkpoint file to start a new run"
+        )
+    checkpoint.model, checkpoint.model_name = model, model_name
+
+    total = await db.count_transcripts(checkpoint.after)
+    progress = ResummarizeProgress(total=min(total, limit) if limit is not None else total)
+    limits = {**DEFAULT_PROVIDER_LIMITS, **(provider_limits or {})}
+    provider_slots: Dict[str, asyncio.Semaphore] = {}
+    slots = asyncio.Semaphore(concurrency)
+    # Bounds the meetings read ahead of the ones being summarized
+    backlog = asyncio.Semaphore(max(page_size, concurrency) * 2)
+    # Meeting ids in keyset order that are not yet behind the checkpoint position
+    in_order: deque = deque()
+    finished = set()
+
+    def record(meeting_id: str, outcome: str) -> None:
+        setattr(progress, outcome, getattr(progress, outcome) + 1)
+        if outcome == "completed":
+            checkpoint.completed += 1
+        else:
+            getattr(checkpoint, outcome).append(meeting_id)
+        finished.add(meeting_id)
+        while in_order and in_order[0] in finished:
+            checkpoint.after = in_order.popleft()
+            finished.discard(checkpoint.after)
+        checkpoint.save(checkpoint_path)
+
+    async def run(row: Dict) -> None:
+        provider = model or row["model"]
+        provider_slot = provider_slots.setdefault(provider, asyncio.Semaphore(limits.get(provider, concurrency)))
+        name = model_name or row["model_name"]
+        if provider == "ollama":
+            # Keeps the local model loaded while the meeting waits for the provider's slot
+            ollama_lifecycle.hold(name)
+        try:
+            # The provider's slot comes first, so meetings waiting for a busy provider hold no global slot
+            async with provider_slot, slots:
+                outcome = await _summarize(db, row["meeting_id"], provider, name)
+        except Exception as e:
+            logger.error(f"Re-summarizing {row['meeting_id']} failed: {e}", exc_info=True)
+            outcome = "failed"
+        finally:
+            backlog.release()
+            if provider == "ollama":
+                await ollama_lifecycle.release(name)
+        record(row["meeting_id"], outcome)
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            on_progress(progress)
+
+    reporter = asyncio.create_task(report()) if on_progress else None
+    tasks = set()
+    after, scheduled = checkpoint.after, 0
+    try:
+        while limit is None or scheduled < limit:
+            page_limit = page_size if limit is None else min(page_size, limit - scheduled)
+            rows = await db.get_transcript_page(after, page_limit)
+            if not rows:
+                break
+            for row in rows:
+                await backlog.acquire()
+                in_order.append(row["meeting_id"])
+                task = asyncio.create_task(run(row))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            after = rows[-1]["meeting_id"]
+            scheduled += len(rows)
+        await asyncio.gather(*tasks)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+    if on_progress:
+        on_progress(progress)
+    return progress
+
+
+async def _keep_leases(leases: List[str], owner: str) -> None:
+    while True:
+        await asyncio.sleep(SUMMARY_LEASE_TTL / 3)
+        for lease in leases:
+            if not await state_store.renew_lease(lease, owner, SUMMARY_LEASE_TTL):
+                logger.warning(f"Lost lease {lease} held by {owner}")
+
+
+async def _transcript_text(db: DatabaseManager, row: Dict) -> str:
+    if not row["upload_id"]:
+        return row["transcript_text"] or ""
+    uploaded = await open_transcript_upload(db, row["upload_id"])
+    return await asyncio.to_thread(lambda: "".join(uploaded.iter_text()))
+
+
+async def resummarize_batch(
+    checkpoint_path: str,
+    model: str,
+    model_name: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+    on_progress: Optional[Callable[[ResummarizeProgress], None]] = None,
+    db: Optional[DatabaseManager] = None,
+    **options,
+) -> ResummarizeProgress:
+    """Re-summarize the stored meetings after the checkpoint's position through the batch API.
+
+    Every page of ``page_size`` meetings is one ``summarize_batch`` run with
+    ``model``/``model_name``, holding the summary leases of its meetings;
+    ``options`` go to ``BatchSummarizer``. Meetings the batch left incomplete
+    count as failed, and running them again only resubmits their missing
+    chunks. ``on_progress`` is called after every page.
+    """
+    db = db or processor.db
+    summarizer = TranscriptProcessor(db)
+    checkpoint = ResummarizeCheckpoint.load(checkpoint_path)
+    if checkpoint.after is not None and (checkpoint.model, checkpoint.model_name) != (model, model_name):
+        raise ValueError(
+            f"{checkpoint_path} belongs to a run with model {checkpoint.model}/{checkpoint.model_name}; "
+            "use another checkpoint file to start a new run"
+        )
+    checkpoint.model, checkpoint.model_name = model, model_name
+
+    total = await db.count_transcripts(checkpoint.after)
+    progress = ResummarizeProgress(total=min(total, limit) if limit is not None else total)
+    lease_owner = new_lease_owner()
+    while limit is None or progress.done < limit:
+        page_limit = page_size if limit is None else min(page_size, limit - progress.done)
+        rows = await db.get_transcript_page(checkpoint.after, page_limit)
+        if not rows:
+            break
+        outcomes: Dict[str, str] = {}
+        jobs, leases = [], []
+        try:
+            for row in rows:
+                meeting_id = row["meeting_id"]
+                lease = summary_lease_name(meeting_id)
+                if not await state_store.acquire_lease(lease, lease_owner, SUMMARY_LEASE_TTL):
+                    logger.info(f"Skipping {meeting_id}: its summary is already being processed")
+                    outcomes[meeting_id] = "skipped"
+                    continue
+                leases.append(lease)
+                stored = await db.get_stored_transcript(meeting_id)
+                if stored is None:
+                    outcomes[meeting_id] = "skipped"
+                    continue
+                try:
+                    text = await _transcript_text(db, stored)
+                except (LookupError, ValueError) as e:
+                    logger.error(f"Re-summarizing {meeting_id} failed: {e}")
+                    outcomes[meeting_id] = "failed"
+                    continue
+                jobs.append(BatchJob(meeting_id, text, chunk_size=stored["chunk_size"] or 5000,
+                                     overlap=stored["overlap"] or 1000))
+            if jobs:
+                keeper = asyncio.create_task(_keep_leases(leases, lease_owner))
+                try:
+                    results = await summarizer.summarize_batch(jobs, model, model_name, **options)
+                finally:
+                    keeper.cancel()
+                for meeting_id, result in results.items():
+                    outcomes[meeting_id] = "completed" if result == "completed" else "failed"
+        finally:
+            for lease in leases:
+                await state_store.release_lease(lease, lease_owner)
+
+        for row in rows:
+            meeting_id = row["meeting_id"]
+            outcome = outcomes[meeting_id]
+            setattr(progress, outcome, getattr(progress, outcome) + 1)
+            if outcome == "completed":
+                checkpoint.completed += 1
+            else:
+                getattr(checkpoint, outcome).append(meeting_id)
+        checkpoint.after = rows[-1]["meeting_id"]
+        checkpoint.save(checkpoint_path)
+        if on_progress:
+            on_progress(progress)
+    return progress
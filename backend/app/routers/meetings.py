@@ -1,15 +1,19 @@
 """Router module containing meeting-related endpoints."""
 
+import asyncio
 import json
 import logging
+import os
 import time
+import uuid
 from typing import List
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from auth import User, get_current_active_admin, get_current_active_user
 from db import DatabaseManager
+from instrumentation import timed
 from schemas.meetings import (
     DeleteMeetingRequest,
     MeetingDetailsResponse,
@@ -21,39 +25,72 @@ from schemas.meetings import (
     Transcript,
     TranscriptRequest,
 )
-from transcript_processor import TranscriptProcessor
+from cpu_pool import cpu_pool
+from state_store import WORKER_ID, state_store
+from summary_stream import PartialSummary, broadcaster
+from transcript_processor import ChunkCheckpoint, TranscriptProcessor
+from upload_store import open_transcript_upload
 
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Minimum seconds between persisting partial results while streaming
+PARTIAL_PERSIST_INTERVAL = 0.5
+# Seconds a summary job's lease lasts unless renewed; it is renewed every third of that
+SUMMARY_LEASE_TTL = float(os.getenv("SUMMARY_LEASE_TTL", "30"))
+# Seconds between checks of the stored status while streaming a job that may run on another worker
+STREAM_POLL_INTERVAL = 1.0
+WORKER_STOPPED_ERROR = "Summary processing stopped: the worker running it exited before finishing"
+
+
+def summary_lease_name(meeting_id: str) -> str:
+    return f"summary:{meeting_id}"
+
+
+def new_lease_owner() -> str:
+    return f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+
 
 class SummaryProcessor:
     """Handles the processing of summaries in a thread-safe way."""
 
     def __init__(self) -> None:
         try:
-            self.db = DatabaseManager()
             logger.info("Initializing SummaryProcessor components")
-            self.transcript_processor = TranscriptProcessor()
+            self.transcript_processor = TranscriptProcessor(DatabaseManager())
             logger.info("SummaryProcessor initialized successfully (core components)")
         except Exception as e:  # pragma: no cover - initialization errors are logged
             logger.error(f"Failed to initialize SummaryProcessor: {str(e)}", exc_info=True)
             raise
 
+    @property
+    def db(self) -> DatabaseManager:
+        """The database of the transcript processor, so both always read the same one."""
+        return self.transcript_processor.db
+
+    @db.setter
+    def db(self, database: DatabaseManager) -> None:
+        self.transcript_processor.db = database
+
     async def process_transcript(
         self,
-        text: str,
+        text,
         model: str,
         model_name: str,
         chunk_size: int = 5000,
         overlap: int = 1000,
+        on_event=None,
+        compact: bool = True,
+        job_stats: dict | None = None,
+        checkpoint: ChunkCheckpoint | None = None,
     ) -> tuple:
-        """Process a transcript text."""
+        """Process a transcript text, or an ``UploadedTranscript`` read lazily."""
 
         try:
-            if not text:
+            length = len(text) if isinstance(text, str) else text.size
+            if not length:
                 raise ValueError("Empty transcript text provided")
 
             if chunk_size <= 0:
@@ -68,7 +105,7 @@ class SummaryProcessor:
                 chunk_size = overlap + 1
 
             logger.info(
-                f"Processing transcript of length {len(text)} with chunk_size={chunk_size}, overlap={overlap}"
+                f"Processing transcript of length {length} with chunk_size={chunk_size}, overlap={overlap}"
             )
             num_chunks, all_json_data = await self.transcript_processor.process_transcript(
                 text=text,
@@ -76,6 +113,10 @@ class SummaryProcessor:
                 model_name=model_name,
                 chunk_size=chunk_size,
                 overlap=overlap,
+                on_event=on_event,
+                compact=compact,
+                job_stats=job_stats,
+                checkpoint=checkpoint,
             )
             logger.info(f"Successfully processed transcript into {num_chunks} chunks")
 
@@ -158,75 +199,114 @@ async def delete_meeting(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _keep_lease(name: str, owner: str) -> None:
+    while True:
+        await asyncio.sleep(SUMMARY_LEASE_TTL / 3)
+        if not await state_store.renew_lease(name, owner, SUMMARY_LEASE_TTL):
+            logger.warning(f"Lost lease {name} held by {owner}")
+            return
+
+
 async def process_transcript_background(
-    process_id: str, transcript: TranscriptRequest, meeting_id: str | None = None
+    process_id: str,
+    transcript: TranscriptRequest,
+    meeting_id: str | None = None,
+    lease_owner: str | None = None,
 ):
-    """Background task to process transcript."""
+    """Background task to process transcript.
+
+    The job holds the meeting's summary lease while it runs, so no other
+    worker starts the same summary and readers can tell when the worker
+    running it has gone away. ``lease_owner`` is passed when the caller has
+    already acquired the lease.
+    """
 
     if meeting_id is None:
         meeting_id = process_id
 
+    lease = summary_lease_name(meeting_id)
+    if lease_owner is None:
+        lease_owner = new_lease_owner()
+        if not await state_store.acquire_lease(lease, lease_owner, SUMMARY_LEASE_TTL):
+            logger.warning(f"Summary for {meeting_id} is already being processed elsewhere")
+            return
+    keeper = asyncio.create_task(_keep_lease(lease, lease_owner))
+    try:
+        await _process_transcript(process_id, transcript, meeting_id)
+    finally:
+        keeper.cancel()
+        await state_store.release_lease(lease, lease_owner)
+
+
+async def _process_transcript(process_id: str, transcript: TranscriptRequest, meeting_id: str) -> None:
+    on_event = None
+    if transcript.stream:
+        partial = PartialSummary()
+        last_persist = 0.0
+
+        async def on_event(event: dict) -> None:
+            nonlocal last_persist
+            partial.apply(event)
+            broadcaster.publish(meeting_id, event)
+            now = time.monotonic()
+            if event["type"] == "chunk_complete" or now - last_persist >= PARTIAL_PERSIST_INTERVAL:
+                last_persist = now
+                await processor.db.update_process(
+                    process_id, status="processing", result=partial.snapshot()
+                )
+
+    job_stats: dict = {}
     try:
         logger.info(f"Starting background processing for process_id: {process_id}")
 
+        text = transcript.text
+        if transcript.upload_id is not None:
+            text = await open_transcript_upload(processor.db, transcript.upload_id)
+
+        # Chunks summarized by an earlier, failed run of this meeting's job are reused
+        checkpoint = ChunkCheckpoint(processor.db, meeting_id)
+        if await checkpoint.load():
+            logger.info(f"Found {len(checkpoint.saved)} saved chunk summaries for {meeting_id}")
+
         num_chunks, all_json_data = await processor.process_transcript(
-            text=transcript.text,
+            text=text,
             model=transcript.model,
             model_name=transcript.model_name,
             chunk_size=transcript.chunk_size,
             overlap=transcript.overlap,
+            on_event=on_event,
+            compact=transcript.compact,
+            job_stats=job_stats,
+            checkpoint=checkpoint,
         )
 
-        final_summary = {
-            "MeetingName": "",
-            "SectionSummary": {"title": "Section Summary", "blocks": []},
-            "CriticalDeadlines": {"title": "Critical Deadlines", "blocks": []},
-            "KeyItemsDecisions": {"title": "Key Items & Decisions", "blocks": []},
-            "ImmediateActionItems": {"title": "Immediate Action Items", "blocks": []},
-            "NextSteps": {"title": "Next Steps", "blocks": []},
-            "OtherImportantPoints": {
-                "title": "Other Important Points",
-                "blocks": [],
-            },
-            "ClosingRemarks": {"title": "Closing Remarks", "blocks": []},
-        }
-
-        for json_str in all_json_data:
-            try:
-                json_dict = json.loads(json_str)
-                if "MeetingName" in json_dict and json_dict["MeetingName"]:
-                    final_summary["MeetingName"] = json_dict["MeetingName"]
-                for key in final_summary:
-                    if (
-                        key != "MeetingName"
-                        and key in json_dict
-                        and isinstance(json_dict[key], dict)
-                        and "blocks" in json_dict[key]
-                        and isinstance(json_dict[key]["blocks"], list)
-                    ):
-                        final_summary[key]["blocks"].extend(json_dict[key]["blocks"])
-            except json.JSONDecodeError as e:
-                logger.error(
-                    f"Failed to parse JSON chunk for {process_id}: {e}. Chunk: {json_str[:100]}..."
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error processing chunk data for {process_id}: {e}. Chunk: {json_str[:100]}..."
-                )
+        # Decoding, merging and deduplicating large results runs in the CPU pool
+        meeting_name, summary_json = await cpu_pool.merge_summaries(
+            all_json_data, label=process_id, stats=job_stats
+        )
 
-        if final_summary["MeetingName"]:
-            await processor.db.update_meeting_name(meeting_id, final_summary["MeetingName"])
+        if meeting_name:
+            await processor.db.update_meeting_name(meeting_id, meeting_name)
 
         if all_json_data:
             await processor.db.update_process(
-                process_id, status="completed", result=json.dumps(final_summary)
+                process_id,
+                status="completed",
+                result=summary_json,
+                chunk_count=num_chunks,
+                metadata=job_stats,
             )
+            broadcaster.publish(meeting_id, {"type": "completed", "meetingName": meeting_name})
             logger.info(f"Background processing completed for process_id: {process_id}")
+            if len(all_json_data) == num_chunks:
+                # Every chunk made it into the result; a new request starts afresh
+                await checkpoint.clear()
         else:
             error_msg = (
                 "Summary generation failed: No summary could be generated. Please check your model/API key settings."
             )
             await processor.db.update_process(process_id, status="failed", error=error_msg)
+            broadcaster.publish(meeting_id, {"type": "failed", "error": error_msg})
             logger.error(
                 f"Background processing failed for process_id: {process_id} - {error_msg}"
             )
@@ -236,6 +316,7 @@ async def process_transcript_background(
         logger.error(
             f"Error in background processing for {process_id}: {error_msg}", exc_info=True
         )
+        broadcaster.publish(meeting_id, {"type": "failed", "error": error_msg})
         try:
             await processor.db.update_process(
                 process_id, status="failed", error=error_msg
@@ -252,25 +333,41 @@ async def process_transcript_api(
 ):
     """Process a transcript text with background processing."""
 
+    if transcript.upload_id is not None:
+        try:
+            await open_transcript_upload(processor.db, transcript.upload_id)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    lease = summary_lease_name(meeting_id)
+    lease_owner = new_lease_owner()
+    if not await state_store.acquire_lease(lease, lease_owner, SUMMARY_LEASE_TTL):
+        raise HTTPException(status_code=409, detail="A summary for this meeting is already being processed")
+
     try:
         process_id = await processor.db.create_process(meeting_id)
 
+        # Uploaded transcripts stay in their parts and are referenced, not copied
         await processor.db.save_transcript(
             meeting_id,
-            transcript.text,
+            transcript.text or "",
             transcript.model,
             transcript.model_name,
             transcript.chunk_size,
             transcript.overlap,
+            upload_id=transcript.upload_id,
         )
 
         background_tasks.add_task(
-            process_transcript_background, process_id, transcript, meeting_id=meeting_id
+            process_transcript_background, process_id, transcript, meeting_id=meeting_id, lease_owner=lease_owner
         )
 
         return JSONResponse({"message": "Processing started", "process_id": process_id})
     except Exception as e:
         logger.error(f"Error in process_transcript_api: {str(e)}", exc_info=True)
+        await state_store.release_lease(lease, lease_owner)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -296,14 +393,23 @@ async def get_summary(meeting_id: str):
 
         status = result.get("status", "unknown").lower()
 
+        if status in ["processing", "pending", "started"]:
+            lease = await state_store.get_lease(summary_lease_name(meeting_id))
+            if lease is not None and lease.expired:
+                # The lease is released when a job ends, so an expired one means its worker died
+                await processor.db.update_process(meeting_id, status="failed", error=WORKER_STOPPED_ERROR)
+                status = "failed"
+                result["error"] = WORKER_STOPPED_ERROR
+
         summary_data = None
         if result.get("result"):
             try:
-                parsed_result = json.loads(result["result"])
-                if isinstance(parsed_result, str):
-                    summary_data = json.loads(parsed_result)
-                else:
-                    summary_data = parsed_result
+                with timed("serialization"):
+                    parsed_result = json.loads(result["result"])
+                    if isinstance(parsed_result, str):
+                        summary_data = json.loads(parsed_result)
+                    else:
+                        summary_data = parsed_result
                 if not isinstance(summary_data, dict):
                     logger.error(
                         f"Parsed summary data is not a dictionary for meeting {meeting_id}"
@@ -341,6 +447,8 @@ async def get_summary(meeting_id: str):
             response["meetingName"] = None
             return JSONResponse(status_code=400, content=response)
         elif status in ["processing", "pending", "started"]:
+            # Blocks streamed so far are exposed separately from the final data
+            response["partial"] = summary_data
             response["data"] = None
             return JSONResponse(status_code=202, content=response)
         elif status == "completed":
@@ -375,6 +483,38 @@ async def get_summary(meeting_id: str):
         )
 
 
+@router.get("/meetings/{meeting_id}/summary/stream")
+async def stream_summary(meeting_id: str):
+    """Stream summary progress for a meeting as server-sent events."""
+
+    async def event_source():
+        async with broadcaster.subscribe(meeting_id) as queue:
+            snapshot = await get_summary(meeting_id)
+            yield f"event: snapshot\ndata: {snapshot.body.decode()}\n\n"
+            if snapshot.status_code != 202:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Events are only published by the worker running the job, so
+                    # fall back to the stored status in case that is another one
+                    snapshot = await get_summary(meeting_id)
+                    if snapshot.status_code == 202:
+                        continue
+                    kind = "completed" if snapshot.status_code == 200 else "failed"
+                    yield f"event: {kind}\ndata: {snapshot.body.decode()}\n\n"
+                    return
+                if event["type"] in ("completed", "failed"):
+                    # Subscribers get the stored final state rather than the raw event
+                    final = await get_summary(meeting_id)
+                    yield f"event: {event['type']}\ndata: {final.body.decode()}\n\n"
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream")
+
+
 @router.post("/meetings")
 async def create_meeting(request: SaveTranscriptRequest):
     """Create a meeting and save transcript segments without processing."""
@@ -385,7 +525,8 @@ async def create_meeting(request: SaveTranscriptRequest):
         )
         logger.info(f"Number of transcripts to save: {len(request.transcripts)}")
 
-        meeting_id = f"meeting-{int(time.time() * 1000)}"
+        # The random suffix keeps concurrent requests in the same millisecond apart
+        meeting_id = f"meeting-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
         await processor.db.save_meeting(meeting_id, request.meeting_title)
 
         for transcript in request.transcripts:
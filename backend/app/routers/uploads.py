@@ -0,0 +1,165 @@
+"""Router module for chunked, resumable uploads of transcripts and audio.
+
+A client creates a session with the total size, sends the content as parts
+with ``PUT /uploads/{upload_id}/parts`` and a ``Content-Range`` header, in
+any order and possibly in parallel, and calls ``.../complete`` once every
+byte is there. After an interruption ``GET /uploads/{upload_id}`` lists the
+ranges still missing. A completed transcript upload can be summarized by
+passing its ``upload_id`` to ``POST /meetings/{meeting_id}/summary``.
+"""
+
+import logging
+import re
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+
+from routers.meetings import processor
+from schemas.uploads import CompleteUploadRequest, CreateUploadRequest
+from upload_store import MAX_PART_BYTES, missing_ranges, parts_overlap, upload_store
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def _upload_status(session: Dict, parts: List[Dict]) -> Dict:
+    return {
+        "upload_id": session["id"],
+        "kind": session["kind"],
+        "filename": session["filename"],
+        "meeting_id": session["meeting_id"],
+        "size": session["size"],
+        "sha256": session["sha256"],
+        "status": session["status"],
+        "received_bytes": sum(part["size"] for part in parts),
+        # Inclusive byte ranges, as used by Content-Range
+        "missing": [{"start": start, "end": end - 1} for start, end in missing_ranges(session["size"], parts)],
+        "max_part_size": MAX_PART_BYTES,
+    }
+
+
+async def _get_session(upload_id: str) -> Dict:
+    session = await processor.db.get_upload_session(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+@router.post("/uploads")
+async def create_upload(request: CreateUploadRequest):
+    """Start a chunked upload session."""
+
+    upload_id = uuid.uuid4().hex
+    await processor.db.create_upload_session(
+        upload_id,
+        request.kind,
+        request.size,
+        sha256=request.sha256.lower() if request.sha256 else None,
+        filename=request.filename,
+        meeting_id=request.meeting_id,
+    )
+    logger.info(f"Created {request.kind} upload {upload_id} of {request.size} bytes")
+    return _upload_status(await _get_session(upload_id), [])
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Get the state of an upload, including the byte ranges still missing."""
+
+    session = await _get_session(upload_id)
+    return _upload_status(session, await processor.db.get_upload_parts(upload_id))
+
+
+@router.put("/uploads/{upload_id}/parts")
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(...),
+    x_content_sha256: Optional[str] = Header(None),
+):
+    """Store one byte range of an upload, streamed to disk as it arrives.
+
+    ``Content-Range: bytes START-END/TOTAL`` gives the range (END inclusive).
+    If ``X-Content-SHA256`` is set the part is rejected unless it matches.
+    Sending the same range again replaces the stored part, unless it is
+    rejected.
+    """
+
+    session = await _get_session(upload_id)
+    if session["status"] != "open":
+        raise HTTPException(status_code=409, detail="Upload is already complete")
+
+    match = _CONTENT_RANGE_RE.match(content_range.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range must look like 'bytes START-END/TOTAL'")
+    start, end = int(match.group(1)), int(match.group(2))
+    total = match.group(3)
+    size = end - start + 1
+    if size <= 0 or end >= session["size"] or (total != "*" and int(total) != session["size"]):
+        raise HTTPException(status_code=416, detail=f"Range does not fit an upload of {session['size']} bytes")
+    if size > MAX_PART_BYTES:
+        raise HTTPException(status_code=413, detail=f"Parts may be at most {MAX_PART_BYTES} bytes")
+
+    for part in await processor.db.get_upload_parts(upload_id):
+        same_range = part["offset"] == start and part["size"] == size
+        if not same_range and part["offset"] < end + 1 and start < part["offset"] + part["size"]:
+            raise HTTPException(status_code=409, detail="Range overlaps a part that was already uploaded")
+
+    try:
+        # Checked before the part is moved into place, so a bad re-send never replaces a good part
+        digest = await upload_store.write_part(upload_id, start, size, request.stream(), x_content_sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await processor.db.save_upload_part(upload_id, start, size, digest)
+    parts = await processor.db.get_upload_parts(upload_id)
+    return {
+        "upload_id": upload_id,
+        "start": start,
+        "end": end,
+        "sha256": digest,
+        "received_bytes": sum(part["size"] for part in parts),
+    }
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, request: Optional[CompleteUploadRequest] = None):
+    """Verify that every byte arrived and the content hash matches, and close the upload."""
+
+    session = await _get_session(upload_id)
+    parts = await processor.db.get_upload_parts(upload_id)
+    if session["status"] == "complete":
+        return _upload_status(session, parts)
+
+    if parts_overlap(parts):
+        raise HTTPException(status_code=409, detail="Uploaded parts overlap")
+    status = _upload_status(session, parts)
+    if status["missing"]:
+        raise HTTPException(status_code=400, detail={"message": "Upload is missing byte ranges", "missing": status["missing"]})
+
+    expected = (request.sha256 if request and request.sha256 else session["sha256"] or "").lower()
+    digest = await upload_store.sha256(upload_id, parts)
+    if expected and expected != digest:
+        raise HTTPException(status_code=400, detail="Upload SHA-256 does not match")
+
+    await processor.db.complete_upload_session(upload_id, digest)
+    logger.info(f"Completed upload {upload_id} ({session['size']} bytes in {len(parts)} parts)")
+    return _upload_status(await _get_session(upload_id), parts)
+
+
+@router.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    """Abort an upload and delete its stored parts."""
+
+    await _get_session(upload_id)
+    await upload_store.delete(upload_id)
+    await processor.db.delete_upload_session(upload_id)
+    return {"message": "Upload deleted successfully"}
+
+
+__all__ = ["router"]
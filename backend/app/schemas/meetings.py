@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 class Transcript(BaseModel):
@@ -45,13 +45,22 @@ class SaveModelConfigRequest(BaseModel):
 
 
 class TranscriptRequest(BaseModel):
-    """Request model for transcript text"""
+    """Request model for transcript text, given inline or as a completed upload"""
 
-    text: str
+    text: Optional[str] = None
+    upload_id: Optional[str] = None
     model: str
     model_name: str
     chunk_size: Optional[int] = 5000
     overlap: Optional[int] = 1000
+    stream: Optional[bool] = False
+    compact: Optional[bool] = True
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if (self.text is None) == (self.upload_id is None):
+            raise ValueError("Provide either text or upload_id")
+        return self
 
 
 class ProcessTranscriptRequest(TranscriptRequest):
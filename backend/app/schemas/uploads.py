@@ -0,0 +1,19 @@
+"""Pydantic models for chunked uploads."""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class CreateUploadRequest(BaseModel):
+    """Start an upload of ``size`` bytes; ``sha256`` is checked on completion if given"""
+
+    size: int = Field(gt=0)
+    kind: Literal["transcript", "audio"] = "transcript"
+    filename: Optional[str] = None
+    sha256: Optional[str] = None
+    meeting_id: Optional[str] = None
+
+
+class CompleteUploadRequest(BaseModel):
+    sha256: Optional[str] = None
@@ -0,0 +1,222 @@
+"""State shared between API worker processes.
+
+A single uvicorn process can keep job results and ownership in memory, but
+with ``cli.py serve --workers N`` a request may land on any worker. Such
+state goes through a :class:`StateStore` instead:
+
+* ``get``/``set``/``delete`` of JSON values by namespace and key, with an
+  optional TTL;
+* leases: ``acquire_lease`` hands a named lease to one owner until it
+  expires or is released, so a job runs on one worker only, and a job whose
+  lease expired without being released is known to have lost its worker.
+
+``STATE_STORE=memory`` (the default) keeps everything in this process.
+``STATE_STORE=sqlite`` stores it in the ``shared_state`` and ``job_leases``
+tables of ``STATE_DB_PATH`` (default: the main database), which every
+worker on the host can see.
+"""
+
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import aiosqlite
+
+from db import DEFAULT_DB_PATH
+from instrumentation import timed
+
+# Identifies this process as a lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Lease:
+    name: str
+    owner: str
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= time.time()
+
+
+class StateStore:
+    """Interface for state shared across worker processes."""
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take ``name`` for ``owner`` unless someone else holds a live lease.
+
+        Re-acquiring a lease already held by ``owner`` extends it.
+        """
+        raise NotImplementedError
+
+    async def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Extend a lease held by ``owner``; False if it was taken over."""
+        raise NotImplementedError
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        raise NotImplementedError
+
+    async def get_lease(self, name: str) -> Optional[Lease]:
+        """Return the lease record, expired or not, or None if there is none."""
+        raise NotImplementedError
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store, for a single worker and for tests."""
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, str], Tuple[Any, Optional[float]]] = {}
+        self._leases: Dict[str, Lease] = {}
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self._values.get((namespace, key))
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._values[(namespace, key)]
+            return default
+        return value
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._values[(namespace, key)] = (value, expires_at)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._values.pop((namespace, key), None)
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        lease = self._leases.get(name)
+        if lease is not None and lease.owner != owner and not lease.expired:
+            return False
+        self._leases[name] = Lease(name, owner, time.time() + ttl)
+        return True
+
+    async def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        lease = self._leases.get(name)
+        if lease is None or lease.owner != owner:
+            return False
+        lease.expires_at = time.time() + ttl
+        return True
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        lease = self._leases.get(name)
+        if lease is not None and lease.owner == owner:
+            del self._leases[name]
+
+    async def get_lease(self, name: str) -> Optional[Lease]:
+        return self._leases.get(name)
+
+
+class SQLiteStateStore(StateStore):
+    """Store backed by tables in a SQLite database shared by all workers.
+
+    The tables are created by ``run_migrations``.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+
+    def _connect(self):
+        return aiosqlite.connect(self.db_path)
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with timed("db"):
+            async with self._connect() as conn:
+                cursor = await conn.execute(
+                    "SELECT value FROM shared_state WHERE namespace = ? AND key = ? "
+                    "AND (expires_at IS NULL OR expires_at > ?)",
+                    (namespace, key, time.time()),
+                )
+                row = await cursor.fetchone()
+        return json.loads(row[0]) if row else default
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with timed("db"):
+            async with self._connect() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+                    """,
+                    (namespace, key, json.dumps(value), expires_at),
+                )
+                # Expired entries are only ever filtered out by reads; drop them as we go
+                await conn.execute(
+                    "DELETE FROM shared_state WHERE namespace = ? AND expires_at <= ?", (namespace, now)
+                )
+                await conn.commit()
+
+    async def delete(self, namespace: str, key: str) -> None:
+        with timed("db"):
+            async with self._connect() as conn:
+                await conn.execute("DELETE FROM shared_state WHERE namespace = ? AND key = ?", (namespace, key))
+                await conn.commit()
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with timed("db"):
+            async with self._connect() as conn:
+                cursor = await conn.execute(
+                    """
+                    INSERT INTO job_leases (name, owner, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                    WHERE job_leases.owner = excluded.owner OR job_leases.expires_at <= ?
+                    """,
+                    (name, owner, now + ttl, now),
+                )
+                acquired = cursor.rowcount > 0
+                await conn.commit()
+        return acquired
+
+    async def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        with timed("db"):
+            async with self._connect() as conn:
+                cursor = await conn.execute(
+                    "UPDATE job_leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                    (time.time() + ttl, name, owner),
+                )
+                renewed = cursor.rowcount > 0
+                await conn.commit()
+        return renewed
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        with timed("db"):
+            async with self._connect() as conn:
+                await conn.execute("DELETE FROM job_leases WHERE name = ? AND owner = ?", (name, owner))
+                await conn.commit()
+
+    async def get_lease(self, name: str) -> Optional[Lease]:
+        with timed("db"):
+            async with self._connect() as conn:
+                cursor = await conn.execute("SELECT owner, expires_at FROM job_leases WHERE name = ?", (name,))
+                row = await cursor.fetchone()
+        return Lease(name, row[0], row[1]) if row else None
+
+
+def create_state_store() -> StateStore:
+    """Build the store selected by ``STATE_STORE``."""
+    kind = os.getenv("STATE_STORE", "memory").lower()
+    if kind == "memory":
+        return MemoryStateStore()
+    if kind == "sqlite":
+        return SQLiteStateStore(os.getenv("STATE_DB_PATH", DEFAULT_DB_PATH))
+    raise ValueError(f"Unknown STATE_STORE: {kind}")
+
+
+state_store = create_state_store()
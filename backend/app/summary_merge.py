@@ -0,0 +1,233 @@
+"""Merging of per-chunk summaries into the final meeting summary.
+
+Consecutive chunks share context, so the LLM tends to report the same action
+item or decision in several chunks with slightly different wording.
+``merge_chunk_summaries`` concatenates the sections and then runs
+``dedupe_blocks`` on each of them, which clusters near-duplicate blocks of
+adjacent chunks with MinHash signatures and locality-sensitive hashing and
+keeps one block per cluster. Blocks of the same chunk are never merged, nor
+are blocks that differ in a number, a date or a negation ("by March 3" and
+"by March 30", "Do not deploy" and "Deploy"). Signatures are computed with NumPy and each block is only compared
+against the leaders of the buckets it falls into, so the cost grows linearly
+with the number of blocks.
+
+While merging, the blocks of every chunk are held as ``CompactSummary``
+blocks rather than dicts; the chunk JSON was written by the pipeline from
+validated results, so it is not validated again here.
+"""
+
+import json
+import logging
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compact_summary import CompactBlock, CompactSummary
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+DEFAULT_THRESHOLD = 0.7
+
+_rng = np.random.default_rng(0x5EED)
+# Multiply-shift hashing: h(x) = (a * x + b) >> 32 with odd a, wrapping in uint64
+_HASH_A = (_rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+# Words that change what a block says about when or whether something happens
+# ("don't" normalizes to "don t")
+_FACT_WORDS = frozenset(
+    "not no never t cannot without none nor "
+    "january february march april may june july august september october november december "
+    "jan feb mar apr jun jul aug sep sept oct nov dec "
+    "monday tuesday wednesday thursday friday saturday sunday mon tue tues wed thu thur thurs fri sat sun "
+    "today tomorrow tonight yesterday".split()
+)
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """MinHash signatures over character shingles, one row per text."""
+    return _minhash([_normalize(text) for text in texts])
+
+
+def _minhash(normalized: List[str]) -> np.ndarray:
+    # All texts are hashed in one pass: their bytes are concatenated, every
+    # shingle is packed into an integer and the per-text minimum of each hash
+    # function is taken with ``np.minimum.reduceat``.
+    encoded = [text.encode("utf-8").ljust(SHINGLE_SIZE, b"\0") for text in normalized]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    # Pack each run of SHINGLE_SIZE bytes into one integer
+    count = data.size - SHINGLE_SIZE + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        shingles = (shingles << np.uint64(8)) | data[offset:offset + count]
+
+    # Keep only shingles that start and end inside the same text
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    text_of = np.repeat(np.arange(len(normalized)), lengths)[:count]
+    local = np.arange(count) - starts[text_of]
+    shingles = shingles[local <= lengths[text_of] - SHINGLE_SIZE]
+    per_text = lengths - SHINGLE_SIZE + 1
+    segments = np.concatenate(([0], np.cumsum(per_text)[:-1]))
+
+    result = np.empty((len(normalized), NUM_PERM), dtype=np.uint64)
+    for perm in range(NUM_PERM):
+        hashed = (shingles * _HASH_A[perm] + _HASH_B[perm]) >> np.uint64(32)
+        result[:, perm] = np.minimum.reduceat(hashed, segments)
+    return result
+
+
+def _content(block) -> Any:
+    if isinstance(block, CompactBlock):
+        return block.content
+    return block.get("content", "") if isinstance(block, dict) else None
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return float(np.count_nonzero(a == b)) / a.size
+
+
+def _facts(key: str) -> Tuple[str, ...]:
+    """The numbers, dates and negations of a normalized text, which near-duplicates must share."""
+    return tuple(sorted(
+        token for token in key.split()
+        if token in _FACT_WORDS or any(char.isdigit() for char in token)
+    ))
+
+
+def dedupe_blocks(blocks: List, threshold: float = DEFAULT_THRESHOLD,
+                  chunks: Optional[List[int]] = None) -> List:
+    """Collapse near-duplicate blocks, keeping the most detailed one of each cluster.
+
+    ``blocks`` are block dicts or ``CompactBlock``s. ``chunks`` gives the
+    index of the chunk each block came from; blocks are then only merged
+    with blocks of an adjacent chunk, where the overlap between chunks makes
+    the LLM repeat itself, never with blocks of their own chunk. Blocks whose
+    numbers, dates or negations differ are never merged, however similar
+    the rest of their text is.
+
+    The surviving block takes the position of the first block of its cluster
+    so the original ordering is preserved.
+    """
+    if len(blocks) < 2:
+        return list(blocks)
+
+    def mergeable(index: int, leader: int) -> bool:
+        return chunks is None or abs(chunks[index] - chunks[leader]) == 1
+
+    def prune(leaders: deque, index: int) -> None:
+        # Blocks come in chunk order, so leaders before the previous chunk can no longer match
+        while chunks is not None and leaders and chunks[leaders[0]] < chunks[index] - 1:
+            leaders.popleft()
+
+    leader_of = list(range(len(blocks)))
+    exact: Dict[str, deque] = {}
+    candidates: List[int] = []
+    keys: List[str] = []
+    for index, block in enumerate(blocks):
+        content = _content(block)
+        if not isinstance(content, str) or not content.strip():
+            continue
+        key = _normalize(content)
+        same = exact.setdefault(key, deque())
+        prune(same, index)
+        leader = next((other for other in same if mergeable(index, other)), None)
+        if leader is not None:
+            leader_of[index] = leader
+        else:
+            same.append(index)
+            candidates.append(index)
+            keys.append(key)
+
+    if len(candidates) > 1:
+        signatures = _minhash(keys)
+        facts = [_facts(key) for key in keys]
+        candidate_rows = {index: row for row, index in enumerate(candidates)}
+        # Fold each band's rows into one integer so bucket keys are cheap to hash
+        rows = NUM_PERM // BANDS
+        bands = signatures.reshape(len(candidates), BANDS, rows)
+        band_hashes = np.zeros((len(candidates), BANDS), dtype=np.uint64)
+        for r in range(rows):
+            band_hashes = (band_hashes * np.uint64(0x100000001B3)) ^ bands[:, :, r]
+        band_hashes = (band_hashes + np.arange(BANDS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)).tolist()
+
+        # Only blocks with the same facts can merge, so they key the buckets too
+        buckets: Dict[Tuple, deque] = {}
+        for row, index in enumerate(candidates):
+            leader = None
+            row_keys = [(band_key, facts[row]) for band_key in band_hashes[row]]
+            for bucket_key in row_keys:
+                bucket = buckets.get(bucket_key)
+                if not bucket:
+                    continue
+                prune(bucket, index)
+                for candidate in bucket:
+                    if (
+                        mergeable(index, candidate)
+                        and estimated_similarity(signatures[row], signatures[candidate_rows[candidate]]) >= threshold
+                    ):
+                        leader = candidate
+                        break
+                if leader is not None:
+                    break
+            if leader is None:
+                for bucket_key in row_keys:
+                    buckets.setdefault(bucket_key, deque()).append(index)
+            else:
+                leader_of[index] = leader
+
+    # Pick the longest block of each cluster as its representative
+    best: Dict[int, int] = {}
+    for index, leader in enumerate(leader_of):
+        current = best.get(leader)
+        if current is None or len(str(_content(blocks[index]))) > len(str(_content(blocks[current]))):
+            best[leader] = index
+    return [blocks[best[index]] for index, leader in enumerate(leader_of) if leader == index]
+
+
+def merge_chunk_summaries(
+    all_json_data: List[str],
+    dedupe: bool = True,
+    threshold: float = DEFAULT_THRESHOLD,
+    label: str = "",
+    stats: Optional[Dict] = None,
+) -> Dict:
+    """Merge the JSON summaries of all chunks into a single summary dict."""
+    final_summary = CompactSummary()
+    # The chunk each block came from, per section
+    sources: Dict[str, List[int]] = {key: [] for key in final_summary.sections}
+
+    for chunk_index, json_str in enumerate(all_json_data):
+        try:
+            chunk_summary = CompactSummary.from_json(json_str)
+            final_summary.extend(chunk_summary)
+            for key, section in chunk_summary.sections.items():
+                sources[key].extend([chunk_index] * len(section.blocks))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON chunk for {label}: {e}. Chunk: {json_str[:100]}...")
+        except Exception as e:
+            logger.error(f"Error processing chunk data for {label}: {e}. Chunk: {json_str[:100]}...")
+
+    if dedupe:
+        before = after = 0
+        for key, section in final_summary.sections.items():
+            before += len(section.blocks)
+            section.blocks = dedupe_blocks(section.blocks, threshold, chunks=sources[key])
+            after += len(section.blocks)
+        if before != after:
+            logger.info(f"Deduplicated summary blocks for {label}: {before} -> {after}")
+        if stats is not None:
+            stats["dedup"] = {"blocks_before": before, "blocks_after": after}
+
+    return final_summary.as_dict()
@@ -0,0 +1,219 @@
+"""Incremental parsing and fan-out of streamed summary results.
+
+The LLM returns one ``SummaryResponse`` JSON document per transcript chunk.
+When the provider streams tokens we do not want to wait for the closing
+brace before showing anything, so :class:`SummaryStreamParser` scans the
+growing JSON text and emits every ``Block`` object as soon as it is closed.
+:class:`PartialSummary` folds those events into a summary dict that can be
+persisted while processing, and :class:`SummaryBroadcaster` pushes the same
+events to any live subscribers (e.g. the SSE endpoint).
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SECTION_TITLES = {
+    "SectionSummary": "Section Summary",
+    "CriticalDeadlines": "Critical Deadlines",
+    "KeyItemsDecisions": "Key Items & Decisions",
+    "ImmediateActionItems": "Immediate Action Items",
+    "NextSteps": "Next Steps",
+    "OtherImportantPoints": "Other Important Points",
+    "ClosingRemarks": "Closing Remarks",
+}
+
+
+def empty_summary() -> Dict:
+    """Return an empty summary dict with every section present."""
+    summary = {"MeetingName": ""}
+    for key, title in SECTION_TITLES.items():
+        summary[key] = {"title": title, "blocks": []}
+    return summary
+
+
+class SummaryStreamParser:
+    """Incrementally scan ``SummaryResponse`` JSON and emit completed fields.
+
+    ``feed`` accepts the next piece of text and returns the events that became
+    complete with it. Each character is looked at once and only the text of
+    the block currently being received is retained, so feeding a whole
+    response stays linear in its length.
+    """
+
+    def __init__(self):
+        self._data = ""
+        self._offset = 0
+        self._started = False
+        # Each frame is [kind, key, start_offset, expect_key]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._pending_key: Optional[str] = None
+
+    def _text(self, start: int, end: int) -> str:
+        return self._data[start - self._offset:end - self._offset]
+
+    def feed(self, text: str) -> List[Dict]:
+        events: List[Dict] = []
+        if not text:
+            return events
+        base = self._offset + len(self._data)
+        self._data += text
+
+        for offset, ch in enumerate(text):
+            pos = base + offset
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(["obj", None, pos, True])
+                continue
+            if not self._stack:
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._on_string(pos, events)
+                continue
+
+            frame = self._stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":":
+                frame[3] = False
+            elif ch == ",":
+                if frame[0] == "obj":
+                    frame[3] = True
+                    self._pending_key = None
+            elif ch in "{[":
+                key = self._pending_key if frame[0] == "obj" else None
+                self._stack.append(["obj" if ch == "{" else "arr", key, pos, ch == "{"])
+                self._pending_key = None
+            elif ch in "}]":
+                closed = self._stack.pop()
+                self._on_close(closed, pos, events)
+                self._pending_key = None
+
+        self._trim()
+        return events
+
+    def _trim(self) -> None:
+        """Drop buffered text that no open block or string still needs."""
+        keep = self._offset + len(self._data)
+        if len(self._stack) > 3:
+            keep = min(keep, self._stack[3][2])
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if keep > self._offset:
+            self._data = self._data[keep - self._offset:]
+            self._offset = keep
+
+    def _on_string(self, end: int, events: List[Dict]) -> None:
+        frame = self._stack[-1]
+        if frame[0] != "obj":
+            return
+        if frame[3]:
+            self._pending_key = json.loads(self._text(self._string_start, end + 1))
+        elif len(self._stack) == 1 and self._pending_key == "MeetingName":
+            value = json.loads(self._text(self._string_start, end + 1))
+            events.append({"type": "meeting_name", "value": value})
+
+    def _on_close(self, closed: list, end: int, events: List[Dict]) -> None:
+        # A block is an object directly inside root.<Section>.blocks[]
+        if closed[0] != "obj" or len(self._stack) != 3:
+            return
+        blocks_frame, section_frame = self._stack[2], self._stack[1]
+        if blocks_frame[1] != "blocks" or section_frame[1] not in SECTION_TITLES:
+            return
+        try:
+            block = json.loads(self._text(closed[2], end + 1))
+        except json.JSONDecodeError:
+            logger.debug("Skipping undecodable streamed block")
+            return
+        events.append({"type": "block", "section": section_frame[1], "block": block})
+
+
+class PartialSummary:
+    """Fold stream events from all chunks into a single summary dict.
+
+    Blocks streamed for a chunk are provisional until its ``chunk_complete``
+    event arrives, at which point they are replaced by the validated result.
+    """
+
+    def __init__(self):
+        self.meeting_name = ""
+        self._chunks: Dict[int, Dict] = {}
+
+    def apply(self, event: Dict) -> None:
+        chunk = event.get("chunk", 0)
+        kind = event["type"]
+        if kind == "meeting_name":
+            if event["value"]:
+                self.meeting_name = event["value"]
+        elif kind == "block":
+            sections = self._chunks.setdefault(chunk, {})
+            sections.setdefault(event["section"], []).append(event["block"])
+        elif kind == "chunk_reset":
+            self._chunks.pop(chunk, None)
+        elif kind == "chunk_complete":
+            data = json.loads(event["summary"])
+            if data.get("MeetingName"):
+                self.meeting_name = data["MeetingName"]
+            self._chunks[chunk] = {
+                key: list(data[key].get("blocks") or [])
+                for key in SECTION_TITLES
+                if isinstance(data.get(key), dict)
+            }
+
+    def snapshot(self) -> Dict:
+        summary = empty_summary()
+        summary["MeetingName"] = self.meeting_name
+        for chunk in sorted(self._chunks):
+            for key, blocks in self._chunks[chunk].items():
+                summary[key]["blocks"].extend(blocks)
+        return summary
+
+
+class SummaryBroadcaster:
+    """In-process pub/sub of summary events keyed by meeting ID."""
+
+    def __init__(self, max_queue_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, meeting_id: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(meeting_id, []).append(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(meeting_id, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self._subscribers.pop(meeting_id, None)
+
+    def publish(self, meeting_id: str, event: Dict) -> None:
+        for queue in self._subscribers.get(meeting_id, []):
+            if queue.full():
+                # Drop the oldest event rather than blocking the producer
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscriber_count(self, meeting_id: str) -> int:
+        return len(self._subscribers.get(meeting_id, []))
+
+
+broadcaster = SummaryBroadcaster()
@@ -0,0 +1,272 @@
+"""Transcript pre-processing that shrinks chunk prompts before they reach the LLM.
+
+Whisper output carries a lot of text that costs tokens without adding
+meaning: filler words, stutters, per-line timestamps, the same speaker label
+on every line and ``[BLANK_AUDIO]`` style markers. On top of that the
+chunker used to resend ``overlap`` characters of the previous chunk. This
+module removes the noise and replaces the overlap with a short carry-over
+summary built from the previous chunk's result.
+
+Everything also works on text that arrives in pieces (``iter_chunks``), so
+an uploaded transcript can be summarized without reading it into memory.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Sections whose first blocks make the most useful carry-over context
+CARRY_OVER_SECTIONS = ("KeyItemsDecisions", "ImmediateActionItems", "SectionSummary", "NextSteps")
+# Upper bound for the carry-over note, whatever overlap the caller asked for
+CARRY_OVER_MAX_CHARS = 600
+
+# Case-sensitive: "ER" or "HMM" in caps are acronyms, not fillers. Only a
+# filler starting a sentence may be capitalized
+_FILLERS = r"(?:u+m+|u+h+|e+r+m*|a+h+|h+m+|m+h*m+|uh-huh)"
+_SENTENCE_FILLERS = r"(?:Uu*m+|Uu*h+|Ee*r+m*|Aa*h+|Hh*m+|Mm*h*m+|Uh-huh)"
+_FILLER_RE = re.compile(
+    rf"(?:(?<![\w'-]){_FILLERS}|(?:^|(?<=[.!?] )){_SENTENCE_FILLERS})(?![\w'-])[,.]?\s*"
+)
+_MARKER_RE = re.compile(r"[\[(](?:blank_audio|silence|music|inaudible|noise|applause|laughter)[\])]", re.IGNORECASE)
+# Only single letters and a few function words are collapsed when repeated:
+# other words are often repeated on purpose ("no no", "that that", "had had")
+_STUTTER_RE = re.compile(r"\b([A-Za-z]|an|the|and|of|to)(?:,?\s+\1\b)+", re.IGNORECASE)
+_TIMESTAMP_RE = re.compile(
+    r"^\s*[\[(]\s*(\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?)(?:\s*-->\s*\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?)?\s*[\])]\s*"
+)
+# Diarization labels ("Speaker 1", "SPEAKER_00") or a name of up to three capitalized words
+_SPEAKER_RE = re.compile(r"^((?i:speaker|spk)[ _-]?\d{1,3}|[A-Z][\w'-]*(?: [A-Z][\w'-]*){0,2}):\s+")
+# Capitalized labels that introduce a note rather than a speaker
+_NOT_SPEAKERS = {
+    "action", "action item", "action items", "agenda", "answer", "decision", "decisions", "next steps",
+    "note", "notes", "question", "reminder", "summary", "todo", "update",
+}
+_SPACES_RE = re.compile(r"[ \t ]+")
+# Characters ``str.splitlines`` treats as line boundaries
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+# A streamed line longer than this is cut, so text without line breaks is never held whole
+MAX_LINE_CHARS = 64 * 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for reporting."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def compact_transcript(text: str) -> str:
+    """Normalize whitespace, drop disfluencies and collapse repeated labels.
+
+    Timestamps are only kept when they change, and consecutive lines from the
+    same speaker are merged under a single label.
+    """
+    return "\n".join(iter_compacted_lines(text.splitlines()))
+
+
+def iter_lines(pieces: Iterable[str], max_line_chars: int = MAX_LINE_CHARS) -> Iterator[str]:
+    """Split text arriving in pieces into lines, like ``str.splitlines``."""
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        lines = buffer.splitlines(keepends=True)
+        buffer = ""
+        if lines and lines[-1][-1] not in _LINE_BREAKS:
+            buffer = lines.pop()
+        for line in lines:
+            yield line[:-2] if line.endswith("\r\n") else line[:-1]
+        while len(buffer) > max_line_chars:
+            yield buffer[:max_line_chars]
+            buffer = buffer[max_line_chars:]
+    if buffer:
+        yield buffer
+
+
+def iter_compacted_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Compact transcript lines one at a time; see ``compact_transcript``."""
+    current: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    last_speaker: Optional[str] = None
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        timestamp = None
+        match = _TIMESTAMP_RE.match(line)
+        if match:
+            timestamp = match.group(1)
+            line = line[match.end():]
+        speaker = None
+        match = _SPEAKER_RE.match(line)
+        if match and match.group(1).lower() not in _NOT_SPEAKERS:
+            speaker = match.group(1)
+            line = line[match.end():]
+
+        line = _MARKER_RE.sub(" ", line)
+        line = _FILLER_RE.sub("", line)
+        line = _STUTTER_RE.sub(r"\1", line)
+        line = _SPACES_RE.sub(" ", line).strip(" ,")
+        if not line:
+            continue
+
+        prefix = ""
+        if timestamp and timestamp != last_timestamp:
+            prefix = f"[{timestamp}] "
+            last_timestamp = timestamp
+        if speaker and speaker != last_speaker:
+            prefix += f"{speaker}: "
+        elif speaker and current is not None and not prefix:
+            # Same speaker keeps talking: continue their previous line
+            current = f"{current} {line}"
+            continue
+        # After an unlabeled line the next speaker is named again
+        last_speaker = speaker
+        if current is not None:
+            yield current
+        current = prefix + line
+
+    if current is not None:
+        yield current
+
+
+def _chunk_end(text: str, start: int, chunk_size: int) -> int:
+    length = len(text)
+    end = min(start + chunk_size, length)
+    if end < length:
+        # Only look back over the last fifth of the chunk for a boundary
+        floor = start + (chunk_size * 4) // 5
+        cut = text.rfind("\n", floor, end)
+        if cut == -1:
+            cut = text.rfind(" ", floor, end)
+        if cut > start:
+            end = cut + 1
+    return end
+
+
+def chunk_spans(text: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Return ``(start, end)`` offsets of non-overlapping chunks, preferring line or word boundaries."""
+    spans = []
+    start = 0
+    while start < len(text):
+        end = _chunk_end(text, start, chunk_size)
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+def split_chunks(text: str, chunk_size: int) -> List[str]:
+    """Split text into non-overlapping chunks, preferring line or word boundaries."""
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size)]
+
+
+def prepare_chunks(text: str, chunk_size: int, overlap: int, compact: bool) -> Tuple[str, List[Tuple[int, int]]]:
+    """Return the text to send and the spans of each chunk within it.
+
+    With ``compact`` the transcript is compacted and split without overlap;
+    otherwise the raw text is cut into ``chunk_size`` slices that overlap by
+    ``overlap`` characters.
+    """
+    if compact:
+        source = compact_transcript(text)
+        return source, chunk_spans(source, chunk_size)
+    step = chunk_size - overlap
+    length = len(text)
+    return text, [(i, min(i + chunk_size, length)) for i in range(0, length, step)]
+
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int, overlap: int, compact: bool) -> Iterator[str]:
+    """Yield the chunks ``prepare_chunks`` would produce, from text arriving in pieces.
+
+    Only about one chunk (plus the current line when compacting) is held in
+    memory at a time.
+    """
+    buffer = ""
+    if compact:
+        separator = ""
+        for line in iter_compacted_lines(iter_lines(pieces)):
+            buffer += separator + line
+            separator = "\n"
+            while len(buffer) > chunk_size:
+                end = _chunk_end(buffer, 0, chunk_size)
+                yield buffer[:end]
+                buffer = buffer[end:]
+        if buffer:
+            yield buffer
+        return
+
+    step = chunk_size - overlap
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            yield buffer[:chunk_size]
+            buffer = buffer[step:]
+    while buffer:
+        yield buffer[:chunk_size]
+        buffer = buffer[step:]
+
+
+def carry_over_summary(chunk_summary_json: Optional[str], previous_chunk: str, budget: int) -> str:
+    """Build a compact context note for the next chunk.
+
+    Uses the previous chunk's structured result when available and falls back
+    to the tail of the previous chunk text (what the overlap used to resend),
+    in both cases limited to ``budget`` characters.
+    """
+    if budget <= 0:
+        return ""
+    parts: List[str] = []
+    if chunk_summary_json:
+        try:
+            data = json.loads(chunk_summary_json)
+        except json.JSONDecodeError:
+            data = {}
+        if data.get("MeetingName"):
+            parts.append(f"Meeting: {data['MeetingName']}")
+        for key in CARRY_OVER_SECTIONS:
+            for block in (data.get(key) or {}).get("blocks") or []:
+                content = str(block.get("content", "")).strip()
+                if content:
+                    parts.append(f"- {content}")
+    note = "\n".join(parts)
+    if not note:
+        note = previous_chunk[-budget:].lstrip()
+        space = note.find(" ")
+        if 0 <= space < len(note) // 4:
+            note = note[space + 1:]
+    return note[:budget]
+
+
+@dataclass
+class CompactionStats:
+    """Token accounting for one transcript, reported per meeting."""
+
+    raw_chars: int = 0
+    compact_chars: int = 0
+    raw_tokens: int = 0
+    prompt_tokens: int = 0
+    chunks: int = 0
+    carry_over_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.prompt_tokens)
+
+    def as_dict(self) -> Dict:
+        return {
+            "raw_chars": self.raw_chars,
+            "compact_chars": self.compact_chars,
+            "raw_tokens": self.raw_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens_saved": self.tokens_saved,
+            "carry_over_tokens": self.carry_over_tokens,
+            "chunks": self.chunks,
+        }
+
+
+def raw_chunk_tokens(text: str, chunk_size: int, overlap: int) -> int:
+    """Tokens the uncompacted, overlapping chunker would have sent."""
+    return raw_chunk_tokens_for_length(len(text), chunk_size, overlap)
+
+
+def raw_chunk_tokens_for_length(length: int, chunk_size: int, overlap: int) -> int:
+    step = max(1, chunk_size - overlap)
+    return sum(math.ceil(min(chunk_size, length - i) / 4) for i in range(0, length, step))
@@ -1,14 +1,27 @@
 from pydantic import BaseModel
-from typing import List, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic_ai.models.ollama import OllamaModel
-from pydantic_ai.models.groq import GroqModel
-from pydantic_ai.models.openai import OpenAIModel
+import hashlib
+import importlib
 import logging
 import os
 from dotenv import load_dotenv
+from cpu_pool import cpu_pool
 from db import DatabaseManager
+from generation_stats import CountingModel, GenerationStats, record_job
+from instrumentation import timed
+from ollama_lifecycle import lifecycle as ollama_lifecycle
+from prompt_cache import PromptCacheStats
+from summary_stream import SummaryStreamParser
+from transcript_compaction import (
+    CARRY_OVER_MAX_CHARS,
+    CompactionStats,
+    carry_over_summary,
+    estimate_tokens,
+    iter_chunks,
+    raw_chunk_tokens,
+    raw_chunk_tokens_for_length,
+)
 
 
 
@@ -23,7 +36,22 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()  # Load environment variables from .env file
 
-db = DatabaseManager()
+# Provider model classes are imported on first use: each one pulls in its
+# vendor SDK, and together they made up most of the API's import time.
+PROVIDER_MODELS = {
+    "claude": ("anthropic_caching", "CachingAnthropicModel"),
+    "ollama": ("ollama_structured", "StructuredOllamaModel"),
+    "groq": ("pydantic_ai.models.groq", "GroqModel"),
+    "openai": ("pydantic_ai.models.openai", "OpenAIModel"),
+}
+
+
+def load_model_class(provider: str):
+    """Import and return the pydantic-ai model class for a provider."""
+    if provider not in PROVIDER_MODELS:
+        raise ValueError(f"Unsupported model provider: {provider}")
+    module_name, class_name = PROVIDER_MODELS[provider]
+    return getattr(importlib.import_module(module_name), class_name)
 
 class Block(BaseModel):
     """Represents a block of content in a section"""
@@ -48,24 +76,173 @@ class SummaryResponse(BaseModel):
     OtherImportantPoints: Section
     ClosingRemarks: Section
 
+SummaryEventCallback = Callable[[Dict], Awaitable[None]]
+
+# The same for every chunk (and every meeting), so it is sent as the system
+# prompt ahead of the chunk and providers can cache it; see prompt_cache
+SUMMARY_SYSTEM_PROMPT = """You summarize meeting transcripts. Each request contains one chunk of a \
+longer transcript, optionally preceded by context from earlier in the meeting that has already \
+been summarized.
+
+Extract the relevant information from the transcript chunk according to the required JSON \
+structure. Do not repeat information from the context. If a specific section (like Critical \
+Deadlines) has no relevant information in this chunk, return an empty list for its 'blocks'. \
+Ensure the output is only the JSON data.
+
+Sections:
+- MeetingName: a short title for the meeting, based on its main topic.
+- SectionSummary: what was discussed in this chunk, in a few sentences.
+- CriticalDeadlines: dates and deadlines that were set or mentioned, with what is due.
+- KeyItemsDecisions: decisions that were made and the key points agreed on.
+- ImmediateActionItems: tasks to be done, with the owner when one is named.
+- NextSteps: follow-ups and plans for after the meeting.
+- OtherImportantPoints: risks, concerns, open questions and anything else worth keeping.
+- ClosingRemarks: how the meeting (or this part of it) ended.
+
+Blocks:
+- id: unique within the section.
+- type: "bullet" for list items, "text" for sentences and paragraphs, "heading1" or \
+"heading2" for headings.
+- color: "default", or "gray" for minor details.
+- content: plain text, stated as facts from the meeting; name speakers only when it matters \
+who said or owns something."""
+
+
+def chunk_prompt(chunk: str, carry_over: Optional[str] = None) -> str:
+    """The per-chunk user prompt that follows the cached system prompt."""
+    prompt = f"Transcript Chunk:\n---\n{chunk}\n---\n"
+    if carry_over:
+        prompt = (
+            "Context from earlier in the meeting (already summarized, do not repeat it):\n"
+            f"---\n{carry_over}\n---\n\n{prompt}"
+        )
+    return prompt
+
+
+def _response_text(message) -> str:
+    """Return the raw JSON (or text) received so far in a streamed model response."""
+    parts = []
+    for part in message.parts:
+        if hasattr(part, "args_as_json_str"):
+            parts.append(part.args_as_json_str())
+        elif hasattr(part, "content") and isinstance(part.content, str):
+            parts.append(part.content)
+    return "".join(parts)
+
+class ChunkCheckpoint:
+    """Chunk summaries of one meeting's summary job, saved as each chunk completes.
+
+    ``process_transcript`` reuses a saved summary instead of calling the LLM
+    when the chunk's text and model are unchanged, so a retry after a crash
+    or provider failure only pays for the chunks that are still missing.
+    """
+
+    def __init__(self, db: DatabaseManager, meeting_id: str):
+        self.db = db
+        self.meeting_id = meeting_id
+        self.saved: Dict[int, Dict] = {}
+
+    @staticmethod
+    def input_hash(chunk: str, model: str, model_name: str) -> str:
+        return hashlib.sha256(f"{model}\0{model_name}\0{chunk}".encode("utf-8")).hexdigest()
+
+    async def load(self) -> int:
+        """Read the summaries saved by earlier runs; returns how many there are."""
+        self.saved = await self.db.get_chunk_results(self.meeting_id)
+        return len(self.saved)
+
+    def lookup(self, index: int, input_hash: str) -> Optional[str]:
+        saved = self.saved.get(index)
+        return saved["summary"] if saved and saved["input_hash"] == input_hash else None
+
+    async def save(self, index: int, input_hash: str, summary: str) -> None:
+        await self.db.save_chunk_result(self.meeting_id, index, input_hash, summary)
+        self.saved[index] = {"input_hash": input_hash, "summary": summary}
+
+    async def clear(self) -> None:
+        await self.db.delete_chunk_results(self.meeting_id)
+        self.saved = {}
+
 # --- Main Class Used by main.py ---
 
 class TranscriptProcessor:
     """Handles the processing of meeting transcripts using AI models."""
-    def __init__(self):
-        """Initialize the transcript processor."""
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        """Initialize the transcript processor; API keys are read from ``db``."""
         logger.info("TranscriptProcessor initialized.")
-        self.db = DatabaseManager()
-    async def process_transcript(self, text: str, model: str, model_name: str, chunk_size: int = 5000, overlap: int = 1000) -> Tuple[int, List[str]]:
+        self.db = db if db is not None else DatabaseManager()
+
+    def cleanup(self):
+        """Release resources on shutdown; agents and models are created per call, so there is nothing to free."""
+        logger.info("TranscriptProcessor cleaned up.")
+
+    async def summarize_batch(self, jobs: List, model: str, model_name: str, **options) -> Dict[str, str]:
+        """Summarize many meetings through the provider's batch API instead of per-chunk runs.
+
+        For non-urgent work such as reprocessing the archive: batches cost
+        less and do not use the interactive rate limits, but can take up to
+        24 hours. ``jobs`` are ``batch_summaries.BatchJob``; ``options`` go to
+        ``BatchSummarizer`` (``poll_interval``, ``max_requests``). Returns
+        ``completed`` or ``incomplete`` per meeting id.
+        """
+        # Imported here: batch_summaries imports this module
+        from batch_summaries import BatchSummarizer, batch_client
+
+        client = batch_client(model, await self.db.get_api_key(model), options.pop("http_client", None))
+        try:
+            return await BatchSummarizer(self.db, client, model, model_name, **options).run(jobs)
+        finally:
+            await client.aclose()
+
+    async def _run_chunk_streaming(self, agent, prompt: str, chunk_index: int, on_event: SummaryEventCallback,
+                                   cache_stats: Optional[PromptCacheStats] = None):
+        """Run the agent on one chunk, emitting blocks as soon as the provider streams them."""
+        parser = SummaryStreamParser()
+        received = ""
+        async with agent.run_stream(prompt) as result:
+            message = None
+            async for message, _is_last in result.stream_structured(debounce_by=None):
+                raw = _response_text(message)
+                # A model that repairs its output replaces it at the end; chunk_complete carries that
+                if raw.startswith(received):
+                    for event in parser.feed(raw[len(received):]):
+                        event["chunk"] = chunk_index
+                        await on_event(event)
+                received = raw
+            validated = await result.validate_structured_result(message)
+            if cache_stats is not None:
+                cache_stats.add_result(result)
+            return validated
+
+    async def process_transcript(self, text, model: str, model_name: str, chunk_size: int = 5000, overlap: int = 1000,
+                                 on_event: Optional[SummaryEventCallback] = None, compact: bool = True,
+                                 job_stats: Optional[Dict] = None,
+                                 checkpoint: Optional[ChunkCheckpoint] = None) -> Tuple[int, List[str]]:
         """
         Process transcript text into chunks and generate structured summaries for each chunk using an AI model.
 
         Args:
-            text: The transcript text.
+            text: The transcript text, or an object whose ``iter_text()`` yields
+                it in pieces (an ``UploadedTranscript``). The latter is read and
+                chunked as the chunks are needed and never held in memory whole.
             model: The AI model provider ('claude', 'ollama', 'groq', 'openai').
             model_name: The specific model name.
             chunk_size: The size of each text chunk.
             overlap: The overlap between consecutive chunks.
+            on_event: Optional async callback enabling streaming mode. It receives
+                ``block``/``meeting_name`` events while a chunk is being generated
+                and a ``chunk_complete`` event with the validated JSON afterwards.
+            compact: Strip filler/markers from the transcript and replace the raw
+                overlap with a carry-over summary of the previous chunk (at most
+                ``overlap`` characters).
+            job_stats: Optional dict that receives per-job statistics, such as the
+                ``compaction`` token accounting, the ``prompt_cache`` usage
+                reported by the provider, the ``generation`` calls and retries
+                per chunk (with the model load and generation time, for
+                Ollama) and the number of ``resumed_chunks``.
+            checkpoint: Optional ``ChunkCheckpoint``; each chunk summary is saved
+                to it, and chunks it already holds a summary for are not sent
+                to the LLM again.
 
         Returns:
             A tuple containing:
@@ -73,46 +250,57 @@ class TranscriptProcessor:
             - A list of JSON strings, where each string is the summary of a chunk.
         """
 
-        logger.info(f"Processing transcript (length {len(text)}) with model provider={model}, model_name={model_name}, chunk_size={chunk_size}, overlap={overlap}")
+        length = len(text) if isinstance(text, str) else text.size
+        logger.info(f"Processing transcript (length {length}) with model provider={model}, model_name={model_name}, chunk_size={chunk_size}, overlap={overlap}")
 
         all_json_data = []
         agent = None # Define agent variable
         llm = None # Define llm variable
+        held_model = None
 
         try:
             # Select and initialize the AI model and agent
             if model == "claude":
-                api_key = await db.get_api_key("claude")
+                api_key = await self.db.get_api_key("claude")
                 if not api_key: raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-                llm = AnthropicModel(model_name, api_key=api_key)
+                llm = load_model_class("claude")(model_name, api_key=api_key)
                 logger.info(f"Using Claude model: {model_name}")
             elif model == "ollama":
                 # Assumes Ollama server is running locally at default address
                 # You might need host/port configuration if it's elsewhere
-                llm = OllamaModel(model_name)
+                llm = load_model_class("ollama")(model_name)
+                # Kept loaded between chunks and for the jobs queued after this one
+                ollama_lifecycle.hold(model_name)
+                held_model = model_name
                 logger.info(f"Using Ollama model: {model_name}")
             elif model == "groq":
-                api_key = await db.get_api_key("groq")
+                api_key = await self.db.get_api_key("groq")
                 if not api_key: raise ValueError("GROQ_API_KEY environment variable not set")
-                llm = GroqModel(model_name, api_key=api_key)
+                llm = load_model_class("groq")(model_name, api_key=api_key)
                 logger.info(f"Using Groq model: {model_name}")
             # --- ADD OPENAI SUPPORT HERE ---
             elif model == "openai":
-                api_key = await db.get_api_key("openai")
+                api_key = await self.db.get_api_key("openai")
                 if not api_key: raise ValueError("OPENAI_API_KEY environment variable not set")
-                llm = OpenAIModel(model_name, api_key=api_key)
+                llm = load_model_class("openai")(model_name, api_key=api_key)
                 logger.info(f"Using OpenAI model: {model_name}")
             # --- END OPENAI SUPPORT ---
             else:
                 logger.error(f"Unsupported model provider requested: {model}")
                 raise ValueError(f"Unsupported model provider: {model}")
 
+            # Records each generation, so retries after invalid output are counted
+            llm = CountingModel(llm)
+            generation_stats = GenerationStats()
+
             # Initialize the agent with the selected LLM
             agent = Agent(
                 llm,
                 result_type=SummaryResponse,
                 result_retries=5,
+                system_prompt=SUMMARY_SYSTEM_PROMPT,
             )
+            cache_stats = PromptCacheStats()
             logger.info("Pydantic-AI Agent initialized.")
 
             # Split transcript into chunks
@@ -122,23 +310,72 @@ class TranscriptProcessor:
                 overlap = max(0, chunk_size - 100)
                 step = chunk_size - overlap
 
-            chunks = [text[i:i+chunk_size] for i in range(0, len(text), step)]
-            num_chunks = len(chunks)
-            logger.info(f"Split transcript into {num_chunks} chunks.")
+            raw_chars = 0
+            if isinstance(text, str):
+                stats = CompactionStats(raw_chars=len(text), raw_tokens=raw_chunk_tokens(text, chunk_size, overlap))
+                # Large transcripts are compacted and split in the shared CPU pool
+                source, chunks = await cpu_pool.prepare_chunks(text, chunk_size, overlap, compact)
+                if compact:
+                    stats.compact_chars = len(source)
+                num_chunks = len(chunks)
+                logger.info(f"Split transcript into {num_chunks} chunks.")
+            else:
+                # Uploaded transcripts are read, compacted and split one chunk at a time
+                def counted(pieces):
+                    nonlocal raw_chars
+                    for piece in pieces:
+                        raw_chars += len(piece)
+                        yield piece
+
+                stats = CompactionStats()
+                chunks = iter_chunks(counted(text.iter_text()), chunk_size, overlap, compact)
+                num_chunks = None
 
+            previous_json = None
+            previous_chunk = None
+            processed = 0
+            resumed = 0
             for i, chunk in enumerate(chunks):
-                logger.info(f"Processing chunk {i+1}/{num_chunks}...")
+                processed += 1
+                logger.info(f"Processing chunk {i+1}/{num_chunks or '?'}...")
+                if num_chunks is None and compact:
+                    stats.compact_chars += len(chunk)
+                carry_over = None
+                if compact and i > 0:
+                    carry_over = carry_over_summary(previous_json, previous_chunk, min(overlap, CARRY_OVER_MAX_CHARS))
+                    if carry_over:
+                        stats.carry_over_tokens += estimate_tokens(carry_over)
+                stats.prompt_tokens += estimate_tokens(chunk) + estimate_tokens(carry_over or "")
+                prompt = chunk_prompt(chunk, carry_over)
+                previous_json = None
+                previous_chunk = chunk
+                if checkpoint is not None:
+                    input_hash = checkpoint.input_hash(chunk, model, model_name)
+                    saved_json = checkpoint.lookup(i, input_hash)
+                    if saved_json is not None:
+                        resumed += 1
+                        all_json_data.append(saved_json)
+                        previous_json = saved_json
+                        if on_event is not None:
+                            await on_event({"type": "chunk_complete", "chunk": i, "summary": saved_json})
+                        logger.info(f"Reusing the saved summary for chunk {i+1}.")
+                        continue
+                llm.usages.clear()
                 try:
-                    # Run the agent to get the structured summary for the chunk
-                    summary_result = await agent.run(
-                        f"""Given the following meeting transcript chunk, extract the relevant information according to the required JSON structure. If a specific section (like Critical Deadlines) has no relevant information in this chunk, return an empty list for its 'blocks'. Ensure the output is only the JSON data.
-
-                        Transcript Chunk:
-                        ---
-                        {chunk}
-                        ---
-                        """,
-                    )
+                    summary_result = None
+                    if on_event is not None:
+                        try:
+                            async with timed("llm"):
+                                summary_result = await self._run_chunk_streaming(agent, prompt, i, on_event, cache_stats)
+                        except Exception as stream_error:
+                            # Streaming does not get the agent's result retries; fall back to a normal run
+                            logger.warning(f"Streaming failed for chunk {i+1}, retrying without streaming: {stream_error}")
+                            await on_event({"type": "chunk_reset", "chunk": i})
+                    if summary_result is None:
+                        # Run the agent to get the structured summary for the chunk
+                        async with timed("llm"):
+                            summary_result = await agent.run(prompt)
+                        cache_stats.add_result(summary_result)
 
                     if hasattr(summary_result, 'data') and isinstance(summary_result.data, SummaryResponse):
                          final_summary_pydantic = summary_result.data
@@ -148,17 +385,46 @@ class TranscriptProcessor:
                          logger.error(f"Unexpected result type from agent for chunk {i+1}: {type(summary_result)}")
                          continue # Skip this chunk
 
+                    generation_stats.add_chunk(llm.usages, succeeded=True)
                     # Convert the Pydantic model to a JSON string
                     chunk_summary_json = final_summary_pydantic.model_dump_json()
                     all_json_data.append(chunk_summary_json)
+                    previous_json = chunk_summary_json
+                    if checkpoint is not None:
+                        try:
+                            await checkpoint.save(i, input_hash, chunk_summary_json)
+                        except Exception as save_error:
+                            # The summary is still used; only a later retry would redo this chunk
+                            logger.warning(f"Could not save the summary of chunk {i+1}: {save_error}")
+                    if on_event is not None:
+                        await on_event({"type": "chunk_complete", "chunk": i, "summary": chunk_summary_json})
                     logger.info(f"Successfully generated summary for chunk {i+1}.")
 
                 except Exception as chunk_error:
+                    generation_stats.add_chunk(llm.usages, succeeded=False)
                     logger.error(f"Error processing chunk {i+1}: {chunk_error}", exc_info=True)
 
+            if num_chunks is None:
+                num_chunks = processed
+                stats.raw_chars = raw_chars
+                stats.raw_tokens = raw_chunk_tokens_for_length(raw_chars, chunk_size, overlap)
+            stats.chunks = num_chunks
             logger.info(f"Finished processing all {num_chunks} chunks.")
+            if compact:
+                logger.info(f"Prompt compaction saved ~{stats.tokens_saved} of {stats.raw_tokens} transcript tokens.")
+            generation_stats.repaired = llm.repaired
+            record_job(llm.name(), generation_stats)
+            if job_stats is not None:
+                job_stats["compaction"] = stats.as_dict()
+                job_stats["generation"] = generation_stats.as_dict()
+                job_stats["prompt_cache"] = cache_stats.as_dict()
+                if checkpoint is not None:
+                    job_stats["resumed_chunks"] = resumed
             return num_chunks, all_json_data
 
         except Exception as e:
             logger.error(f"Error during transcript processing: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+        finally:
+            if held_model is not None:
+                await ollama_lifecycle.release(held_model)
\ No newline at end of file
@@ -0,0 +1,315 @@
+"""Transcribe one recording on several workers at once.
+
+whisper transcribes a file on one core (or one server) at a time. The
+:class:`TranscriptionDispatcher` instead cuts a recording into pieces of
+about ``target_seconds`` at silences found by the VAD, leaving long silences
+out altogether, transcribes the pieces concurrently on a backend and
+stitches the results back together in order:
+
+* :class:`WhisperServerBackend` spreads pieces over one or more whisper.cpp
+  servers (``whisper-custom/server``), each handling one request at a time;
+* :class:`ProcessPoolBackend` runs a local transcription function in a
+  process pool (see ``cpu_pool.CPUPool``).
+
+Speech that runs longer than ``max_seconds`` without a pause is cut anyway,
+with ``overlap_seconds`` of audio on both sides of the cut. Each side of a
+cut then hears the words around it, so when stitching, segments on the far
+side of the cut are dropped and words repeated across it removed.
+"""
+
+import asyncio
+import re
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from audio_stream import DEFAULT_SAMPLE_RATE, DEFAULT_SAMPLE_WIDTH, AudioFrame, TranscriptSegment
+from cpu_pool import CPUPool
+from vad import SpeechRegion, VoiceActivityDetector
+
+DEFAULT_TARGET_SECONDS = 30.0
+DEFAULT_MAX_SECONDS = 45.0
+DEFAULT_OVERLAP_SECONDS = 1.0
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)?")
+
+# A transcriber returns plain text or whisper's ``verbose_json`` result
+TranscriberResult = Union[str, Dict]
+
+
+def segments_from_result(result: TranscriberResult, duration: float) -> List[TranscriptSegment]:
+    """Turn a transcriber result into segments timed from the start of its audio."""
+    if isinstance(result, str):
+        text = result.strip()
+        return [TranscriptSegment(0.0, duration, text)] if text else []
+    if "error" in result:
+        raise RuntimeError(f"Transcription failed: {result['error']}")
+    if "segments" not in result:
+        return segments_from_result(result.get("text", ""), duration)
+    return [
+        TranscriptSegment(float(segment["start"]), float(segment["end"]), segment["text"].strip())
+        for segment in result["segments"]
+        if segment.get("text", "").strip()
+    ]
+
+
+def plan_pieces(
+    regions: Sequence[SpeechRegion],
+    target_seconds: float = DEFAULT_TARGET_SECONDS,
+    max_seconds: float = DEFAULT_MAX_SECONDS,
+    overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+) -> List[Tuple[float, float]]:
+    """Group speech regions into ``(start, end)`` pieces to transcribe separately.
+
+    Regions are added to a piece while it is shorter than ``target_seconds``
+    and would stay within ``max_seconds``; the silence between pieces is not
+    transcribed. A piece still longer than ``max_seconds`` (a region without
+    pauses) is cut every ``target_seconds`` with ``overlap_seconds`` of overlap.
+    """
+    groups: List[Tuple[float, float]] = []
+    for region in regions:
+        if groups:
+            start, end = groups[-1]
+            if end - start < target_seconds and region.end - start <= max_seconds:
+                groups[-1] = (start, region.end)
+                continue
+        groups.append((region.start, region.end))
+
+    pieces = []
+    half = overlap_seconds / 2
+    for start, end in groups:
+        if end - start <= max_seconds:
+            pieces.append((start, end))
+            continue
+        cut = start
+        while end - cut > max_seconds:
+            next_cut = cut + target_seconds
+            pieces.append((max(start, cut - half), next_cut + half))
+            cut = next_cut
+        pieces.append((cut - half, end))
+    return pieces
+
+
+def _words(text: str) -> List[str]:
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+def _drop_leading_words(text: str, count: int) -> str:
+    matches = list(_WORD_RE.finditer(text))
+    return text[matches[count].start():].strip()
+
+
+def stitch(pieces: Sequence[Tuple[AudioFrame, List[TranscriptSegment]]], min_seam_words: int = 2) -> List[TranscriptSegment]:
+    """Merge per-piece segments into one timeline.
+
+    Segment times are shifted by the piece's start. Where two pieces
+    overlap, segments beyond the middle of the overlap are dropped from both
+    sides, and the longest run of at least ``min_seam_words`` words that ends
+    the earlier piece's overlapping segments and starts the later piece is
+    kept only once.
+    """
+    merged: List[TranscriptSegment] = []
+    previous: Optional[AudioFrame] = None
+    for frame, segments in pieces:
+        shifted = [
+            TranscriptSegment(frame.start + segment.start, min(frame.start + segment.end, frame.end), segment.text)
+            for segment in segments
+        ]
+        if previous is not None and previous.end > frame.start:
+            seam = (frame.start + previous.end) / 2
+            while merged and merged[-1].start >= seam:
+                merged.pop()
+            shifted = [segment for segment in shifted if segment.end > seam]
+            # Words heard by both pieces may span several segments on either side
+            tail = _words(" ".join(segment.text for segment in merged if segment.end > frame.start))
+            head = _words(" ".join(segment.text for segment in shifted))
+            repeated = 0
+            for size in range(min(len(tail), len(head)), min_seam_words - 1, -1):
+                if tail[-size:] == head[:size]:
+                    repeated = size
+                    break
+            while repeated and shifted:
+                count = len(_words(shifted[0].text))
+                if count <= repeated:
+                    shifted.pop(0)
+                    repeated -= count
+                else:
+                    shifted[0] = TranscriptSegment(
+                        merged[-1].end, shifted[0].end, _drop_leading_words(shifted[0].text, repeated)
+                    )
+                    repeated = 0
+        merged.extend(shifted)
+        previous = frame
+    return merged
+
+
+class ProcessPoolBackend:
+    """Run ``transcribe(wav_bytes)`` in a pool of worker processes.
+
+    ``transcribe`` must be a module level function so it can be pickled to
+    the workers; it returns text or a ``verbose_json`` style dict.
+    """
+
+    def __init__(self, transcribe: Callable[[bytes], TranscriberResult], workers: Optional[int] = None,
+                 pool: Optional[CPUPool] = None):
+        self.transcribe_fn = transcribe
+        self.pool = pool if pool is not None else CPUPool(max_workers=workers, min_offload_chars=0)
+
+    @property
+    def concurrency(self) -> int:
+        return self.pool.max_workers
+
+    async def transcribe(self, frame: AudioFrame) -> List[TranscriptSegment]:
+        result = await self.pool.run(self.transcribe_fn, frame.to_wav())
+        return segments_from_result(result, frame.duration)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
+
+
+class WhisperServerBackend:
+    """Send pieces to whichever of the whisper servers at ``urls`` is free.
+
+    The whisper.cpp server decodes one request at a time, so each server
+    gets at most one piece at a time; run several servers (on different
+    ports or hosts) to use more cores.
+    """
+
+    def __init__(self, urls: Sequence[str], http_client=None, inference_path: str = "/inference",
+                 language: Optional[str] = None):
+        if not urls:
+            raise ValueError("at least one whisper server URL is needed")
+        self.urls = [url.rstrip("/") for url in urls]
+        self.inference_path = inference_path
+        self.language = language
+        self._http_client = http_client
+        self._own_client = None
+        self._free: Optional[asyncio.Queue] = None
+        self._loop = None
+        self.requests: Dict[str, int] = {url: 0 for url in self.urls}
+
+    @property
+    def concurrency(self) -> int:
+        return len(self.urls)
+
+    def _bind_loop(self) -> None:
+        # The free-server queue and our own client belong to one event loop;
+        # ``transcribe_file`` runs each call in a new one
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._free = asyncio.Queue()
+        for url in self.urls:
+            self._free.put_nowait(url)
+        if self._http_client is None:
+            from integrations.http import create_http_client
+            self._own_client = create_http_client()
+
+    async def transcribe(self, frame: AudioFrame) -> List[TranscriptSegment]:
+        self._bind_loop()
+        client = self._http_client if self._http_client is not None else self._own_client
+        url = await self._free.get()
+        try:
+            data = {"response_format": "verbose_json", "temperature": "0.0"}
+            if self.language:
+                data["language"] = self.language
+            response = await client.post(
+                f"{url}{self.inference_path}",
+                files={"file": (f"piece-{frame.index}.wav", frame.to_wav(), "audio/wav")},
+                data=data,
+            )
+            response.raise_for_status()
+            self.requests[url] += 1
+        finally:
+            self._free.put_nowait(url)
+        return segments_from_result(response.json(), frame.duration)
+
+    async def aclose(self) -> None:
+        if self._own_client is not None:
+            await self._own_client.aclose()
+            self._own_client = None
+            self._loop = None
+
+
+@dataclass
+class DispatchResult:
+    segments: List[TranscriptSegment] = field(default_factory=list)
+    pieces: int = 0
+    # Length of the recording and of the audio actually transcribed, in seconds
+    duration: float = 0.0
+    transcribed_seconds: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return " ".join(segment.text for segment in self.segments)
+
+
+class TranscriptionDispatcher:
+    """Split a recording at silences and transcribe the pieces in parallel."""
+
+    def __init__(
+        self,
+        backend,
+        vad: Optional[VoiceActivityDetector] = None,
+        target_seconds: float = DEFAULT_TARGET_SECONDS,
+        max_seconds: float = DEFAULT_MAX_SECONDS,
+        overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+        min_seam_words: int = 2,
+    ):
+        if max_seconds < target_seconds + overlap_seconds:
+            raise ValueError("max_seconds must leave room for target_seconds plus the overlap")
+        self.backend = backend
+        self.vad = vad if vad is not None else VoiceActivityDetector()
+        self.target_seconds = target_seconds
+        self.max_seconds = max_seconds
+        self.overlap_seconds = overlap_seconds
+        self.min_seam_words = min_seam_words
+
+    def split(self, pcm: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE,
+              sample_width: int = DEFAULT_SAMPLE_WIDTH, channels: int = 1) -> List[AudioFrame]:
+        regions = self.vad.detect(pcm, sample_rate, sample_width, channels)
+        bytes_per_sample = sample_width * channels
+        frames = []
+        for index, (start, end) in enumerate(
+            plan_pieces(regions, self.target_seconds, self.max_seconds, self.overlap_seconds)
+        ):
+            first, last = int(round(start * sample_rate)), int(round(end * sample_rate))
+            frames.append(AudioFrame(
+                index=index, start=first / sample_rate, duration=(last - first) / sample_rate,
+                data=pcm[first * bytes_per_sample:last * bytes_per_sample],
+                sample_rate=sample_rate, sample_width=sample_width, channels=channels,
+            ))
+        return frames
+
+    async def transcribe(self, pcm: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                         sample_width: int = DEFAULT_SAMPLE_WIDTH, channels: int = 1) -> DispatchResult:
+        started = time.perf_counter()
+        frames = await asyncio.to_thread(self.split, pcm, sample_rate, sample_width, channels)
+        results = await asyncio.gather(*(self.backend.transcribe(frame) for frame in frames))
+        return DispatchResult(
+            segments=stitch(list(zip(frames, results)), self.min_seam_words),
+            pieces=len(frames),
+            duration=len(pcm) // (sample_width * channels) / sample_rate,
+            transcribed_seconds=sum(frame.duration for frame in frames),
+            elapsed=time.perf_counter() - started,
+        )
+
+    async def transcribe_wav(self, path: str) -> DispatchResult:
+        def read():
+            with wave.open(path, "rb") as wav:
+                return wav.getparams(), wav.readframes(wav.getnframes())
+        params, pcm = await asyncio.to_thread(read)
+        return await self.transcribe(pcm, params.framerate, params.sampwidth, params.nchannels)
+
+    def transcribe_file(self, path: str) -> str:
+        """Blocking ``path -> text`` transcriber, e.g. for ``MeetingBot(transcriber=...)``."""
+        async def run() -> str:
+            try:
+                return (await self.transcribe_wav(path)).text
+            finally:
+                if hasattr(self.backend, "aclose"):
+                    await self.backend.aclose()
+        return asyncio.run(run())
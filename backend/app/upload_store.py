@@ -0,0 +1,155 @@
+"""On-disk storage for chunked, resumable uploads.
+
+Each part of an upload is streamed from the request body into its own file
+under ``UPLOAD_DIR/<upload_id>/``, hashed as it is written and renamed into
+place only once complete, so an interrupted part leaves nothing behind and
+is simply sent again. Sessions and part records live in the database (see
+``DatabaseManager.create_upload_session``); parts are never concatenated.
+
+:class:`UploadedTranscript` reads a completed transcript upload back part by
+part, so the summarizer can chunk it without materializing the whole text.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import os
+import shutil
+import uuid
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+# Largest part accepted in one request
+MAX_PART_BYTES = int(os.getenv("UPLOAD_MAX_PART_BYTES", str(64 * 1024 * 1024)))
+READ_BLOCK_BYTES = 64 * 1024
+
+
+def missing_ranges(size: int, parts: List[Dict]) -> List[Tuple[int, int]]:
+    """Return the ``(start, end)`` byte ranges (end exclusive) not covered by ``parts``."""
+    missing = []
+    position = 0
+    for part in sorted(parts, key=lambda part: part["offset"]):
+        if part["offset"] > position:
+            missing.append((position, part["offset"]))
+        position = max(position, part["offset"] + part["size"])
+    if position < size:
+        missing.append((position, size))
+    return missing
+
+
+def parts_overlap(parts: List[Dict]) -> bool:
+    position = 0
+    for part in sorted(parts, key=lambda part: part["offset"]):
+        if part["offset"] < position:
+            return True
+        position = part["offset"] + part["size"]
+    return False
+
+
+class UploadStore:
+    """Part files of upload sessions under one root directory."""
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+
+    def session_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, upload_id)
+
+    def part_path(self, upload_id: str, offset: int) -> str:
+        return os.path.join(self.session_dir(upload_id), f"{offset:020d}.part")
+
+    async def write_part(self, upload_id: str, offset: int, size: int, body: AsyncIterator[bytes],
+                         expected_sha256: Optional[str] = None) -> str:
+        """Stream ``body`` into the part starting at ``offset`` and return its SHA-256.
+
+        Raises ``ValueError`` if the body is not exactly ``size`` bytes long or
+        its SHA-256 is not ``expected_sha256``; a part already stored at
+        ``offset`` is then left as it was.
+        """
+        directory = self.session_dir(upload_id)
+        await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{offset}.{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        written = 0
+        f = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            async for data in body:
+                written += len(data)
+                if written > size:
+                    raise ValueError(f"Part is larger than the {size} bytes given in Content-Range")
+                digest.update(data)
+                await asyncio.to_thread(f.write, data)
+            if written != size:
+                raise ValueError(f"Part has {written} bytes, Content-Range gives {size}")
+            if expected_sha256 and expected_sha256.lower() != digest.hexdigest():
+                raise ValueError("Part SHA-256 does not match X-Content-SHA256")
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, temp_path, self.part_path(upload_id, offset))
+        except BaseException:
+            f.close()
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return digest.hexdigest()
+
+    def iter_bytes(self, upload_id: str, parts: List[Dict], block_size: int = READ_BLOCK_BYTES) -> Iterator[bytes]:
+        """Yield the content of ``parts`` in order, ``block_size`` bytes at a time."""
+        for part in sorted(parts, key=lambda part: part["offset"]):
+            with open(self.part_path(upload_id, part["offset"]), "rb") as f:
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    yield block
+
+    def _sha256(self, upload_id: str, parts: List[Dict]) -> str:
+        digest = hashlib.sha256()
+        for block in self.iter_bytes(upload_id, parts, block_size=1024 * 1024):
+            digest.update(block)
+        return digest.hexdigest()
+
+    async def sha256(self, upload_id: str, parts: List[Dict]) -> str:
+        """Hash the assembled content of an upload off the event loop."""
+        return await asyncio.to_thread(self._sha256, upload_id, parts)
+
+    async def delete(self, upload_id: str) -> None:
+        await asyncio.to_thread(shutil.rmtree, self.session_dir(upload_id), True)
+
+
+class UploadedTranscript:
+    """UTF-8 text of a completed transcript upload, decoded lazily."""
+
+    def __init__(self, store: UploadStore, upload_id: str, parts: List[Dict]):
+        self.store = store
+        self.upload_id = upload_id
+        self.parts = parts
+        self.size = sum(part["size"] for part in parts)
+
+    def iter_text(self, block_size: int = READ_BLOCK_BYTES) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for block in self.store.iter_bytes(self.upload_id, self.parts, block_size):
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+async def open_transcript_upload(db, upload_id: str) -> UploadedTranscript:
+    """Return the transcript stored by a completed upload.
+
+    Raises ``LookupError`` if there is no such upload and ``ValueError`` if it
+    is not a completed transcript upload.
+    """
+    session = await db.get_upload_session(upload_id)
+    if session is None:
+        raise LookupError(f"Upload {upload_id} not found")
+    if session["kind"] != "transcript":
+        raise ValueError(f"Upload {upload_id} is not a transcript")
+    if session["status"] != "complete":
+        raise ValueError(f"Upload {upload_id} is not complete")
+    return UploadedTranscript(upload_store, upload_id, await db.get_upload_parts(upload_id))
+
+
+upload_store = UploadStore()
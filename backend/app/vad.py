@@ -0,0 +1,303 @@
+"""Energy and zero-crossing voice activity detection.
+
+Meetings are often a third silence, and whisper spends as long on a second
+of silence as on a second of speech. :class:`VoiceActivityDetector` finds
+the speech regions of 16-bit PCM with two per-frame features computed over
+the whole signal at once with NumPy:
+
+* RMS energy in dB relative to the recording's own noise floor (its 10th
+  percentile), so the threshold adapts to the microphone and room, and
+* the zero-crossing rate, which lets quiet unvoiced sounds ("s", "f") through
+  while low-level hum stays out.
+
+A live stream is trimmed a few seconds at a time, and a stretch of steady
+speech that fills a whole frame would be its own noise floor. Streams keep
+a :class:`NoiseFloor` across frames instead: each frame's estimate only
+lowers it, and it rises back slowly.
+
+The frame decisions are smoothed (short gaps closed, short blips dropped,
+regions padded) and the speech is concatenated. :class:`TimestampMap` maps
+times in the trimmed audio back to the original recording, so transcript
+timestamps still refer to the meeting.
+"""
+
+import bisect
+import os
+import threading
+import wave
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from audio_stream import DEFAULT_SAMPLE_RATE, DEFAULT_SAMPLE_WIDTH, AudioFrame
+
+_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+@dataclass
+class SpeechRegion:
+    """Speech from ``start`` to ``end`` seconds into the original audio."""
+
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class TimestampMap:
+    """Maps offsets in trimmed audio back to offsets in the original audio."""
+
+    def __init__(self, regions: List[SpeechRegion]):
+        self.regions = regions
+        # Offset in the trimmed audio at which each region starts
+        self.trimmed_starts: List[float] = []
+        position = 0.0
+        for region in regions:
+            self.trimmed_starts.append(position)
+            position += region.duration
+        self.trimmed_duration = position
+
+    def to_source(self, seconds: float) -> float:
+        if not self.regions:
+            return seconds
+        index = max(0, bisect.bisect_right(self.trimmed_starts, seconds) - 1)
+        region = self.regions[index]
+        return min(region.start + seconds - self.trimmed_starts[index], region.end)
+
+    def span_to_source(self, start: float, end: float) -> Tuple[float, float]:
+        # The end of a span sits at the end of the region it finishes in, not
+        # the start of the next one
+        if not self.regions:
+            return start, end
+        index = max(0, bisect.bisect_left(self.trimmed_starts, end) - 1)
+        region = self.regions[index]
+        return self.to_source(start), min(region.start + end - self.trimmed_starts[index], region.end)
+
+
+@dataclass
+class TrimmedAudio:
+    """Speech-only PCM plus what was cut out of it."""
+
+    data: bytes
+    sample_rate: int
+    sample_width: int
+    channels: int
+    regions: List[SpeechRegion] = field(default_factory=list)
+    # Length of the original audio in seconds
+    duration: float = 0.0
+
+    @property
+    def timestamp_map(self) -> TimestampMap:
+        return TimestampMap(self.regions)
+
+    @property
+    def speech_duration(self) -> float:
+        return sum(region.duration for region in self.regions)
+
+    @property
+    def skipped_fraction(self) -> float:
+        return 1.0 - self.speech_duration / self.duration if self.duration else 0.0
+
+
+class NoiseFloor:
+    """Running noise floor of one audio stream, in dB.
+
+    A quieter frame lowers it at once; it rises towards louder frames by at
+    most ``rise_db_per_second`` of audio, so several minutes of speech pass
+    before the floor reaches the speech level. The first frame seeds it.
+    """
+
+    def __init__(self, rise_db_per_second: float = 0.05):
+        self.rise_db_per_second = rise_db_per_second
+        self.level: Optional[float] = None
+        # Frames of one stream may be trimmed in several threads at once
+        self._lock = threading.Lock()
+
+    def update(self, frame_floor: float, seconds: float) -> float:
+        """Account for a frame whose own floor is ``frame_floor``; returns the floor to use for it."""
+        with self._lock:
+            if self.level is None:
+                self.level = frame_floor
+            else:
+                self.level = min(frame_floor, self.level + self.rise_db_per_second * seconds)
+            return self.level
+
+
+class VoiceActivityDetector:
+    """Find and keep the speech in PCM audio.
+
+    ``threshold_db`` is how far above the noise floor a frame must be to
+    count as speech; frames at least ``threshold_db - zcr_relief_db`` above
+    it also count if their zero-crossing rate is at least ``zcr_threshold``.
+    Gaps shorter than ``min_silence`` are kept, regions shorter than
+    ``min_speech`` dropped and the rest padded by ``padding`` seconds.
+    """
+
+    def __init__(
+        self,
+        frame_seconds: float = 0.03,
+        threshold_db: float = 12.0,
+        zcr_threshold: float = 0.25,
+        zcr_relief_db: float = 6.0,
+        min_level_db: float = -60.0,
+        min_silence: float = 0.3,
+        min_speech: float = 0.1,
+        padding: float = 0.2,
+    ):
+        self.frame_seconds = frame_seconds
+        self.threshold_db = threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.zcr_relief_db = zcr_relief_db
+        self.min_level_db = min_level_db
+        self.min_silence = min_silence
+        self.min_speech = min_speech
+        self.padding = padding
+
+    @staticmethod
+    def _samples(pcm: bytes, sample_width: int, channels: int) -> np.ndarray:
+        """Mono float samples in [-1, 1)."""
+        dtype = _DTYPES.get(sample_width)
+        if dtype is None:
+            raise ValueError(f"Unsupported sample width {sample_width}")
+        usable = len(pcm) - len(pcm) % (sample_width * channels)
+        samples = np.frombuffer(pcm[:usable], dtype=dtype).astype(np.float32)
+        if sample_width == 1:
+            samples -= 128.0
+        samples /= float(2 ** (8 * sample_width - 1))
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples
+
+    def speech_mask(self, samples: np.ndarray, sample_rate: int,
+                    noise_floor: Optional[NoiseFloor] = None) -> np.ndarray:
+        """Per-frame speech decision for mono float ``samples``.
+
+        Without ``noise_floor`` the floor is estimated from ``samples`` alone.
+        """
+        frame_len = max(1, int(self.frame_seconds * sample_rate))
+        n_frames = -(-len(samples) // frame_len)
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = np.zeros(n_frames * frame_len, dtype=np.float32)
+        frames[:len(samples)] = samples
+        frames = frames.reshape(n_frames, frame_len)
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frame_len - 1)
+
+        floor = float(np.percentile(energy_db, 10))
+        if noise_floor is not None:
+            floor = noise_floor.update(floor, len(samples) / sample_rate)
+        floor = max(floor, self.min_level_db)
+        loud = energy_db >= floor + self.threshold_db
+        fricative = (energy_db >= floor + self.threshold_db - self.zcr_relief_db) & (zcr >= self.zcr_threshold)
+        mask = (loud | fricative) & (energy_db > self.min_level_db)
+        return self._smooth(mask)
+
+    def _runs(self, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end (exclusive) frame indices of the True runs of ``mask``."""
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    def _smooth(self, mask: np.ndarray) -> np.ndarray:
+        mask = mask.copy()
+        starts, ends = self._runs(mask)
+        # Close gaps shorter than min_silence between two speech runs
+        gap_frames = int(round(self.min_silence / self.frame_seconds))
+        for gap_start, gap_end in zip(ends[:-1], starts[1:]):
+            if gap_end - gap_start < gap_frames:
+                mask[gap_start:gap_end] = True
+        # Drop blips shorter than min_speech
+        min_frames = int(round(self.min_speech / self.frame_seconds))
+        for start, end in zip(*self._runs(mask)):
+            if end - start < min_frames:
+                mask[start:end] = False
+        # Pad what is left on both sides
+        pad = int(round(self.padding / self.frame_seconds))
+        if pad and mask.any():
+            mask = np.convolve(mask.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+        return mask
+
+    def detect(
+        self,
+        pcm: bytes,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        sample_width: int = DEFAULT_SAMPLE_WIDTH,
+        channels: int = 1,
+        noise_floor: Optional[NoiseFloor] = None,
+    ) -> List[SpeechRegion]:
+        samples = self._samples(pcm, sample_width, channels)
+        duration = len(samples) / sample_rate
+        starts, ends = self._runs(self.speech_mask(samples, sample_rate, noise_floor))
+        frame_len = max(1, int(self.frame_seconds * sample_rate)) / sample_rate
+        return [
+            SpeechRegion(float(start * frame_len), float(min(end * frame_len, duration)))
+            for start, end in zip(starts, ends)
+        ]
+
+    def trim(
+        self,
+        pcm: bytes,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        sample_width: int = DEFAULT_SAMPLE_WIDTH,
+        channels: int = 1,
+        noise_floor: Optional[NoiseFloor] = None,
+    ) -> TrimmedAudio:
+        """Keep only the speech regions of ``pcm``, concatenated."""
+        regions = self.detect(pcm, sample_rate, sample_width, channels, noise_floor)
+        bytes_per_sample = sample_width * channels
+        data = b"".join(
+            pcm[int(round(region.start * sample_rate)) * bytes_per_sample:
+                int(round(region.end * sample_rate)) * bytes_per_sample]
+            for region in regions
+        )
+        return TrimmedAudio(
+            data=data,
+            sample_rate=sample_rate,
+            sample_width=sample_width,
+            channels=channels,
+            regions=regions,
+            duration=len(pcm) // bytes_per_sample / sample_rate,
+        )
+
+    def trim_frame(self, frame: AudioFrame,
+                   noise_floor: Optional[NoiseFloor] = None) -> Tuple[Optional[AudioFrame], TrimmedAudio]:
+        """Return the speech of ``frame`` as a frame of its own, or None if it is silent.
+
+        Pass the stream's ``noise_floor`` so frames are judged against it
+        rather than against themselves alone. The returned frame starts at
+        the first speech in ``frame``; use the ``TrimmedAudio`` timestamp map
+        (offset by ``frame.start``) for others.
+        """
+        trimmed = self.trim(frame.data, frame.sample_rate, frame.sample_width, frame.channels, noise_floor)
+        if not trimmed.regions:
+            return None, trimmed
+        speech = AudioFrame(
+            index=frame.index,
+            start=frame.start + trimmed.regions[0].start,
+            duration=trimmed.speech_duration,
+            data=trimmed.data,
+            sample_rate=frame.sample_rate,
+            sample_width=frame.sample_width,
+            channels=frame.channels,
+            captured_at=frame.captured_at,
+        )
+        return speech, trimmed
+
+    def trim_wav(self, path: str, out_path: Optional[str] = None) -> Tuple[str, TrimmedAudio]:
+        """Write the speech of a WAV file to ``out_path`` (default: ``<path>.speech.wav``)."""
+        with wave.open(path, "rb") as wav:
+            params = wav.getparams()
+            pcm = wav.readframes(params.nframes)
+        trimmed = self.trim(pcm, params.framerate, params.sampwidth, params.nchannels)
+        out_path = out_path or f"{os.path.splitext(path)[0]}.speech.wav"
+        with wave.open(out_path, "wb") as out:
+            out.setnchannels(params.nchannels)
+            out.setsampwidth(params.sampwidth)
+            out.setframerate(params.framerate)
+            out.writeframes(trimmed.data)
+        return out_path, trimmed
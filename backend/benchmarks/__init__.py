@@ -0,0 +1,14 @@
+"""Offline benchmarks for the summarization pipeline.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.run --help``.
+No provider is contacted: ``fake_llm.FakeAgent`` stands in for the
+pydantic-ai ``Agent`` and ``transcripts`` generates Whisper-style input.
+"""
+
+import pathlib
+import sys
+
+# The app modules import each other by bare name
+APP_DIR = pathlib.Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
@@ -0,0 +1,136 @@
+"""Benchmark the memory and CPU cost of the in-memory summary representations.
+
+Generates the chunk summaries of a long meeting as JSON (the form the
+pipeline hands between stages) and loads every chunk three ways:
+
+* ``pydantic``: validated again as ``SummaryResponse`` models;
+* ``dict``: ``json.loads`` dicts, as the merge used to hold them;
+* ``compact``: ``CompactSummary`` slotted blocks with interned values.
+
+For each it reports the memory the loaded summaries keep alive (measured
+with ``tracemalloc``), per block, and the best load time over ``--repeat``
+runs, and the time of ``merge_chunk_summaries`` over the same chunks::
+
+    python -m benchmarks.compact_summary --blocks 50000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import APP_DIR  # noqa: F401  (puts the app modules on sys.path)
+from benchmarks.transcripts import synthetic_transcript
+from compact_summary import CompactSummary
+from summary_merge import merge_chunk_summaries
+from summary_stream import SECTION_TITLES
+
+COLORS = ("default", "gray", "blue", "green", "red")
+TYPES = ("bullet", "text", "heading1")
+
+
+def chunk_summaries(blocks: int, blocks_per_chunk: int = 40, seed: int = 0) -> List[str]:
+    """JSON summaries of enough chunks to hold ``blocks`` blocks in total."""
+    rng = random.Random(seed)
+    lines = [line.split(": ", 1)[-1] for line in synthetic_transcript(200_000, seed=seed).splitlines()
+             if ": " in line]
+    chunks = []
+    for start in range(0, blocks, blocks_per_chunk):
+        summary = {"MeetingName": "Quarterly planning"}
+        for key, title in SECTION_TITLES.items():
+            summary[key] = {"title": title, "blocks": []}
+        for index in range(min(blocks_per_chunk, blocks - start)):
+            summary[rng.choice(list(SECTION_TITLES))]["blocks"].append({
+                "id": str(index + 1),
+                "type": rng.choice(TYPES),
+                "content": rng.choice(lines),
+                "color": rng.choice(COLORS),
+            })
+        chunks.append(json.dumps(summary))
+    return chunks
+
+
+def _loaders() -> Dict[str, Callable[[str], object]]:
+    # Imported here: it pulls in pydantic-ai
+    from transcript_processor import SummaryResponse
+
+    return {
+        "pydantic": SummaryResponse.model_validate_json,
+        "dict": json.loads,
+        "compact": CompactSummary.from_json,
+    }
+
+
+def _retained_bytes(load: Callable[[str], object], chunks: List[str]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        loaded = [load(chunk) for chunk in chunks]
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return retained
+
+
+def _best_seconds(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(blocks: int, repeat: int = 3, seed: int = 0) -> Dict:
+    chunks = chunk_summaries(blocks, seed=seed)
+    results = []
+    for name, load in _loaders().items():
+        retained = _retained_bytes(load, chunks)
+        seconds = _best_seconds(lambda: [load(chunk) for chunk in chunks], repeat)
+        results.append({
+            "representation": name,
+            "retained_bytes": retained,
+            "bytes_per_block": retained / blocks,
+            "load_ms": seconds * 1000,
+        })
+    merge_seconds = _best_seconds(lambda: merge_chunk_summaries(chunks, dedupe=False), repeat)
+    return {"blocks": blocks, "chunks": len(chunks), "results": results, "merge_ms": merge_seconds * 1000}
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{report['blocks']} blocks in {report['chunks']} chunks",
+             f"{'representation':<15} {'retained MB':>12} {'bytes/block':>12} {'load ms':>9}"]
+    for result in report["results"]:
+        lines.append(f"{result['representation']:<15} {result['retained_bytes'] / 1e6:>12.2f} "
+                     f"{result['bytes_per_block']:>12.0f} {result['load_ms']:>9.1f}")
+    lines.append(f"merge_chunk_summaries (no dedupe): {report['merge_ms']:.1f} ms")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Summary representation memory/CPU benchmark")
+    parser.add_argument("--blocks", type=int, default=50_000, help="Blocks across all chunks")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs; the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run_benchmark(args.blocks, args.repeat, args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""A local stand-in for the OpenAI and Anthropic batch APIs.
+
+``FakeBatchServer`` serves the endpoints ``batch_summaries`` uses:
+
+* OpenAI: ``POST /v1/files`` (multipart JSONL), ``POST /v1/batches``,
+  ``GET /v1/batches/{id}`` and ``GET /v1/files/{id}/content``;
+* Anthropic: ``POST /v1/messages/batches``, ``GET /v1/messages/batches/{id}``
+  and its ``results_url``.
+
+A batch is in progress for its first ``polls_to_complete`` status checks and
+then ends. Each request is answered like the interactive APIs would by
+``RecordedProvider`` (so the summaries and cache usage are the same), except
+the ``custom_id`` values in ``fail`` which come back as errors.
+"""
+
+import itertools
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+from benchmarks.fake_provider import RecordedProvider
+
+SERVER_ERROR = {"type": "api_error", "message": "Internal server error"}
+
+
+class FakeBatchServer:
+    """Both providers' batch endpoints over HTTP, answered by a ``RecordedProvider``."""
+
+    def __init__(self, polls_to_complete: int = 1, fail: Iterable[str] = (),
+                 provider: Optional[RecordedProvider] = None):
+        self.polls_to_complete = polls_to_complete
+        self.fail = set(fail)
+        self.provider = provider or RecordedProvider()
+        # Every submitted batch: its requests, how often it was polled and its results
+        self.batches: Dict[str, Dict] = {}
+        self.files: Dict[str, bytes] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> List[Dict]:
+        """The requests of every batch, in submission order."""
+        return [request for batch in self.batches.values() for request in batch["requests"]]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):06d}"
+
+    def _openai_line(self, request: Dict) -> Dict:
+        line = {"id": self._new_id("batch_req_"), "custom_id": request["custom_id"]}
+        if request["custom_id"] in self.fail:
+            line.update(response={"status_code": 500, "request_id": line["id"], "body": {"error": SERVER_ERROR}},
+                        error=None)
+        else:
+            payload, _ = self.provider.openai(request["body"])
+            line.update(response={"status_code": 200, "request_id": line["id"], "body": payload}, error=None)
+        return line
+
+    def _anthropic_line(self, request: Dict) -> Dict:
+        if request["custom_id"] in self.fail:
+            result = {"type": "errored", "error": {"type": "error", "error": SERVER_ERROR}}
+        else:
+            payload, _ = self.provider.anthropic(request["params"])
+            result = {"type": "succeeded", "message": payload}
+        return {"custom_id": request["custom_id"], "result": result}
+
+    def _submit(self, kind: str, requests: List[Dict]) -> Dict:
+        batch_id = self._new_id("batch_" if kind == "openai" else "msgbatch_")
+        self.batches[batch_id] = {"kind": kind, "requests": requests, "polls": 0}
+        return self._status(batch_id, poll=False)
+
+    def _status(self, batch_id: str, poll: bool = True) -> Optional[Dict]:
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        if poll:
+            batch["polls"] += 1
+        ended = batch["polls"] >= self.polls_to_complete
+        if ended and "results" not in batch:
+            # Answered once, when the batch ends, like the real APIs
+            if batch["kind"] == "openai":
+                batch["results"] = [self._openai_line(request) for request in batch["requests"]]
+            else:
+                batch["results"] = [self._anthropic_line(request) for request in batch["requests"]]
+        total = len(batch["requests"])
+
+        if batch["kind"] == "anthropic":
+            failed = sum(line["result"]["type"] != "succeeded" for line in batch.get("results", []))
+            return {
+                "id": batch_id,
+                "type": "message_batch",
+                "processing_status": "ended" if ended else "in_progress",
+                "request_counts": {
+                    "processing": 0 if ended else total,
+                    "succeeded": total - failed if ended else 0,
+                    "errored": failed,
+                    "canceled": 0,
+                    "expired": 0,
+                },
+                "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+            }
+
+        status = {"id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions",
+                  "status": "completed" if ended else "in_progress", "output_file_id": None,
+                  "error_file_id": None, "request_counts": {"total": total, "completed": 0, "failed": 0}}
+        if ended:
+            output = [line for line in batch["results"] if line["response"]["status_code"] == 200]
+            errors = [line for line in batch["results"] if line["response"]["status_code"] != 200]
+            for key, lines in (("output_file_id", output), ("error_file_id", errors)):
+                if lines:
+                    file_id = self._new_id("file-")
+                    self.files[file_id] = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+                    status[key] = file_id
+            status["request_counts"].update(completed=len(output), failed=len(errors))
+        return status
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body, content_type: str = "application/json") -> None:
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _not_found(self) -> None:
+                self._reply(404, {"error": {"message": f"no route for {self.path}"}})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with fake._lock:
+                    if self.path == "/v1/files":
+                        message = BytesParser(policy=HTTP).parsebytes(
+                            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                        )
+                        fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                                  for part in message.iter_parts()}
+                        file_id = fake._new_id("file-")
+                        fake.files[file_id] = fields["file"]
+                        return self._reply(200, {"id": file_id, "object": "file", "purpose": "batch",
+                                                 "bytes": len(fields["file"])})
+                    if self.path == "/v1/batches":
+                        input_file = fake.files.get(json.loads(body)["input_file_id"])
+                        if input_file is None:
+                            return self._not_found()
+                        requests = [json.loads(line) for line in input_file.decode("utf-8").splitlines() if line]
+                        return self._reply(200, fake._submit("openai", requests))
+                    if self.path == "/v1/messages/batches":
+                        return self._reply(200, fake._submit("anthropic", json.loads(body)["requests"]))
+                self._not_found()
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                with fake._lock:
+                    if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                        status = fake._status(parts[2])
+                    elif parts[:3] == ["v1", "messages", "batches"] and len(parts) == 4:
+                        status = fake._status(parts[3])
+                    elif parts[:3] == ["v1", "messages", "batches"] and parts[4:] == ["results"]:
+                        batch = fake.batches.get(parts[3])
+                        if batch is None or "results" not in batch:
+                            return self._not_found()
+                        lines = "".join(json.dumps(line) + "\n" for line in batch["results"])
+                        return self._reply(200, lines.encode("utf-8"), "application/binary")
+                    elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+                        content = fake.files.get(parts[2])
+                        if content is None:
+                            return self._not_found()
+                        return self._reply(200, content, "application/octet-stream")
+                    else:
+                        status = None
+                if status is None:
+                    return self._not_found()
+                self._reply(200, status)
+
+        return Handler
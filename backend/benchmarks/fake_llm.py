@@ -0,0 +1,149 @@
+"""A deterministic stand-in for the pydantic-ai ``Agent``.
+
+``FakeLLM`` is called like the ``Agent`` class (``Agent(model, result_type=...)``)
+and returns a ``FakeAgent`` whose ``run`` sleeps for a latency drawn from a
+configurable distribution, fails at a configurable rate and otherwise
+returns a ``result_type`` instance built from the transcript lines in the
+prompt. Every draw is seeded from the prompt itself, so a given prompt always
+gets the same latency, outcome and summary regardless of scheduling order.
+"""
+
+import asyncio
+import math
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+# Sections a transcript line can land in, keyed by a word that routes it there
+_SECTION_HINTS: Tuple[Tuple[str, str], ...] = (
+    ("action item", "ImmediateActionItems"),
+    ("agreed", "KeyItemsDecisions"),
+    ("by friday", "CriticalDeadlines"),
+    ("next week", "NextSteps"),
+    ("concern", "OtherImportantPoints"),
+)
+_SECTION_TITLES = {
+    "SectionSummary": "Section Summary",
+    "CriticalDeadlines": "Critical Deadlines",
+    "KeyItemsDecisions": "Key Items & Decisions",
+    "ImmediateActionItems": "Immediate Action Items",
+    "NextSteps": "Next Steps",
+    "OtherImportantPoints": "Other Important Points",
+    "ClosingRemarks": "Closing Remarks",
+}
+_SPOKEN_RE = re.compile(r"^\s*(?:\[[^\]]*\]\s*)?(?:[A-Z][\w .'-]{0,40}?:\s+)?(.{20,})$", re.MULTILINE)
+MAX_BLOCKS_PER_SECTION = 3
+
+
+class FakeProviderError(RuntimeError):
+    """Raised by ``FakeAgent.run`` to simulate a provider failure."""
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    """Latency in seconds drawn from ``fixed``, ``uniform``, ``exponential`` or ``lognormal``.
+
+    Parsed from specs like ``"fixed:0.05"``, ``"uniform:0.01,0.2"``,
+    ``"exponential:0.05"`` (mean) or ``"lognormal:0.05,0.5"`` (median, sigma).
+    """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    KINDS = {"fixed": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, raw = spec.partition(":")
+        kind = kind.strip().lower()
+        if kind not in cls.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind!r}")
+        params = tuple(float(p) for p in raw.split(",") if p.strip())
+        if len(params) != cls.KINDS[kind]:
+            raise ValueError(f"{kind} latency takes {cls.KINDS[kind]} parameter(s), got {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(repr(p) for p in self.params)}"
+
+
+@dataclass
+class FakeLLM:
+    """Factory with the ``Agent`` signature that also records every call."""
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0
+    seed: int = 0
+    calls: int = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def __call__(self, model=None, result_type=None, **kwargs) -> "FakeAgent":
+        return FakeAgent(self, result_type)
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latencies = []
+
+    def rng_for(self, prompt: str) -> random.Random:
+        return random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+
+
+class FakeAgent:
+    def __init__(self, llm: FakeLLM, result_type=None):
+        self.llm = llm
+        self.result_type = result_type
+
+    async def run(self, prompt: str):
+        rng = self.llm.rng_for(prompt)
+        delay = self.llm.latency.sample(rng)
+        self.llm.calls += 1
+        self.llm.latencies.append(delay)
+        await asyncio.sleep(delay)
+        if rng.random() < self.llm.error_rate:
+            self.llm.errors += 1
+            raise FakeProviderError("simulated provider error")
+
+        summary = fake_summary(prompt, rng)
+        data = self.result_type.model_validate(summary) if self.result_type is not None else summary
+
+        class Result:
+            pass
+
+        result = Result()
+        result.data = data
+        return result
+
+
+def fake_summary(prompt: str, rng: random.Random) -> dict:
+    """Build a plausible summary dict from the spoken lines of a prompt."""
+    summary = {"MeetingName": "Synthetic Meeting"}
+    for key, title in _SECTION_TITLES.items():
+        summary[key] = {"title": title, "blocks": []}
+
+    body = prompt.rsplit("Transcript Chunk:", 1)[-1]
+    lines = [m.group(1).strip() for m in _SPOKEN_RE.finditer(body)]
+    for index, line in enumerate(lines):
+        lowered = line.lower()
+        key = next((section for hint, section in _SECTION_HINTS if hint in lowered), None)
+        if key is None:
+            key = "SectionSummary" if rng.random() < 0.5 else None
+        if key is None or len(summary[key]["blocks"]) >= MAX_BLOCKS_PER_SECTION:
+            continue
+        summary[key]["blocks"].append(
+            {"id": f"{key}-{index}", "type": "bullet", "content": line, "color": "default"}
+        )
+    return summary
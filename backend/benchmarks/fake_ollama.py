@@ -0,0 +1,211 @@
+"""A stand-in for a local Ollama server running a small model.
+
+``FakeOllama.http_client()`` is an ``httpx`` client that answers:
+
+* ``POST /api/chat``, Ollama's native chat endpoint, streamed (NDJSON) or
+  not. With a ``format`` schema the output is constrained to valid JSON, as
+  Ollama's grammar sampling does, and only cut off at the token limit
+  (``truncate_rate``). Without one it is malformed at ``malformed_rate``;
+* ``POST /v1/chat/completions``, the OpenAI-compatible endpoint the stock
+  pydantic-ai ``OllamaModel`` uses, whose tool call arguments are malformed
+  at ``malformed_rate`` the way small models get them wrong: wrapped in a
+  code fence or prose, a trailing comma, cut off, or a section left out;
+* ``POST /api/generate`` without a prompt, which loads a model (or unloads
+  it, with ``keep_alive`` 0), and ``GET /api/ps``, the models in memory.
+
+Models are loaded by the first request for them and unloaded ``keep_alive``
+after the last one, as Ollama does. A request that has to load the model
+reports ``load_seconds`` as its ``load_duration`` (nothing actually waits),
+and generation reports ``eval_seconds_per_token``; ``loads`` counts them.
+Loaded models are named with their tag, ``:latest`` when a request gave
+none, as ``/api/ps`` reports them.
+
+Summaries come from ``fake_llm.fake_summary``; outcomes are drawn from a
+generator seeded with ``seed``, so a run is reproducible.
+"""
+
+import copy
+import json
+import random
+import re
+import time
+import zlib
+from typing import Dict, List
+
+import httpx
+
+from benchmarks import APP_DIR  # noqa: F401  (puts the app modules on sys.path)
+from benchmarks.fake_llm import fake_summary
+from benchmarks.fake_provider import OPENAI_COMPLETION, count_tokens
+from ollama_lifecycle import tagged_model_name
+
+MALFORMATIONS = ("fence", "prose", "trailing_comma", "truncated", "missing_section")
+
+
+def malform(text: str, kind: str) -> str:
+    """``text`` (a JSON object) broken the way ``kind`` names."""
+    if kind == "fence":
+        return f"```json\n{text}\n```"
+    if kind == "prose":
+        return f"Here is the summary of the transcript chunk:\n{text}"
+    if kind == "trailing_comma":
+        return text[:-1] + ",}"
+    if kind == "truncated":
+        return text[:int(len(text) * 0.8)]
+    if kind == "missing_section":
+        data = json.loads(text)
+        data.pop("ClosingRemarks", None)
+        return json.dumps(data)
+    raise ValueError(f"unknown malformation {kind}")
+
+
+def keep_alive_seconds(value) -> float:
+    """An Ollama ``keep_alive`` ("10m", "30s", seconds, negative for ever) in seconds."""
+    if value is None:
+        return 300.0
+    match = re.fullmatch(r"(-?[\d.]+)([smh]?)", str(value).strip())
+    if not match:
+        raise ValueError(f"invalid keep_alive {value!r}")
+    seconds = float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+def _prompt(messages: List[Dict]) -> str:
+    """The chunk prompt; retry prompts come after it."""
+    for message in reversed(messages):
+        content = message.get("content") or ""
+        if message["role"] == "user" and "Transcript Chunk:" in content:
+            return content
+    return messages[-1].get("content") or ""
+
+
+class FakeOllama:
+    """Answers Ollama's native and OpenAI-compatible chat endpoints."""
+
+    def __init__(self, malformed_rate: float = 0.0, truncate_rate: float = 0.0, seed: int = 0,
+                 load_seconds: float = 0.0, eval_seconds_per_token: float = 0.02):
+        self.malformed_rate = malformed_rate
+        self.truncate_rate = truncate_rate
+        self.rng = random.Random(seed)
+        self.requests: List[Dict] = []
+        self.malformed = 0
+        self.load_seconds = load_seconds
+        self.eval_seconds_per_token = eval_seconds_per_token
+        # Tagged model name -> time.monotonic() at which it is unloaded
+        self.loaded: Dict[str, float] = {}
+        self.loads = 0
+
+    def transport(self, httpx_module=httpx):
+        async def handle(request):
+            return self.handle(request, httpx_module)
+        return httpx_module.MockTransport(handle)
+
+    def http_client(self, httpx_module=httpx):
+        return httpx_module.AsyncClient(transport=self.transport(httpx_module))
+
+    def _summary(self, messages: List[Dict]) -> Dict:
+        prompt = _prompt(messages)
+        return fake_summary(prompt, random.Random(zlib.crc32(prompt.encode("utf-8"))))
+
+    def _output(self, summary: Dict, constrained: bool) -> str:
+        text = json.dumps(summary)
+        if constrained:
+            if self.rng.random() < self.truncate_rate:
+                self.malformed += 1
+                return malform(text, "truncated")
+            return text
+        if self.rng.random() < self.malformed_rate:
+            self.malformed += 1
+            return malform(text, self.rng.choice(MALFORMATIONS))
+        return text
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for model, expires_at in list(self.loaded.items()):
+            if expires_at <= now:
+                del self.loaded[model]
+
+    def _load(self, model: str, keep_alive) -> int:
+        """Load ``model`` if it is not in memory and renew its keep-alive; the load duration in ns."""
+        model = tagged_model_name(model)
+        self._expire()
+        load_duration = 0
+        if model not in self.loaded:
+            self.loads += 1
+            load_duration = int(self.load_seconds * 1e9)
+        self.loaded[model] = time.monotonic() + keep_alive_seconds(keep_alive)
+        self._expire()
+        return load_duration
+
+    def handle(self, request, httpx_module=httpx):
+        body = json.loads(request.content) if request.content else {}
+        self.requests.append(body)
+        if request.url.path == "/api/chat":
+            return self._chat(body, httpx_module)
+        if request.url.path == "/api/generate":
+            return self._generate(body, httpx_module)
+        if request.url.path == "/api/ps":
+            self._expire()
+            return httpx_module.Response(200, json={"models": [
+                {"name": model, "model": model, "size": 2_000_000_000} for model in self.loaded
+            ]})
+        if request.url.path.endswith("/chat/completions"):
+            return self._openai(body, httpx_module)
+        return httpx_module.Response(404, json={"error": f"no route for {request.url.path}"})
+
+    def _generate(self, body: Dict, httpx_module):
+        if body.get("prompt"):
+            return httpx_module.Response(400, json={"error": "the fake only loads and unloads models"})
+        unload = keep_alive_seconds(body.get("keep_alive")) == 0
+        if unload:
+            self.loaded.pop(tagged_model_name(body["model"]), None)
+        load_duration = 0 if unload else self._load(body["model"], body.get("keep_alive"))
+        return httpx_module.Response(200, json={
+            "model": body["model"],
+            "created_at": "2025-01-01T00:00:00Z",
+            "response": "",
+            "done": True,
+            "done_reason": "unload" if unload else "load",
+            "load_duration": load_duration,
+        })
+
+    def _chat(self, body: Dict, httpx_module):
+        load_duration = self._load(body["model"], body.get("keep_alive"))
+        content = self._output(self._summary(body["messages"]), constrained="format" in body)
+        prompt_tokens, eval_count = count_tokens(body["messages"]), count_tokens(content)
+        done = {
+            "model": body["model"],
+            "created_at": "2025-01-01T00:00:00Z",
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": 0,
+            "load_duration": load_duration,
+            "prompt_eval_count": prompt_tokens,
+            # Prompt tokens are processed about ten times faster than tokens are generated
+            "prompt_eval_duration": int(prompt_tokens * self.eval_seconds_per_token * 1e8),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_count * self.eval_seconds_per_token * 1e9),
+        }
+        if not body.get("stream", True):
+            return httpx_module.Response(200, json={**done, "message": {"role": "assistant", "content": content}})
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)]
+        lines = [{"model": body["model"], "message": {"role": "assistant", "content": piece}, "done": False}
+                 for piece in pieces]
+        lines.append({**done, "message": {"role": "assistant", "content": ""}})
+        ndjson = "".join(json.dumps(line) + "\n" for line in lines)
+        return httpx_module.Response(200, content=ndjson.encode("utf-8"),
+                                     headers={"Content-Type": "application/x-ndjson"})
+
+    def _openai(self, body: Dict, httpx_module):
+        messages = [{"role": message["role"], "content": message.get("content") or ""}
+                    for message in body["messages"]]
+        arguments = self._output(self._summary(messages), constrained=False)
+        payload = copy.deepcopy(OPENAI_COMPLETION)
+        payload["model"] = body["model"]
+        call = payload["choices"][0]["message"]["tool_calls"][0]["function"]
+        call["name"] = body["tools"][-1]["function"]["name"]
+        call["arguments"] = arguments
+        prompt_tokens, completion_tokens = count_tokens(body["messages"]), count_tokens(arguments)
+        payload["usage"].update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        return httpx_module.Response(200, json=payload)
@@ -0,0 +1,242 @@
+"""Recorded Anthropic and OpenAI responses, served in place of the real APIs.
+
+``RecordedProvider.http_client()`` is an ``httpx`` client for the provider
+SDKs. Each Messages or Chat Completions request gets a copy of a
+recorded response, with the tool call filled from the transcript lines in
+the prompt (see ``fake_llm.fake_summary``). The ``usage`` is filled the
+way each provider caches prompt prefixes:
+
+* Anthropic caches the tools and system prompt up to a block marked with
+  ``cache_control``: the first request writes the prefix to the cache
+  (``cache_creation_input_tokens``), later ones read it
+  (``cache_read_input_tokens``);
+* OpenAI caches the tools and system messages automatically and reports
+  the cached part, in 128 token steps, as ``prompt_tokens_details.cached_tokens``.
+
+Prefixes shorter than ``min_cacheable_tokens`` are not cached, as with the
+real APIs. Streamed Messages requests get the same message as server-sent
+events, the usage split between ``message_start`` and ``message_delta``. Each response takes ``seconds_per_input_token`` per uncached input
+token, so cached prefixes are also faster.
+"""
+
+import asyncio
+import copy
+import importlib
+import json
+import random
+import zlib
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from benchmarks.fake_llm import fake_summary
+
+ANTHROPIC_MESSAGE = {
+    "id": "msg_01XFDUDYJgAACzvnptvVoYEL",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-3-5-sonnet-20241022",
+    "content": [
+        {"type": "tool_use", "id": "toolu_01A09q90qw90lq917835lq9", "name": "final_result", "input": {}},
+    ],
+    "stop_reason": "tool_use",
+    "stop_sequence": None,
+    "usage": {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    },
+}
+
+OPENAI_COMPLETION = {
+    "id": "chatcmpl-AhP0aNkCBbl3K6xcPq7ZCeGw1rmBm",
+    "object": "chat.completion",
+    "created": 1735000000,
+    "model": "gpt-4o-2024-08-06",
+    "choices": [
+        {
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": "call_NhlpDsSaaTdk5PYM4Sd7cHnf",
+                        "type": "function",
+                        "function": {"name": "final_result", "arguments": "{}"},
+                    }
+                ],
+                "refusal": None,
+            },
+            "logprobs": None,
+            "finish_reason": "tool_calls",
+        }
+    ],
+    "usage": {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "prompt_tokens_details": {"cached_tokens": 0, "audio_tokens": 0},
+        "completion_tokens_details": {"reasoning_tokens": 0, "audio_tokens": 0},
+    },
+    "system_fingerprint": "fp_5f20662549",
+}
+
+OPENAI_CACHE_STEP = 128
+
+
+def sdk_httpx(sdk):
+    """The httpx package a provider SDK's clients are built on; newer anthropic releases use ``httpx2``."""
+    base = importlib.import_module(f"{sdk.__name__}._base_client")
+    return getattr(base, "httpx", None) or getattr(base, "httpx2")
+
+
+def count_tokens(value) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+    return max(1, len(text) // 4)
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+class RecordedProvider:
+    """Serves recorded provider responses and simulates prompt caching."""
+
+    def __init__(self, min_cacheable_tokens: int = 1024, seconds_per_input_token: float = 0.0, seed: int = 0):
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.seconds_per_input_token = seconds_per_input_token
+        self.seed = seed
+        self.requests: List[Dict] = []
+        self._cached: Set[str] = set()
+
+    def transport(self, httpx_module=httpx):
+        """A mock transport of ``httpx_module`` (``httpx`` or an SDK's own, see :func:`sdk_httpx`)."""
+        async def handle(request):
+            status, payload = await self.handle(request)
+            if isinstance(payload, str):
+                return httpx_module.Response(status, text=payload, headers={"content-type": "text/event-stream"})
+            return httpx_module.Response(status, json=payload)
+        return httpx_module.MockTransport(handle)
+
+    def http_client(self, httpx_module=httpx):
+        return httpx_module.AsyncClient(transport=self.transport(httpx_module))
+
+    async def handle(self, request):
+        """``(status, body)`` for a request to the Messages or Chat Completions API.
+
+        The body is a string of server-sent events for a streamed Messages request.
+        """
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if request.url.path.endswith("/messages"):
+            payload, uncached = self.anthropic(body)
+            if body.get("stream"):
+                payload = anthropic_events(payload)
+        elif request.url.path.endswith("/chat/completions"):
+            payload, uncached = self.openai(body)
+        else:
+            return 404, {"error": {"message": f"no recording for {request.url.path}"}}
+        if self.seconds_per_input_token:
+            await asyncio.sleep(uncached * self.seconds_per_input_token)
+        return 200, payload
+
+    def _summary(self, prompt: str) -> Dict:
+        return fake_summary(prompt, random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed))
+
+    def _cache(self, key: str, tokens: int) -> Optional[bool]:
+        """None if the prefix is too short to cache, else whether it was cached already."""
+        if tokens < self.min_cacheable_tokens:
+            return None
+        hit = key in self._cached
+        self._cached.add(key)
+        return hit
+
+    def anthropic(self, body: Dict):
+        system = body.get("system") or []
+        prefix = [body.get("tools"), system]
+        marked = isinstance(system, list) and any("cache_control" in block for block in system)
+        prefix_tokens = count_tokens(prefix)
+        message_tokens = count_tokens(body["messages"])
+        read = write = 0
+        if marked:
+            hit = self._cache(json.dumps(prefix, sort_keys=True), prefix_tokens)
+            if hit:
+                read = prefix_tokens
+            elif hit is False:
+                write = prefix_tokens
+
+        prompt = _text(body["messages"][-1]["content"])
+        summary = self._summary(prompt)
+        payload = copy.deepcopy(ANTHROPIC_MESSAGE)
+        payload["model"] = body["model"]
+        payload["content"][0]["name"] = body["tools"][-1]["name"]
+        payload["content"][0]["input"] = summary
+        payload["usage"].update(
+            input_tokens=prefix_tokens + message_tokens - read - write,
+            output_tokens=count_tokens(summary),
+            cache_creation_input_tokens=write,
+            cache_read_input_tokens=read,
+        )
+        return payload, prefix_tokens + message_tokens - read
+
+    def openai(self, body: Dict):
+        system = [message for message in body["messages"] if message["role"] == "system"]
+        prefix = [body.get("tools"), system]
+        prefix_tokens = count_tokens(prefix)
+        prompt_tokens = prefix_tokens + count_tokens(body["messages"][len(system):])
+        cached = 0
+        if self._cache(json.dumps(prefix, sort_keys=True), prefix_tokens):
+            cached = prefix_tokens // OPENAI_CACHE_STEP * OPENAI_CACHE_STEP
+
+        prompt = _text(body["messages"][-1]["content"])
+        summary = self._summary(prompt)
+        payload = copy.deepcopy(OPENAI_COMPLETION)
+        payload["model"] = body["model"]
+        call = payload["choices"][0]["message"]["tool_calls"][0]["function"]
+        call["name"] = body["tools"][-1]["function"]["name"]
+        call["arguments"] = json.dumps(summary)
+        completion_tokens = count_tokens(summary)
+        payload["usage"].update(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        payload["usage"]["prompt_tokens_details"]["cached_tokens"] = cached
+        return payload, prompt_tokens - cached
+
+
+def anthropic_events(message: Dict, piece_size: int = 64) -> str:
+    """A Messages API response as the server-sent events of a streamed one."""
+    start = copy.deepcopy(message)
+    start["content"] = []
+    start["stop_reason"] = None
+    # Like the API: the input and cache counts come first, the output count at the end
+    start["usage"]["output_tokens"] = 1
+    events = [("message_start", {"type": "message_start", "message": start})]
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "tool_use":
+            arguments = json.dumps(block["input"])
+            events.append(("content_block_start", {
+                "type": "content_block_start", "index": index, "content_block": dict(block, input={}),
+            }))
+            for i in range(0, len(arguments), piece_size):
+                delta = {"type": "input_json_delta", "partial_json": arguments[i:i + piece_size]}
+                events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": delta}))
+        else:
+            events.append(("content_block_start", {
+                "type": "content_block_start", "index": index, "content_block": dict(block, text=""),
+            }))
+            delta = {"type": "text_delta", "text": block["text"]}
+            events.append(("content_block_delta", {"type": "content_block_delta", "index": index, "delta": delta}))
+        events.append(("content_block_stop", {"type": "content_block_stop", "index": index}))
+    events.append(("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+        "usage": {"output_tokens": message["usage"]["output_tokens"]},
+    }))
+    events.append(("message_stop", {"type": "message_stop"}))
+    return "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
@@ -0,0 +1,190 @@
+"""A deterministic stand-in for whisper.
+
+``synthetic_speech`` renders a list of phrases as 16-bit PCM in which every
+word is a short tone whose pitch encodes the word, with short gaps between
+words and longer pauses between phrases. ``transcribe_wav`` recovers the
+words (and their timings) from any slice of that audio, so cutting,
+overlapping and re-stitching audio can be tested for real: a word cut in
+two is heard on both sides of the cut, exactly the seam problem of real
+transcription.
+
+``FakeWhisperServer`` serves ``transcribe_wav`` over HTTP the way the
+whisper.cpp server in ``whisper-custom/server`` does (``POST /inference``,
+multipart ``file`` and ``response_format``), one request at a time and
+taking ``realtime_factor`` seconds per second of audio.
+"""
+
+import io
+import json
+import threading
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BASE_HZ = 300.0
+STEP_HZ = 25.0
+VOCABULARY = 100
+WORD_SECONDS = 0.3
+GAP_SECONDS = 0.1
+PAUSE_SECONDS = 1.5
+# Pieces of a word shorter than this are not heard
+MIN_WORD_SECONDS = 0.06
+# A pause at least this long ends a segment, as does reaching MAX_SEGMENT_WORDS
+SEGMENT_PAUSE_SECONDS = 0.5
+MAX_SEGMENT_WORDS = 6
+
+
+def word(n: int) -> str:
+    return f"w{n}"
+
+
+def synthetic_speech(phrases: List[List[int]], sample_rate: int = SAMPLE_RATE, lead_in: float = 1.0,
+                     seed: int = 0) -> Tuple[bytes, List[Tuple[float, float, str]]]:
+    """Render ``phrases`` of word numbers; returns the PCM and ``(start, end, word)`` of each word."""
+    rng = np.random.default_rng(seed)
+    pieces = [np.zeros(int(lead_in * sample_rate))]
+    timings = []
+    position = lead_in
+    for phrase in phrases:
+        for n in phrase:
+            if not 0 <= n < VOCABULARY:
+                raise ValueError(f"word {n} is outside the vocabulary")
+            t = np.arange(int(WORD_SECONDS * sample_rate)) / sample_rate
+            pieces.append(0.3 * np.sin(2 * np.pi * (BASE_HZ + STEP_HZ * n) * t))
+            timings.append((position, position + WORD_SECONDS, word(n)))
+            pieces.append(np.zeros(int(GAP_SECONDS * sample_rate)))
+            position += WORD_SECONDS + GAP_SECONDS
+        pieces.append(np.zeros(int(PAUSE_SECONDS * sample_rate)))
+        position += PAUSE_SECONDS
+    signal = np.concatenate(pieces)
+    signal += rng.normal(0, 0.001, len(signal))
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes(), timings
+
+
+def decode_words(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float, str]]:
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    hop = sample_rate // 100
+    n_frames = len(samples) // hop
+    if n_frames == 0:
+        return []
+    energy = np.sqrt(np.mean(samples[:n_frames * hop].reshape(n_frames, hop) ** 2, axis=1))
+    loud = np.concatenate(([0], (energy > 0.05).astype(np.int8), [0]))
+    edges = np.diff(loud)
+    words = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if (end - start) * hop / sample_rate < MIN_WORD_SECONDS:
+            continue
+        tone = samples[start * hop:end * hop]
+        spectrum = np.abs(np.fft.rfft(tone * np.hanning(len(tone))))
+        frequency = np.argmax(spectrum) * sample_rate / len(tone)
+        n = int(round((frequency - BASE_HZ) / STEP_HZ))
+        if 0 <= n < VOCABULARY:
+            words.append((float(start * hop / sample_rate), float(end * hop / sample_rate), word(n)))
+    return words
+
+
+def transcribe_pcm(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> Dict:
+    """Return a whisper ``verbose_json`` style result for 16-bit mono PCM."""
+    segments: List[Dict] = []
+    current: List[Tuple[float, float, str]] = []
+
+    def flush():
+        if current:
+            segments.append({
+                "id": len(segments),
+                "start": round(current[0][0], 2),
+                "end": round(current[-1][1], 2),
+                "text": " " + " ".join(w for _, _, w in current),
+            })
+            current.clear()
+
+    for start, end, w in decode_words(pcm, sample_rate):
+        if current and (start - current[-1][1] >= SEGMENT_PAUSE_SECONDS or len(current) >= MAX_SEGMENT_WORDS):
+            flush()
+        current.append((start, end, w))
+    flush()
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def transcribe_wav(wav_bytes: bytes) -> Dict:
+    """Transcribe a WAV file's bytes; usable as a process pool transcriber."""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError("fake whisper reads 16-bit mono WAV only")
+        return transcribe_pcm(wav.readframes(wav.getnframes()), wav.getframerate())
+
+
+class FakeWhisperServer:
+    """``transcribe_wav`` behind a whisper.cpp compatible ``/inference`` endpoint."""
+
+    def __init__(self, realtime_factor: float = 0.0):
+        self.realtime_factor = realtime_factor
+        self.requests = 0
+        self.audio_seconds = 0.0
+        # whisper.cpp holds a model mutex for the whole request
+        self._model_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path != "/inference":
+                    return self._reply(404, b'{"error":"not found"}', "application/json")
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                )
+                fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                          for part in message.iter_parts()}
+                if "file" not in fields:
+                    return self._reply(200, b"{\"error\":\"no 'file' field in the request\"}", "application/json")
+                with fake._model_lock:
+                    result = transcribe_wav(fields["file"])
+                    with wave.open(io.BytesIO(fields["file"]), "rb") as wav:
+                        duration = wav.getnframes() / wav.getframerate()
+                    fake.requests += 1
+                    fake.audio_seconds += duration
+                    time.sleep(duration * fake.realtime_factor)
+                response_format = (fields.get("response_format") or b"json").decode()
+                if response_format == "text":
+                    return self._reply(200, result["text"].encode(), "text/plain")
+                if response_format != "verbose_json":
+                    result = {"text": result["text"]}
+                self._reply(200, json.dumps(result).encode(), "application/json")
+
+        return Handler
@@ -0,0 +1,125 @@
+"""Cold-start guard: how long ``import main`` takes and what it pulls in.
+
+Each measurement runs ``python -X importtime -c "import main"`` in a fresh
+interpreter, so nothing is cached in ``sys.modules``. The report lists the
+cumulative import time of ``main``, the slowest top-level packages and any
+heavy module (provider SDKs, Celery, uvicorn, NumPy) that was imported even
+though the API only needs it on first use::
+
+    python -m benchmarks.importtime --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks import APP_DIR
+
+# Modules that must only be imported on first use, never by ``import main``
+LAZY_MODULES = (
+    "anthropic",
+    "openai",
+    "groq",
+    "pydantic_ai.models.anthropic",
+    "pydantic_ai.models.groq",
+    "pydantic_ai.models.ollama",
+    "pydantic_ai.models.openai",
+    "celery",
+    "tasks",
+    "uvicorn",
+    "numpy",
+)
+DEFAULT_BUDGET_MS = 1500.0
+TOP_PACKAGES = 10
+
+
+def _run_import(module: str) -> subprocess.CompletedProcess:
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ, PRELOAD_MODEL_PROVIDER="false")
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse ``-X importtime`` output into ``{name, depth, self_us, cumulative_us}`` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        rows.append({
+            "name": stripped.strip(),
+            "depth": (len(name) - len(stripped)) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return rows
+
+
+def measure(module: str = "main", runs: int = 3) -> Dict:
+    """Import ``module`` in ``runs`` fresh interpreters and summarize the cost."""
+    totals: List[float] = []
+    packages: Dict[str, int] = {}
+    loaded: List[str] = []
+    for _ in range(runs):
+        result = _run_import(module)
+        rows = parse_importtime(result.stderr)
+        target = next(row for row in reversed(rows) if row["name"] == module)
+        totals.append(target["cumulative_us"] / 1000)
+        for row in rows:
+            package = row["name"].split(".", 1)[0]
+            packages[package] = packages.get(package, 0) + row["self_us"]
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]
+    loaded_set = set(loaded)
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": statistics.median(totals),
+        "import_ms_all": totals,
+        "slowest_packages_ms": {name: total / runs / 1000 for name, total in slowest},
+        "eager_lazy_modules": [name for name in LAZY_MODULES if name in loaded_set],
+        "modules_loaded": len(loaded),
+    }
+
+
+def check(report: Dict, budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> List[str]:
+    """Return the problems found in a report; empty when within budget."""
+    problems = [f"{name} is imported at startup" for name in report["eager_lazy_modules"]]
+    if budget_ms is not None and report["import_ms"] > budget_ms:
+        problems.append(f"import {report['module']} took {report['import_ms']:.0f}ms (budget {budget_ms:.0f}ms)")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure and guard API cold-start import time")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    report = measure(args.module, args.runs)
+    print(f"import {report['module']}: {report['import_ms']:.0f}ms (median of {report['runs']})")
+    for name, ms in report["slowest_packages_ms"].items():
+        print(f"  {name:<24} {ms:8.1f}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    problems = check(report, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
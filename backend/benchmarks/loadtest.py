@@ -0,0 +1,329 @@
+"""In-process HTTP load generator for the FastAPI backend.
+
+Virtual users run the real client flows concurrently against the ASGI app:
+log in, create a meeting with transcript segments, trigger a summary, follow
+it by polling or over the SSE stream, list meetings and refresh their token.
+Summaries are produced by ``FakeLLM`` and everything is stored in a
+throwaway SQLite database, so no provider or server process is involved.
+Started through ``python -m app.cli loadtest``.
+
+Requests go through ``DetachedASGITransport`` rather than
+``httpx.ASGITransport``: the latter only returns once the application call
+has finished, which includes background tasks, so ``POST .../summary`` would
+appear to take as long as the whole summary. The detached transport returns
+as soon as the response body is complete, like a real server does.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from urllib.parse import unquote
+
+import httpx
+
+from benchmarks.fake_llm import FakeLLM, LatencyDistribution
+from benchmarks.run import _setup_database, percentiles
+from benchmarks.transcripts import synthetic_transcript
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    def __init__(self, queue: asyncio.Queue, disconnected: asyncio.Event):
+        self._queue = queue
+        self._disconnected = disconnected
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._disconnected.set()
+
+
+class DetachedASGITransport(httpx.AsyncBaseTransport):
+    """Serve requests from an ASGI app without waiting for its background work."""
+
+    def __init__(self, app):
+        self.app = app
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        url = request.url
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "scheme": url.scheme,
+            "path": unquote(url.path),
+            "raw_path": url.raw_path.split(b"?")[0],
+            "query_string": url.query,
+            "server": (url.host, url.port or (443 if url.scheme == "https" else 80)),
+            "client": ("127.0.0.1", 0),
+            "root_path": "",
+        }
+        loop = asyncio.get_running_loop()
+        started: asyncio.Future = loop.create_future()
+        chunks: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set_result((message["status"], message.get("headers", [])))
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    chunks.put_nowait(message["body"])
+                if not message.get("more_body", False):
+                    chunks.put_nowait(None)
+
+        async def run_app():
+            try:
+                await self.app(scope, receive, send)
+            except Exception as exc:
+                if not started.done():
+                    started.set_exception(exc)
+                    return
+                raise
+            finally:
+                chunks.put_nowait(None)
+
+        task = loop.create_task(run_app())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        status, headers = await started
+        return httpx.Response(status, headers=headers, stream=_QueueStream(chunks, disconnected), request=request)
+
+    async def aclose(self) -> None:
+        # Let background work (summaries in flight) finish before shutting down
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+@dataclass
+class LoadTestConfig:
+    users: int = 20
+    iterations: int = 1
+    segments: int = 20
+    segment_chars: int = 400
+    mode: str = "poll"  # or "stream"
+    poll_interval: float = 0.05
+    summary_timeout: float = 120.0
+    ramp_up: float = 0.0
+    latency: str = "lognormal:0.02,0.5"
+    error_rate: float = 0.0
+    seed: int = 0
+    chunk_size: int = 5000
+    overlap: int = 1000
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+
+class Recorder:
+    """Per-endpoint latency and status bookkeeping."""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, name: str, elapsed: float, status: Optional[int], ok: bool) -> None:
+        stats = self.endpoints.setdefault(name, EndpointStats())
+        stats.latencies.append(elapsed)
+        key = str(status) if status is not None else "exception"
+        stats.statuses[key] = stats.statuses.get(key, 0) + 1
+        if not ok:
+            stats.errors += 1
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str,
+                      expected=(200,), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.record(name, time.perf_counter() - start, None, False)
+            return None
+        self.record(name, time.perf_counter() - start, response.status_code, response.status_code in expected)
+        return response
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name, stats in sorted(self.endpoints.items()):
+            endpoints[name] = {
+                "requests": len(stats.latencies),
+                "errors": stats.errors,
+                "statuses": stats.statuses,
+                "throughput_rps": len(stats.latencies) / elapsed if elapsed > 0 else None,
+                "latency": percentiles(stats.latencies),
+            }
+        return endpoints
+
+
+async def _follow_summary(client, recorder: Recorder, config: LoadTestConfig, meeting_id: str) -> bool:
+    deadline = time.monotonic() + config.summary_timeout
+    if config.mode == "stream":
+        name = "GET /meetings/{meeting_id}/summary/stream"
+        start = time.perf_counter()
+        event = None
+        try:
+            async with client.stream("GET", f"/meetings/{meeting_id}/summary/stream") as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    if time.monotonic() > deadline:
+                        break
+                status = response.status_code
+        except Exception:
+            recorder.record(name, time.perf_counter() - start, None, False)
+            return False
+        ok = status == 200 and event == "completed"
+        recorder.record(name, time.perf_counter() - start, status, ok)
+        return ok
+
+    while time.monotonic() < deadline:
+        response = await recorder.request(
+            client, "GET /meetings/{meeting_id}/summary", "GET", f"/meetings/{meeting_id}/summary",
+            expected=(200, 202),
+        )
+        if response is None or response.status_code != 202:
+            return response is not None and response.status_code == 200
+        await asyncio.sleep(config.poll_interval)
+    return False
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, config: LoadTestConfig, index: int) -> None:
+    username = f"loadtest-user-{index}"
+    if config.ramp_up:
+        await asyncio.sleep(config.ramp_up * index / max(1, config.users))
+
+    response = await recorder.request(
+        client, "POST /token", "POST", "/token",
+        data={"username": username, "password": LOADTEST_PASSWORD, "grant_type": "password"},
+    )
+    if response is None or response.status_code != 200:
+        return
+    tokens = response.json()
+
+    for iteration in range(config.iterations):
+        text = synthetic_transcript(config.segments * config.segment_chars, seed=config.seed + index * 1000 + iteration)
+        lines = text.splitlines()
+        per_segment = max(1, len(lines) // config.segments)
+        segments = [
+            {"id": str(n), "text": "\n".join(lines[n * per_segment:(n + 1) * per_segment]), "timestamp": f"{n:05d}"}
+            for n in range(config.segments)
+        ]
+        response = await recorder.request(
+            client, "POST /meetings", "POST", "/meetings",
+            json={"meeting_title": f"Load test {index}-{iteration}", "transcripts": segments},
+        )
+        if response is None or response.status_code != 200:
+            continue
+        meeting_id = response.json()["meeting_id"]
+
+        flow_start = time.perf_counter()
+        response = await recorder.request(
+            client, "POST /meetings/{meeting_id}/summary", "POST", f"/meetings/{meeting_id}/summary",
+            json={
+                "text": text, "model": "openai", "model_name": "fake-model", "meeting_id": meeting_id,
+                "chunk_size": config.chunk_size, "overlap": config.overlap, "stream": config.mode == "stream",
+            },
+        )
+        if response is not None and response.status_code == 200:
+            ok = await _follow_summary(client, recorder, config, meeting_id)
+            recorder.record("flow: summary", time.perf_counter() - flow_start, 200 if ok else None, ok)
+
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        await recorder.request(client, "GET /get-meetings", "GET", "/get-meetings", headers=headers)
+
+        response = await recorder.request(
+            client, "POST /refresh", "POST", "/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        if response is not None and response.status_code == 200:
+            tokens = response.json()
+
+
+async def run_loadtest(app, config: LoadTestConfig) -> Dict:
+    """Drive ``config.users`` virtual users through ``app`` and return the report."""
+    import auth
+    import transcript_processor
+    from routers import meetings
+
+    fake = FakeLLM(latency=LatencyDistribution.parse(config.latency), error_rate=config.error_rate, seed=config.seed)
+    originals = (transcript_processor.Agent, meetings.processor.db, auth.db)
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory() as tmp:
+        database = await _setup_database(os.path.join(tmp, "loadtest.db"))
+        # One hash for every user: bcrypt is deliberately slow and login cost is measured separately
+        hashed = auth.pwd_context.hash(LOADTEST_PASSWORD)
+        for index in range(config.users):
+            await database.create_user(f"loadtest-user-{index}", hashed, "user")
+
+        transcript_processor.Agent = fake
+        meetings.processor.db = database
+        auth.db = database
+        transport = DetachedASGITransport(app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                started = time.perf_counter()
+                await asyncio.gather(*(virtual_user(client, recorder, config, i) for i in range(config.users)))
+                elapsed = time.perf_counter() - started
+        finally:
+            await transport.aclose()
+            transcript_processor.Agent, meetings.processor.db, auth.db = originals
+            meetings.cpu_pool.shutdown()
+
+    endpoints = recorder.report(elapsed)
+    total = sum(stats["requests"] for name, stats in endpoints.items() if not name.startswith("flow:"))
+    return {
+        "config": config.__dict__,
+        "elapsed_sec": elapsed,
+        "requests": total,
+        "throughput_rps": total / elapsed if elapsed > 0 else None,
+        "llm_calls": fake.calls,
+        "llm_errors": fake.errors,
+        "endpoints": endpoints,
+    }
+
+
+def format_report(report: Dict) -> str:
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.1f}"
+
+    lines = [
+        f"{report['requests']} requests in {report['elapsed_sec']:.2f}s "
+        f"({report['throughput_rps']:.1f} req/s), fake LLM errors {report['llm_errors']}/{report['llm_calls']}",
+        f"{'endpoint':<44} {'count':>6} {'err':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+    ]
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency"]
+        lines.append(
+            f"{name:<44} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput_rps']:>7.1f} "
+            f"{ms(latency['p50']):>8} {ms(latency['p95']):>8} {ms(latency['p99']):>8}"
+        )
+    return "\n".join(lines)
+
+
+def write_report(report: Dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,310 @@
+"""Benchmark ``process_transcript_background`` end to end against a fake LLM.
+
+Each scenario generates a synthetic transcript of the given size and runs it
+through the same path as ``POST /meetings/{id}/summary``: the transcript is
+saved, chunked and summarized by ``FakeLLM`` and the merged summary is
+written to a throwaway SQLite database. Reports include chunks/sec,
+end-to-end and per-chunk latency percentiles, error counts and the peak RSS
+of the benchmark process, and are written as JSON so two runs can be diffed
+with ``--compare``::
+
+    python -m benchmarks.run --sizes 1k,100k,2M --latency lognormal:0.02,0.5 \\
+        --error-rate 0.01 --output before.json
+    python -m benchmarks.run --sizes 1k,100k,2M --latency lognormal:0.02,0.5 \\
+        --error-rate 0.01 --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import APP_DIR
+from benchmarks.fake_llm import FakeLLM, LatencyDistribution
+from benchmarks.transcripts import parse_size, synthetic_transcript
+
+DEFAULT_SIZES = "1k,10k,100k,500k,2M"
+DEFAULT_LATENCY = "lognormal:0.02,0.5"
+# Relative change in the wrong direction that is reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+# Metrics compared by --compare and whether higher values are better
+COMPARED_METRICS = {
+    "chunks_per_sec": True,
+    "latency.p50": False,
+    "latency.p95": False,
+    "latency.p99": False,
+    "peak_rss_mb": False,
+}
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(np.mean(values))}
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs: fall back to the process-wide high-water mark
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class RSSSampler:
+    """Track the peak resident set size of this process while active."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, _current_rss())
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self) -> "RSSSampler":
+        self.peak = _current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+async def _setup_database(db_path: str):
+    from db import DatabaseManager
+    from migrations import run_migrations
+
+    await run_migrations(db_path)
+    database = DatabaseManager(db_path)
+    await database.save_model_config("openai", "fake-model", "base")
+    await database.save_api_key("benchmark-key", "openai")
+    return database
+
+
+async def run_scenario(size: int, args: argparse.Namespace, fake: FakeLLM, database) -> Dict:
+    """Run ``args.repeat`` summaries of a ``size`` character transcript."""
+    from routers import meetings
+    from schemas.meetings import TranscriptRequest
+
+    text = synthetic_transcript(size, seed=args.seed)
+    fake.reset()
+    run_latencies: List[float] = []
+    failed = 0
+    chunks = 0
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        for run in range(args.repeat):
+            meeting_id = f"bench-{size}-{run}"
+            request = TranscriptRequest(
+                text=text, model="openai", model_name="fake-model", meeting_id=meeting_id,
+                chunk_size=args.chunk_size, overlap=args.overlap, compact=args.compact,
+            )
+            process_id = await database.create_process(meeting_id)
+            await database.save_transcript(
+                meeting_id, text, request.model, request.model_name, request.chunk_size, request.overlap
+            )
+            calls_before = fake.calls
+            run_started = time.perf_counter()
+            await meetings.process_transcript_background(process_id, request, meeting_id=meeting_id)
+            run_latencies.append(time.perf_counter() - run_started)
+            chunks += fake.calls - calls_before
+
+            result = await database.get_transcript_data(meeting_id)
+            if not result or result.get("status") != "completed":
+                failed += 1
+        elapsed = time.perf_counter() - started
+
+    return {
+        "size_chars": size,
+        "runs": args.repeat,
+        "failed_runs": failed,
+        "chunks": chunks,
+        "chunks_per_sec": chunks / elapsed if elapsed > 0 else None,
+        "elapsed_sec": elapsed,
+        "latency": percentiles(run_latencies),
+        "llm_latency": percentiles(fake.latencies),
+        "llm_calls": fake.calls,
+        "llm_errors": fake.errors,
+        "peak_rss_mb": rss.peak / (1024 * 1024),
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict:
+    import transcript_processor
+    from routers import meetings
+
+    fake = FakeLLM(latency=LatencyDistribution.parse(args.latency), error_rate=args.error_rate, seed=args.seed)
+    original_agent, original_db = transcript_processor.Agent, meetings.processor.db
+    scenarios = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = await _setup_database(os.path.join(tmp, "benchmark.db"))
+        transcript_processor.Agent = fake
+        meetings.processor.db = database
+        try:
+            for size in args.sizes:
+                scenario = await run_scenario(size, args, fake, database)
+                scenarios.append(scenario)
+                if not args.quiet:
+                    print(format_scenario(scenario), flush=True)
+        finally:
+            transcript_processor.Agent = original_agent
+            meetings.processor.db = original_db
+            meetings.cpu_pool.shutdown()
+
+    return {"meta": _metadata(args), "scenarios": scenarios}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> Dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "chunk_size": args.chunk_size,
+            "overlap": args.overlap,
+            "compact": args.compact,
+        },
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+def format_scenario(scenario: Dict) -> str:
+    latency = scenario["latency"]
+    return (
+        f"{scenario['size_chars']:>9} chars  {scenario['chunks']:>5} chunks  "
+        f"{scenario['chunks_per_sec'] or 0:8.1f} chunks/s  "
+        f"p50 {_ms(latency['p50'])}  p95 {_ms(latency['p95'])}  p99 {_ms(latency['p99'])}  "
+        f"errors {scenario['llm_errors']}/{scenario['llm_calls']}  "
+        f"failed {scenario['failed_runs']}/{scenario['runs']}  "
+        f"rss {scenario['peak_rss_mb']:.1f}MB"
+    )
+
+
+def _metric(scenario: Dict, path: str) -> Optional[float]:
+    value = scenario
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict]:
+    """Compare matching scenarios and flag metrics that got worse by more than ``threshold``."""
+    previous = {s["size_chars"]: s for s in baseline.get("scenarios", [])}
+    rows = []
+    for scenario in current.get("scenarios", []):
+        old = previous.get(scenario["size_chars"])
+        if old is None:
+            continue
+        for path, higher_is_better in COMPARED_METRICS.items():
+            before, after = _metric(old, path), _metric(scenario, path)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            regression = -change > threshold if higher_is_better else change > threshold
+            rows.append({
+                "size_chars": scenario["size_chars"], "metric": path,
+                "before": before, "after": after, "change": change, "regression": regression,
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'size':>9}  {'metric':<15} {'before':>12} {'after':>12} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['size_chars']:>9}  {row['metric']:<15} {row['before']:>12.4f} {row['after']:>12.4f} "
+            f"{row['change']:>+7.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline summarization pipeline benchmark")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Transcript sizes in characters (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY,
+                        help="Fake LLM latency: fixed:S, uniform:MIN,MAX, exponential:MEAN or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--overlap", type=int, default=1000)
+    parser.add_argument("--no-compact", dest="compact", action="store_false", help="Disable prompt compaction")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression")
+    parser.add_argument("--quiet", action="store_true")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    # The pipeline logs every chunk at INFO and every simulated failure with a
+    # traceback, which would dominate the timings
+    logging.disable(logging.ERROR)
+
+    report = asyncio.run(run_benchmarks(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_reports(baseline, report, args.threshold)
+        print(format_comparison(rows))
+        if args.fail_on_regression and any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Benchmark database size and read latency of compressed columns.
+
+Fills a throwaway database with synthetic meetings (live transcript
+segments, the full transcript submitted for summarization and a summary
+result) and stores it three ways: plain TEXT, zstd without a dictionary and
+zstd with per-column trained dictionaries (via ``migrations.recompress``).
+For each it reports the file size after ``VACUUM``, the stored bytes per
+column and the latency of ``get_transcript_data`` and ``get_meeting``::
+
+    python -m benchmarks.storage --meetings 200 --transcript-size 40k
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import APP_DIR  # noqa: F401  (puts the app modules on sys.path)
+from benchmarks.transcripts import parse_size, synthetic_transcript
+from column_codec import ColumnCodec
+from db import DatabaseManager
+from migrations import run_migrations
+from migrations.recompress import recompress
+
+MODES = ("plain", "zstd", "zstd+dict")
+
+
+def _summary_result(transcript: str, rng: random.Random) -> Dict:
+    lines = [line.split(": ", 1)[-1] for line in transcript.splitlines() if ": " in line]
+    section = lambda title: {  # noqa: E731
+        "title": title,
+        "blocks": [{"id": str(i), "type": "bullet", "content": rng.choice(lines), "color": "default"}
+                   for i in range(rng.randint(2, 6))],
+    }
+    return {
+        "MeetingName": "Weekly sync",
+        "SectionSummary": section("Section Summary"),
+        "KeyItemsDecisions": section("Key Items & Decisions"),
+        "ImmediateActionItems": section("Immediate Action Items"),
+        "NextSteps": section("Next Steps"),
+    }
+
+
+async def populate(database: DatabaseManager, meetings: int, transcript_size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    ids = []
+    for index in range(meetings):
+        meeting_id = f"meeting-{index}"
+        transcript = synthetic_transcript(transcript_size, seed=seed + index)
+        await database.save_meeting(meeting_id, f"Meeting {index}")
+        for line in transcript.splitlines():
+            await database.save_meeting_transcript(meeting_id, line, line[1:13])
+        await database.create_process(meeting_id)
+        await database.save_transcript(meeting_id, transcript, "openai", "gpt-4o", 5000, 1000)
+        await database.update_process(meeting_id, "COMPLETED", result=_summary_result(transcript, rng))
+        ids.append(meeting_id)
+    return ids
+
+
+async def _column_bytes(db_path: str) -> Dict[str, int]:
+    import aiosqlite
+
+    sizes = {}
+    async with aiosqlite.connect(db_path) as conn:
+        for table, column in (("transcripts", "transcript"), ("transcript_chunks", "transcript_text"),
+                              ("summary_processes", "result")):
+            cursor = await conn.execute(f"SELECT COALESCE(SUM(LENGTH(CAST({column} AS BLOB))), 0) FROM {table}")
+            sizes[f"{table}.{column}"] = (await cursor.fetchone())[0]
+    return sizes
+
+
+def _percentiles(samples: List[float]) -> Dict:
+    values = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(values, 50)), 3), "p95_ms": round(float(np.percentile(values, 95)), 3)}
+
+
+async def run_mode(mode: str, args: argparse.Namespace, directory: str) -> Dict:
+    db_path = os.path.join(directory, f"{mode.replace('+', '-')}.db")
+    await run_migrations(db_path)
+    # Written uncompressed, then brought to the mode's format the way an
+    # existing deployment would be
+    await populate(DatabaseManager(db_path, ColumnCodec(enabled=False)), args.meetings, args.transcript_size, args.seed)
+    if mode != "plain":
+        await recompress(db_path, train=mode == "zstd+dict", dict_size=args.dict_size)
+    import aiosqlite
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute("VACUUM")
+
+    reader = DatabaseManager(db_path, ColumnCodec(enabled=mode != "plain"))
+    rng = random.Random(args.seed)
+    timings: Dict[str, List[float]] = {"get_transcript_data": [], "get_meeting": []}
+    for _ in range(args.reads):
+        meeting_id = f"meeting-{rng.randrange(args.meetings)}"
+        started = time.perf_counter()
+        await reader.get_transcript_data(meeting_id)
+        timings["get_transcript_data"].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        await reader.get_meeting(meeting_id)
+        timings["get_meeting"].append(time.perf_counter() - started)
+
+    return {
+        "mode": mode,
+        "file_bytes": os.path.getsize(db_path),
+        "columns": await _column_bytes(db_path),
+        "reads": {name: _percentiles(samples) for name, samples in timings.items()},
+    }
+
+
+async def run_storage_benchmark(args: argparse.Namespace) -> Dict:
+    with tempfile.TemporaryDirectory() as directory:
+        results = [await run_mode(mode, args, directory) for mode in args.modes]
+    return {
+        "meetings": args.meetings,
+        "transcript_size": args.transcript_size,
+        "results": results,
+    }
+
+
+def format_report(report: Dict) -> str:
+    plain = next((result["file_bytes"] for result in report["results"] if result["mode"] == "plain"), None)
+    lines = [f"{'mode':<10} {'file MB':>9} {'ratio':>6} {'transcript_data p50/p95 ms':>28} {'meeting p50/p95 ms':>20}"]
+    for result in report["results"]:
+        reads = result["reads"]
+        ratio = f"{plain / result['file_bytes']:.1f}x" if plain else "-"
+        lines.append(
+            f"{result['mode']:<10} {result['file_bytes'] / 1e6:>9.2f} {ratio:>6} "
+            f"{reads['get_transcript_data']['p50_ms']:>13.2f} / {reads['get_transcript_data']['p95_ms']:<12.2f} "
+            f"{reads['get_meeting']['p50_ms']:>8.2f} / {reads['get_meeting']['p95_ms']:<9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compressed column storage benchmark")
+    parser.add_argument("--meetings", type=int, default=100)
+    parser.add_argument("--transcript-size", type=parse_size, default="20k", help="Characters per transcript")
+    parser.add_argument("--reads", type=int, default=200, help="Random meetings read per mode")
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=list(MODES),
+                        help=f"Comma separated subset of {', '.join(MODES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_storage_benchmark(args))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
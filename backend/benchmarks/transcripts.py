@@ -0,0 +1,74 @@
+"""Deterministic synthetic transcripts in the format produced by Whisper."""
+
+import random
+import re
+from typing import Optional
+
+SPEAKERS = ("Alice", "Bob", "Carol", "Dave", "Erin", "Frank")
+FILLERS = ("um,", "uh,", "so", "like,", "you know,")
+SUBJECTS = (
+    "the release", "the budget", "onboarding", "the API migration", "the roadmap", "customer feedback",
+    "the hiring plan", "the security review", "the Q3 targets", "the design system",
+)
+VERBS = ("finish", "review", "ship", "draft", "present", "test", "document", "estimate", "schedule", "approve")
+DEADLINES = ("by Friday", "next week", "before the demo", "end of month", "by Tuesday", "this sprint")
+TEMPLATES = (
+    "I think we should {verb} {subject} {deadline}.",
+    "Can someone {verb} {subject}? It is blocking the team.",
+    "We agreed to {verb} {subject} {deadline}.",
+    "My concern with {subject} is that we cannot {verb} it {deadline}.",
+    "Action item: {speaker} will {verb} {subject} {deadline}.",
+    "Let's move on from {subject}, we can {verb} it later.",
+)
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*$")
+
+
+def parse_size(value: str) -> int:
+    """Parse ``"1k"``/``"2M"``-style sizes into a character count."""
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, unit = match.groups()
+    scale = {"": 1, "k": 1_000, "m": 1_000_000}[unit.lower()]
+    return int(float(number) * scale)
+
+
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+def synthetic_transcript(chars: int, seed: int = 0, speakers: Optional[int] = None) -> str:
+    """Generate a transcript of exactly ``chars`` characters.
+
+    Lines carry ``[start --> end]`` timestamps, speaker labels, filler words,
+    stutters and the occasional ``[BLANK_AUDIO]`` marker, so compaction and
+    chunking see realistic input. The same ``seed`` always yields the same text.
+    """
+    rng = random.Random(seed)
+    names = SPEAKERS[: max(1, min(speakers or 4, len(SPEAKERS)))]
+    lines = []
+    total = 0
+    clock = 0.0
+    while total < chars:
+        speaker = rng.choice(names)
+        duration = rng.uniform(1.5, 8.0)
+        if rng.random() < 0.03:
+            text = "[BLANK_AUDIO]"
+        else:
+            text = rng.choice(TEMPLATES).format(
+                verb=rng.choice(VERBS), subject=rng.choice(SUBJECTS),
+                deadline=rng.choice(DEADLINES), speaker=rng.choice(names),
+            )
+            if rng.random() < 0.4:
+                text = f"{rng.choice(FILLERS)} {text[0].lower()}{text[1:]}"
+            if rng.random() < 0.15:
+                first = text.split(" ", 1)[0]
+                text = f"{first} {text}"
+        line = f"[{_timestamp(clock)} --> {_timestamp(clock + duration)}] {speaker}: {text}\n"
+        clock += duration
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)[:chars]
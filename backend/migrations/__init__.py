@@ -1,9 +1,22 @@
 import asyncio
 import aiosqlite
 
-async def run_migrations(db_path: str = "meeting_minutes.db"):
-    """Run database migrations for the given SQLite database."""
+
+async def _add_column(conn, table: str, column: str, definition: str):
+    """Add a column to an existing table unless it is already there."""
+    cursor = await conn.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in await cursor.fetchall()]:
+        await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+async def run_migrations(db_path: str = "meeting_minutes.db", wal: bool = False):
+    """Run database migrations for the given SQLite database.
+
+    ``wal`` switches the database to write-ahead logging, which lets several
+    worker processes read while one of them writes.
+    """
     async with aiosqlite.connect(db_path) as conn:
+        if wal:
+            await conn.execute("PRAGMA journal_mode=WAL")
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS meetings (
                 id TEXT PRIMARY KEY,
@@ -53,6 +66,8 @@ async def run_migrations(db_path: str = "meeting_minutes.db"):
                 FOREIGN KEY (meeting_id) REFERENCES meetings(id)
             )
         """)
+        # Set instead of transcript_text when the transcript was uploaded in parts
+        await _add_column(conn, "transcript_chunks", "upload_id", "TEXT")
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 username TEXT PRIMARY KEY,
@@ -79,6 +94,80 @@ async def run_migrations(db_path: str = "meeting_minutes.db"):
                 ollamaApiKey TEXT
             )
         """)
+        # Bumped with every settings write so each process knows when its
+        # cached copy of the settings row is stale
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS settings_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        """)
+        await conn.execute("INSERT OR IGNORE INTO settings_version (id, version) VALUES (1, 0)")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS shared_state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS upload_sessions (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                filename TEXT,
+                meeting_id TEXT,
+                size INTEGER NOT NULL,
+                sha256 TEXT,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS upload_parts (
+                upload_id TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (upload_id, offset),
+                FOREIGN KEY (upload_id) REFERENCES upload_sessions(id)
+            )
+        """)
+        # Summaries of the chunks a summary job has finished, so a retry after
+        # a crash or provider failure only runs the chunks still missing
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_chunk_results (
+                meeting_id TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                input_hash TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (meeting_id, chunk_index),
+                FOREIGN KEY (meeting_id) REFERENCES meetings(id)
+            )
+        """)
+        # zstd dictionaries of compressed columns (see app/column_codec.py);
+        # the newest row per column is the one new values are compressed with
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS compression_dictionaries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL,
+                dict_id INTEGER NOT NULL UNIQUE,
+                data BLOB NOT NULL,
+                samples INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
         await conn.commit()
 
 if __name__ == "__main__":
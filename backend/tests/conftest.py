@@ -2,19 +2,20 @@ import sys
 import pathlib
 import pytest_asyncio
 
-# Add backend to Python path
+# Add backend to Python path; app modules import each other by bare name
 BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR / "app"))
 sys.path.append(str(BACKEND_DIR))
 
+# Alias the bare module names before importing main so both spellings share one module
 import app.db as db_module
-import app.main as main_module
 sys.modules["db"] = db_module
-sys.modules["main"] = main_module
 import app.auth as auth_module
 sys.modules["auth"] = auth_module
 import app.transcript_processor as tp_module
 sys.modules["transcript_processor"] = tp_module
-import app.auth as auth_module
+import app.main as main_module
+sys.modules["main"] = main_module
 from migrations import run_migrations
 
 @pytest_asyncio.fixture
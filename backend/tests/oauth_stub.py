@@ -0,0 +1,98 @@
+"""Local stand-in for an OAuth provider and its meeting API.
+
+Serves ``POST /oauth/token`` (authorization code and refresh token grants)
+and ``POST /meetings/<id>/join`` / ``/meetings/<id>:join`` on a random
+localhost port with HTTP/1.1 keep-alive, and records what it was asked so
+tests can check token reuse, refresh deduplication and connection pooling.
+"""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class OAuthStubServer:
+    def __init__(self, expires_in: int = 3600, token_delay: float = 0.0):
+        self.expires_in = expires_in
+        self.token_delay = token_delay
+        self.grants = []
+        self.joins = []
+        self.connections = set()
+        self.valid_tokens = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def revoke(self, access_token: str) -> None:
+        with self._lock:
+            self.valid_tokens.discard(access_token)
+
+    def _issue(self, grant: str) -> dict:
+        with self._lock:
+            number = next(self._ids)
+            self.grants.append(grant)
+            access_token = f"access-{number}"
+            self.valid_tokens.add(access_token)
+        return {
+            "access_token": access_token,
+            "refresh_token": f"refresh-{number}",
+            "expires_in": self.expires_in,
+            "token_type": "Bearer",
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                with stub._lock:
+                    stub.connections.add(self.client_address)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path == "/oauth/token":
+                    form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+                    if form.get("grant_type") not in ("authorization_code", "refresh_token"):
+                        return self._reply(400, {"error": "unsupported_grant_type"})
+                    if stub.token_delay:
+                        time.sleep(stub.token_delay)
+                    return self._reply(200, stub._issue(form["grant_type"]))
+                if self.path.startswith("/meetings/") and self.path.endswith("join"):
+                    token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                    if token not in stub.valid_tokens:
+                        return self._reply(401, {"error": "invalid_token"})
+                    with stub._lock:
+                        stub.joins.append((self.path, token))
+                    return self._reply(200, {"joined": True})
+                self._reply(404, {"error": "not_found"})
+
+        return Handler
@@ -0,0 +1,148 @@
+import json
+
+import httpx
+import pytest
+
+from app.transcript_processor import SUMMARY_SYSTEM_PROMPT, TranscriptProcessor
+from batch_summaries import BatchJob, batch_client
+from benchmarks.fake_batch_server import FakeBatchServer
+from benchmarks.fake_provider import RecordedProvider
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "test-key"
+
+
+def transcript(meeting: int, lines: int = 60) -> str:
+    return "\n".join(
+        f"[00:{i // 60:02d}:{i % 60:02d}] Speaker {i % 3}: meeting {meeting} agreed item {i} ships friday"
+        for i in range(lines)
+    )
+
+
+async def summarize(test_db, server, model, jobs, **options):
+    import batch_summaries
+
+    with pytest.MonkeyPatch.context() as patch:
+        for name in ("OPENAI_BATCH_URL", "ANTHROPIC_BATCH_URL"):
+            patch.setattr(batch_summaries, name, server.url)
+        processor = TranscriptProcessor()
+        processor.db = test_db
+        model_name = "claude-3-5-sonnet-latest" if model == "claude" else "gpt-4o"
+        async with httpx.AsyncClient() as client:
+            return await processor.summarize_batch(jobs, model, model_name, http_client=client,
+                                                   poll_interval=0.01, **options)
+
+
+@pytest.fixture
+def api_key(test_db, monkeypatch):
+    monkeypatch.setattr(test_db, "get_api_key", DummyDB().get_api_key)
+
+
+@pytest.mark.asyncio
+async def test_openai_batch_summarizes_many_meetings_in_one_submission(test_db, api_key):
+    jobs = [BatchJob(f"m{n}", transcript(n), chunk_size=1200, overlap=200) for n in range(3)]
+    for job in jobs:
+        await test_db.save_transcript(job.meeting_id, job.text, "openai", "gpt-4o", 1200, 200)
+
+    with FakeBatchServer(polls_to_complete=3) as server:
+        outcomes = await summarize(test_db, server, "openai", jobs)
+
+    assert outcomes == {"m0": "completed", "m1": "completed", "m2": "completed"}
+    assert len(server.batches) == 1
+    request = server.requests[0]
+    assert request["url"] == "/v1/chat/completions"
+    assert request["body"]["messages"][0] == {"role": "system", "content": SUMMARY_SYSTEM_PROMPT}
+    assert {batch["polls"] for batch in server.batches.values()} == {3}
+
+    data = await test_db.get_transcript_data("m1")
+    assert data["status"] == "completed" and data["result"]
+    # Chunk results are only kept until the meeting's summary is complete
+    assert await test_db.get_chunk_results("m1") == {}
+
+
+@pytest.mark.asyncio
+async def test_anthropic_failed_chunks_are_resubmitted_alone(test_db, api_key):
+    jobs = [BatchJob(f"m{n}", transcript(n), chunk_size=1200, overlap=200) for n in range(2)]
+    with FakeBatchServer(fail={"j0-c1"}, provider=RecordedProvider(min_cacheable_tokens=256)) as server:
+        first = await summarize(test_db, server, "claude", jobs)
+        assert first == {"m0": "incomplete", "m1": "completed"}
+        submitted = len(server.requests)
+        saved = await test_db.get_chunk_results("m0")
+        assert saved and 1 not in saved
+
+        system = server.requests[0]["params"]["system"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+
+        server.fail.clear()
+        second = await summarize(test_db, server, "claude", jobs[:1])
+
+    assert second == {"m0": "completed"}
+    assert len(server.requests) == submitted + 1
+    assert server.requests[-1]["custom_id"] == "j0-c1"
+
+
+@pytest.mark.asyncio
+async def test_large_runs_are_split_into_several_batches(test_db, api_key):
+    jobs = [BatchJob(f"m{n}", transcript(n), chunk_size=1200, overlap=200) for n in range(2)]
+    with FakeBatchServer() as server:
+        outcomes = await summarize(test_db, server, "openai", jobs, max_requests=2)
+
+    assert set(outcomes.values()) == {"completed"}
+    assert all(len(batch["requests"]) <= 2 for batch in server.batches.values())
+    assert len(server.batches) == -(-len(server.requests) // 2)
+
+
+@pytest.mark.asyncio
+async def test_batch_usage_is_recorded_in_the_process_metadata(test_db, api_key):
+    job = BatchJob("m0", transcript(0), chunk_size=1200, overlap=200)
+    await test_db.save_transcript("m0", job.text, "openai", "gpt-4o", 1200, 200)
+    with FakeBatchServer(provider=RecordedProvider(min_cacheable_tokens=256)) as server:
+        await summarize(test_db, server, "openai", [job])
+
+    async with test_db._get_connection() as conn:
+        async with conn.execute("SELECT metadata FROM summary_processes WHERE meeting_id = 'm0'") as cursor:
+            metadata = json.loads((await cursor.fetchone())[0])
+    assert metadata["batch"]["requests"] == len(server.requests) and metadata["batch"]["failed"] == 0
+    assert metadata["prompt_cache"]["requests"] == len(server.requests)
+    assert metadata["prompt_cache"]["cached_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_ollama_has_no_batch_mode(test_db, api_key):
+    with pytest.raises(ValueError):
+        await TranscriptProcessor(test_db).summarize_batch([], "ollama", "llama3")
+
+
+@pytest.mark.asyncio
+async def test_batch_client_closes_only_the_http_client_it_created():
+    owned = batch_client("claude", "test-key")
+    await owned.aclose()
+    assert owned.client.is_closed
+
+    async with httpx.AsyncClient() as http_client:
+        shared = batch_client("openai", "test-key", http_client)
+        await shared.aclose()
+        assert not http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_resummarize_batch_submits_a_page_of_meetings_at_a_time(test_db, api_key, tmp_path, monkeypatch):
+    import batch_summaries
+    from resummarize import ResummarizeCheckpoint, resummarize_batch
+
+    for n in range(5):
+        await test_db.save_transcript(f"m{n}", transcript(n), "openai", "gpt-old", 1200, 200)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    with FakeBatchServer() as server:
+        monkeypatch.setattr(batch_summaries, "OPENAI_BATCH_URL", server.url)
+        progress = await resummarize_batch(checkpoint, "openai", "gpt-4o", page_size=2, db=test_db,
+                                           poll_interval=0.01)
+
+    assert (progress.completed, progress.failed) == (5, 0)
+    assert len(server.batches) == 3
+    assert {request["body"]["model"] for request in server.requests} == {"gpt-4o"}
+    assert ResummarizeCheckpoint.load(checkpoint).after == "m4"
+    data = await test_db.get_transcript_data("m3")
+    assert data["status"] == "completed" and data["result"]
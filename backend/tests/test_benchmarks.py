@@ -0,0 +1,63 @@
+import pytest
+
+from benchmarks.compact_summary import run_benchmark as run_compact_benchmark
+from benchmarks.fake_llm import FakeLLM, FakeProviderError, LatencyDistribution
+from benchmarks.run import build_parser, compare_reports, run_benchmarks
+from benchmarks.transcripts import parse_size, synthetic_transcript
+from app.transcript_processor import SummaryResponse
+
+
+def test_synthetic_transcript_is_deterministic():
+    text = synthetic_transcript(5000, seed=3)
+    assert len(text) == 5000
+    assert text == synthetic_transcript(5000, seed=3)
+    assert text != synthetic_transcript(5000, seed=4)
+    assert parse_size("2M") == 2_000_000 and parse_size("1.5k") == 1500
+
+
+def test_latency_distribution_parsing():
+    assert LatencyDistribution.parse("uniform:0.01,0.2") == LatencyDistribution("uniform", (0.01, 0.2))
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("lognormal:0.1")
+
+
+@pytest.mark.asyncio
+async def test_fake_agent_is_deterministic_per_prompt():
+    llm = FakeLLM(error_rate=0.5, seed=1)
+    prompt = "Transcript Chunk:\n[00:00:01.000] Alice: Action item: Bob will ship the release by Friday.\n"
+    outcomes = []
+    for _ in range(2):
+        try:
+            result = await llm(None, result_type=SummaryResponse).run(prompt)
+            outcomes.append(result.data.model_dump())
+        except FakeProviderError:
+            outcomes.append("error")
+    assert outcomes[0] == outcomes[1]
+    assert llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_benchmark_report_and_comparison():
+    args = build_parser().parse_args(["--repeat", "2", "--latency", "fixed:0", "--error-rate", "0.5", "--quiet"])
+    args.sizes = [2000, 20000]
+    report = await run_benchmarks(args)
+
+    small, large = report["scenarios"]
+    assert large["chunks"] > small["chunks"] > 0
+    assert large["llm_calls"] == large["chunks"]
+    assert large["llm_errors"] > 0
+    assert large["latency"]["p50"] <= large["latency"]["p99"]
+    assert large["peak_rss_mb"] > 0
+    assert report["meta"]["config"]["error_rate"] == 0.5
+
+    slower = {"scenarios": [dict(large, chunks_per_sec=large["chunks_per_sec"] / 2)]}
+    rows = compare_reports(report, slower)
+    assert any(row["metric"] == "chunks_per_sec" and row["regression"] for row in rows)
+    assert not any(row["metric"] == "peak_rss_mb" and row["regression"] for row in rows)
+
+
+def test_compact_summary_benchmark_reports_each_representation():
+    report = run_compact_benchmark(2000, repeat=1)
+    retained = {result["representation"]: result["retained_bytes"] for result in report["results"]}
+    assert set(retained) == {"pydantic", "dict", "compact"} and report["chunks"] == 50
+    assert retained["compact"] < retained["dict"] < retained["pydantic"]
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from app.bot_scheduler import BotScheduler, CalendarEvent, SessionState, TranscriptionPool
+from app.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 1000
+
+
+async def pcm_source(seconds, block_seconds=0.1, speedup=20):
+    block = bytes(int(SAMPLE_RATE * block_seconds) * 2)
+    for _ in range(int(seconds / block_seconds)):
+        await asyncio.sleep(block_seconds / speedup)
+        yield block
+
+
+async def transcribe(frame):
+    await asyncio.sleep(0.005)
+    return f"frame {frame.index}"
+
+
+def _scheduler(connectors, transcriber=transcribe, **kwargs):
+    kwargs.setdefault("pool", TranscriptionPool(workers=4, cpu_probe=lambda: 0.0))
+    return BotScheduler(
+        connectors,
+        audio_source=lambda session: pcm_source(1.0),
+        transcriber=transcriber,
+        frame_seconds=0.25,
+        sample_rate=SAMPLE_RATE,
+        join_early=0,
+        **kwargs,
+    )
+
+
+async def _wait_watching(scheduler):
+    """Wait for every session, returning the most sessions each connector ran at once."""
+    peak = {}
+    waiter = asyncio.create_task(scheduler.wait())
+    while not waiter.done():
+        for name, connector in scheduler.health()["connectors"].items():
+            peak[name] = max(peak.get(name, 0), connector["running"])
+        await asyncio.sleep(0.005)
+    return peak
+
+
+@pytest.mark.asyncio
+async def test_scheduler_caps_concurrent_meetings_per_connector():
+    connectors = {"zoom": mock.MagicMock(), "google_meet": mock.MagicMock()}
+    scheduler = _scheduler(connectors, connector_limits={"zoom": 2, "google_meet": 5})
+    for index in range(6):
+        scheduler.schedule(f"z{index}", "zoom", "token")
+        scheduler.schedule(f"g{index}", "google_meet", "token")
+
+    peak = await _wait_watching(scheduler)
+    await scheduler.aclose()
+
+    assert peak == {"zoom": 2, "google_meet": 5}
+    health = scheduler.health()
+    assert [session["state"] for session in health["sessions"]] == ["completed"] * 12
+    assert all(session["status"] == "ok" and session["segments"] == 4 for session in health["sessions"])
+    assert connectors["zoom"].join_meeting.call_count == 6
+    assert health["pool"]["completed"] == 48
+
+
+@pytest.mark.asyncio
+async def test_scheduler_joins_calendar_events_at_their_start():
+    scheduler = _scheduler({"zoom": mock.MagicMock()})
+    scheduler.join_early = 0.1
+    now = datetime.now()
+    scheduler.schedule_calendar([
+        CalendarEvent("soon", "zoom", "token", start=now + timedelta(seconds=0.3)),
+        CalendarEvent("over", "zoom", "token", start=now - timedelta(hours=2), end=now - timedelta(hours=1)),
+    ])
+    # Schedule the calendar again: the meeting is already pending
+    assert scheduler.schedule_calendar([CalendarEvent("soon", "zoom", "token", start=now)]) == []
+
+    (session,) = scheduler.sessions.values()
+    await asyncio.sleep(0.05)
+    assert session.state == SessionState.SCHEDULED
+    await scheduler.wait()
+    assert session.state == SessionState.COMPLETED
+    assert session.started_at >= now.timestamp() + 0.2
+    await scheduler.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pool_throttles_while_cpu_is_saturated():
+    cpu = {"value": 1.0}
+    pool = TranscriptionPool(workers=4, cpu_probe=lambda: cpu["value"], poll_interval=0.005)
+    running = {"now": 0, "peak": 0}
+
+    def blocking_transcribe(frame):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.01)
+        running["now"] -= 1
+        return "text"
+
+    frames = [mock.MagicMock(index=index) for index in range(8)]
+    results = await asyncio.gather(*(pool.transcribe(blocking_transcribe, frame) for frame in frames))
+    assert results == ["text"] * 8
+    assert running["peak"] == 1
+    assert pool.throttled_seconds > 0
+
+    cpu["value"] = 0.2
+    running["peak"] = 0
+    await asyncio.gather(*(pool.transcribe(blocking_transcribe, frame) for frame in frames))
+    assert running["peak"] > 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_session_health_reports_failures_and_stalls():
+    refusing = mock.MagicMock()
+    refusing.join_meeting.side_effect = RuntimeError("join refused")
+
+    async def silent_source(session):
+        await asyncio.sleep(10)
+        yield b""
+
+    scheduler = BotScheduler(
+        {"zoom": refusing, "google_meet": mock.MagicMock()},
+        audio_source=lambda session: silent_source(session),
+        transcriber=transcribe,
+        pool=TranscriptionPool(workers=1, cpu_probe=lambda: 0.0),
+        join_early=0,
+        stall_seconds=0.05,
+    )
+    failed = scheduler.schedule("m1", "zoom", "token")
+    stalled = scheduler.schedule("m2", "google_meet", "token")
+    await asyncio.sleep(0.15)
+
+    sessions = {session["meeting_id"]: session for session in scheduler.health()["sessions"]}
+    assert sessions["m1"]["status"] == "failed"
+    assert sessions["m1"]["error"] == "join refused"
+    assert sessions["m2"]["state"] == "running"
+    assert sessions["m2"]["status"] == "stalled"
+
+    assert scheduler.cancel(stalled.session_id)
+    await scheduler.wait()
+    assert stalled.state == SessionState.CANCELLED
+    assert not scheduler.cancel(failed.session_id)
+    with pytest.raises(ValueError):
+        scheduler.schedule("m3", "teams", "token")
+    await scheduler.aclose()
+
+
+@pytest.mark.asyncio
+async def test_silent_stretch_is_not_reported_as_a_stall():
+    transcriber = mock.AsyncMock(return_value="")
+    scheduler = BotScheduler(
+        {"zoom": mock.MagicMock()},
+        audio_source=lambda session: pcm_source(8.0),
+        transcriber=transcriber,
+        pool=TranscriptionPool(workers=1, cpu_probe=lambda: 0.0),
+        frame_seconds=0.25,
+        sample_rate=SAMPLE_RATE,
+        join_early=0,
+        stall_seconds=0.1,
+        vad=VoiceActivityDetector(),
+    )
+    session = scheduler.schedule("m1", "zoom", "token")
+    await asyncio.sleep(0.25)
+
+    # Every frame so far was silence, so none reached the transcriber
+    assert session.state == SessionState.RUNNING and session.transcript.silent_frames > 5
+    transcriber.assert_not_called()
+    assert session.status(scheduler.stall_seconds) == "ok"
+    await scheduler.wait()
+    await scheduler.aclose()
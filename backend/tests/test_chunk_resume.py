@@ -0,0 +1,80 @@
+import pytest
+
+import app.transcript_processor as tp_module
+from app.main import process_transcript_background
+from app.schemas.meetings import TranscriptRequest
+from app.transcript_processor import Section, SummaryResponse
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "key"
+
+
+class FlakyAgent:
+    """Summarizes each chunk by its item numbers; fails on chunks listed in ``fail_on``."""
+
+    prompts = []
+    fail_on = set()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def run(self, prompt):
+        FlakyAgent.prompts.append(prompt)
+        chunk = prompt.split("Transcript Chunk:")[1]
+        if any(f"item {n} " in chunk for n in FlakyAgent.fail_on):
+            raise RuntimeError("provider unavailable")
+        first = chunk.split("item ")[1].split()[0]
+        empty = lambda title: Section(title=title, blocks=[])  # noqa: E731
+
+        class Result:
+            data = SummaryResponse(
+                MeetingName=f"Chunk from item {first}",
+                SectionSummary=empty("Section Summary"),
+                CriticalDeadlines=empty("Critical Deadlines"),
+                KeyItemsDecisions=empty("Key Items & Decisions"),
+                ImmediateActionItems=empty("Immediate Action Items"),
+                NextSteps=empty("Next Steps"),
+                OtherImportantPoints=empty("Other Important Points"),
+                ClosingRemarks=empty("Closing Remarks"),
+            )
+
+        return Result()
+
+
+@pytest.mark.asyncio
+async def test_retry_resumes_only_failed_chunks(test_db, monkeypatch):
+    monkeypatch.setattr(test_db, "get_api_key", DummyDB().get_api_key)
+    monkeypatch.setattr(tp_module, "Agent", FlakyAgent)
+    text = "\n".join(f"[00:00:{i % 60:02d}] Speaker 1: item {i} is done" for i in range(300))
+    request = TranscriptRequest(text=text, model="openai", model_name="gpt-test", chunk_size=1000, overlap=200)
+
+    FlakyAgent.prompts, FlakyAgent.fail_on = [], {150}
+    await test_db.create_process("m1")
+    await test_db.save_transcript("m1", text, "openai", "gpt-test", 1000, 200)
+    await process_transcript_background("m1", request)
+    chunks = len(FlakyAgent.prompts)
+    saved = await test_db.get_chunk_results("m1")
+    assert chunks > 5 and len(saved) == chunks - 1
+
+    FlakyAgent.prompts, FlakyAgent.fail_on = [], set()
+    await test_db.create_process("m1")
+    await process_transcript_background("m1", request)
+    # Only the chunk that failed is sent to the provider again
+    assert len(FlakyAgent.prompts) == 1 and "item 150 " in FlakyAgent.prompts[0]
+
+    data = await test_db.get_transcript_data("m1")
+    assert data["status"] == "completed"
+    assert data["result"]
+    # A complete result leaves nothing to resume from
+    assert await test_db.get_chunk_results("m1") == {}
+
+    # Saved summaries are only reused for the same chunk text and model
+    FlakyAgent.prompts, FlakyAgent.fail_on = [], {0}
+    await process_transcript_background("m1", request)
+    other_model = request.model_copy(update={"model_name": "gpt-other"})
+    FlakyAgent.prompts = []
+    FlakyAgent.fail_on = set()
+    await process_transcript_background("m1", other_model)
+    assert len(FlakyAgent.prompts) == chunks
@@ -0,0 +1,96 @@
+import json
+
+import aiosqlite
+import pytest
+
+# db and migrations.recompress import the codec by its bare module name
+from column_codec import ColumnCodec, UnknownDictionary, train_dictionary
+from app.db import DatabaseManager
+from benchmarks.transcripts import synthetic_transcript
+from migrations import run_migrations
+from migrations.recompress import recompress
+
+
+async def stored(db_path, table, column):
+    async with aiosqlite.connect(db_path) as conn:
+        cursor = await conn.execute(f"SELECT {column} FROM {table}")
+        return [row[0] for row in await cursor.fetchall()]
+
+
+def test_codec_compresses_long_values_only():
+    codec = ColumnCodec(enabled=True, min_bytes=64)
+    text = synthetic_transcript(4000, seed=1)
+    encoded = codec.encode("transcripts", "transcript", text)
+    assert isinstance(encoded, bytes) and len(encoded) < len(text)
+    assert codec.decode(encoded) == text
+    assert codec.encode("transcripts", "transcript", "short") == "short"
+    assert codec.decode("plain text row") == "plain text row"
+    assert ColumnCodec(enabled=False).encode("transcripts", "transcript", text) == text
+
+
+@pytest.mark.asyncio
+async def test_new_rows_are_compressed_and_legacy_rows_stay_readable(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    await run_migrations(db_path)
+    transcript = synthetic_transcript(3000, seed=2)
+
+    legacy = DatabaseManager(db_path, ColumnCodec(enabled=False))
+    await legacy.save_meeting("old", "Old")
+    await legacy.save_meeting_transcript("old", transcript, "00:00")
+
+    db = DatabaseManager(db_path, ColumnCodec(enabled=True))
+    await db.save_meeting("new", "New")
+    await db.save_meeting_transcript("new", transcript, "00:00")
+    await db.create_process("new")
+    await db.save_transcript("new", transcript, "openai", "gpt-4o", 5000, 1000)
+    await db.update_process("new", "COMPLETED", result={"summary": transcript[:500]})
+
+    rows = await stored(db_path, "transcripts", "transcript")
+    assert [type(value) for value in rows] == [str, bytes]
+    assert isinstance((await stored(db_path, "transcript_chunks", "transcript_text"))[0], bytes)
+
+    for meeting_id in ("old", "new"):
+        assert (await db.get_meeting(meeting_id))["transcripts"][0]["text"] == transcript
+    data = await db.get_transcript_data("new")
+    assert data["transcript_text"] == transcript
+    assert json.loads(data["result"]) == {"summary": transcript[:500]}
+
+
+@pytest.mark.asyncio
+async def test_recompress_trains_dictionaries_and_shrinks_rows(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    await run_migrations(db_path)
+    legacy = DatabaseManager(db_path, ColumnCodec(enabled=False))
+    texts = {}
+    for index in range(60):
+        meeting_id = f"m{index}"
+        texts[meeting_id] = synthetic_transcript(600, seed=index)
+        await legacy.save_meeting(meeting_id, meeting_id)
+        await legacy.save_meeting_transcript(meeting_id, texts[meeting_id], "00:00")
+
+    reader = DatabaseManager(db_path, ColumnCodec(enabled=True))
+    assert (await reader.get_meeting("m0"))["transcripts"][0]["text"] == texts["m0"]
+
+    report = await recompress(db_path, batch_size=7, dict_size=8 * 1024, columns=(("transcripts", "transcript"),))
+    stats = report[0]
+    assert stats["rows"] == 60 and stats["dict_id"]
+    assert stats["bytes_after"] < stats["bytes_before"] / 2
+    assert all(isinstance(value, bytes) for value in await stored(db_path, "transcripts", "transcript"))
+
+    # ``reader`` loaded the (empty) dictionary table before the dictionary
+    # was trained and picks it up on the first row that needs it
+    for meeting_id, text in texts.items():
+        assert (await reader.get_meeting(meeting_id))["transcripts"][0]["text"] == text
+
+    # Running again is a no-op for rows already compressed with the active dictionary
+    again = await recompress(db_path, train=False, columns=(("transcripts", "transcript"),))
+    assert again[0]["bytes_after"] == stats["bytes_after"]
+
+
+def test_unknown_dictionary_is_reported():
+    trainer = ColumnCodec(enabled=True, min_bytes=0)
+    samples = [synthetic_transcript(600, seed=seed) for seed in range(60)]
+    trainer.load_dictionaries([("transcripts", "transcript", train_dictionary(samples, 8 * 1024))])
+    encoded = trainer.encode("transcripts", "transcript", samples[0])
+    with pytest.raises(UnknownDictionary):
+        ColumnCodec(enabled=True).decode(encoded)
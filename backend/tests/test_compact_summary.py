@@ -0,0 +1,49 @@
+import json
+
+from app.transcript_processor import Block, Section, SummaryResponse
+from compact_summary import CompactBlock, CompactSummary
+
+
+def _response(meeting_name, content):
+    def section(title, blocks=()):
+        return Section(title=title, blocks=list(blocks))
+
+    return SummaryResponse(
+        MeetingName=meeting_name,
+        SectionSummary=section("Section Summary", [Block(id="1", type="bullet", content=content, color="default")]),
+        CriticalDeadlines=section("Critical Deadlines"),
+        KeyItemsDecisions=section("Key Items & Decisions"),
+        ImmediateActionItems=section("Immediate Action Items"),
+        NextSteps=section("Next Steps"),
+        OtherImportantPoints=section("Other Important Points"),
+        ClosingRemarks=section("Closing Remarks"),
+    )
+
+
+def test_compact_summary_round_trips_validated_results():
+    response = _response("Weekly sync", "Ship the release")
+    from_model = CompactSummary.from_response(response)
+    from_json = CompactSummary.from_json(response.model_dump_json())
+    assert from_model == from_json
+    assert from_model.as_dict() == response.model_dump()
+    assert json.loads(from_model.to_json()) == response.model_dump()
+
+    # Values repeated across blocks are stored once
+    other = CompactSummary.from_json(_response("", "Review the budget").model_dump_json())
+    first, second = from_json.sections["SectionSummary"].blocks[0], other.sections["SectionSummary"].blocks[0]
+    assert first.color is second.color and first.type is second.type
+    assert not hasattr(first, "__dict__")
+
+    from_json.extend(other)
+    assert from_json.meeting_name == "Weekly sync" and from_json.block_count() == 2
+
+
+def test_compact_summary_skips_malformed_sections():
+    summary = CompactSummary.from_dict({
+        "MeetingName": "M",
+        "NextSteps": {"title": "Next", "blocks": [{"id": "1", "content": "Ship"}, "not a block"]},
+        "ClosingRemarks": {"title": "Closing", "blocks": "none"},
+    })
+    assert summary.sections["NextSteps"].blocks == [CompactBlock("1", "", "Ship", "")]
+    assert summary.as_dict()["ClosingRemarks"] == {"title": "Closing Remarks", "blocks": []}
+    assert list(summary.as_dict())[1:] == list(CompactSummary().sections)
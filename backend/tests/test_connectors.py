@@ -1,12 +1,21 @@
+import asyncio
 import json
 import os
 import sys
+import time
 from unittest import mock
 
+import pytest
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.integrations.zoom import ZoomConnector
 from app.integrations.google import GoogleMeetConnector
+from app.integrations import http
+from app.integrations.http import create_http_client
+from app.integrations.tokens import OAuthToken, TokenStore
+from app.state_store import MemoryStateStore
+from oauth_stub import OAuthStubServer
 
 
 def _fake_response(payload):
@@ -44,3 +53,99 @@ def test_zoom_disabled(monkeypatch):
             assert True
         else:
             assert False
+
+
+@pytest.fixture
+def oauth_stub():
+    with OAuthStubServer() as server:
+        yield server
+
+
+def _stub_connector(cls, stub, **kwargs):
+    connector = cls("id", "secret", "http://localhost", **kwargs)
+    connector.token_url = f"{stub.url}/oauth/token"
+    connector.api_base_url = stub.url
+    return connector
+
+
+@pytest.mark.asyncio
+async def test_async_join_reuses_cached_token_and_connections(monkeypatch, oauth_stub):
+    monkeypatch.setenv("FEATURE_ZOOM", "true")
+    async with create_http_client() as client:
+        connector = _stub_connector(ZoomConnector, oauth_stub, http_client=client)
+        await connector.authorize_async("code", "alice")
+        for index in range(20):
+            assert await connector.join_meeting_async(str(index), account="alice") == {"joined": True}
+
+    assert oauth_stub.grants == ["authorization_code"]
+    assert {token for _, token in oauth_stub.joins} == {"access-1"}
+    assert oauth_stub.joins[0][0] == "/meetings/0/join"
+    # 21 requests over one pooled keep-alive connection
+    assert len(oauth_stub.connections) == 1
+
+
+def test_shared_client_is_made_per_event_loop_and_closed(monkeypatch, oauth_stub):
+    monkeypatch.setenv("FEATURE_ZOOM", "true")
+    connector = _stub_connector(ZoomConnector, oauth_stub)
+
+    async def join(close):
+        client = connector.http_client
+        await connector.authorize_async("code", "carol")
+        assert await connector.join_meeting_async("1", account="carol") == {"joined": True}
+        assert connector.http_client is client
+        if close:
+            await http.close_http_client()
+        return client
+
+    # The first loop's client is left open, as by an app that was not shut down
+    first = asyncio.run(join(close=False))
+    second = asyncio.run(join(close=True))
+    assert second is not first
+    assert second.is_closed
+    assert http._client is None
+
+
+@pytest.mark.asyncio
+async def test_expiring_token_is_refreshed_once_for_concurrent_joins(monkeypatch, oauth_stub):
+    monkeypatch.setenv("FEATURE_GOOGLE_MEET", "true")
+    oauth_stub.token_delay = 0.1
+    store = TokenStore(refresh_margin=60)
+    async with create_http_client() as client:
+        connector = _stub_connector(GoogleMeetConnector, oauth_stub, token_store=store, http_client=client)
+        await connector.authorize_async("code", "bob")
+        token = await store.get("google_meet:bob")
+        # Expires inside the refresh margin but has not lapsed yet
+        token.expires_at = time.time() + 30
+
+        results = await asyncio.gather(*(connector.join_meeting_async(f"m{i}", account="bob") for i in range(10)))
+        assert results == [{"joined": True}] * 10
+        assert oauth_stub.grants == ["authorization_code", "refresh_token"]
+        assert store.refreshes == 1
+        assert {token for _, token in oauth_stub.joins} == {"access-2"}
+        assert (await store.get("google_meet:bob")).refresh_token == "refresh-2"
+
+        # A token the provider rejects is refreshed and the join retried
+        oauth_stub.revoke("access-2")
+        assert await connector.join_meeting_async("m-retry", account="bob") == {"joined": True}
+        assert oauth_stub.joins[-1] == ("/meetings/m-retry:join", "access-3")
+
+        with pytest.raises(LookupError):
+            await connector.join_meeting_async("m1", account="nobody")
+
+
+@pytest.mark.asyncio
+async def test_token_store_shares_tokens_through_state_store():
+    state = MemoryStateStore()
+    refreshed = []
+
+    async def refresh(token):
+        refreshed.append(token.refresh_token)
+        return OAuthToken.from_response({"access_token": "new", "expires_in": 3600}, previous=token)
+
+    worker_a, worker_b = TokenStore(state), TokenStore(state)
+    await worker_a.set("zoom:carol", OAuthToken("old", "r1", expires_at=time.time() + 10))
+    assert (await worker_b.get_token("zoom:carol", refresh)).access_token == "new"
+    # The other worker sees the refreshed token and does not refresh again
+    assert (await worker_a.get_token("zoom:carol", refresh)).access_token == "new"
+    assert refreshed == ["r1"]
+    assert (await worker_a.get("zoom:carol")).refresh_token == "r1"
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.cpu_pool import CPUPool, put_shared_text, read_shared_text
+from app.summary_merge import merge_chunk_summaries
+from app.transcript_compaction import prepare_chunks
+
+# Maximum acceptable event-loop stall while a large merge runs in the pool
+MAX_LOOP_LAG = 0.1
+
+
+def _big_chunks(count=600, blocks=40):
+    chunks = []
+    for c in range(count):
+        data = {"MeetingName": "Big Meeting"}
+        data["KeyItemsDecisions"] = {
+            "title": "Key Items & Decisions",
+            "blocks": [
+                {"id": f"{c}-{b}", "type": "bullet", "color": "gray",
+                 "content": f"Decision {c * blocks + b}: team {b % 7} owns workstream {c} item {b} " * 3}
+                for b in range(blocks)
+            ],
+        }
+        chunks.append(json.dumps(data))
+    return chunks
+
+
+async def _measure_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - expected)
+    return worst
+
+
+def test_shared_text_round_trip():
+    shm, ref = put_shared_text("héllo wörld")
+    try:
+        assert read_shared_text(ref) == "héllo wörld"
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@pytest.mark.asyncio
+async def test_small_inputs_stay_inline():
+    pool = CPUPool(max_workers=1)
+    source, chunks = await pool.prepare_chunks("hello world", 10, 0, compact=False)
+    assert chunks == ["hello worl", "d"]
+    assert not pool.started
+
+
+def test_pool_restarts_under_another_event_loop():
+    pool = CPUPool(max_workers=1)
+
+    async def start_twice():
+        # Concurrent starts wait on the start lock, which binds it to the running loop
+        await asyncio.gather(pool.start(), pool.start())
+        assert pool.started
+        pool.shutdown()
+
+    try:
+        asyncio.run(start_twice())
+        asyncio.run(start_twice())
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_offloaded_results_match_inline():
+    pool = CPUPool(max_workers=1, min_offload_chars=1)
+    try:
+        text = "Speaker 1: um, so so the plan is to ship\n" * 500
+        source, chunks = await pool.prepare_chunks(text, 1000, 200, compact=True)
+        expected_source, spans = prepare_chunks(text, 1000, 200, compact=True)
+        assert source == expected_source
+        assert chunks == [expected_source[s:e] for s, e in spans]
+
+        data = _big_chunks(count=5, blocks=3)
+        stats = {}
+        name, summary_json = await pool.merge_summaries(data, label="p1", stats=stats)
+        assert name == "Big Meeting"
+        assert json.loads(summary_json) == merge_chunk_summaries(data)
+        assert stats["dedup"]["blocks_before"] == 15
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_stays_low_during_big_merge():
+    data = _big_chunks()
+    pool = CPUPool(max_workers=2)
+    try:
+        await pool.start()
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_measure_lag(stop))
+        started = time.perf_counter()
+        name, summary_json = await pool.merge_summaries(data, label="big")
+        elapsed = time.perf_counter() - started
+        stop.set()
+        worst_lag = await lag_task
+    finally:
+        pool.shutdown()
+
+    assert name == "Big Meeting"
+    # The merge itself takes far longer than the allowed stall
+    assert elapsed > MAX_LOOP_LAG
+    assert worst_lag < MAX_LOOP_LAG
@@ -1,6 +1,6 @@
 import pytest
 
-from app.db import DatabaseManager
+from app.db import DB_BULK_BUSY_TIMEOUT, DatabaseManager
 from migrations import run_migrations
 
 @pytest.mark.asyncio
@@ -19,3 +19,123 @@ async def test_meeting_crud(tmp_path):
 
     await db.delete_meeting("m1")
     assert await db.get_meeting("m1") is None
+
+
+@pytest.mark.asyncio
+async def test_settings_are_cached_and_invalidated_across_managers(tmp_path):
+    import aiosqlite
+
+    db_path = str(tmp_path / "test.db")
+    await run_migrations(db_path)
+    first, second = DatabaseManager(db_path), DatabaseManager(db_path)
+    second.settings_cache_ttl = 0
+
+    await first.save_model_config("openai", "gpt-4o", "base")
+    await first.save_api_key("sk-1", "openai")
+    assert await first.get_model_config() == {"provider": "openai", "model": "gpt-4o", "whisperModel": "base"}
+    assert await second.get_api_key("openai") == "sk-1"
+
+    # A change that does not bump the version is not seen: reads come from memory
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.execute("UPDATE settings SET openaiApiKey = 'sk-raw' WHERE id = '1'")
+        await conn.commit()
+    assert await first.get_api_key("openai") == "sk-1"
+    assert await second.get_api_key("openai") == "sk-1"
+
+    # Writes through one manager reach the other on its next version check
+    await first.save_api_key("sk-2", "openai")
+    assert await first.get_api_key("openai") == "sk-2"
+    assert await second.get_api_key("openai") == "sk-2"
+    await second.delete_api_key("openai")
+    assert await second.get_api_key("openai") is None
+    first.settings_cache_ttl = 0
+    assert await first.get_api_key("openai") is None
+
+    with pytest.raises(ValueError):
+        await first.get_api_key("unknown")
+
+
+@pytest.mark.asyncio
+async def test_settings_writes_are_seen_at_once_by_other_managers_of_the_file(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    await run_migrations(db_path)
+    first, second = DatabaseManager(db_path), DatabaseManager(str(tmp_path / "." / "test.db"))
+    other = DatabaseManager(str(tmp_path / "other.db"))
+    await run_migrations(other.db_path)
+
+    await first.save_model_config("openai", "gpt-4o", "base")
+    await other.save_model_config("claude", "claude-3-5-sonnet-latest", "base")
+    assert (await second.get_model_config())["model"] == "gpt-4o"
+
+    # Well within the cache TTL, the second manager still sees the new values
+    await first.save_model_config("openai", "gpt-4o-mini", "base")
+    await first.save_api_key("sk-1", "openai")
+    assert (await second.get_model_config())["model"] == "gpt-4o-mini"
+    assert await second.get_api_key("openai") == "sk-1"
+    assert (await other.get_model_config())["provider"] == "claude"
+
+
+class TracingDatabaseManager(DatabaseManager):
+    """Records the SQL statements run on its connections"""
+
+    def __init__(self, db_path, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.statements = []
+
+    def _get_connection(self):
+        manager = super()._get_connection()
+
+        class Traced:
+            async def __aenter__(inner):
+                conn = await manager.__aenter__()
+                await conn.set_trace_callback(self.statements.append)
+                return conn
+
+            async def __aexit__(inner, *exc):
+                return await manager.__aexit__(*exc)
+
+        return Traced()
+
+    def queries(self):
+        statements = [s for s in self.statements if s.split()[0].upper() in ("SELECT", "INSERT", "UPDATE")]
+        self.statements.clear()
+        return statements
+
+
+@pytest.mark.asyncio
+async def test_parallel_writers_upsert_without_lost_or_failed_writes(tmp_path):
+    import asyncio
+
+    db_path = str(tmp_path / "test.db")
+    await run_migrations(db_path)
+    # A burst of writers, each waiting its turn for the write lock
+    db = TracingDatabaseManager(db_path, busy_timeout=DB_BULK_BUSY_TIMEOUT)
+
+    # 300 writers race to create or reset the processes and transcripts of 30 meetings
+    async def write(index):
+        meeting_id = f"m{index % 30}"
+        await db.create_process(meeting_id)
+        await db.save_transcript(meeting_id, f"text {index}", "openai", "gpt-4o", 1000, 100)
+        await db.update_process(meeting_id, "COMPLETED", result={"writer": index})
+
+    results = await asyncio.gather(*(write(i) for i in range(300)), return_exceptions=True)
+    assert [r for r in results if isinstance(r, Exception)] == []
+    for m in range(30):
+        data = await db.get_transcript_data(f"m{m}")
+        assert data["status"] == "COMPLETED"
+        assert data["transcript_text"].startswith("text ")
+        assert int(data["transcript_text"].split()[1]) % 30 == m
+
+    # Of many requests saving one meeting, exactly one creates it
+    saved = await asyncio.gather(*(db.save_meeting("shared", "Shared") for _ in range(100)), return_exceptions=True)
+    assert saved.count(True) == 1
+    assert (await db.get_meeting("shared"))["title"] == "Shared"
+
+    # Each upsert is a single statement whether it inserts or updates
+    db.queries()
+    for _ in range(2):
+        await db.create_process("new")
+        await db.save_transcript("new", "text", "openai", "gpt-4o", 1000, 100)
+        await db.save_model_config("openai", "gpt-4o", "base")
+        queries = db.queries()
+        assert len(queries) == 4, queries
@@ -0,0 +1,15 @@
+import pytest
+
+from app.transcript_processor import load_model_class
+from benchmarks.importtime import DEFAULT_BUDGET_MS, check, measure
+
+
+def test_import_main_stays_lazy_and_within_budget():
+    report = measure("main", runs=1)
+    assert check(report, DEFAULT_BUDGET_MS) == []
+
+
+def test_provider_models_load_on_first_use():
+    assert load_model_class("ollama").__name__ == "StructuredOllamaModel"
+    with pytest.raises(ValueError):
+        load_model_class("unknown")
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+
+import app.instrumentation as instrumentation
+from app.instrumentation import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.inc("jobs_total", help_text="Jobs run", kind="summary")
+    metrics.observe("job_seconds", 0.5, help_text="Job time", kind="summary")
+
+    text = metrics.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="summary"} 1' in text
+    assert 'job_seconds_bucket{kind="summary",le="0.1"} 0' in text
+    assert 'job_seconds_bucket{kind="summary",le="1.0"} 1' in text
+    assert 'job_seconds_bucket{kind="summary",le="+Inf"} 1' in text
+    assert 'job_seconds_count{kind="summary"} 1' in text
+
+
+@pytest.fixture
+def instrumented_app(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_active", False)
+    monkeypatch.setattr(instrumentation, "monitor", None)
+    monkeypatch.setattr(instrumentation, "EXPOSE_METRICS", True)
+    monkeypatch.setattr(instrumentation, "EXPOSE_DEBUG_ENDPOINTS", True)
+    instrumentation.registry.reset()
+    app = FastAPI()
+    instrumentation.install(app)
+    instrumentation.monitor.interval = 0.02
+    instrumentation.monitor.threshold = 0.1
+
+    @app.get("/blocking/{item_id}")
+    async def blocking(item_id: str):
+        with instrumentation.timed("db"):
+            time.sleep(0.3)
+        return {"item": item_id}
+
+    @app.post("/jobs")
+    async def job(background_tasks: BackgroundTasks):
+        def work():
+            with instrumentation.timed("summarize"):
+                time.sleep(0.3)
+
+        background_tasks.add_task(work)
+        return {"queued": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    yield app
+    instrumentation.registry.reset()
+
+
+def test_blocking_endpoint_is_reported_with_stack(instrumented_app):
+    with TestClient(instrumented_app) as client:
+        response = client.get("/blocking/1")
+        assert response.status_code == 200
+        assert response.headers["server-timing"].startswith("db;dur=")
+
+        # Let the loop tick again so the watchdog closes the stall
+        time.sleep(0.2)
+        client.get("/fast")
+        slow = client.get("/debug/slow-callbacks").json()
+        metrics = client.get("/metrics").text
+
+    assert slow, "blocking call was not detected"
+    assert any("time.sleep(0.3)" in line for line in slow[0]["stack"])
+    assert slow[0]["duration"] >= 0.1
+    assert "event_loop_slow_callbacks_total" in metrics
+    assert 'http_request_duration_seconds_count{method="GET",route="/blocking/{item_id}",status="200"} 1' in metrics
+    assert 'http_request_phase_seconds_count{phase="db",route="/blocking/{item_id}"} 1' in metrics
+    assert "event_loop_lag_seconds_count" in metrics
+
+
+def test_background_tasks_are_timed_apart_from_the_request(instrumented_app):
+    with TestClient(instrumented_app) as client:
+        assert client.post("/jobs").status_code == 200
+
+    request = instrumentation.registry.histogram_sum(
+        "http_request_duration_seconds", method="POST", route="/jobs", status="200")
+    assert request < 0.25
+    assert instrumentation.registry.histogram_sum("http_background_seconds", route="/jobs") >= 0.3
+    assert instrumentation.registry.histogram_count(
+        "http_background_phase_seconds", route="/jobs", phase="summarize") == 1
+    assert instrumentation.registry.histogram_count(
+        "http_request_phase_seconds", route="/jobs", phase="summarize") == 0
+
+
+def test_timed_is_inert_when_not_installed(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_active", False)
+    instrumentation.registry.reset()
+    with instrumentation.timed("db"):
+        pass
+    assert instrumentation.registry.histogram_count("app_phase_duration_seconds", phase="db") == 0
+
+
+def test_endpoints_are_not_mounted_unless_exposed(instrumented_app, monkeypatch):
+    monkeypatch.setattr(instrumentation, "EXPOSE_METRICS", False)
+    monkeypatch.setattr(instrumentation, "EXPOSE_DEBUG_ENDPOINTS", False)
+    app = FastAPI()
+    instrumentation.install(app)
+
+    @app.get("/fast")
+    async def fast():
+        with instrumentation.timed("db"):
+            pass
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        # Timing still works without the endpoints
+        assert client.get("/fast").headers["server-timing"].startswith("db;dur=")
+        assert client.get("/metrics").status_code == 404
+        assert client.get("/debug/slow-callbacks").status_code == 404
@@ -0,0 +1,33 @@
+import pytest
+
+import app.main as main
+from benchmarks.loadtest import LoadTestConfig, format_report, run_loadtest
+
+FLOW_ENDPOINTS = {
+    "POST /token",
+    "POST /meetings",
+    "POST /meetings/{meeting_id}/summary",
+    "GET /get-meetings",
+    "POST /refresh",
+    "flow: summary",
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["poll", "stream"])
+async def test_loadtest_runs_all_flows(mode):
+    config = LoadTestConfig(users=3, iterations=2, segments=5, segment_chars=300, mode=mode,
+                            latency="fixed:0.01", poll_interval=0.01, chunk_size=500, overlap=100)
+    report = await run_loadtest(main.app, config)
+
+    endpoints = report["endpoints"]
+    follow = "GET /meetings/{meeting_id}/summary/stream" if mode == "stream" else "GET /meetings/{meeting_id}/summary"
+    assert FLOW_ENDPOINTS | {follow} <= set(endpoints)
+    assert endpoints["POST /token"]["requests"] == 3
+    assert endpoints["flow: summary"]["requests"] == 6
+    assert all(stats["errors"] == 0 for stats in endpoints.values()), endpoints
+    assert report["llm_calls"] > 6
+    # Triggering a summary must not wait for the summary itself
+    assert (endpoints["POST /meetings/{meeting_id}/summary"]["latency"]["p50"]
+            < endpoints["flow: summary"]["latency"]["p50"])
+    assert "p99 ms" in format_report(report)
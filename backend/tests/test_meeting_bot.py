@@ -1,9 +1,15 @@
 from unittest import mock
+import asyncio
 import os
+import random
 import sys
+import time
+
+import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from app.audio_stream import AudioFrame, FrameRingBuffer, iter_frames
 from app.meeting_bot import MeetingBot
 
 
@@ -15,3 +21,126 @@ def test_meeting_bot_flow(monkeypatch):
     connector.join_meeting.assert_called_once_with("123", "token")
     transcriber.assert_called_once()
     assert result == "transcript"
+
+
+SAMPLE_RATE = 1000  # small frames keep the test fast; the pipeline is rate agnostic
+
+
+async def live_source(seconds, block_seconds=0.1, speedup=10, stats=None):
+    """Yield 16-bit PCM blocks paced like a live capture running ``speedup`` times faster."""
+    block = bytes(int(SAMPLE_RATE * block_seconds) * 2)
+    for _ in range(int(seconds / block_seconds)):
+        await asyncio.sleep(block_seconds / speedup)
+        yield block
+    if stats is not None:
+        stats["ended_at"] = time.monotonic()
+
+
+class StoredTranscripts:
+    def __init__(self):
+        self.rows = []
+
+    async def save_meeting_transcript(self, meeting_id, transcript, timestamp, **kwargs):
+        self.rows.append((meeting_id, transcript, timestamp, time.monotonic()))
+
+
+@pytest.mark.asyncio
+async def test_iter_frames_cuts_fixed_durations():
+    async def source():
+        for size in (300, 1700, 5, 995):
+            yield bytes(size)
+
+    frames = [frame async for frame in iter_frames(source(), frame_seconds=0.5, sample_rate=SAMPLE_RATE)]
+    assert [len(frame.data) for frame in frames] == [1000, 1000, 1000]
+    assert [frame.start for frame in frames] == [0.0, 0.5, 1.0]
+    assert frames[0].to_wav().startswith(b"RIFF")
+
+
+@pytest.mark.asyncio
+async def test_ring_buffer_drops_oldest_when_full():
+    buffer = FrameRingBuffer(capacity=2)
+    for index in range(5):
+        buffer.put_nowait(AudioFrame(index=index, start=index, duration=1, data=b""))
+    buffer.close()
+    assert [frame.index async for frame in buffer] == [3, 4]
+    assert buffer.dropped == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_and_transcribe_stores_segments_while_recording():
+    rng = random.Random(0)
+
+    async def transcribe(frame):
+        await asyncio.sleep(rng.uniform(0.01, 0.08))
+        return f"frame {frame.index}"
+
+    db = StoredTranscripts()
+    source_stats = {}
+    bot = MeetingBot(mock.MagicMock(), transcriber=None, frame_transcriber=transcribe, db=db)
+    result = await bot.stream_and_transcribe(
+        "m1", "token", live_source(6, stats=source_stats),
+        frame_seconds=0.5, sample_rate=SAMPLE_RATE, concurrency=3,
+    )
+
+    bot.connector.join_meeting.assert_called_once_with("m1", "token")
+    assert result.frames == 12 and result.dropped_frames == 0 and result.failed_frames == 0
+    assert [row[1] for row in db.rows] == [f"frame {i}" for i in range(12)]
+    assert db.rows[1][2] == "00:00:00.500"
+    # Text was stored while the meeting was still being recorded
+    assert db.rows[0][3] < source_stats["ended_at"]
+    assert result.max_latency < 0.5
+
+
+class FlakyTranscripts(StoredTranscripts):
+    async def save_meeting_transcript(self, meeting_id, transcript, timestamp, **kwargs):
+        if transcript == "frame 1":
+            raise RuntimeError("database is locked")
+        await super().save_meeting_transcript(meeting_id, transcript, timestamp, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_stream_and_transcribe_keeps_going_when_a_segment_cannot_be_stored():
+    async def transcribe(frame):
+        return f"frame {frame.index}"
+
+    db = FlakyTranscripts()
+    bot = MeetingBot(mock.MagicMock(), transcriber=None, frame_transcriber=transcribe, db=db)
+    result = await bot.stream_and_transcribe(
+        "m1", "token", live_source(2), frame_seconds=0.5, sample_rate=SAMPLE_RATE
+    )
+    assert result.failed_segments == 1 and result.failed_frames == 0
+    assert [row[1] for row in db.rows] == ["frame 0", "frame 2", "frame 3"]
+    assert result.text == "frame 0 frame 1 frame 2 frame 3"
+
+
+@pytest.mark.asyncio
+async def test_stream_and_transcribe_waits_for_cancelled_frames_when_the_source_fails():
+    async def transcribe(frame):
+        await asyncio.sleep(10)
+        return f"frame {frame.index}"
+
+    async def failing_source():
+        yield bytes(SAMPLE_RATE)
+        raise ConnectionError("capture lost")
+
+    bot = MeetingBot(mock.MagicMock(), transcriber=None, frame_transcriber=transcribe)
+    with pytest.raises(ConnectionError):
+        await bot.stream_and_transcribe("m1", "token", failing_source(), frame_seconds=0.5,
+                                        sample_rate=SAMPLE_RATE)
+    # The frame transcriptions were cancelled and awaited, not left running
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_stream_and_transcribe_keeps_going_when_a_frame_fails():
+    def transcribe(frame):
+        if frame.index == 1:
+            raise RuntimeError("whisper unavailable")
+        return "" if frame.index == 2 else f"frame {frame.index}"
+
+    bot = MeetingBot(mock.MagicMock(), transcriber=None, frame_transcriber=transcribe)
+    result = await bot.stream_and_transcribe(
+        "m1", "token", live_source(2), frame_seconds=0.5, sample_rate=SAMPLE_RATE
+    )
+    assert result.failed_frames == 1
+    assert result.text == "frame 0 frame 3"
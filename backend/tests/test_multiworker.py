@@ -0,0 +1,174 @@
+import asyncio
+import os
+import pathlib
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from app.db import DatabaseManager
+from app.routers.meetings import WORKER_STOPPED_ERROR, summary_lease_name
+from app.state_store import MemoryStateStore, SQLiteStateStore
+from migrations import run_migrations
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store_factory(request, tmp_path):
+    if request.param == "memory":
+        shared = MemoryStateStore()
+        return lambda: shared
+    db_path = str(tmp_path / "state.db")
+    asyncio.run(run_migrations(db_path))
+    # Separate instances stand in for separate workers
+    return lambda: SQLiteStateStore(db_path)
+
+
+@pytest.mark.asyncio
+async def test_lease_has_one_owner_until_released_or_expired(store_factory):
+    first, second = store_factory(), store_factory()
+
+    assert await first.acquire_lease("job", "worker-a", ttl=30)
+    assert not await second.acquire_lease("job", "worker-b", ttl=30)
+    assert await first.acquire_lease("job", "worker-a", ttl=30)
+    assert (await second.get_lease("job")).owner == "worker-a"
+    assert not await second.renew_lease("job", "worker-b", ttl=30)
+
+    await second.release_lease("job", "worker-b")
+    assert (await first.get_lease("job")).owner == "worker-a"
+    await first.release_lease("job", "worker-a")
+    assert await second.get_lease("job") is None
+
+    assert await first.acquire_lease("job", "worker-a", ttl=0.05)
+    await asyncio.sleep(0.1)
+    assert (await second.get_lease("job")).expired
+    assert await second.acquire_lease("job", "worker-b", ttl=30)
+    assert not await first.renew_lease("job", "worker-a", ttl=30)
+
+
+@pytest.mark.asyncio
+async def test_values_are_shared_and_expire(store_factory):
+    first, second = store_factory(), store_factory()
+
+    await first.set("results", "task-1", {"summary": "done"})
+    assert await second.get("results", "task-1") == {"summary": "done"}
+    await second.delete("results", "task-1")
+    assert await first.get("results", "task-1", "missing") == "missing"
+
+    await first.set("results", "task-2", [1, 2], ttl=0.05)
+    await asyncio.sleep(0.1)
+    assert await second.get("results", "task-2") is None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> set:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return {int(child) for child in f.read().split()}
+
+
+def _wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except (httpx.HTTPError, OSError):
+            pass
+        time.sleep(0.1)
+    raise AssertionError("timed out waiting for the server")
+
+
+@pytest.fixture
+def two_workers(tmp_path):
+    if not os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children"):
+        pytest.skip("needs /proc to find the worker processes")
+    db_path = str(tmp_path / "shared.db")
+    port = _free_port()
+    env = dict(os.environ, PRELOAD_MODEL_PROVIDER="false", CPU_POOL_WORKERS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.cli", "serve", "--db", db_path, "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "2", "--graceful-timeout", "5"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for(lambda: len(_children(server.pid)) >= 2)
+        _wait_for(lambda: httpx.get(f"{base_url}/meetings/none").status_code == 404)
+        yield server, base_url, db_path
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    # A fresh connection each time, so requests are spread over both workers
+    return httpx.request(method, url, headers={"Connection": "close"}, timeout=10, **kwargs)
+
+
+def _pending_job(database: DatabaseManager, meeting_id: str) -> None:
+    asyncio.run(database.create_process(meeting_id))
+    asyncio.run(database.save_transcript(meeting_id, "hello", "openai", "gpt", 5000, 1000))
+
+
+def test_two_workers_share_job_ownership_and_progress(two_workers):
+    server, base_url, db_path = two_workers
+    database = DatabaseManager(db_path)
+    store = SQLiteStateStore(db_path)
+
+    meeting_id = _request("POST", f"{base_url}/meetings", json={"meeting_title": "Shared", "transcripts": []}).json()[
+        "meeting_id"
+    ]
+    # Another worker owns the summary job
+    asyncio.run(store.acquire_lease(summary_lease_name(meeting_id), "elsewhere:1", ttl=60))
+    _pending_job(database, meeting_id)
+
+    body = {"text": "hello", "model": "openai", "model_name": "gpt", "meeting_id": meeting_id}
+    for _ in range(6):
+        response = _request("POST", f"{base_url}/meetings/{meeting_id}/summary", json=body)
+        assert response.status_code == 409
+        assert _request("GET", f"{base_url}/meetings/{meeting_id}/summary").status_code == 202
+
+    # A stream served by either worker sees the job finish from the shared database
+    with httpx.stream("GET", f"{base_url}/meetings/{meeting_id}/summary/stream", timeout=10) as stream:
+        lines = stream.iter_lines()
+        assert next(lines) == "event: snapshot"
+        summary = {"MeetingName": "Shared", "SectionSummary": {"title": "Section Summary", "blocks": []}}
+        asyncio.run(database.update_process(meeting_id, status="completed", result=summary))
+        events = [line for line in lines if line.startswith("event: ")]
+    assert events == ["event: completed"]
+    assert _request("GET", f"{base_url}/meetings/{meeting_id}/summary").json()["meetingName"] == "Shared"
+
+
+def test_expired_lease_marks_job_failed_and_sighup_restarts_workers(two_workers):
+    server, base_url, db_path = two_workers
+    database = DatabaseManager(db_path)
+    store = SQLiteStateStore(db_path)
+
+    meeting_id = _request("POST", f"{base_url}/meetings", json={"meeting_title": "Orphan", "transcripts": []}).json()[
+        "meeting_id"
+    ]
+    _pending_job(database, meeting_id)
+    # The worker holding the lease died without releasing it
+    asyncio.run(store.acquire_lease(summary_lease_name(meeting_id), "gone:1", ttl=-1))
+
+    response = _request("GET", f"{base_url}/meetings/{meeting_id}/summary")
+    assert response.status_code == 400
+    assert response.json()["error"] == WORKER_STOPPED_ERROR
+
+    workers = _children(server.pid)
+    server.send_signal(signal.SIGHUP)
+    _wait_for(lambda: len(_children(server.pid) - workers) >= 2)
+    _wait_for(lambda: _request("GET", f"{base_url}/meetings/{meeting_id}/summary").status_code == 400)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import app.main as main_module
+import app.transcript_processor as tp_module
+from app.transcript_processor import TranscriptProcessor
+from benchmarks.fake_ollama import FakeOllama
+from instrumentation import registry
+from ollama_lifecycle import OllamaLifecycle, tagged_model_name
+
+TRANSCRIPT = "\n".join(f"[00:00:{i:02d}] Speaker {i % 2}: item {i} is due on monday" for i in range(60))
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    import ollama_structured
+
+    fake = FakeOllama(load_seconds=20.0)
+    monkeypatch.setattr(ollama_structured, "cached_async_http_client", lambda: fake.http_client())
+    monkeypatch.setattr(tp_module, "ollama_lifecycle", OllamaLifecycle(http_client=fake.http_client()))
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_startup_preloads_the_configured_ollama_model(test_db, fake, monkeypatch):
+    await test_db.save_model_config("ollama", "llama3.2", "base")
+    monkeypatch.setattr(main_module, "ollama_lifecycle", OllamaLifecycle(http_client=fake.http_client()))
+    loads_before = registry.histogram_count("ollama_model_load_seconds", model="llama3.2")
+
+    await main_module.preload_model_provider()
+
+    assert list(fake.loaded) == ["llama3.2:latest"] and fake.loads == 1
+    assert registry.histogram_count("ollama_model_load_seconds", model="llama3.2") == loads_before + 1
+
+
+@pytest.mark.asyncio
+async def test_load_time_is_reported_apart_from_generation(fake):
+    cold, warm = {}, {}
+    await TranscriptProcessor().process_transcript(TRANSCRIPT, "ollama", "llama3.2", chunk_size=800,
+                                                   overlap=100, job_stats=cold)
+    await TranscriptProcessor().process_transcript(TRANSCRIPT, "ollama", "llama3.2", chunk_size=800,
+                                                   overlap=100, job_stats=warm)
+
+    # Only the first chunk of the first job waited for the model to load
+    assert fake.loads == 1 and cold["generation"]["chunks"] > 1
+    assert cold["generation"]["load_seconds"] == 20.0
+    assert warm["generation"]["load_seconds"] == 0.0
+    assert warm["generation"]["generation_seconds"] > 0
+    assert all(request["keep_alive"] == "10m" for request in fake.requests)
+
+
+@pytest.mark.asyncio
+async def test_keep_alive_pings_while_jobs_are_held():
+    fake = FakeOllama()
+    lifecycle = OllamaLifecycle(http_client=fake.http_client(), keep_alive="0.3s", ping_interval=0.02)
+    lifecycle.hold("llama3.2")
+    async with lifecycle.job("llama3.2"):
+        # Queued jobs get the model loaded before they run, and keep it loaded
+        await asyncio.sleep(1.0)
+        assert list(fake.loaded) == ["llama3.2:latest"] and fake.loads == 1
+    assert lifecycle.jobs == {"llama3.2": 1}
+    await lifecycle.release("llama3.2")
+    assert lifecycle.jobs == {}
+
+    # Without jobs there are no more pings, and Ollama unloads the model after keep_alive
+    await asyncio.sleep(0.5)
+    assert await lifecycle.loaded_models() == []
+
+
+@pytest.mark.asyncio
+async def test_idle_models_are_unloaded_under_memory_pressure():
+    fake = FakeOllama()
+    free_memory = [8192.0]
+    lifecycle = OllamaLifecycle(http_client=fake.http_client(), ping_interval=60, min_free_memory_mb=1024,
+                                memory_probe=lambda: free_memory[0])
+    await lifecycle.preload("llama3.2")
+    await lifecycle.preload("mistral")
+
+    async with lifecycle.job("llama3.2"):
+        assert await lifecycle.relieve_memory_pressure() == []
+        free_memory[0] = 512.0
+        # The model a job is holding stays loaded
+        assert await lifecycle.relieve_memory_pressure() == ["mistral:latest"]
+        assert list(fake.loaded) == ["llama3.2:latest"]
+    assert fake.loaded == {}
+    assert registry.get("ollama_model_unloads_total", model="llama3.2:latest") >= 1
+
+
+@pytest.mark.asyncio
+async def test_models_held_without_a_tag_are_not_unloaded():
+    fake = FakeOllama()
+    free_memory = [512.0]
+    lifecycle = OllamaLifecycle(http_client=fake.http_client(), ping_interval=60, min_free_memory_mb=1024,
+                                memory_probe=lambda: free_memory[0])
+    await lifecycle.preload("llama3.2")
+    await lifecycle.preload("mistral:7b")
+    assert sorted(await lifecycle.loaded_models()) == ["llama3.2:latest", "mistral:7b"]
+
+    async with lifecycle.job("llama3.2"):
+        assert await lifecycle.relieve_memory_pressure() == ["mistral:7b"]
+        assert list(fake.loaded) == ["llama3.2:latest"]
+
+
+def test_tagged_model_name():
+    assert tagged_model_name("llama3.2") == "llama3.2:latest"
+    assert tagged_model_name("llama3.2:1b") == "llama3.2:1b"
+    assert tagged_model_name("registry.local:5000/team/model") == "registry.local:5000/team/model:latest"
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import app.transcript_processor as tp_module
+from app.transcript_processor import SummaryResponse, TranscriptProcessor
+from benchmarks.fake_ollama import MALFORMATIONS, FakeOllama, malform
+from benchmarks.fake_provider import sdk_httpx
+from generation_stats import model_stats
+from json_repair import fill_required, repair_json
+
+TRANSCRIPT = "\n".join(
+    f"[00:{i // 60:02d}:{i % 60:02d}] Speaker {i % 3}: we agreed that item {i} ships by friday" for i in range(120)
+)
+SUMMARY = json.dumps({
+    "MeetingName": "Planning",
+    **{key: {"title": key, "blocks": [{"id": "1", "type": "bullet", "content": "a, b", "color": "default"}]}
+       for key in ("SectionSummary", "CriticalDeadlines", "KeyItemsDecisions", "ImmediateActionItems",
+                   "NextSteps", "OtherImportantPoints", "ClosingRemarks")},
+})
+
+
+@pytest.mark.parametrize("kind", MALFORMATIONS)
+def test_repaired_outputs_validate(kind):
+    text = malform(SUMMARY, kind)
+    with pytest.raises(Exception):
+        SummaryResponse.model_validate_json(text)
+    data = fill_required(repair_json(text), SummaryResponse.model_json_schema())
+    SummaryResponse.model_validate(data)
+
+
+def test_repair_handles_literals_comments_and_newlines():
+    assert repair_json('{"a": True, // note\n "b": "x\ny", "c": [None,]}') == {"a": True, "b": "x\ny", "c": [None]}
+    with pytest.raises(ValueError):
+        repair_json("I could not summarize this chunk.")
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    import ollama_structured
+
+    fake = FakeOllama(malformed_rate=0.6, truncate_rate=0.3, seed=1)
+    monkeypatch.setattr(ollama_structured, "cached_async_http_client", lambda: fake.http_client())
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_schema_constrained_chunks_take_one_generation(ollama):
+    job_stats = {}
+    num_chunks, data = await TranscriptProcessor().process_transcript(
+        TRANSCRIPT, "ollama", "llama3.2", chunk_size=1500, overlap=200, job_stats=job_stats
+    )
+    assert num_chunks == len(data) > 2
+
+    generation = job_stats["generation"]
+    assert generation["generations_per_chunk"] == 1.0 and generation["retries"] == 0
+    # Outputs cut off at the token limit were repaired instead of generated again
+    assert generation["repaired"] == ollama.malformed > 0
+    assert model_stats["ollama:llama3.2"].chunks >= num_chunks
+
+    request = ollama.requests[0]
+    assert request["stream"] is False
+    assert request["format"]["required"][0] == "MeetingName"
+    assert "$ref" not in json.dumps(request["format"])
+
+
+@pytest.mark.asyncio
+async def test_unconstrained_tool_calls_cost_retries(monkeypatch):
+    import openai
+    import pydantic_ai.models.ollama
+
+    fake = FakeOllama(malformed_rate=0.6, seed=1)
+    monkeypatch.setitem(tp_module.PROVIDER_MODELS, "ollama", ("pydantic_ai.models.ollama", "OllamaModel"))
+    monkeypatch.setattr(pydantic_ai.models.ollama, "cached_async_http_client",
+                        lambda: fake.http_client(sdk_httpx(openai)))
+    job_stats = {}
+    await TranscriptProcessor().process_transcript(
+        TRANSCRIPT, "ollama", "llama3.2-tools", chunk_size=1500, overlap=200, job_stats=job_stats
+    )
+
+    generation = job_stats["generation"]
+    assert generation["generations_per_chunk"] > 1.2
+    assert generation["retries"] > 0 and generation["wasted_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_outputs_are_repaired_at_the_end(monkeypatch):
+    import ollama_structured
+
+    fake = FakeOllama(truncate_rate=1.0)
+    monkeypatch.setattr(ollama_structured, "cached_async_http_client", lambda: fake.http_client())
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    job_stats = {}
+    num_chunks, _ = await TranscriptProcessor().process_transcript(
+        TRANSCRIPT, "ollama", "llama3.2", chunk_size=1500, overlap=200, on_event=on_event, job_stats=job_stats
+    )
+    assert fake.requests[0]["stream"] is True
+    assert [event["chunk"] for event in events if event["type"] == "chunk_complete"] == list(range(num_chunks))
+    assert not [event for event in events if event["type"] == "chunk_reset"]
+    assert job_stats["generation"]["repaired"] == num_chunks
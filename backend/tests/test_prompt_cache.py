@@ -0,0 +1,117 @@
+import pytest
+
+from app.prompt_cache import PromptCacheStats
+from app.transcript_processor import SUMMARY_SYSTEM_PROMPT, TranscriptProcessor
+from benchmarks.fake_provider import RecordedProvider, sdk_httpx
+
+TRANSCRIPT = "\n".join(
+    f"[00:{i // 60:02d}:{i % 60:02d}] Speaker {i % 3}: we agreed that item {i} ships by friday" for i in range(120)
+)
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "test-key"
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    import anthropic
+    import openai
+    import pydantic_ai.models.anthropic
+    import pydantic_ai.models.openai
+
+    recorded = RecordedProvider(min_cacheable_tokens=256)
+    for module, sdk in ((pydantic_ai.models.anthropic, anthropic), (pydantic_ai.models.openai, openai)):
+        monkeypatch.setattr(module, "cached_async_http_client", lambda sdk=sdk: recorded.http_client(sdk_httpx(sdk)))
+    return recorded
+
+
+@pytest.mark.asyncio
+async def test_anthropic_requests_mark_the_static_prefix_and_report_cache_reads(provider):
+    job_stats = {}
+    num_chunks, data = await TranscriptProcessor(DummyDB()).process_transcript(
+        TRANSCRIPT, "claude", "claude-3-5-sonnet-latest", chunk_size=1500, overlap=200, job_stats=job_stats
+    )
+    assert num_chunks == len(data) == len(provider.requests) > 2
+
+    systems = [request["system"] for request in provider.requests]
+    assert all(system == systems[0] for system in systems)
+    assert systems[0] == [{"type": "text", "text": SUMMARY_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+    # The chunk is only in the user message, after the cached prefix
+    assert "Transcript Chunk:" in provider.requests[1]["messages"][0]["content"]
+    assert "Transcript Chunk:" not in systems[0][0]["text"]
+
+    cache = job_stats["prompt_cache"]
+    assert cache["requests"] == num_chunks
+    assert cache["cache_write_tokens"] > 0
+    assert cache["cached_tokens"] == cache["cache_write_tokens"] * (num_chunks - 1)
+    assert cache["hit_rate"] > 0.3
+
+
+@pytest.mark.asyncio
+async def test_streamed_anthropic_chunks_report_cache_reads(provider):
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    job_stats = {}
+    num_chunks, data = await TranscriptProcessor(DummyDB()).process_transcript(
+        TRANSCRIPT, "claude", "claude-3-5-sonnet-latest", chunk_size=1500, overlap=200,
+        on_event=on_event, job_stats=job_stats,
+    )
+    # Every chunk was streamed: none fell back to a plain request
+    assert len(provider.requests) == num_chunks > 2
+    assert all(request["stream"] for request in provider.requests)
+    assert [event["chunk"] for event in events if event["type"] == "chunk_complete"] == list(range(num_chunks))
+
+    cache = job_stats["prompt_cache"]
+    assert cache["requests"] == num_chunks
+    assert cache["cache_write_tokens"] > 0
+    assert cache["cached_tokens"] == cache["cache_write_tokens"] * (num_chunks - 1)
+    assert cache["output_tokens"] > num_chunks
+
+
+@pytest.mark.asyncio
+async def test_openai_cached_tokens_are_recorded_per_job(provider):
+    job_stats = {}
+    num_chunks, _ = await TranscriptProcessor(DummyDB()).process_transcript(
+        TRANSCRIPT, "openai", "gpt-4o", chunk_size=1500, overlap=200, job_stats=job_stats
+    )
+    assert provider.requests[0]["messages"][0] == {"role": "system", "content": SUMMARY_SYSTEM_PROMPT}
+
+    cache = job_stats["prompt_cache"]
+    assert cache["requests"] == num_chunks
+    assert cache["cached_tokens"] > 0 and cache["cached_tokens"] % 128 == 0
+    assert cache["cache_write_tokens"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_prefix_is_cheaper_and_faster_than_an_uncached_one(monkeypatch):
+    import time
+
+    import openai
+    import pydantic_ai.models.openai
+
+    results = {}
+    for name, min_cacheable in (("uncached", 10 ** 9), ("cached", 256)):
+        recorded = RecordedProvider(min_cacheable_tokens=min_cacheable, seconds_per_input_token=0.0001)
+        monkeypatch.setattr(pydantic_ai.models.openai, "cached_async_http_client",
+                            lambda recorded=recorded: recorded.http_client(sdk_httpx(openai)))
+        job_stats = {}
+        started = time.perf_counter()
+        await TranscriptProcessor(DummyDB()).process_transcript(
+            TRANSCRIPT, "openai", "gpt-4o", chunk_size=1500, overlap=200, job_stats=job_stats
+        )
+        results[name] = (time.perf_counter() - started, job_stats["prompt_cache"])
+
+    assert results["uncached"][1]["cached_tokens"] == 0
+    assert results["cached"][1]["input_tokens"] == results["uncached"][1]["input_tokens"]
+    assert results["cached"][0] < results["uncached"][0]
+
+
+def test_stats_ignore_results_without_usage():
+    stats = PromptCacheStats()
+    stats.add_result(object())
+    assert stats.as_dict()["requests"] == 0 and stats.hit_rate == 0.0
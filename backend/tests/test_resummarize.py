@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+import app.transcript_processor as tp_module
+from app.transcript_processor import Section, SummaryResponse
+from resummarize import ResummarizeCheckpoint, resummarize
+from state_store import state_store
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "key"
+
+
+class SlowAgent:
+    """Summarizes a chunk after ``delay`` seconds, tracking how many run at once per model."""
+
+    delay = 0.01
+    running = {}
+    peak = {}
+    models = []
+    fail = False
+
+    def __init__(self, llm, **kwargs):
+        self.model = llm.name()
+
+    async def run(self, prompt):
+        SlowAgent.models.append(self.model)
+        SlowAgent.running[self.model] = SlowAgent.running.get(self.model, 0) + 1
+        SlowAgent.peak[self.model] = max(SlowAgent.peak.get(self.model, 0), SlowAgent.running[self.model])
+        try:
+            await asyncio.sleep(SlowAgent.delay)
+        finally:
+            SlowAgent.running[self.model] -= 1
+        if SlowAgent.fail:
+            raise RuntimeError("provider unavailable")
+        empty = lambda title: Section(title=title, blocks=[])  # noqa: E731
+
+        class Result:
+            data = SummaryResponse(
+                MeetingName="Planning",
+                SectionSummary=empty("Section Summary"),
+                CriticalDeadlines=empty("Critical Deadlines"),
+                KeyItemsDecisions=empty("Key Items & Decisions"),
+                ImmediateActionItems=empty("Immediate Action Items"),
+                NextSteps=empty("Next Steps"),
+                OtherImportantPoints=empty("Other Important Points"),
+                ClosingRemarks=empty("Closing Remarks"),
+            )
+
+        return Result()
+
+
+@pytest.fixture
+def agent(test_db, monkeypatch):
+    monkeypatch.setattr(test_db, "get_api_key", DummyDB().get_api_key)
+    monkeypatch.setattr(tp_module, "Agent", SlowAgent)
+    SlowAgent.running, SlowAgent.peak, SlowAgent.models, SlowAgent.fail = {}, {}, [], False
+    SlowAgent.delay = 0.01
+    return SlowAgent
+
+
+async def store_meetings(db, count, model="openai", model_name="gpt-old", prefix="meeting"):
+    ids = [f"{prefix}-{n:03d}" for n in range(count)]
+    for meeting_id in ids:
+        text = f"[00:00:01] Speaker 1: {meeting_id} agreed the plan"
+        await db.save_transcript(meeting_id, text, model, model_name, 5000, 1000)
+        await db.create_process(meeting_id)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_resumes_after_the_checkpoint_with_the_new_model(test_db, agent, tmp_path):
+    ids = await store_meetings(test_db, 7)
+    path = str(tmp_path / "checkpoint.json")
+    reports = []
+
+    first = await resummarize(path, "openai", "gpt-new", page_size=2, limit=3, on_progress=reports.append)
+    assert (first.total, first.completed) == (3, 3)
+    checkpoint = ResummarizeCheckpoint.load(path)
+    assert checkpoint.after == ids[2] and checkpoint.completed == 3
+    assert reports and "3/3 meetings" in reports[-1].format()
+
+    second = await resummarize(path, "openai", "gpt-new", page_size=2)
+    assert (second.total, second.completed) == (4, 4)
+    assert len(agent.models) == 7
+    assert ResummarizeCheckpoint.load(path).after == ids[-1]
+    for meeting_id in ids:
+        data = await test_db.get_transcript_data(meeting_id)
+        assert data["status"] == "completed" and data["model_name"] == "gpt-new"
+
+    # Nothing is left after the checkpoint
+    assert (await resummarize(path, "openai", "gpt-new")).total == 0
+    with pytest.raises(ValueError):
+        await resummarize(path, "claude", "claude-new")
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_per_provider(test_db, agent, tmp_path):
+    agent.delay = 0.05
+    await store_meetings(test_db, 6, "openai", "gpt-4o")
+    await store_meetings(test_db, 6, "groq", "llama3", prefix="other")
+
+    progress = await resummarize(str(tmp_path / "checkpoint.json"), concurrency=5,
+                                 provider_limits={"openai": 2}, page_size=4)
+    assert progress.completed == 12
+    assert agent.peak["openai:gpt-4o"] == 2
+    assert 2 < agent.peak["groq:llama3"] <= 5
+
+
+@pytest.mark.asyncio
+async def test_busy_and_failed_meetings_are_recorded(test_db, agent, tmp_path):
+    ids = await store_meetings(test_db, 3)
+    await state_store.acquire_lease(f"summary:{ids[1]}", "api-worker", 30)
+    agent.fail = True
+    path = str(tmp_path / "checkpoint.json")
+    try:
+        progress = await resummarize(path)
+    finally:
+        await state_store.release_lease(f"summary:{ids[1]}", "api-worker")
+
+    assert (progress.failed, progress.skipped, progress.completed) == (2, 1, 0)
+    checkpoint = ResummarizeCheckpoint.load(path)
+    assert checkpoint.skipped == [ids[1]] and sorted(checkpoint.failed) == [ids[0], ids[2]]
+    assert checkpoint.after == ids[2]
+
+
+@pytest.mark.asyncio
+async def test_transcripts_are_read_only_when_their_summary_starts(test_db, agent, tmp_path, monkeypatch):
+    agent.delay = 0.02
+    await store_meetings(test_db, 10)
+    assert "transcript_text" not in (await test_db.get_transcript_page(None, 10))[0]
+
+    get_stored_transcript = test_db.get_stored_transcript
+    read, peak = [0], [0]
+
+    async def counting_read(meeting_id):
+        read[0] += 1
+        finished = len(agent.models) - agent.running.get("openai:gpt-old", 0)
+        peak[0] = max(peak[0], read[0] - finished)
+        return await get_stored_transcript(meeting_id)
+
+    monkeypatch.setattr(test_db, "get_stored_transcript", counting_read)
+    progress = await resummarize(str(tmp_path / "checkpoint.json"), concurrency=2, page_size=50)
+    assert progress.completed == 10 and read[0] == 10
+    # Every meeting of the page was scheduled at once, but at most two transcripts were loaded
+    assert peak[0] <= 2
@@ -0,0 +1,86 @@
+import json
+import random
+import time
+
+from app.summary_merge import dedupe_blocks, merge_chunk_summaries
+
+
+def _chunk(name, **sections):
+    data = {"MeetingName": name}
+    for key, contents in sections.items():
+        data[key] = {
+            "title": key,
+            "blocks": [{"id": str(i), "type": "bullet", "content": c, "color": "gray"} for i, c in enumerate(contents)],
+        }
+    return json.dumps(data)
+
+
+def test_merge_dedupes_overlapping_chunks():
+    chunks = [
+        _chunk("Weekly Sync", ImmediateActionItems=["Alice will send the revised budget to finance by Friday"]),
+        _chunk("", ImmediateActionItems=[
+            "Alice will send the revised budget to Finance by Friday.",
+            "Bob schedules the design review for next week",
+        ]),
+        "not json",
+    ]
+    stats = {}
+    summary = merge_chunk_summaries(chunks, label="p1", stats=stats)
+
+    contents = [b["content"] for b in summary["ImmediateActionItems"]["blocks"]]
+    assert contents == [
+        "Alice will send the revised budget to Finance by Friday.",
+        "Bob schedules the design review for next week",
+    ]
+    assert summary["MeetingName"] == "Weekly Sync"
+    assert summary["NextSteps"] == {"title": "Next Steps", "blocks": []}
+    assert stats["dedup"] == {"blocks_before": 3, "blocks_after": 2}
+
+
+def test_merge_without_dedupe_keeps_every_block():
+    chunks = [_chunk("M", NextSteps=["Ship it"]), _chunk("M", NextSteps=["Ship it"])]
+    summary = merge_chunk_summaries(chunks, dedupe=False)
+    assert len(summary["NextSteps"]["blocks"]) == 2
+
+
+def test_merge_keeps_near_misses_and_blocks_of_one_chunk():
+    near_misses = [
+        ("Carol will send the quarterly report to the board by Friday",
+         "Carol will send the quarterly report to the board by Monday"),
+        ("Finance completes the vendor audit by March 3", "Finance completes the vendor audit by March 30"),
+        ("Do not deploy the payment service on Friday", "Deploy the payment service on Friday"),
+    ]
+    for first, second in near_misses:
+        summary = merge_chunk_summaries([_chunk("M", NextSteps=[first]), _chunk("M", NextSteps=[second])])
+        assert [b["content"] for b in summary["NextSteps"]["blocks"]] == [first, second]
+
+    # Repeats within one chunk, or between chunks that do not overlap, are what the LLM said
+    repeated = "Alice will send the revised budget to finance by Friday"
+    summary = merge_chunk_summaries([
+        _chunk("M", NextSteps=[repeated, repeated + "."]),
+        _chunk("M", NextSteps=["Unrelated"]),
+        _chunk("M", NextSteps=[repeated]),
+    ])
+    assert len(summary["NextSteps"]["blocks"]) == 4
+
+
+def test_dedupe_keeps_distinct_blocks_and_scales_linearly():
+    rng = random.Random(7)
+    words = [f"w{n}" for n in range(5000)]
+
+    def make(count):
+        blocks = [{"content": " ".join(rng.choice(words) for _ in range(12))} for _ in range(count)]
+        return blocks + [dict(b) for b in blocks[: count // 4]]
+
+    small_input, large_input = make(1000), make(4000)
+    start = time.perf_counter()
+    small = dedupe_blocks(small_input)
+    small_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    result = dedupe_blocks(large_input)
+    large_elapsed = time.perf_counter() - start
+
+    assert len(small) == 1000
+    assert len(result) == 4000
+    # 4x the input should not cost anywhere near 16x (quadratic) the time
+    assert large_elapsed < small_elapsed * 10 + 0.5
@@ -0,0 +1,122 @@
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+import app.transcript_processor as tp_module
+from app.summary_stream import PartialSummary, SummaryBroadcaster, SummaryStreamParser
+from app.transcript_processor import Block, Section, SummaryResponse, TranscriptProcessor
+
+
+def _summary(name="Streamed Meeting"):
+    def section(title, blocks=()):
+        return Section(title=title, blocks=list(blocks))
+
+    return SummaryResponse(
+        MeetingName=name,
+        SectionSummary=section("Section Summary", [Block(id="1", type="text", content="Intro {with} \"quotes\"", color="gray")]),
+        CriticalDeadlines=section("Critical Deadlines"),
+        KeyItemsDecisions=section("Key Items & Decisions", [Block(id="2", type="bullet", content="Ship it", color="green")]),
+        ImmediateActionItems=section("Immediate Action Items"),
+        NextSteps=section("Next Steps"),
+        OtherImportantPoints=section("Other Important Points"),
+        ClosingRemarks=section("Closing Remarks"),
+    )
+
+
+def test_parser_emits_blocks_as_they_close():
+    raw = _summary().model_dump_json()
+    parser = SummaryStreamParser()
+    events = []
+    for ch in raw:
+        events.extend(parser.feed(ch))
+
+    assert events[0] == {"type": "meeting_name", "value": "Streamed Meeting"}
+    blocks = [e for e in events if e["type"] == "block"]
+    assert [(e["section"], e["block"]["id"]) for e in blocks] == [
+        ("SectionSummary", "1"),
+        ("KeyItemsDecisions", "2"),
+    ]
+    assert blocks[0]["block"]["content"] == 'Intro {with} "quotes"'
+
+
+def test_partial_summary_replaces_provisional_blocks():
+    partial = PartialSummary()
+    partial.apply({"type": "block", "chunk": 0, "section": "NextSteps", "block": {"id": "a"}})
+    partial.apply({"type": "block", "chunk": 0, "section": "NextSteps", "block": {"id": "a"}})
+    assert len(partial.snapshot()["NextSteps"]["blocks"]) == 2
+
+    partial.apply({"type": "chunk_complete", "chunk": 0, "summary": _summary().model_dump_json()})
+    snapshot = partial.snapshot()
+    assert snapshot["MeetingName"] == "Streamed Meeting"
+    assert snapshot["NextSteps"]["blocks"] == []
+    assert [b["id"] for b in snapshot["KeyItemsDecisions"]["blocks"]] == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_drops_oldest_when_full():
+    broadcaster = SummaryBroadcaster(max_queue_size=2)
+    async with broadcaster.subscribe("m1") as queue:
+        for i in range(3):
+            broadcaster.publish("m1", {"type": "block", "n": i})
+        assert [queue.get_nowait()["n"] for _ in range(2)] == [1, 2]
+    assert broadcaster.subscriber_count("m1") == 0
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "key"
+
+
+class StreamingAgent:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @asynccontextmanager
+    async def run_stream(self, prompt):
+        raw = _summary().model_dump_json()
+
+        class Part:
+            def __init__(self, text):
+                self.text = text
+
+            def args_as_json_str(self):
+                return self.text
+
+        class Message:
+            def __init__(self, text):
+                self.parts = [Part(text)]
+
+        class Result:
+            async def stream_structured(self, debounce_by=None):
+                for end in range(0, len(raw), 16):
+                    yield Message(raw[:end + 16]), end + 16 >= len(raw)
+
+            async def validate_structured_result(self, message):
+                return SummaryResponse.model_validate_json(message.parts[0].text)
+
+        yield Result()
+
+    async def run(self, prompt):
+        raise AssertionError("streaming mode should not fall back to run()")
+
+
+@pytest.mark.asyncio
+async def test_process_transcript_streaming(monkeypatch):
+    monkeypatch.setattr(tp_module, "Agent", StreamingAgent)
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    processor = TranscriptProcessor(DummyDB())
+    num_chunks, data = await processor.process_transcript(
+        "hello world", "openai", "gpt-test", 10, 0, on_event=on_event
+    )
+
+    assert num_chunks == 2
+    assert [e["type"] for e in events].count("chunk_complete") == 2
+    first_block = next(i for i, e in enumerate(events) if e["type"] == "block")
+    first_complete = next(i for i, e in enumerate(events) if e["type"] == "chunk_complete")
+    assert first_block < first_complete
+    assert json.loads(data[0])["MeetingName"] == "Streamed Meeting"
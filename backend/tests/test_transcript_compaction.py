@@ -0,0 +1,165 @@
+import json
+
+import pytest
+
+import app.transcript_processor as tp_module
+from app.transcript_compaction import (
+    carry_over_summary,
+    compact_transcript,
+    iter_chunks,
+    prepare_chunks,
+    raw_chunk_tokens,
+    split_chunks,
+)
+from app.transcript_processor import Section, SummaryResponse, TranscriptProcessor
+
+
+def test_compact_transcript_strips_noise():
+    raw = (
+        "[00:00:01.000 --> 00:00:04.000]  Alice:  Um, so  so we need to, uh, ship   on Friday.\n"
+        "[00:00:01.000 --> 00:00:04.000] Alice: [BLANK_AUDIO]\n"
+        "[00:00:05.000 --> 00:00:07.000] Alice: And I I will write the notes.\n"
+        "[00:00:08.000 --> 00:00:09.000] Bob: Hmm. Sounds good.\n"
+    )
+    assert compact_transcript(raw) == (
+        "[00:00:01.000] Alice: so so we need to, ship on Friday.\n"
+        "[00:00:05.000] And I will write the notes.\n"
+        "[00:00:08.000] Bob: Sounds good."
+    )
+
+
+def test_compact_transcript_keeps_words_containing_fillers():
+    assert compact_transcript("The umbrella hummed, ahead of summer.") == "The umbrella hummed, ahead of summer."
+
+
+def test_compact_transcript_keeps_capitalized_words_and_deliberate_repeats():
+    raw = (
+        "[00:00:01] Alice: The ER, er, was full. Um, we moved to the HMM model.\n"
+        "[00:00:02] Bob: No no, so so results. Go go go! I I agree, uh, to to a point.\n"
+    )
+    assert compact_transcript(raw) == (
+        "[00:00:01] Alice: The ER, was full. we moved to the HMM model.\n"
+        "[00:00:02] Bob: No no, so so results. Go go go! I agree, to a point."
+    )
+
+
+def test_compact_transcript_keeps_repeated_words_and_note_labels():
+    raw = (
+        "[00:00:01] Alice: I think that that is fine, we had had this before.\n"
+        "[00:00:02] Note: the the budget is frozen.\n"
+        "[00:00:03] Alice: Action items: send the notes.\n"
+        "[00:00:04] Action Items: Bob reviews the draft.\n"
+        "[00:00:05] SPEAKER_01: Agreed.\n"
+    )
+    assert compact_transcript(raw) == (
+        "[00:00:01] Alice: I think that that is fine, we had had this before.\n"
+        "[00:00:02] Note: the budget is frozen.\n"
+        "[00:00:03] Alice: Action items: send the notes.\n"
+        "[00:00:04] Action Items: Bob reviews the draft.\n"
+        "[00:00:05] SPEAKER_01: Agreed."
+    )
+
+
+def test_split_chunks_prefers_word_boundaries():
+    text = "alpha beta gamma delta epsilon"
+    chunks = split_chunks(text, 12)
+    assert "".join(chunks) == text
+    assert chunks[0] == "alpha beta "
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_iter_chunks_matches_prepare_chunks(compact):
+    text = "\r\n".join(f"[00:00:{i % 60:02d}] Speaker {i % 3}: um, point {i} is is settled" for i in range(300))
+    pieces = [text[i:i + 37] for i in range(0, len(text), 37)]
+
+    source, spans = prepare_chunks(text, 700, 150, compact)
+    assert list(iter_chunks(pieces, 700, 150, compact)) == [source[start:end] for start, end in spans]
+
+
+def test_carry_over_uses_previous_result_and_falls_back_to_tail():
+    summary = {
+        "MeetingName": "Planning",
+        "KeyItemsDecisions": {"title": "Key Items & Decisions", "blocks": [{"content": "Launch moved to May"}]},
+    }
+    note = carry_over_summary(json.dumps(summary), "ignored", 200)
+    assert note == "Meeting: Planning\n- Launch moved to May"
+    assert carry_over_summary(None, "the quick brown fox jumps", 10) == "fox jumps"
+
+
+class DummyDB:
+    async def get_api_key(self, provider):
+        return "key"
+
+
+class RecordingAgent:
+    prompts = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def run(self, prompt):
+        RecordingAgent.prompts.append(prompt)
+        result = SummaryResponse(
+            MeetingName="Compact Meeting",
+            SectionSummary=Section(title="Section Summary", blocks=[]),
+            CriticalDeadlines=Section(title="Critical Deadlines", blocks=[]),
+            KeyItemsDecisions=Section(title="Key Items & Decisions", blocks=[]),
+            ImmediateActionItems=Section(title="Immediate Action Items", blocks=[]),
+            NextSteps=Section(title="Next Steps", blocks=[]),
+            OtherImportantPoints=Section(title="Other Important Points", blocks=[]),
+            ClosingRemarks=Section(title="Closing Remarks", blocks=[]),
+        )
+
+        class R:
+            data = result
+
+        return R()
+
+
+@pytest.mark.asyncio
+async def test_process_transcript_reports_tokens_saved(monkeypatch):
+    monkeypatch.setattr(tp_module, "Agent", RecordingAgent)
+    RecordingAgent.prompts = []
+    text = "\n".join(f"[00:00:{i % 60:02d}] Speaker 1: um, uh, item number {i} is is done" for i in range(200))
+
+    job_stats = {}
+    num_chunks, data = await TranscriptProcessor(DummyDB()).process_transcript(
+        text, "openai", "gpt-test", chunk_size=1000, overlap=300, job_stats=job_stats
+    )
+
+    stats = job_stats["compaction"]
+    assert stats["chunks"] == num_chunks == len(data)
+    assert stats["raw_tokens"] == raw_chunk_tokens(text, 1000, 300)
+    assert stats["tokens_saved"] > stats["raw_tokens"] // 3
+    assert "um," not in RecordingAgent.prompts[0]
+    assert "Meeting: Compact Meeting" in RecordingAgent.prompts[1]
+
+
+class PiecewiseText:
+    """Stands in for an uploaded transcript: only readable in pieces."""
+
+    def __init__(self, text, piece_size):
+        self.text = text
+        self.size = len(text)
+        self.piece_size = piece_size
+
+    def iter_text(self):
+        for i in range(0, len(self.text), self.piece_size):
+            yield self.text[i:i + self.piece_size]
+
+
+@pytest.mark.asyncio
+async def test_process_transcript_reads_piecewise_text_lazily(monkeypatch):
+    monkeypatch.setattr(tp_module, "Agent", RecordingAgent)
+    text = "\n".join(f"[00:00:{i % 60:02d}] Speaker {i % 2}: uh, item number {i} is done" for i in range(200))
+
+    results = []
+    for source in (text, PiecewiseText(text, 333)):
+        RecordingAgent.prompts = []
+        job_stats = {}
+        num_chunks, data = await TranscriptProcessor(DummyDB()).process_transcript(
+            source, "openai", "gpt-test", chunk_size=1000, overlap=300, job_stats=job_stats
+        )
+        results.append((num_chunks, data, list(RecordingAgent.prompts), job_stats["compaction"]))
+
+    assert results[0] == results[1]
@@ -28,9 +28,8 @@ class DummyAgent:
 
 @pytest.mark.asyncio
 async def test_process_transcript(monkeypatch):
-    monkeypatch.setattr(tp_module, "db", DummyDB())
     monkeypatch.setattr(tp_module, "Agent", DummyAgent)
-    processor = TranscriptProcessor()
+    processor = TranscriptProcessor(DummyDB())
     num_chunks, data = await processor.process_transcript("hello world", "openai", "gpt-test", 10, 0)
     assert num_chunks == 2
     assert len(data) == 2
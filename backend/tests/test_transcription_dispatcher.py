@@ -0,0 +1,90 @@
+import time
+import wave
+
+import pytest
+
+from app.audio_stream import AudioFrame, TranscriptSegment
+from app.transcription_dispatcher import (
+    ProcessPoolBackend,
+    TranscriptionDispatcher,
+    WhisperServerBackend,
+    plan_pieces,
+    stitch,
+)
+from app.vad import SpeechRegion
+from benchmarks.fake_whisper import FakeWhisperServer, synthetic_speech, transcribe_wav
+
+# Twelve phrases of 8 words (4.7s of speech and pause each), then one 60-word phrase without a pause
+PHRASES = [[(p * 8 + i) % 100 for i in range(8)] for p in range(12)] + [[i % 100 for i in range(60)]]
+
+
+def expected_text(phrases):
+    return " ".join(f"w{n}" for phrase in phrases for n in phrase)
+
+
+def test_plan_pieces_cuts_at_silences_and_overlaps_long_speech():
+    regions = [SpeechRegion(0, 6), SpeechRegion(8, 12), SpeechRegion(30, 34), SpeechRegion(40, 75)]
+    pieces = plan_pieces(regions, target_seconds=10, max_seconds=15, overlap_seconds=1)
+    # The first two regions are one piece; the silence before 30 and 40 is not transcribed;
+    # the 35s region is cut every 10s with half a second of audio on each side
+    assert pieces == [(0, 12), (30, 34), (40, 50.5), (49.5, 60.5), (59.5, 75)]
+
+
+def test_stitch_drops_repeated_words_at_an_overlapping_seam():
+    first = AudioFrame(index=0, start=0.0, duration=10.5, data=b"")
+    second = AudioFrame(index=1, start=9.5, duration=10.0, data=b"")
+    stitched = stitch([
+        (first, [TranscriptSegment(0, 6, "we agreed to ship"), TranscriptSegment(6, 10.5, "the release on Friday")]),
+        (second, [TranscriptSegment(0, 0.5, "Friday"), TranscriptSegment(0, 3, "release on Friday, then"),
+                  TranscriptSegment(3, 6, "review the numbers")]),
+    ])
+    assert " ".join(segment.text for segment in stitched) == "we agreed to ship the release on Friday then review the numbers"
+    assert stitched[2].start == pytest.approx(10.5)
+    assert stitched[3].start == pytest.approx(12.5)
+
+
+@pytest.mark.asyncio
+async def test_whisper_servers_transcribe_in_parallel_and_stitch_in_order():
+    pcm, timings = synthetic_speech(PHRASES)
+    dispatcher_args = dict(target_seconds=10, max_seconds=15, overlap_seconds=1.0)
+    with FakeWhisperServer(realtime_factor=0.02) as a, FakeWhisperServer(realtime_factor=0.02) as b, \
+            FakeWhisperServer(realtime_factor=0.02) as c:
+        single = TranscriptionDispatcher(WhisperServerBackend([a.url]), **dispatcher_args)
+        one = await single.transcribe(pcm)
+        await single.backend.aclose()
+
+        parallel = TranscriptionDispatcher(WhisperServerBackend([a.url, b.url, c.url]), **dispatcher_args)
+        three = await parallel.transcribe(pcm)
+        await parallel.backend.aclose()
+
+        assert b.requests > 0 and c.requests > 0
+
+    assert one.text == three.text == expected_text(PHRASES)
+    assert three.pieces >= 6
+    # The pauses between pieces are not sent to whisper
+    assert three.transcribed_seconds < three.duration - 5
+    assert three.elapsed < one.elapsed * 0.6
+    # Timestamps point into the whole recording
+    starts = [segment.start for segment in three.segments]
+    assert starts == sorted(starts)
+    last_word_start = timings[-1][0]
+    assert three.segments[-1].end == pytest.approx(timings[-1][1], abs=0.05)
+    assert three.segments[-1].start <= last_word_start
+
+
+def test_process_pool_backend_and_blocking_transcriber(tmp_path):
+    phrases = PHRASES[:4] + PHRASES[-1:]
+    pcm, _ = synthetic_speech(phrases)
+    path = tmp_path / "meeting.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(pcm)
+
+    backend = ProcessPoolBackend(transcribe_wav, workers=2)
+    try:
+        dispatcher = TranscriptionDispatcher(backend, target_seconds=10, max_seconds=15, overlap_seconds=1.0)
+        assert dispatcher.transcribe_file(str(path)) == expected_text(phrases)
+    finally:
+        backend.shutdown()
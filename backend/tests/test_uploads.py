@@ -0,0 +1,136 @@
+import hashlib
+
+import pytest
+
+import transcript_processor
+import upload_store
+from benchmarks.fake_llm import FakeLLM, LatencyDistribution
+from benchmarks.transcripts import synthetic_transcript
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store.upload_store, "root", str(tmp_path / "uploads"))
+    return tmp_path / "uploads"
+
+
+def _put(client, upload_id, data, start, size, **headers):
+    return client.put(
+        f"/uploads/{upload_id}/parts",
+        content=data[start:start + size],
+        headers={"Content-Range": f"bytes {start}-{start + size - 1}/{len(data)}", **headers},
+    )
+
+
+@pytest.mark.asyncio
+async def test_upload_resumes_and_verifies_hashes(client, test_db, uploads_dir):
+    # "é" is two bytes, so some parts end in the middle of a character
+    data = ("Alice: café on Friday, é é é\n" * 400).encode("utf-8")
+    response = client.post("/uploads", json={"size": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+    assert response.status_code == 200
+    upload_id = response.json()["upload_id"]
+
+    part = 4001
+    offsets = list(range(0, len(data), part))
+    # Parts may arrive in any order; the first attempt at the last part is corrupted
+    for start in reversed(offsets[1:]):
+        size = min(part, len(data) - start)
+        assert _put(client, upload_id, data, start, size).status_code == 200
+    bad = _put(client, upload_id, data, 0, part, **{"X-Content-SHA256": "0" * 64})
+    assert bad.status_code == 400
+
+    status = client.get(f"/uploads/{upload_id}").json()
+    assert status["missing"] == [{"start": 0, "end": part - 1}]
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 400
+
+    # Resume: only the missing range is sent again; a resend of a stored part replaces it
+    ok = _put(client, upload_id, data, 0, part, **{"X-Content-SHA256": hashlib.sha256(data[:part]).hexdigest()})
+    assert ok.status_code == 200
+    assert _put(client, upload_id, data, part, part).status_code == 200
+    assert _put(client, upload_id, data, 10, 10).status_code == 409
+
+    response = client.post(f"/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+    assert response.json()["status"] == "complete"
+    assert response.json()["received_bytes"] == len(data)
+    assert _put(client, upload_id, data, 0, part).status_code == 409
+
+    uploaded = await upload_store.open_transcript_upload(test_db, upload_id)
+    pieces = list(uploaded.iter_text(block_size=1000))
+    assert "".join(pieces) == data.decode("utf-8")
+    assert max(len(piece) for piece in pieces) <= 1000
+
+    assert client.delete(f"/uploads/{upload_id}").status_code == 200
+    assert not (uploads_dir / upload_id).exists()
+    assert client.get(f"/uploads/{upload_id}").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_bad_ranges_and_hash(client, uploads_dir):
+    data = b"x" * 100
+    upload_id = client.post("/uploads", json={"size": 100, "sha256": "f" * 64}).json()["upload_id"]
+
+    assert client.put(f"/uploads/{upload_id}/parts", content=data,
+                      headers={"Content-Range": "items 0-99/100"}).status_code == 400
+    assert _put(client, upload_id, data + b"y", 0, 101).status_code == 416
+    short = client.put(f"/uploads/{upload_id}/parts", content=data[:50],
+                       headers={"Content-Range": "bytes 0-99/100"})
+    assert short.status_code == 400
+    assert list(uploads_dir.glob(f"{upload_id}/*")) == []
+
+    assert _put(client, upload_id, data, 0, 100).status_code == 200
+    response = client.post(f"/uploads/{upload_id}/complete")
+    assert response.status_code == 400
+    assert "SHA-256" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_resent_part_with_bad_hash_keeps_the_stored_bytes(client, test_db, uploads_dir):
+    data = b"0123456789" * 20
+    upload_id = client.post("/uploads", json={"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+                            ).json()["upload_id"]
+    assert _put(client, upload_id, data, 0, 100).status_code == 200
+    assert _put(client, upload_id, data, 100, 100).status_code == 200
+
+    corrupt = b"X" * 50 + data[50:]
+    bad = _put(client, upload_id, corrupt, 0, 100, **{"X-Content-SHA256": hashlib.sha256(data[:100]).hexdigest()})
+    assert bad.status_code == 400
+    assert (uploads_dir / upload_id / f"{0:020d}.part").read_bytes() == data[:100]
+    assert [path.name for path in (uploads_dir / upload_id).iterdir() if path.name.endswith(".tmp")] == []
+
+    response = client.post(f"/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+    uploaded = await upload_store.open_transcript_upload(test_db, upload_id)
+    assert "".join(uploaded.iter_text()) == data.decode()
+
+
+@pytest.mark.asyncio
+async def test_summary_from_upload_matches_inline_text(client, test_db, uploads_dir, monkeypatch):
+    await test_db.save_model_config("openai", "fake-model", "base")
+    await test_db.save_api_key("test-key", "openai")
+    monkeypatch.setattr(transcript_processor, "Agent", FakeLLM(latency=LatencyDistribution.parse("fixed:0")))
+
+    text = synthetic_transcript(30_000, seed=3)
+    data = text.encode("utf-8")
+    upload_id = client.post("/uploads", json={"size": len(data)}).json()["upload_id"]
+    for start in range(0, len(data), 8192):
+        assert _put(client, upload_id, data, start, min(8192, len(data) - start)).status_code == 200
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 200
+
+    settings = {"model": "openai", "model_name": "fake-model", "chunk_size": 2000, "overlap": 300}
+    results = {}
+    for meeting_id, source in (("m-inline", {"text": text}), ("m-upload", {"upload_id": upload_id})):
+        await test_db.save_meeting(meeting_id, meeting_id)
+        response = client.post(f"/meetings/{meeting_id}/summary", json={**settings, **source})
+        assert response.status_code == 200
+        summary = client.get(f"/meetings/{meeting_id}/summary")
+        assert summary.status_code == 200
+        results[meeting_id] = summary.json()["data"]
+
+    assert results["m-upload"] == results["m-inline"]
+    stored = await test_db.get_transcript_data("m-upload")
+    assert stored["transcript_text"] == ""
+    assert stored["upload_id"] == upload_id
+
+    assert client.post("/meetings/m-upload/summary", json={**settings, "upload_id": "missing"}).status_code == 404
+    assert client.post("/meetings/m-upload/summary", json=settings).status_code == 422
@@ -0,0 +1,140 @@
+import asyncio
+import wave
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from app.audio_stream import AudioFrame
+from app.meeting_bot import MeetingBot
+from app.vad import NoiseFloor, SpeechRegion, TimestampMap, VoiceActivityDetector
+
+RATE = 16000
+
+
+def synthetic_meeting(layout, seed=0):
+    """16-bit PCM of ``(seconds, kind)`` pieces: "speech", "steady" (speech without
+    pauses or syllable rhythm), "hiss" (fricative-like) or "silence"."""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    for seconds, kind in layout:
+        n = int(seconds * RATE)
+        t = np.arange(n) / RATE
+        # Room noise under everything
+        signal = rng.normal(0, 0.002, n)
+        if kind == "speech":
+            # Voiced harmonics with a syllable-rate envelope
+            envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+            signal += envelope * sum(0.15 / k * np.sin(2 * np.pi * 140 * k * t) for k in range(1, 6))
+        elif kind == "steady":
+            signal += sum(0.15 / k * np.sin(2 * np.pi * 140 * k * t) for k in range(1, 6))
+        elif kind == "hiss":
+            signal += rng.normal(0, 0.02, n)
+        pieces.append(signal)
+    return (np.clip(np.concatenate(pieces), -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+LAYOUT = [(1.0, "silence"), (2.0, "speech"), (3.0, "silence"), (0.5, "hiss"), (1.5, "speech"), (2.0, "silence")]
+
+
+def test_detects_speech_regions_and_skipped_fraction():
+    vad = VoiceActivityDetector(padding=0.1)
+    trimmed = vad.trim(synthetic_meeting(LAYOUT), RATE)
+
+    regions = [(round(region.start, 1), round(region.end, 1)) for region in trimmed.regions]
+    # The hiss and the following speech are one region; padding widens each by 0.1s
+    assert regions == [(0.9, 3.1), (5.9, 8.1)]
+    assert trimmed.duration == 10.0
+    assert trimmed.skipped_fraction == pytest.approx(0.56, abs=0.02)
+    assert len(trimmed.data) == round(trimmed.speech_duration * RATE) * 2
+
+
+def test_silence_only_and_empty_audio_have_no_speech():
+    vad = VoiceActivityDetector()
+    assert vad.detect(synthetic_meeting([(3.0, "silence")]), RATE) == []
+    assert vad.detect(b"", RATE) == []
+    assert vad.detect(bytes(RATE * 2), RATE) == []
+
+
+def test_timestamp_map_points_back_into_the_recording():
+    mapping = TimestampMap([SpeechRegion(1.0, 3.0), SpeechRegion(6.0, 8.0)])
+    assert mapping.trimmed_duration == 4.0
+    assert mapping.to_source(0.0) == 1.0
+    assert mapping.to_source(1.5) == 2.5
+    assert mapping.to_source(2.5) == 6.5
+    # A span ending at a region boundary ends in that region, not the next
+    assert mapping.span_to_source(0.5, 2.0) == (1.5, 3.0)
+    assert mapping.span_to_source(1.0, 3.5) == (2.0, 7.5)
+
+
+def test_trim_wav_writes_speech_only_file(tmp_path):
+    path = tmp_path / "meeting.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(synthetic_meeting(LAYOUT))
+
+    transcriber = mock.MagicMock(return_value="hello")
+    bot = MeetingBot(mock.MagicMock(), transcriber, vad=VoiceActivityDetector())
+    assert bot.handoff_for_transcription(str(path)) == "hello"
+
+    (speech_path,) = transcriber.call_args.args
+    with wave.open(speech_path, "rb") as wav:
+        assert wav.getnframes() / RATE == pytest.approx(bot.last_trim.speech_duration, abs=0.01)
+    assert bot.last_trim.skipped_fraction > 0.45
+
+
+@pytest.mark.asyncio
+async def test_streaming_skips_silent_frames_and_keeps_meeting_timestamps():
+    pcm = synthetic_meeting([(4.0, "silence"), (1.0, "speech"), (5.0, "silence"), (1.0, "speech"), (1.0, "silence")])
+    transcribed = []
+
+    async def transcribe(frame):
+        transcribed.append(frame.duration)
+        return f"speech at {frame.start:.1f}"
+
+    async def source():
+        for start in range(0, len(pcm), 3200):
+            await asyncio.sleep(0)
+            yield pcm[start:start + 3200]
+
+    bot = MeetingBot(mock.MagicMock(), None, frame_transcriber=transcribe, vad=VoiceActivityDetector(padding=0.1))
+    result = await bot.stream_and_transcribe("m1", "token", source(), frame_seconds=3.0, sample_rate=RATE)
+
+    # Frames are [0,3) [3,6) [6,9) [9,12); the silent first and third are never transcribed
+    assert result.frames == 4 and result.silent_frames == 2
+    assert len(transcribed) == 2
+    assert [(round(s.start, 1), round(s.end, 1)) for s in result.segments] == [(3.9, 5.1), (9.9, 11.1)]
+    assert result.text == "speech at 3.9 speech at 9.9"
+    assert result.skipped_fraction == pytest.approx(1 - 2.4 / 12, abs=0.02)
+
+
+def test_trim_frame_returns_none_for_silence():
+    vad = VoiceActivityDetector()
+    frame = AudioFrame(index=0, start=10.0, duration=1.0, data=synthetic_meeting([(1.0, "silence")]))
+    speech, trimmed = vad.trim_frame(frame)
+    assert speech is None
+    assert trimmed.skipped_fraction == 1.0
+
+
+def test_frames_full_of_steady_speech_are_kept():
+    vad = VoiceActivityDetector()
+    pcm = synthetic_meeting([(5.0, "silence"), (10.0, "steady")])
+    frames = [AudioFrame(index=i, start=i * 5.0, duration=5.0, data=pcm[i * 5 * RATE * 2:(i + 1) * 5 * RATE * 2])
+              for i in range(3)]
+
+    # On its own, a frame with no quieter moment is its own noise floor
+    assert vad.trim_frame(frames[1])[0] is None
+
+    noise_floor = NoiseFloor()
+    fractions = [vad.trim_frame(frame, noise_floor)[1].skipped_fraction for frame in frames]
+    assert fractions[0] == 1.0
+    assert fractions[1] == pytest.approx(0.0) and fractions[2] == pytest.approx(0.0)
+
+
+def test_noise_floor_drops_at_once_and_rises_slowly():
+    floor = NoiseFloor(rise_db_per_second=0.1)
+    assert floor.update(-50.0, 5.0) == -50.0
+    assert floor.update(-20.0, 5.0) == pytest.approx(-49.5)
+    assert floor.update(-70.0, 5.0) == -70.0